@@ -0,0 +1,79 @@
+"""Benchmark of the dynamic EPLB placement policies on the host.
+
+The expert placement is generated by ``generate_layered_experts`` and the
+expert workload is random, no NPU is needed.
+
+Example:
+    python benchmarks/ops/ben_eplb_placement.py --num-layers 58 \
+        --num-ranks 32 --experts-per-rank 9 --num-experts 256
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from vllm_ascend.eplb.core.policy.policy_abstract import DynamicConfig
+from vllm_ascend.eplb.core.policy.policy_factory import PolicyFactory
+from vllm_ascend.eplb.core.policy.policy_flashlb import \
+    generate_layered_experts
+
+POLICY_NAMES = {1: "DynamicEplb", 2: "DynamicEplbV2", 3: "FlashLB"}
+
+
+def benchmark_policy(policy_type, placement, workload, num_iterations,
+                     num_warmup_iterations):
+    """Return the rebalance wall times in seconds and the last result."""
+    config = DynamicConfig()
+    config.ep_worldsize = placement.shape[1]
+    policy = PolicyFactory.generate_policy(policy_type, config)
+    times = np.zeros(num_iterations)
+    result = None
+    for i in range(num_warmup_iterations + num_iterations):
+        start = time.perf_counter()
+        result = policy.rebalance_experts(placement.clone(), workload.clone())
+        if i >= num_warmup_iterations:
+            times[i - num_warmup_iterations] = time.perf_counter() - start
+    return times, result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the EPLB placement policies.")
+    parser.add_argument("--num-layers", type=int, default=58)
+    parser.add_argument("--num-ranks", type=int, default=32)
+    parser.add_argument("--experts-per-rank", type=int, default=9)
+    parser.add_argument("--num-experts", type=int, default=256)
+    parser.add_argument("--policies",
+                        type=int,
+                        nargs="+",
+                        default=[1, 2],
+                        choices=sorted(POLICY_NAMES))
+    parser.add_argument("--num-iterations", type=int, default=5)
+    parser.add_argument("--num-warmup-iterations", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    placement = generate_layered_experts(num_layers=args.num_layers,
+                                         layer_shape=(args.num_ranks,
+                                                      args.experts_per_rank),
+                                         expert_max=args.num_experts - 1)
+    workload = torch.randint(1, 1000, placement.shape)
+    max_heat_before = workload.sum(dim=-1).max(dim=-1).values.sum().item()
+
+    print(f"placement shape: {tuple(placement.shape)}, "
+          f"sum of max rank load before: {max_heat_before}")
+    for policy_type in args.policies:
+        times, result = benchmark_policy(policy_type, placement, workload,
+                                         args.num_iterations,
+                                         args.num_warmup_iterations)
+        new_placement = torch.tensor(result[2])
+        print(f"{POLICY_NAMES[policy_type]:>14}: "
+              f"mean {times.mean() * 1000:.2f} ms, "
+              f"min {times.min() * 1000:.2f} ms, changed {result[0]}, "
+              f"new placement shape {tuple(new_placement.shape)}")
+
+
+if __name__ == "__main__":
+    main()
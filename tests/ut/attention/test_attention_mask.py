@@ -70,17 +70,15 @@ class TestAttentionMaskBuilder(TestBase):
         self.assertEqual(attention_mask_builder.attn_mask_cache[0][-1],
                          torch.tensor(float("-inf"), dtype=torch.float16))
 
-        # if the len is greater than max_seq_len, the attn_mask_cache will be updated
+        # if the len is greater than max_seq_len, the mask is built on the
+        # device, the attn_mask_cache is not updated
         attn_mask = attention_mask_builder.get_attn_mask(
             max_seq_len=2048, dtype=torch.float16, device=torch.device("cpu"))
         self.assertEqual(attn_mask.shape, (2048, 2048))
         self.assertEqual(attn_mask[0][-1],
                          torch.tensor(float("-inf"), dtype=torch.float16))
-        self.assertEqual(attention_mask_builder._seq_len_cached, 2048)
-        self.assertEqual(attention_mask_builder.attn_mask_cache.shape,
-                         (2048, 2048))
-        self.assertEqual(attention_mask_builder.attn_mask_cache[0][-1],
-                         torch.tensor(float("-inf"), dtype=torch.float16))
+        self.assertEqual(attn_mask[-1][-1], 0)
+        self.assertEqual(attention_mask_builder._seq_len_cached, 1024)
 
     def test_get_splitfuse_attn_mask(self):
         attention_mask_builder = AttentionMaskBuilder(max_seq_len=1024,
@@ -101,7 +99,11 @@ class TestAttentionMaskBuilder(TestBase):
             device=torch.device("cpu"),
         )
         self.assertEqual(attn_mask.shape, (5, 3000))
-        self.assertEqual(attention_mask_builder._seq_len_cached, 3000)
+        self.assertEqual(attn_mask[3][2999], 0)
+        self.assertEqual(attn_mask[4][2000],
+                         torch.tensor(float("-inf"), dtype=torch.float16))
+        # The rows are built from the positions, the host cache is not grown.
+        self.assertEqual(attention_mask_builder._seq_len_cached, 1024)
 
         # splitfuse_attn_mask now only supports data types: torch.float16 and torch.bfloat16
         # otherwise raise ValueError
@@ -113,6 +115,76 @@ class TestAttentionMaskBuilder(TestBase):
                 device=torch.device("cpu"),
             )
 
+    def test_device_mask(self):
+        attention_mask_builder = AttentionMaskBuilder(max_seq_len=1024,
+                                                      dtype=torch.float16)
+        device = torch.device("cpu")
+        attn_mask = attention_mask_builder.get_attn_mask(max_seq_len=100,
+                                                         dtype=torch.float16,
+                                                         device=device)
+        self.assertTrue(
+            torch.equal(attn_mask,
+                        attention_mask_builder.attn_mask_cache[:100, :100]))
+        device_mask = attention_mask_builder._device_masks[(device,
+                                                            torch.float16)]
+        self.assertIs(attn_mask, device_mask)
+
+        # Shorter masks are sliced from the device mask.
+        attn_mask = attention_mask_builder.get_attn_mask(max_seq_len=60,
+                                                         dtype=torch.float16,
+                                                         device=device)
+        self.assertEqual(attn_mask.shape, (60, 60))
+        self.assertTrue(attn_mask.is_contiguous())
+        self.assertTrue(
+            torch.equal(attn_mask,
+                        attention_mask_builder.attn_mask_cache[:60, :60]))
+        self.assertIs(
+            attention_mask_builder._device_masks[(device, torch.float16)],
+            device_mask)
+
+        # Longer ones grow it geometrically.
+        attn_mask = attention_mask_builder.get_attn_mask(max_seq_len=101,
+                                                         dtype=torch.float16,
+                                                         device=device)
+        self.assertTrue(
+            torch.equal(attn_mask,
+                        attention_mask_builder.attn_mask_cache[:101, :101]))
+        self.assertEqual(
+            attention_mask_builder._device_masks[(device,
+                                                  torch.float16)].shape,
+            (200, 200))
+
+    def test_device_mask_bounded_by_max_seq_len(self):
+        attention_mask_builder = AttentionMaskBuilder(max_seq_len=256,
+                                                      dtype=torch.float16)
+        device = torch.device("cpu")
+        for max_seq_len, capacity in ((200, 200), (201, 256), (300, 300),
+                                      (128, 300)):
+            attn_mask = attention_mask_builder.get_attn_mask(
+                max_seq_len=max_seq_len, dtype=torch.float16, device=device)
+            self.assertEqual(attn_mask.shape, (max_seq_len, max_seq_len))
+            self.assertEqual(
+                attention_mask_builder._device_masks[(device,
+                                                      torch.float16)].shape,
+                (capacity, capacity))
+        # A mask per dtype.
+        attn_mask = attention_mask_builder.get_attn_mask(max_seq_len=16,
+                                                         dtype=torch.bfloat16,
+                                                         device=device)
+        self.assertEqual(attn_mask.dtype, torch.bfloat16)
+        self.assertEqual(attn_mask[0][-1], 1)
+        self.assertEqual(len(attention_mask_builder._device_masks), 2)
+
+    def test_get_pooling_mask(self):
+        attention_mask_builder = AttentionMaskBuilder(max_seq_len=16,
+                                                      dtype=torch.float16)
+        pooling_mask = attention_mask_builder.get_pooling_mask("cpu")
+        self.assertEqual(pooling_mask.dtype, torch.bool)
+        self.assertTrue(pooling_mask[0][1])
+        self.assertFalse(pooling_mask[1][0])
+        self.assertIs(attention_mask_builder.get_pooling_mask("cpu"),
+                      pooling_mask)
+
     def test_mask_value_cleanliness(self):
         attention_mask_builder = AttentionMaskBuilder(max_seq_len=6,
                                                       dtype=torch.bfloat16)
@@ -173,6 +173,42 @@ class TestAscendAttentionMetadataBuilder(TestBase):
 
         self.builder.build(1, common_attn_metadata, mock_model)
 
+    @patch('vllm_ascend.attention.attention_v1.is_310p', return_value=False)
+    def test_build_derived_lengths(self, mock_is_310p):
+        builder = AscendAttentionMetadataBuilder(MagicMock(head_size=192),
+                                                 None, self.mock_vllm_config,
+                                                 self.mock_device)
+        common_attn_metadata = AscendCommonAttentionMetadata(
+            query_start_loc=torch.tensor([0, 1, 4, 8]),
+            query_start_loc_cpu=torch.tensor([0, 1, 4, 8]),
+            seq_lens_cpu=torch.tensor([9, 5, 6]),
+            num_reqs=3,
+            num_actual_tokens=8,
+            max_query_len=4,
+            decode_token_per_req=torch.tensor([1, 1, 1]),
+            block_table_tensor=torch.zeros((10, 10)),
+            slot_mapping=torch.tensor(range(20)),
+            actual_seq_lengths_q=torch.tensor([0, 1, 2]),
+            positions=torch.tensor([10, 10]),
+            attn_mask=torch.ones((15, 15)),
+            spec_attn_mask=None,
+            attn_state=AscendAttentionState.ChunkedPrefill,
+            num_computed_tokens_cpu=None,
+            seq_lens=None)
+
+        metadata = builder.build(1, common_attn_metadata, MagicMock())
+
+        self.assertEqual(metadata.max_seq_len, 9)
+        self.assertEqual(metadata.max_prefill_seq_len, 6)
+        self.assertEqual(metadata.cu_seqlen_q.tolist(), [0, 1, 4, 8])
+        self.assertEqual(metadata.cu_seqlen_k.tolist(), [0, 9, 14, 20])
+        self.assertEqual(metadata.actual_seq_lengths_q, [1, 4, 8])
+
+        common_attn_metadata.attn_state = AscendAttentionState.PrefillNoCache
+        metadata = builder.build(1, common_attn_metadata, MagicMock())
+        self.assertIsNone(metadata.cu_seqlen_q)
+        self.assertIsNone(metadata.cu_seqlen_k)
+
 
 class TestAscendAttentionBackendImpl(TestBase):
 
@@ -478,6 +478,8 @@ class TestAscendMLAImpl(TestBase):
         chunk_ctx = MagicMock()
         chunk_ctx.seq_tot = [8]
         chunk_ctx.chunk_seq_lens = [torch.tensor([8])]
+        chunk_ctx.chunk_seq_lens_npu = [torch.tensor([8])]
+        chunk_ctx.chunk_ring_seq_lens = [torch.tensor([[8], [8]])]
         chunk_ctx.starts = [torch.tensor([0])]
 
         prefill_meta = MagicMock()
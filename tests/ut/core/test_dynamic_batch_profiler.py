@@ -0,0 +1,97 @@
+#
+# Copyright (c) 2025 Huawei Technologies Co., Ltd. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import csv
+import os
+import tempfile
+
+from tests.ut.base import TestBase
+# yapf: disable
+from vllm_ascend.core.dynamic_batch_profiler import (PROFILE_TABLE_COLUMNS,
+                                                     LinearCostModel,
+                                                     TimedStepCostModel,
+                                                     load_cost_model, main,
+                                                     profile_dynamic_batch,
+                                                     write_profile_table)
+# yapf: enable
+from vllm_ascend.core.scheduler_dynamic_batch import BudgetRefiner
+
+
+class TestDynamicBatchProfiler(TestBase):
+
+    def test_profile_sweeps_full_grid(self):
+        calls = []
+
+        def cost_model(ctx_len, d_num, chunk_size):
+            calls.append((ctx_len, d_num, chunk_size))
+            return ctx_len + d_num + chunk_size
+
+        rows = profile_dynamic_batch(cost_model,
+                                     ctx_lens=[256, 128],
+                                     d_nums=[1, 2],
+                                     chunk_sizes=[0, 64, 64])
+        self.assertEqual(len(rows), 2 * 2 * 2)
+        self.assertEqual(rows[0], (128, 1, 0, 129.0))
+        self.assertEqual(len(calls), len(rows))
+
+    def test_timed_step_cost_model(self):
+        steps = []
+        syncs = []
+        model = TimedStepCostModel(lambda *args: steps.append(args),
+                                   synchronize=lambda: syncs.append(1),
+                                   num_warmup=1,
+                                   num_repeats=3)
+        cost = model(128, 4, 256)
+        self.assertGreaterEqual(cost, 0.0)
+        self.assertEqual(len(steps), 4)
+        self.assertEqual(len(syncs), 6)
+        with self.assertRaises(ValueError):
+            TimedStepCostModel(lambda *args: None, num_repeats=0)
+
+    def test_load_cost_model(self):
+        model = load_cost_model(
+            "vllm_ascend.core.dynamic_batch_profiler:LinearCostModel")
+        self.assertIsInstance(model, LinearCostModel)
+        with self.assertRaises(ValueError):
+            load_cost_model("vllm_ascend.core.dynamic_batch_profiler")
+
+    def test_table_is_readable_by_budget_refiner(self):
+        rows = profile_dynamic_batch(LinearCostModel(),
+                                     ctx_lens=[128, 1024],
+                                     d_nums=[1, 16],
+                                     chunk_sizes=[128, 512, 2048])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "profile_table.csv")
+            write_profile_table(rows, path)
+            with open(path) as f:
+                reader = csv.reader(f)
+                self.assertEqual(tuple(next(reader)), PROFILE_TABLE_COLUMNS)
+                self.assertEqual(len(list(reader)), len(rows))
+
+            refiner = BudgetRefiner(default_budget=8192,
+                                    slo_limit=20,
+                                    table_file_path=path)
+        self.assertTrue(refiner.enabled)
+        # cost(128, 1, 512) ~= 15.2 and cost(128, 1, 2048) ~= 30.5
+        self.assertEqual(refiner._get_max_budget(100, 1), 512)
+
+    def test_main_writes_table(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "table.csv")
+            main([
+                "--ctx-lens", "128,256", "--d-nums", "1", "--chunk-sizes",
+                "0,128", "--output", path
+            ])
+            with open(path) as f:
+                self.assertEqual(len(f.readlines()), 1 + 2 * 2)
@@ -131,3 +131,29 @@ class TestAscendSchedulerConfig(TestBase):
         )
         self.assertEqual(ascend_config.enable_pd_transfer, True)
         self.assertEqual(ascend_config.decode_max_num_seqs, 48)
+
+    def test_initialize_from_config_with_prefill_tokens_per_second(self):
+        ascend_config = AscendSchedulerConfig.initialize_from_config(
+            self.basic_scheduler_config, {})
+        self.assertEqual(ascend_config.prefill_tokens_per_second, 0)
+        ascend_config = AscendSchedulerConfig.initialize_from_config(
+            self.basic_scheduler_config,
+            AscendSchedulerConfig(
+                prefill_tokens_per_second=20000,
+                max_num_batched_tokens=4096,
+                max_model_len=4096,
+            ),
+        )
+        self.assertEqual(ascend_config.prefill_tokens_per_second, 20000)
+
+    def test_invalid_prefill_tokens_per_second(self):
+        with self.assertRaises(ValueError) as context:
+            AscendSchedulerConfig.initialize_from_config(
+                self.basic_scheduler_config,
+                AscendSchedulerConfig(
+                    prefill_tokens_per_second=-1,
+                    max_num_batched_tokens=4096,
+                    max_model_len=4096,
+                ),
+            )
+        self.assertIn("prefill_tokens_per_second", str(context.exception))
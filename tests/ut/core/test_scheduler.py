@@ -19,8 +19,11 @@ from vllm.v1.request import Request, RequestStatus
 from vllm.v1.structured_output import StructuredOutputManager
 
 from tests.ut.base import TestBase
+from vllm_ascend.core.dynamic_batch_profiler import DEFAULT_PROFILE_TABLE_PATH
 from vllm_ascend.core.scheduler import AscendScheduler
 from vllm_ascend.core.scheduler_dynamic_batch import SchedulerDynamicBatch
+from vllm_ascend.distributed.kv_tier_oracle import (KVTier, KVTierEstimate,
+                                                    KVTierOracle)
 from vllm_ascend.utils import vllm_version_is
 
 if vllm_version_is("0.11.0"):
@@ -264,6 +267,26 @@ class TestAscendScheduler(TestBase):
         for i, request in enumerate(requests):
             self.assertEqual(scheduler.running[i], request)
 
+    def test_schedule_skips_unknown_external_tokens(self):
+        scheduler = self.create_scheduler()
+        scheduler.connector = MagicMock()
+        scheduler.connector.get_num_new_matched_tokens.return_value = (None,
+                                                                       False)
+        requests = create_requests(num_requests=2)
+        for request in requests:
+            scheduler.add_request(request)
+
+        # The connector does not know the hits yet, the requests keep waiting.
+        output = scheduler.schedule()
+        self.assertEqual(len(output.scheduled_new_reqs), 0)
+        self.assertEqual(len(scheduler.waiting), len(requests))
+
+        scheduler.connector.get_num_new_matched_tokens.return_value = (0,
+                                                                       False)
+        output = scheduler.schedule()
+        self.assertEqual(len(output.scheduled_new_reqs), len(requests))
+        self.assertEqual(len(scheduler.running), len(requests))
+
     def test_schedule_multimodal_requests(self):
         scheduler = self.create_scheduler()
         scheduler.scheduler_config.chunked_prefill_enabled = False
@@ -823,6 +846,30 @@ class TestAscendScheduler(TestBase):
         scheduler.update_from_output(scheduler_output, model_runner_output)
         self.assertEqual(scheduler.phase, "decode")
 
+    def test_should_recompute_external_tokens(self):
+        scheduler = self.create_scheduler()
+        request = create_requests(num_requests=1)[0]
+        scheduler.connector = MagicMock(spec=KVTierOracle)
+        scheduler.connector.get_kv_tier_estimates.return_value = [
+            KVTierEstimate(KVTier.STORE, 100, 0.2)
+        ]
+        # Always load by default.
+        self.assertFalse(
+            scheduler._should_recompute_external_tokens(request, 100, False))
+
+        # Recomputing takes 0.1s.
+        scheduler.prefill_tokens_per_second = 1000
+        self.assertTrue(
+            scheduler._should_recompute_external_tokens(request, 100, False))
+        # Remote prefills are always loaded.
+        self.assertFalse(
+            scheduler._should_recompute_external_tokens(request, 100, True))
+
+        # Recomputing takes 1s.
+        scheduler.prefill_tokens_per_second = 100
+        self.assertFalse(
+            scheduler._should_recompute_external_tokens(request, 100, False))
+
 
 class TestSchedulerDynamicBatch(TestBase):
 
@@ -928,6 +975,22 @@ class TestSchedulerDynamicBatch(TestBase):
             self.assertIn(request.request_id, scheduler.requests)
             self.assertEqual(len(scheduler.waiting), i + 1)
 
+    @patch("vllm_ascend.core.scheduler_dynamic_batch.BudgetRefiner")
+    def test_profile_table_path(self, mock_budget_refiner):
+        self.create_scheduler()
+        self.assertEqual(
+            mock_budget_refiner.call_args.kwargs["table_file_path"],
+            DEFAULT_PROFILE_TABLE_PATH)
+
+        with patch.object(SchedulerConfig,
+                          "dynamic_batch_profile_table",
+                          "/path/to/profile_table.csv",
+                          create=True):
+            self.create_scheduler()
+        self.assertEqual(
+            mock_budget_refiner.call_args.kwargs["table_file_path"],
+            "/path/to/profile_table.csv")
+
     def test_finish_request(self):
         scheduler = self.create_scheduler()
         requests = create_requests(num_requests=10)
@@ -0,0 +1,149 @@
+#
+# Copyright (c) 2025 Huawei Technologies Co., Ltd. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import tempfile
+from unittest.mock import MagicMock, patch
+
+from tests.ut.base import TestBase
+from vllm_ascend.core.dynamic_batch_profiler import write_profile_table
+from vllm_ascend.core.scheduler_dynamic_batch import (BudgetRefiner,
+                                                      OnlineCostSurface)
+
+
+def _make_request(num_prompt_tokens, num_computed_tokens, num_tokens):
+    req = MagicMock()
+    req.num_prompt_tokens = num_prompt_tokens
+    req.num_computed_tokens = num_computed_tokens
+    req.num_tokens_with_spec = num_tokens
+    return req
+
+
+class TestOnlineCostSurface(TestBase):
+
+    def test_isotonic_fit(self):
+        surface = OnlineCostSurface()
+        for chunk_size, cost in [(128, 10), (256, 15), (512, 12), (1024, 40)]:
+            surface.add(chunk_size, cost)
+        chunks, costs = surface._fit()
+        self.assertEqual(chunks, [128, 256, 512, 1024])
+        self.assertEqual(costs, [10.0, 13.5, 13.5, 40.0])
+
+    def test_max_chunk_within(self):
+        surface = OnlineCostSurface()
+        self.assertIsNone(surface.max_chunk_within(20, 8192))
+        surface.add(512, 10)
+        surface.add(1024, 30)
+        # Interpolated between the two points.
+        self.assertEqual(surface.max_chunk_within(20, 8192), 768)
+        # Extrapolated beyond the last point and capped.
+        self.assertEqual(surface.max_chunk_within(50, 8192), 1536)
+        self.assertEqual(surface.max_chunk_within(50, 1200), 1200)
+        # Probe a smaller chunk when everything violates the SLO.
+        self.assertEqual(surface.max_chunk_within(5, 8192), 256)
+
+    def test_ema_follows_drift(self):
+        surface = OnlineCostSurface(ema_alpha=0.5)
+        surface.add(256, 10)
+        surface.add(256, 20)
+        self.assertEqual(surface.samples[256][0], 15)
+
+
+class TestBudgetRefiner(TestBase):
+
+    def _write_table(self, tmp_dir):
+        path = os.path.join(tmp_dir, "profile_table.csv")
+        write_profile_table([
+            (128, 1, 256, 10.0),
+            (128, 1, 512, 20.0),
+            (128, 4, 256, 30.0),
+            (512, 4, 256, 15.0),
+        ], path)
+        return path
+
+    def test_disabled(self):
+        refiner = BudgetRefiner(default_budget=1024, slo_limit=-1)
+        self.assertFalse(refiner.enabled)
+        self.assertEqual(refiner.refine_budget([], 1024), 1024)
+        refiner.on_step_scheduled(1024)
+        refiner.on_step_finished()
+
+    def test_missing_table_disables_dynamic_batch(self):
+        refiner = BudgetRefiner(default_budget=1024,
+                                slo_limit=20,
+                                table_file_path="/non/existent.csv")
+        self.assertFalse(refiner.enabled)
+
+    def test_align_key_with_bisect(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            refiner = BudgetRefiner(default_budget=1024,
+                                    slo_limit=20,
+                                    table_file_path=self._write_table(tmp_dir))
+        self.assertEqual(refiner.context_keys, [128, 512])
+        self.assertEqual(refiner.dnum_keys, [1, 4])
+        self.assertEqual(refiner._align_key(100, refiner.context_keys), 128)
+        self.assertEqual(refiner._align_key(512, refiner.context_keys), 512)
+        self.assertIsNone(refiner._align_key(513, refiner.context_keys))
+        self.assertEqual(refiner._get_max_budget(100, 1), 512)
+        self.assertEqual(refiner._get_max_budget(100, 1000), 1024)
+
+    def test_online_calibration_without_table(self):
+        refiner = BudgetRefiner(default_budget=1024,
+                                slo_limit=20,
+                                table_file_path="/non/existent.csv",
+                                online_calibration=True)
+        self.assertTrue(refiner.enabled)
+        running = [_make_request(10, 100, 100), _make_request(10, 10, 120)]
+        self.assertEqual(refiner.refine_budget(running, 1024), 1024)
+
+        with patch("vllm_ascend.core.scheduler_dynamic_batch.time."
+                   "perf_counter") as mock_perf_counter:
+            # A step of 1024 tokens takes 40ms which violates the SLO.
+            mock_perf_counter.side_effect = [0.0, 0.04]
+            refiner.on_step_scheduled(1024)
+            refiner.on_step_finished()
+        self.assertEqual(refiner.surfaces[(128, 2)].samples[1024][0], 40.0)
+        self.assertEqual(refiner.refine_budget(running, 1024), 512)
+
+    def test_online_calibration_seeded_by_table(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            refiner = BudgetRefiner(default_budget=1024,
+                                    slo_limit=20,
+                                    table_file_path=self._write_table(tmp_dir),
+                                    online_calibration=True)
+        self.assertEqual(refiner._get_max_budget(100, 1), 512)
+        # The bucket (128, 4) violates the SLO in the table, it is kept for
+        # online calibration.
+        self.assertEqual(refiner._get_max_budget(100, 4), 128)
+
+    def test_steps_without_decode_are_not_timed(self):
+        refiner = BudgetRefiner(default_budget=1024,
+                                slo_limit=20,
+                                table_file_path="/non/existent.csv",
+                                online_calibration=True)
+        running = [_make_request(10, 100, 100)]
+        prefills = [_make_request(100, 0, 100)]
+
+        with patch("vllm_ascend.core.scheduler_dynamic_batch.time."
+                   "perf_counter") as mock_perf_counter:
+            mock_perf_counter.side_effect = [0.0, 0.04]
+            refiner.refine_budget(running, 1024)
+            refiner.on_step_scheduled(1024)
+            # A prefill only step scheduled before the first one finishes.
+            refiner.refine_budget(prefills, 1024)
+            refiner.on_step_scheduled(1024)
+            refiner.on_step_finished()
+            refiner.on_step_finished()
+        self.assertEqual(refiner.surfaces[(128, 1)].samples[1024][0], 40.0)
+        self.assertFalse(refiner._pending_steps)
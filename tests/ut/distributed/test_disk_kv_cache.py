@@ -0,0 +1,142 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import torch
+from vllm.v1.core.kv_cache_utils import make_block_hash_with_group_id
+from vllm.v1.kv_cache_interface import FullAttentionSpec
+
+from vllm_ascend.distributed.cpu_offload_manager.cpu_kv_cache_manager import \
+    CPUKVCacheManager
+from vllm_ascend.distributed.cpu_offload_manager.disk_kv_cache import \
+    DiskKVCacheTier
+
+NUM_CPU_BLOCKS = 4
+BLOCK_BYTES = 8
+
+
+def make_tier(tmp_path, num_blocks):
+    tier = DiskKVCacheTier(str(tmp_path), num_blocks, num_io_threads=2)
+    buffers = []
+    for name in ("layer0", "layer1"):
+        buffer = bytearray(2 * NUM_CPU_BLOCKS * BLOCK_BYTES)
+        tier.add_buffer(name, buffer, (2, NUM_CPU_BLOCKS, BLOCK_BYTES))
+        buffers.append(
+            np.frombuffer(buffer,
+                          dtype=np.uint8).reshape(2, NUM_CPU_BLOCKS,
+                                                  BLOCK_BYTES))
+    return tier, buffers
+
+
+def test_spill_and_load(tmp_path):
+    tier, buffers = make_tier(tmp_path, num_blocks=4)
+    for i, buffer in enumerate(buffers):
+        buffer[:, 1] = 10 + i
+    tier.spill(1, "a")
+    # The block is reused once spilled.
+    tier.wait()
+    for buffer in buffers:
+        buffer[:, 1] = 0
+
+    assert tier.match(["a", "b"]) == tier.match(["a"])
+    tier.load(3, tier.match(["a"])[0])
+    tier.wait()
+    for i, buffer in enumerate(buffers):
+        assert (buffer[:, 3] == 10 + i).all()
+    tier.close()
+    assert not list(tmp_path.iterdir())
+
+
+def test_least_recently_used_block_is_reused(tmp_path):
+    tier, _ = make_tier(tmp_path, num_blocks=2)
+    tier.spill(0, "a")
+    tier.spill(1, "b")
+    tier.match(["a"])
+    tier.spill(2, "c")
+    tier.wait()
+    assert tier.match(["a"]) != []
+    assert tier.match(["b"]) == []
+    assert len(tier.match(["c"])) == 1
+    tier.close()
+
+
+def test_spilling_a_block_already_on_disk(tmp_path):
+    tier, _ = make_tier(tmp_path, num_blocks=2)
+    tier.spill(0, "a")
+    tier.spill(1, "a")
+    assert len(tier.index) == 1
+    assert len(tier.free_disk_blocks) == 1
+    tier.close()
+
+
+def test_disk_tier_smaller_than_a_block(tmp_path):
+    with pytest.raises(ValueError, match="disk_swap_space_gb"):
+        DiskKVCacheTier(str(tmp_path), 0)
+
+
+BLOCK_SIZE = 4
+
+
+def make_request(block_hashes):
+    return SimpleNamespace(
+        request_id="req",
+        block_hashes=block_hashes,
+        num_tokens=len(block_hashes) * BLOCK_SIZE + 1,
+        sampling_params=SimpleNamespace(prompt_logprobs=None))
+
+
+def make_manager(tmp_path, num_cpu_blocks):
+    tier = DiskKVCacheTier(str(tmp_path), 8, num_io_threads=2)
+    spec = FullAttentionSpec(block_size=BLOCK_SIZE,
+                             num_kv_heads=1,
+                             head_size=8,
+                             dtype=torch.float16)
+    return CPUKVCacheManager(spec, num_cpu_blocks, disk_tier=tier), tier
+
+
+def spill(tier, block_hashes):
+    for cpu_block_id, block_hash in enumerate(block_hashes):
+        tier.spill(cpu_block_id, make_block_hash_with_group_id(block_hash, 0))
+
+
+def test_promote_from_disk(tmp_path):
+    block_hashes = [b"h0", b"h1", b"h2"]
+    manager, tier = make_manager(tmp_path, num_cpu_blocks=8)
+    spill(tier, block_hashes[1:])
+    request = make_request(block_hashes)
+    # The first block is a CPU hit.
+    cpu_blocks = manager.block_pool.get_new_blocks(1)
+    manager.block_pool.cache_full_blocks(request, cpu_blocks, 0, 1, BLOCK_SIZE,
+                                         0)
+    manager.block_pool.free_blocks(cpu_blocks)
+
+    with patch.object(tier, "load", wraps=tier.load) as mock_load:
+        num_computed_tokens, _ = manager.get_matched_num_and_touch(request)
+    assert num_computed_tokens == 3 * BLOCK_SIZE
+    assert mock_load.call_count == 2
+    blocks = manager.req_to_computed_blocks["req"]
+    assert [block.ref_cnt for block in blocks] == [1, 1, 1]
+    for block_hash, block in zip(block_hashes, blocks):
+        assert manager.block_pool.get_cached_block(block_hash, [0]) == [block]
+    tier.close()
+
+
+def test_promote_from_disk_limited_by_free_blocks(tmp_path):
+    block_hashes = [b"h0", b"h1", b"h2"]
+    # One of the CPU blocks is the null block.
+    manager, tier = make_manager(tmp_path, num_cpu_blocks=3)
+    spill(tier, block_hashes)
+    num_computed_tokens, _ = manager.get_matched_num_and_touch(
+        make_request(block_hashes))
+    assert num_computed_tokens == 2 * BLOCK_SIZE
+    assert manager.block_pool.get_num_free_blocks() == 0
+
+    # Nothing is promoted without a prefix on disk.
+    manager, tier2 = make_manager(tmp_path / "other", num_cpu_blocks=8)
+    spill(tier2, block_hashes[1:])
+    assert manager.get_matched_num_and_touch(
+        make_request(block_hashes))[0] == 0
+    assert manager.block_pool.get_num_free_blocks() == 7
+    tier.close()
+    tier2.close()
@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+
+import pytest
+
+from vllm_ascend.distributed.cpu_offload_manager.shm_ring import \
+    ShmNotificationRing
+
+
+@pytest.fixture
+def rings():
+    consumer = ShmNotificationRing(f"test_shm_ring_{os.getpid()}",
+                                   num_slots=4,
+                                   slot_bytes=16,
+                                   create=True)
+    producer = ShmNotificationRing(consumer.name)
+    yield consumer, producer
+    producer.close()
+    consumer.close(unlink=True)
+
+
+def test_push_and_pop_all(rings):
+    consumer, producer = rings
+    assert producer.num_slots == 4 and producer.slot_bytes == 16
+    assert consumer.pop_all() == []
+    for i in range(10):
+        producer.push(f"req-{i}".encode())
+        producer.push(b"")
+        assert consumer.pop_all() == [f"req-{i}".encode(), b""]
+
+
+def test_push_waits_for_a_free_slot(rings):
+    consumer, producer = rings
+    for i in range(4):
+        producer.push(bytes([i]))
+    with pytest.raises(TimeoutError):
+        producer.push(b"x", timeout=0.01)
+    assert consumer.pop_all() == [bytes([i]) for i in range(4)]
+    producer.push(b"x", timeout=0.01)
+    assert consumer.pop_all() == [b"x"]
+
+
+def test_message_too_long(rings):
+    _, producer = rings
+    with pytest.raises(ValueError):
+        producer.push(b"x" * 15)
+
+
+def test_slot_not_visible_yet(rings):
+    consumer, producer = rings
+    producer.push(b"a")
+    producer.push(b"bc")
+    # The write counter is visible before the second message.
+    offset = consumer.shm.buf.nbytes - 3 * consumer.slot_bytes
+    message = bytes(consumer.shm.buf[offset:offset + 16])
+    consumer.shm.buf[offset + 10] = ord("x")
+    assert consumer.pop_all() == [b"a"]
+    assert consumer.pop_all() == []
+    consumer.shm.buf[offset:offset + 16] = message
+    assert consumer.pop_all() == [b"bc"]
+
+
+NUM_STRESS_MESSAGES = 20000
+
+
+def _produce(name):
+    producer = ShmNotificationRing(name)
+    for i in range(NUM_STRESS_MESSAGES):
+        producer.push(str(i).encode() * (i % 3 + 1), timeout=10)
+    producer.close()
+
+
+def test_two_processes():
+    consumer = ShmNotificationRing(f"test_shm_ring_stress_{os.getpid()}",
+                                   num_slots=8,
+                                   slot_bytes=32,
+                                   create=True)
+    process = multiprocessing.get_context("fork").Process(
+        target=_produce, args=(consumer.name, ))
+    process.start()
+    received = []
+    while len(received) < NUM_STRESS_MESSAGES and process.is_alive():
+        received.extend(consumer.pop_all())
+    process.join()
+    received.extend(consumer.pop_all())
+    assert process.exitcode == 0
+    consumer.close(unlink=True)
+    assert received == [
+        str(i).encode() * (i % 3 + 1) for i in range(NUM_STRESS_MESSAGES)
+    ]
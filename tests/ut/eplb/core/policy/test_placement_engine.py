@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from vllm_ascend.eplb.core.policy.placement_engine import (
+    BoxPacker, compute_layer_imbalance, compute_logical_workload,
+    compute_max_heat_per_layer, descending_order, pack_items,
+    split_hot_experts)
+
+
+def test_compute_logical_workload():
+    placement = np.array([[[0, 1], [1, 2]], [[2, 0], [1, 0]]])
+    workload = np.array([[[1, 2], [3, 4]], [[5, 6], [7, 8]]])
+    result = compute_logical_workload(placement, workload, 3)
+    assert np.array_equal(result, [[1, 5, 4], [14, 7, 5]])
+
+
+def test_compute_max_heat_per_layer():
+    workload = np.array([[[1, 2], [3, 4]], [[5, 6], [7, 1]]])
+    assert compute_max_heat_per_layer(workload).tolist() == [7, 11]
+
+
+def test_compute_layer_imbalance():
+    placement = np.array([[[0, 1], [0, 2]]])
+    logical_workload = np.array([[4.0, 2.0, 2.0]])
+    # Both replicas of expert 0 get 2, so the ranks are balanced.
+    assert compute_layer_imbalance(placement,
+                                   logical_workload).tolist() == [1.0]
+
+
+def test_split_hot_experts():
+    counts, avg_weights, picks = split_hot_experts([10, 30, 20], 3)
+    assert counts.tolist() == [1, 3, 2]
+    assert avg_weights.tolist() == [10, 10, 10]
+    assert picks == [1, 2, 1]
+
+
+def test_split_hot_experts_tie_goes_to_later_expert():
+    _, _, picks = split_hot_experts([5, 5], 1)
+    assert picks == [1]
+
+
+def test_descending_order():
+    assert descending_order([1, 3, 3, 2]).tolist() == [2, 1, 3, 0]
+
+
+def test_pack_items_balances_boxes():
+    packer = pack_items([0, 1, 2, 3], [8, 7, 2, 1], card_num=2)
+    result, boxes = packer.result()
+    assert boxes == [[0, 3], [1, 2]]
+    assert [r["total_weight"] for r in result] == [9, 9]
+
+
+def test_box_packer_skips_box_holding_item():
+    packer = BoxPacker(card_num=2, expert_num=4)
+    packer.put(0, 1, 1)
+    packer.rebuild_heap()
+    # Box 0 is lighter but already holds expert 1.
+    assert packer.place(1, 5) == 1
+    assert packer.place(0, 5) == 0
+
+
+def test_box_packer_card0():
+    with pytest.raises(RuntimeError):
+        BoxPacker(card_num=0, expert_num=4)
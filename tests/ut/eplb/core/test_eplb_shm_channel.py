@@ -0,0 +1,83 @@
+import pickle
+
+import pytest
+import torch
+
+from vllm_ascend.eplb.core.eplb_shm_channel import MAX_NDIM, EplbSharedChannel
+
+
+@pytest.fixture
+def channel():
+    channel = EplbSharedChannel()
+    yield channel
+    channel.unlink()
+
+
+def test_read_before_write(channel):
+    assert channel.read("moe_load") is None
+    assert channel.seq("moe_load") == 0
+    assert channel.read_update_info() == []
+
+
+def test_write_read_round_trip(channel):
+    load = torch.arange(24, dtype=torch.int64).reshape(2, 3, 4)
+    assert channel.write("moe_load", load) == 1
+    assert torch.equal(channel.read("moe_load"), load)
+
+    # A larger tensor of another dtype reallocates the data segment.
+    maps = torch.rand(4, 8, 16)
+    assert channel.write("moe_load", maps) == 2
+    assert torch.equal(channel.read("moe_load"), maps)
+
+
+def test_read_copy_and_view(channel):
+    channel.write("expert_maps", torch.zeros(2, 2, dtype=torch.int32))
+    copied = channel.read("expert_maps")
+    view = channel.read("expert_maps", copy=False)
+    channel.write("expert_maps", torch.ones(2, 2, dtype=torch.int32))
+    assert copied.sum() == 0
+    assert view.sum() == 4
+
+
+def test_too_many_dims(channel):
+    with pytest.raises(ValueError):
+        channel.write("moe_load", torch.zeros([1] * (MAX_NDIM + 1)))
+
+
+def test_attached_channel_sees_writes(channel):
+    # This is what the EPLB process gets when it is spawned.
+    attached = pickle.loads(pickle.dumps(channel))
+    channel.write("moe_load", torch.ones(2, 3))
+    assert torch.equal(attached.read("moe_load"), torch.ones(2, 3))
+
+    # Writes of the attached side, including a reallocation, are visible to
+    # the creator.
+    attached.write("expert_maps", torch.arange(6).reshape(1, 2, 3))
+    attached.write("expert_maps", torch.arange(60).reshape(3, 4, 5))
+    assert torch.equal(channel.read("expert_maps"),
+                       torch.arange(60).reshape(3, 4, 5))
+    attached.close()
+
+
+def test_update_info_round_trip(channel):
+    update_info = [
+        ([(1, 5), (2, 7)], [], torch.tensor([0, -1,
+                                             1]), torch.tensor([3, 4, 5]), 0),
+        ([], [(3, 2)], torch.tensor([-1, 0, 1]), torch.tensor([6, 7, 8]), 1),
+    ]
+    seq = channel.write_update_info(update_info)
+    assert seq == channel.seq("update_layer_ids")
+
+    result = channel.read_update_info()
+    assert len(result) == 2
+    for expected, actual in zip(update_info, result):
+        assert actual[0] == expected[0]
+        assert actual[1] == expected[1]
+        assert torch.equal(actual[2], expected[2])
+        assert torch.equal(actual[3], expected[3])
+        assert actual[4] == expected[4]
+
+
+def test_empty_update_info(channel):
+    channel.write_update_info([])
+    assert channel.read_update_info() == []
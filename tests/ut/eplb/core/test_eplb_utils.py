@@ -97,6 +97,28 @@ class TestEPLBParamUtils:
         with pytest.raises(TypeError, match="is not int"):
             EPLBParamUtils.check_iterations(None)
 
+    def test_check_migration_budget(self):
+        EPLBParamUtils.check_migration_budget(0)
+        EPLBParamUtils.check_migration_budget(64.5)
+        with pytest.raises(TypeError, match="is not a number"):
+            EPLBParamUtils.check_migration_budget("64")
+        with pytest.raises(ValueError, match="can not less than 0"):
+            EPLBParamUtils.check_migration_budget(-1)
+
+    def test_check_load_forecaster(self):
+        EPLBParamUtils.check_load_forecaster(None)
+        EPLBParamUtils.check_load_forecaster("holt")
+        with pytest.raises(ValueError, match="is not in"):
+            EPLBParamUtils.check_load_forecaster("arima")
+
+    def test_check_min_rebalance_gain(self):
+        EPLBParamUtils.check_min_rebalance_gain(0)
+        EPLBParamUtils.check_min_rebalance_gain(0.05)
+        with pytest.raises(TypeError, match="is not a number"):
+            EPLBParamUtils.check_min_rebalance_gain(None)
+        with pytest.raises(ValueError, match="is not in"):
+            EPLBParamUtils.check_min_rebalance_gain(1)
+
     def test_check_iterations_value_error_less_than_or_equal_zero(self):
         with pytest.raises(ValueError,
                            match="can not less than or equal to 0"):
@@ -0,0 +1,78 @@
+from unittest.mock import patch
+
+import pytest
+import torch
+
+from vllm_ascend.eplb.core.eplb_shm_channel import EplbSharedChannel
+from vllm_ascend.eplb.core.eplb_worker import EplbWorker
+
+
+@pytest.fixture
+def make_worker():
+
+    def _make(policy_type=1):
+        with patch("torch.distributed.get_rank", return_value=0):
+            return EplbWorker(None, policy_type)
+
+    return _make
+
+
+def test_compose_layer_update_info_greedy_unchanged_layer(make_worker):
+    expert_map = torch.tensor([[0, -1], [-1, 0]])
+    send, recv, new_map, layer_id = \
+        EplbWorker.compose_layer_update_info_greedy(expert_map, expert_map, 3)
+    assert send == {} and recv == {}
+    assert layer_id == 3
+
+    worker = make_worker()
+    maps = torch.stack([expert_map, expert_map])
+    # One entry per layer.
+    assert len(list(worker.compose_expert_update_info_greedy(maps, maps))) == 2
+
+
+def test_compose_layer_update_info_greedy(make_worker):
+    current = torch.tensor([[0, -1], [-1, 0]])
+    updated = torch.tensor([[0, 1], [-1, 0]])
+    send, recv, _, _ = EplbWorker.compose_layer_update_info_greedy(
+        updated, current, 0)
+    assert send == {1: [(0, 1)]}
+    assert recv == {0: [(1, 1)]}
+
+
+def test_do_update_through_shared_channel():
+    channel = EplbSharedChannel()
+    try:
+        with patch("torch.distributed.get_rank", return_value=0):
+            worker = EplbWorker(channel, 1)
+        expert_maps = torch.tensor([[[0, 1, -1, -1], [-1, -1, 0, 1]]])
+        channel.write("expert_maps", expert_maps)
+        channel.write("moe_load", torch.tensor([[[100, 1], [1, 1]]]))
+
+        channel.write_update_info(worker.do_update())
+        update_info = channel.read_update_info()
+        assert len(update_info) == 1
+        assert update_info[0][4] == 0
+        assert torch.equal(update_info[0][2],
+                           channel.read("expert_maps")[0, 0])
+    finally:
+        channel.unlink()
+
+
+def test_do_update_skips_low_gain_layers():
+    channel = EplbSharedChannel()
+    try:
+        with patch("torch.distributed.get_rank", return_value=0):
+            worker = EplbWorker(channel,
+                                1,
+                                load_forecaster="ewma",
+                                min_rebalance_gain=0.5)
+        expert_maps = torch.tensor([[[0, 1, -1, -1], [-1, -1, 0, 1]]])
+        channel.write("expert_maps", expert_maps)
+        channel.write("moe_load", torch.tensor([[[100, 1], [1, 1]]]))
+
+        update_info = worker.do_update()
+        # No placement halves the load of the rank holding expert 0.
+        assert update_info[0][0] == [] and update_info[0][1] == []
+        assert torch.equal(channel.read("expert_maps"), expert_maps)
+    finally:
+        channel.unlink()
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from vllm_ascend.eplb.core.load_forecaster import (EwmaForecaster,
+                                                   HoltForecaster,
+                                                   WindowQuantileForecaster,
+                                                   create_load_forecaster,
+                                                   forecast_workload)
+
+
+def test_ewma_forecaster():
+    forecaster = EwmaForecaster(alpha=0.5)
+    forecaster.update(np.array([[4.0, 0.0]]))
+    forecaster.update(np.array([[0.0, 4.0]]))
+    assert forecaster.predict().tolist() == [[2.0, 2.0]]
+
+
+def test_holt_forecaster_follows_trend():
+    forecaster = HoltForecaster(alpha=1.0, beta=1.0)
+    for load in (1.0, 2.0, 3.0):
+        forecaster.update(np.array([[load, 10 - load]]))
+    assert forecaster.predict().tolist() == [[4.0, 6.0]]
+
+
+def test_holt_forecaster_is_not_negative():
+    forecaster = HoltForecaster(alpha=1.0, beta=1.0)
+    forecaster.update(np.array([[10.0]]))
+    forecaster.update(np.array([[1.0]]))
+    assert forecaster.predict().tolist() == [[0.0]]
+
+
+def test_window_quantile_forecaster():
+    forecaster = WindowQuantileForecaster(window=3, quantile=1.0)
+    for load in (100.0, 1.0, 2.0, 3.0):
+        forecaster.update(np.array([[load]]))
+    # The first window is out of the sliding window.
+    assert forecaster.predict().tolist() == [[3.0]]
+
+
+def test_create_load_forecaster():
+    assert create_load_forecaster(None) is None
+    assert isinstance(create_load_forecaster("ewma"), EwmaForecaster)
+    with pytest.raises(ValueError):
+        create_load_forecaster("arima")
+
+
+def test_forecast_workload_shares_load_between_replicas():
+    # Expert 0 has a replica on each rank.
+    placement = np.array([[[0, 1], [0, 2]]])
+    workload = np.array([[[3, 2], [5, 2]]])
+    forecast = forecast_workload(EwmaForecaster(), placement, workload)
+    assert forecast.tolist() == [[[4.0, 2.0], [4.0, 2.0]]]
@@ -0,0 +1,60 @@
+import numpy as np
+
+from vllm_ascend.eplb.core.migration_planner import (count_migrated_experts,
+                                                     plan_migration,
+                                                     skip_low_gain_layers,
+                                                     spread_layer_updates)
+
+
+def test_count_migrated_experts():
+    old = np.array([[[0, 1], [2, 3]], [[0, 1], [2, 3]]])
+    new = np.array([[[0, 2], [1, 3]], [[1, 0], [2, 3]]])
+    assert count_migrated_experts(old, new).tolist() == [2, 0]
+
+
+def test_plan_migration_within_budget():
+    old = np.array([[[0, 1], [2, 3]]] * 3)
+    # Layer 0 swaps 1 and 2, layer 1 swaps 1 and 3, layer 2 does not help.
+    new = np.array([[[0, 2], [1, 3]], [[0, 3], [2, 1]], [[0, 1], [2, 3]]])
+    workload = np.array([[[10, 10], [1, 1]], [[10, 4], [1, 1]], [[1, 1],
+                                                                 [1, 1]]])
+    expert_weight_bytes = np.array([100, 100, 100])
+
+    placement, selected = plan_migration(old, new, workload,
+                                         expert_weight_bytes, 200)
+    assert selected.tolist() == [True, False, False]
+    assert np.array_equal(placement[0], new[0])
+    assert np.array_equal(placement[1], old[1])
+
+    _, selected = plan_migration(old, new, workload, expert_weight_bytes, 400)
+    assert selected.tolist() == [True, True, False]
+
+    _, selected = plan_migration(old, new, workload, expert_weight_bytes, 100)
+    assert not selected.any()
+
+
+def test_skip_low_gain_layers():
+    old = np.array([[[0, 1], [2, 3]]] * 2)
+    new = np.array([[[0, 2], [1, 3]], [[0, 3], [2, 1]]])
+    # The update of layer 0 takes the max rank load from 20 to 11, the one of
+    # layer 1 from 11 to 10.
+    workload = np.array([[[10, 10], [1, 1]], [[10, 1], [1, 0]]])
+    placement, selected = skip_low_gain_layers(old, new, workload, 0.1)
+    assert selected.tolist() == [True, False]
+    assert np.array_equal(placement, np.stack([new[0], old[1]]))
+
+
+def test_spread_layer_updates():
+    busy = [({
+        0: [(1, 2)]
+    }, {
+        1: [(0, 2)]
+    }, None, layer_id) for layer_id in (0, 1)]
+    idle = [({}, {}, None, layer_id) for layer_id in (2, 3, 4, 5)]
+    spread = spread_layer_updates(busy + idle)
+    assert [info[3] for info in spread] == [0, 2, 3, 1, 4, 5]
+
+
+def test_spread_layer_updates_nothing_to_spread():
+    idle = [({}, {}, None, layer_id) for layer_id in range(3)]
+    assert spread_layer_updates(idle) == idle
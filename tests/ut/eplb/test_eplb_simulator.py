@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import torch
+
+from vllm_ascend.eplb.eplb_simulator import (_placement_to_numpy,
+                                             generate_synthetic_trace,
+                                             load_trace, main,
+                                             save_trace_window, simulate,
+                                             summarize)
+
+
+def _placement(num_layers=2):
+    # 4 ranks, 3 slots, 8 experts and 4 redundant slots.
+    layer = np.array([[0, 1, 2], [3, 4, 5], [6, 7, 0], [1, 2, 3]])
+    return np.stack([layer] * num_layers)
+
+
+def test_trace_round_trip(tmp_path):
+    placements, loads = generate_synthetic_trace(3, _placement(), seed=1)
+    for window in range(3):
+        save_trace_window(str(tmp_path), window, placements[window],
+                          loads[window])
+    read_placements, read_loads = load_trace(str(tmp_path))
+    assert np.array_equal(read_placements, placements)
+    assert np.array_equal(read_loads, loads)
+
+    stacked = tmp_path / "trace.npz"
+    np.savez(stacked, placements=placements, loads=loads)
+    read_placements, read_loads = load_trace(str(stacked))
+    assert np.array_equal(read_loads, loads)
+
+
+def test_synthetic_trace():
+    placements, loads = generate_synthetic_trace(4,
+                                                 _placement(),
+                                                 tokens_per_window=1000)
+    assert placements.shape == loads.shape == (4, 2, 4, 3)
+    assert np.allclose(loads.sum(axis=(2, 3)), 1000, atol=12)
+
+
+def test_simulate_reduces_imbalance():
+    placements, loads = generate_synthetic_trace(4, _placement(), skew=2.0)
+    stats = simulate(1, placements, loads, expert_bytes=10)
+    assert len(stats) == 4
+    assert stats[0].migrated_bytes > 0
+    assert stats[-1].imbalance < stats[0].imbalance
+    summary = summarize(stats)
+    assert summary["total_migrated_bytes"] == sum(s.migrated_bytes
+                                                  for s in stats)
+
+
+def test_simulate_rebalance_every():
+    placements, loads = generate_synthetic_trace(4, _placement())
+    stats = simulate(1, placements, loads, rebalance_every=2, expert_bytes=1)
+    assert [s.planner_ms > 0 for s in stats] == [False, True, False, True]
+
+
+def test_main(tmp_path):
+    placements, loads = generate_synthetic_trace(2, _placement())
+    trace = tmp_path / "trace.npz"
+    np.savez(trace, placements=placements, loads=loads)
+    output = tmp_path / "stats.json"
+    main([
+        "--trace",
+        str(trace), "--policies", "1", "2", "--output-json",
+        str(output)
+    ])
+    results = json.loads(output.read_text())
+    assert sorted(results) == ["1", "2"]
+    assert len(results["1"]) == 2
+
+
+def test_placement_to_numpy():
+    placement = _placement()
+    for policy_placement in (torch.from_numpy(placement), placement.tolist(),
+                             [torch.from_numpy(layer) for layer in placement]):
+        converted = _placement_to_numpy(policy_placement)
+        assert converted.dtype == np.int64
+        np.testing.assert_array_equal(converted, placement)
@@ -0,0 +1,52 @@
+from unittest.mock import MagicMock
+
+import pytest
+import torch
+from vllm.config import KVTransferConfig
+
+from vllm_ascend.distributed.kv_tier_oracle import (KVLoadCostModel, KVTier,
+                                                    KVTierEstimate,
+                                                    get_kv_bytes_per_token,
+                                                    get_kv_load_latency)
+
+
+def make_vllm_config(use_mla=False, extra_config=None):
+    vllm_config = MagicMock()
+    model_config = vllm_config.model_config
+    model_config.dtype = torch.bfloat16
+    model_config.use_mla = use_mla
+    model_config.get_num_layers.return_value = 4
+    model_config.get_num_kv_heads.return_value = 1 if use_mla else 8
+    model_config.get_head_size.return_value = 576 if use_mla else 128
+    vllm_config.cache_config.cache_dtype = "auto"
+    vllm_config.kv_transfer_config = KVTransferConfig(
+        kv_connector="MooncakeConnectorStoreV1",
+        kv_role="kv_both",
+        kv_connector_extra_config=extra_config or {})
+    return vllm_config
+
+
+def test_kv_bytes_per_token():
+    assert get_kv_bytes_per_token(make_vllm_config()) == 4 * 8 * 128 * 2 * 2
+    assert get_kv_bytes_per_token(
+        make_vllm_config(use_mla=True)) == 4 * 576 * 2
+
+
+def test_estimate():
+    cost = KVLoadCostModel(
+        make_vllm_config(extra_config={
+            "kv_load_bandwidth_gbps": 1,
+            "kv_load_latency_ms": 2,
+        }), KVTier.STORE)
+    assert cost.estimate(0) == KVTierEstimate(KVTier.STORE, 0, 0.0)
+    estimate = cost.estimate(1000)
+    assert estimate.num_matched_tokens == 1000
+    assert estimate.load_latency == pytest.approx(2e-3 + 1000 * 16384 / 1e9)
+
+
+def test_load_latency_excludes_local_hits():
+    assert get_kv_load_latency([
+        KVTierEstimate(KVTier.LOCAL_HBM, 128, 1.0),
+        KVTierEstimate(KVTier.CPU, 64, 0.25),
+        KVTierEstimate(KVTier.STORE, 64, 0.5),
+    ]) == 0.75
@@ -0,0 +1,71 @@
+import pickle
+import threading
+
+import torch
+
+from vllm_ascend.distributed.kv_transfer_stats import (
+    AscendKVConnectorStats, KVTransferStats, build_kv_connector_stats,
+    get_kv_block_bytes)
+
+
+def test_collect_returns_the_new_records():
+    stats = KVTransferStats()
+    assert stats.collect() is None
+
+    def record():
+        for _ in range(100):
+            stats.record_transfer(1 << 20, 1e-3)
+        stats.record_failure()
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.record_queue_time(0.5)
+
+    collected = stats.collect()
+    assert collected is not None
+    metrics = collected.reduce()
+    assert metrics["num_transfers"] == 400
+    assert metrics["num_failures"] == 4
+    assert metrics["transfer_bytes_avg"] == 1 << 20
+    assert 1 << 20 <= metrics["transfer_bytes_p99"] <= 2 << 20
+    assert metrics["transfer_time_ms_avg"] == 1.0
+    assert 1.0 <= metrics["transfer_time_ms_p50"] <= 2.0
+    assert 1.0 <= metrics["transfer_gbps_p50"] <= 2.0
+    assert 500 <= metrics["queue_time_ms_p50"] <= 1024
+    assert "handshake_time_ms_avg" not in metrics
+
+    assert stats.collect() is None
+    stats.record_retry()
+    assert stats.collect().reduce()["num_retries"] == 1
+
+
+def test_aggregate_the_stats_of_the_workers():
+    workers = [KVTransferStats() for _ in range(2)]
+    workers[0].record_transfer(100, 1.0)
+    workers[1].record_transfer(300, 1.0)
+    workers[1].record_delayed_free_timeout()
+    # The stats are sent from the workers as their data.
+    data = [
+        pickle.loads(pickle.dumps(worker.collect().data)) for worker in workers
+    ]
+
+    stats = build_kv_connector_stats(data[0])
+    stats = stats.aggregate(build_kv_connector_stats(data[1]))
+    metrics = stats.reduce()
+    assert metrics["num_transfers"] == 2
+    assert metrics["num_delayed_free_timeouts"] == 1
+    assert metrics["transfer_bytes_avg"] == 200
+    assert AscendKVConnectorStats().is_empty()
+
+
+def test_kv_block_bytes():
+    kv_caches = {
+        "layer0": (torch.zeros(4, 16, 2, 8), torch.zeros(4, 16, 2, 8)),
+        "layer1": (torch.zeros(4, 16, 2, 8), torch.zeros(4, 16, 2, 8)),
+    }
+    assert get_kv_block_bytes(kv_caches) == 4 * 16 * 2 * 8 * 4
+    assert get_kv_block_bytes([torch.zeros(4, 16,
+                                           dtype=torch.bfloat16)]) == 16 * 2
@@ -0,0 +1,94 @@
+import array
+import hashlib
+
+import pytest
+import torch
+
+from vllm_ascend.distributed.mooncake.config_data import (
+    ChunkedTokenDatabase, MooncakeEngineMetadata)
+
+BLOCK_SIZE = 16
+
+
+def make_database(hash_algorithm="sha256"):
+    metadata = MooncakeEngineMetadata("model", 1, 0, torch.bfloat16,
+                                      (1, 2, BLOCK_SIZE, 1, 8), BLOCK_SIZE)
+    return ChunkedTokenDatabase(metadata, hash_algorithm)
+
+
+def legacy_chunk_hashes(tokens):
+    prefix_hash = ""
+    hashes = []
+    for i in range(0, len(tokens), BLOCK_SIZE):
+        tokens_bytes = array.array("I", tokens[i:i + BLOCK_SIZE]).tobytes()
+        prefix_hash = hashlib.sha256(
+            prefix_hash.encode("ascii") + tokens_bytes).hexdigest()
+        hashes.append(prefix_hash)
+    return hashes
+
+
+def chunk_hashes(database, tokens, mask=None, req_id=None):
+    return [
+        key.chunk_hash
+        for _, _, key in database.process_tokens(tokens, mask, req_id)
+    ]
+
+
+def test_sha256_keys_are_unchanged():
+    database = make_database()
+    tokens = list(range(100, 150))
+    assert chunk_hashes(database, tokens) == legacy_chunk_hashes(tokens)
+    assert chunk_hashes(database,
+                        torch.tensor(tokens)) == legacy_chunk_hashes(tokens)
+
+
+def test_mask_skips_leading_chunks():
+    database = make_database()
+    tokens = torch.arange(40)
+    mask = torch.ones(40, dtype=torch.bool)
+    mask[:BLOCK_SIZE] = False
+    result = list(database.process_tokens(tokens, mask))
+    assert [(start, end) for start, end, _ in result] == [(16, 32), (32, 40)]
+    assert [key.chunk_hash for _, _, key in result
+            ] == legacy_chunk_hashes(list(range(40)))[1:]
+
+
+def test_incremental_hashing_of_growing_request():
+    database = make_database()
+    tokens = list(range(50))
+    assert chunk_hashes(database, tokens,
+                        req_id="req") == legacy_chunk_hashes(tokens)
+
+    # The memoized chunks must not be trusted when the tokens change.
+    grown = tokens + list(range(1000, 1030))
+    assert chunk_hashes(database, grown,
+                        req_id="req") == legacy_chunk_hashes(grown)
+    changed = [7] + grown[1:]
+    assert chunk_hashes(database, changed,
+                        req_id="req") == legacy_chunk_hashes(changed)
+    assert chunk_hashes(database, changed[:20],
+                        req_id="req") == legacy_chunk_hashes(changed[:20])
+
+    database.discard_request("req")
+    assert "req" not in database._memoized_prefix_hashes
+
+
+def test_memoized_requests_are_bounded():
+    database = make_database()
+    database.max_memoized_requests = 2
+    for req_id in ("a", "b", "c"):
+        chunk_hashes(database, list(range(32)), req_id=req_id)
+    assert list(database._memoized_prefix_hashes) == ["b", "c"]
+
+
+def test_other_algorithms_are_tagged():
+    database = make_database("blake2b")
+    hashes = chunk_hashes(database, list(range(48)))
+    assert all(h.startswith("blake2b:") for h in hashes)
+    assert len(set(hashes)) == 3
+    assert hashes != legacy_chunk_hashes(list(range(48)))
+
+
+def test_unknown_algorithm():
+    with pytest.raises(ValueError):
+        make_database("md5")
@@ -2,6 +2,7 @@ import os
 import queue
 import socket
 import sys
+import tempfile
 import threading
 import time
 import types
@@ -24,12 +25,16 @@ fake_engine = types.ModuleType("mooncake.engine")
 fake_engine.TransferEngine = MagicMock()  # type: ignore[attr-defined]
 sys.modules["mooncake.engine"] = fake_engine
 
+from vllm_ascend.distributed.kv_transfer_stats import \
+    KVTransferStats  # noqa: E402
 from vllm_ascend.distributed.mooncake_connector import (  # noqa: E402
     KVCacheRecvingThread, KVCacheSendingThread, KVCacheTaskTracker,
     KVConnectorRole, MooncakeAgentMetadata, MooncakeConnector,
     MooncakeConnectorMetadata, MooncakeConnectorScheduler,
     MooncakeConnectorWorker, ReqMeta, ensure_zmq_recv, ensure_zmq_send,
     group_concurrent_contiguous, string_to_int64_hash, zmq_ctx)
+from vllm_ascend.distributed.remote_agents import \
+    AgentMetadataCache  # noqa: E402
 
 GET_META_MSG = b"get_meta_msg"
 DONE_RECVING_MSG = b"done_recving_msg"
@@ -386,6 +391,95 @@ class TestCoreFunctionality(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             self.thread._transfer_kv_cache(self.test_req)
 
+    def finish_queued_pulls(self):
+        """Run the queued completions as the receiving thread does."""
+        for call in self.mock_queue.put.call_args_list:
+            self.assertTrue(call.args[0]["pull_done"])
+            self.thread._finish_pull(call.args[0])
+
+    @patch.object(KVCacheRecvingThread, '_send_done_recv_signal')
+    def test_pipelined_pull(self, mock_send):
+        self.thread.kv_caches_base_addr["remote_engine"] = {
+            6666: [0x3000, 0x4000]
+        }
+        self.thread.layer_names = ["layer0", "layer1"]
+        self.thread.pull_layer_group_size = 1
+        req = dict(self.test_req, num_need_pulls=1)
+
+        self.thread._submit_pull(req)
+        self.thread.executor.shutdown(wait=True)
+
+        # One transfer per layer group, each with its own cache.
+        self.assertEqual(self.engine.batch_transfer_sync_read.call_count, 2)
+        src_addrs = sorted(
+            call.args[1][0]
+            for call in self.engine.batch_transfer_sync_read.call_args_list)
+        self.assertEqual(src_addrs, [0x1000 + 1 * 1024, 0x2000 + 1 * 2048])
+        ready_layers = {
+            layer
+            for call in
+            self.thread.task_tracker.update_ready_layers.call_args_list
+            for layer in call.args[1]
+        }
+        self.assertEqual(ready_layers, {"layer0", "layer1"})
+        # The executor threads leave the done signal to the receiving thread.
+        mock_send.assert_not_called()
+        self.mock_queue.put.assert_called_once_with(
+            dict(req, pull_done=True, pull_failed=False))
+
+        self.finish_queued_pulls()
+        mock_send.assert_called_once_with("req1", "localhost", 6666)
+        self.thread.task_tracker.update_done_task_count.assert_called_once_with(
+            "req1")
+        self.assertEqual(self.mock_queue.task_done.call_count, 2)
+
+    @patch.object(KVCacheRecvingThread, '_cat_kv_cache')
+    @patch.object(KVCacheRecvingThread, '_send_done_recv_signal')
+    def test_pipelined_pulls_merged_after_last(self, mock_send, mock_cat):
+        self.thread.kv_caches_base_addr["remote_engine"] = {
+            6666: [0x3000, 0x4000]
+        }
+        self.thread.pull_layer_group_size = 1
+
+        # The pull of the second offset may finish first.
+        self.thread._submit_pull(dict(self.test_req, offset=1))
+        self.thread._submit_pull(self.test_req)
+        self.thread.executor.shutdown(wait=True)
+        self.assertEqual(self.mock_queue.put.call_count, 2)
+
+        self.finish_queued_pulls()
+        self.assertEqual(mock_send.call_count, 2)
+        self.thread.task_tracker.update_ready_layers.assert_not_called()
+        mock_cat.assert_called_once_with([1, 2])
+        self.thread.task_tracker.update_done_task_count.assert_called_once_with(
+            "req1")
+        self.assertEqual(self.thread.pending_pulls, {})
+
+    @patch.object(KVCacheRecvingThread, '_on_pull_failed')
+    @patch.object(KVCacheRecvingThread, '_send_done_recv_signal')
+    def test_pipelined_pull_reported_when_done_signal_fails(
+            self, mock_send, mock_failed):
+        self.thread.kv_caches_base_addr["remote_engine"] = {
+            6666: [0x3000, 0x4000]
+        }
+        self.thread.pull_layer_group_size = 1
+        self.engine.batch_transfer_sync_read.return_value = -1
+        mock_send.side_effect = RuntimeError("no ACK")
+        req = dict(self.test_req, num_need_pulls=1)
+
+        self.thread._submit_pull(req)
+        self.thread.executor.shutdown(wait=True)
+        mock_failed.assert_not_called()
+        self.mock_queue.put.assert_called_once_with(
+            dict(req, pull_done=True, pull_failed=True))
+
+        self.finish_queued_pulls()
+        mock_failed.assert_called_once()
+        mock_send.assert_called_once()
+        self.thread.task_tracker.update_done_task_count.assert_called_once_with(
+            "req1")
+        self.assertEqual(self.mock_queue.task_done.call_count, 2)
+
 
 class TestMetadataHandling(unittest.TestCase):
 
@@ -426,10 +520,13 @@ class TestMetadataHandling(unittest.TestCase):
             mock_get_socket.assert_called_once_with("host1", 5555)
             mock_return_socket.assert_called_once_with(mock_socket, "host1",
                                                        5555)
-            mock_send.assert_called_once_with(
-                mock_socket, self.thread.encoder.encode((GET_META_MSG, "")))
+            mock_send.assert_called_once_with(mock_socket,
+                                              self.thread.encoder.encode(
+                                                  (GET_META_MSG, "")),
+                                              stats=self.thread.stats)
             mock_recv.assert_called_once_with(mock_socket,
-                                              self.thread.remote_poller)
+                                              self.thread.remote_poller,
+                                              stats=self.thread.stats)
             self.assertEqual(
                 self.thread.kv_caches_base_addr["remote_engine"][5555],
                 [0x3000, 0x4000])
@@ -439,7 +536,8 @@ class TestMetadataHandling(unittest.TestCase):
            side_effect=Exception("Network error"))
     def test_get_remote_metadata_failure(self, mock_recv, mock_send):
         with patch.object(self.thread, '_get_remote_socket') as mock_get_socket, \
-                patch.object(self.thread, '_return_remote_socket') as mock_return_socket:
+                patch.object(self.thread, '_return_remote_socket') as mock_return_socket, \
+                patch.object(self.thread, '_close_remote_socket') as mock_close_socket:
             mock_socket = MagicMock()
             mock_get_socket.return_value = mock_socket
 
@@ -447,7 +545,87 @@ class TestMetadataHandling(unittest.TestCase):
                 self.thread._get_remote_metadata("host1", 5555)
 
             self.assertEqual(str(context.exception), "Network error")
-            mock_return_socket.assert_called_once()
+            # A socket that failed is not returned to the pool.
+            mock_close_socket.assert_called_once_with(mock_socket)
+            mock_return_socket.assert_not_called()
+
+    @patch('vllm_ascend.distributed.mooncake_connector.ensure_zmq_send')
+    @patch('vllm_ascend.distributed.mooncake_connector.ensure_zmq_recv')
+    def test_cached_metadata(self, mock_recv, mock_send):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.thread.metadata_cache = AgentMetadataCache(cache_dir.name)
+        mock_recv.return_value = msgspec.msgpack.encode(self.test_metadata)
+        with patch.object(self.thread, '_get_remote_socket'), \
+                patch.object(self.thread, '_return_remote_socket'):
+            self.thread._get_remote_metadata("host1", 5555)
+
+        # A restarted worker loads the metadata without a handshake.
+        thread = KVCacheRecvingThread(
+            tp_rank=0,
+            tp_size=4,
+            engine=self.engine,
+            local_engine_id="local_engine",
+            local_handshake_port=5555,
+            local_kv_caches_base_addr=[0x1000, 0x2000],
+            block_len=[1024, 2048],
+            ready_event=self.ready_event,
+            vllm_config=self.vllm_config,
+            kv_caches=self.kv_caches,
+            metadata_cache=AgentMetadataCache(cache_dir.name))
+        req_meta = {
+            "remote_block_ids": [3, 4],
+            "local_block_ids": [1, 2],
+            "remote_engine_id": "remote_engine",
+            "remote_host": "host1",
+            "remote_handshake_port": 5555,
+            "num_need_pulls": 1,
+        }
+        with patch.object(thread, '_get_remote_metadata') as mock_get_meta:
+            session_id, _, _ = thread._prepare_pull(req_meta)
+            mock_get_meta.assert_not_called()
+        self.assertEqual(session_id, "host1:9090")
+        self.assertEqual(thread.kv_caches_base_addr["remote_engine"][5555],
+                         [0x3000, 0x4000])
+
+        # A failed pull drops the metadata of the engine.
+        thread._on_pull_failed(req_meta)
+        self.assertNotIn(5555, thread.kv_caches_base_addr["remote_engine"])
+        self.assertIsNone(thread.metadata_cache.get("remote_engine",
+                                                    5555))  # type: ignore
+
+    @patch('vllm_ascend.distributed.mooncake_connector.ensure_zmq_send')
+    @patch('vllm_ascend.distributed.mooncake_connector.ensure_zmq_recv')
+    def test_check_remote_agents(self, mock_recv, mock_send):
+        mock_recv.return_value = msgspec.msgpack.encode(self.test_metadata)
+        with patch.object(self.thread, '_get_remote_socket'), \
+                patch.object(self.thread, '_return_remote_socket'):
+            self.thread._get_remote_metadata("host1", 5555)
+            self.thread.transfer_plans[("remote_engine", 5555, 1)] = \
+                MagicMock()
+
+            # An agent that answers with the same layout keeps its plans.
+            self.thread._check_remote_agents()
+            self.assertIn(("remote_engine", 5555, 1),
+                          self.thread.transfer_plans)
+
+            mock_recv.side_effect = RuntimeError("Receive timeout")
+            with patch.object(self.thread,
+                              '_close_remote_sockets') as mock_close:
+                self.thread._check_remote_agents()
+                mock_close.assert_called_once_with("host1", 5555)
+        self.assertEqual(self.thread.remote_engine_ids, {})
+        self.assertNotIn(5555,
+                         self.thread.kv_caches_base_addr["remote_engine"])
+        self.assertEqual(self.thread.transfer_plans, {})
+
+    def test_close_remote_sockets(self):
+        sock = MagicMock()
+        self.thread.remote_sockets["tcp://host1:5555"].append(sock)
+        with patch.object(self.thread, '_close_remote_socket') as mock_close:
+            self.thread._close_remote_sockets("host1", 5555)
+            mock_close.assert_called_once_with(sock)
+        self.assertNotIn("tcp://host1:5555", self.thread.remote_sockets)
 
 
 class TestMainThreadLoop(unittest.TestCase):
@@ -495,6 +673,36 @@ class TestMainThreadLoop(unittest.TestCase):
         mock_handle.assert_called_once_with(test_request)
         self.assertTrue(self.thread.request_queue.empty())
 
+    @patch.object(KVCacheRecvingThread, '_handle_request')
+    @patch.object(KVCacheRecvingThread, '_get_remote_metadata')
+    def test_run_loop_warmup(self, mock_get_meta, mock_handle):
+        mock_get_meta.return_value = "remote_engine"
+        mock_handle.side_effect = \
+            lambda _: self.thread.request_queue.task_done()
+        self.thread.kv_caches_base_addr["remote_engine"][6666] = [0x3000]
+        self.thread.remote_te_port["remote_engine"][6666] = 7777
+        test_request = {"request_id": "req1"}
+
+        # The warm-up runs on the receiving thread, before the requests.
+        self.thread.warmup("localhost", [6666])
+        self.thread.request_queue.put(test_request)
+        self.thread.start()
+        self.thread.request_queue.join()
+
+        mock_get_meta.assert_called_once_with("localhost", 6666)
+        self.engine.batch_transfer_sync_read.assert_called_once_with(
+            "localhost:7777", [0x1000], [0x3000], [1024])
+        mock_handle.assert_called_once_with(test_request)
+
+    @patch.object(KVCacheRecvingThread, '_check_remote_agents')
+    def test_run_loop_checks_remote_agents_when_idle(self, mock_check):
+        checked = threading.Event()
+        mock_check.side_effect = lambda: checked.set()
+        self.thread.health_check_interval = 0.01
+
+        self.thread.start()
+        self.assertTrue(checked.wait(timeout=1.0))
+
 
 class MockVllmConfig:
 
@@ -595,6 +803,14 @@ class TestKVCacheTaskTracker(unittest.TestCase):
         self.assertEqual(len(result_delay), 1)
         self.assertIn("req_2", result_delay)
 
+    def test_expired_requests_are_counted(self):
+        stats = KVTransferStats()
+        tracker = KVCacheTaskTracker(stats)
+        tracker.add_delayed_request("req_1", time.time() - 600)
+        tracker._retrieve_expired_requests()
+        self.assertEqual(stats.collect().reduce()["num_delayed_free_timeouts"],
+                         1)
+
     def test_duplicate_task_update(self):
         self.tracker.update_done_task_count("req1")
         self.tracker.update_done_task_count("req1")
@@ -0,0 +1,39 @@
+from unittest.mock import patch
+
+from vllm_ascend.distributed.mooncake.existence_cache import KeyExistenceCache
+
+
+def test_lookup_and_record():
+    cache = KeyExistenceCache(8)
+    assert cache.lookup(["a", "b"]) == [None, None]
+    cache.record(["a", "b"], [True, False])
+    cache.record_present(["c"])
+    assert cache.lookup(["a", "b", "c", "d"]) == [True, False, True, None]
+
+
+def test_entries_expire():
+    cache = KeyExistenceCache(8, ttl=10.0, negative_ttl=1.0)
+    with patch("time.monotonic", return_value=100.0):
+        cache.record(["present", "absent"], [True, False])
+    with patch("time.monotonic", return_value=102.0):
+        assert cache.lookup(["present", "absent"]) == [True, None]
+    with patch("time.monotonic", return_value=111.0):
+        assert cache.lookup(["present"]) == [None]
+    assert len(cache) == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = KeyExistenceCache(2)
+    cache.record_present(["a", "b"])
+    cache.lookup(["a"])
+    cache.record_present(["c"])
+    assert cache.lookup(["a", "b", "c"]) == [True, None, True]
+
+
+def test_invalidate():
+    cache = KeyExistenceCache(8)
+    cache.record_present(["a", "b", "c"])
+    cache.invalidate(["a"])
+    assert cache.lookup(["a", "b"]) == [None, True]
+    cache.invalidate()
+    assert len(cache) == 0
@@ -7,6 +7,7 @@ import unittest
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import torch
 import zmq
 
@@ -292,9 +293,8 @@ class TestSendingLayerThread(unittest.TestCase):
 
     @patch('torch.npu.synchronize')
     @patch(
-        'vllm_ascend.distributed.mooncake_layerwise_connector.group_concurrent_contiguous'
-    )
-    def test_transfer_kv_cache(self, mock_group, mock_sync):
+        'vllm_ascend.distributed.mooncake_layerwise_connector.contiguous_runs')
+    def test_transfer_kv_cache(self, mock_runs, mock_sync):
         key = torch.zeros((1, 1), dtype=torch.float32)
         value = torch.zeros((1, 1), dtype=torch.float32)
         mock_sync.return_value = None
@@ -313,9 +313,10 @@ class TestSendingLayerThread(unittest.TestCase):
             num_blocks=256,
         )
 
-        mock_group.return_value = (
-            [[10, 11, 12], [20, 21]],  # grouped_remote_block_ids
-            [[5, 6, 7], [8, 9]],  # grouped_local_block_ids
+        mock_runs.return_value = (
+            np.array([10, 20]),  # remote run starts
+            np.array([5, 8]),  # local run starts
+            np.array([3, 2]),  # run lengths
         )
 
         self.engine.batch_transfer_sync_write.return_value = 1
@@ -0,0 +1,217 @@
+import sys
+import threading
+import types
+from unittest.mock import MagicMock
+
+import msgspec
+import numpy as np
+import pytest
+import torch
+import zmq
+
+fake_store = types.ModuleType("mooncake.store")
+fake_store.ReplicateConfig = MagicMock()  # type: ignore[attr-defined]
+sys.modules["mooncake.store"] = fake_store
+fake_engine = types.ModuleType("mooncake.engine")
+fake_engine.TransferEngine = MagicMock()  # type: ignore[attr-defined]
+sys.modules["mooncake.engine"] = fake_engine
+
+from vllm_ascend.distributed.mooncake.config_data import (  # noqa: E402
+    ChunkedTokenDatabase, MooncakeEngineMetadata)
+from vllm_ascend.distributed.mooncake.mooncake_engine import \
+    MooncakeEngine  # noqa: E402
+from vllm_ascend.distributed.mooncake.mooncake_store_connector_v1 import (  # noqa: E402
+    MooncakeLookupClient, MooncakeLookupServer, get_zmq_rpc_path_mooncake)
+
+BLOCK_SIZE = 4
+
+
+@pytest.fixture
+def vllm_config(tmp_path, monkeypatch):
+    monkeypatch.setenv("VLLM_RPC_BASE_PATH", str(tmp_path))
+    config = MagicMock()
+    config.kv_transfer_config.get_from_extra_config.side_effect = \
+        lambda key, default: default
+    return config
+
+
+@pytest.fixture
+def router(vllm_config):
+    ctx = zmq.Context()
+    socket = ctx.socket(zmq.ROUTER)
+    socket.bind(get_zmq_rpc_path_mooncake(vllm_config))
+    socket.setsockopt(zmq.RCVTIMEO, 5000)
+    yield socket
+    socket.close(linger=0)
+    ctx.term()
+
+
+def recv_batch(router):
+    identity, header, payload = router.recv_multipart()
+    batch_id, req_ids, lengths = msgspec.msgpack.decode(header)
+    tokens = np.frombuffer(payload, dtype=np.int64)
+    return identity, batch_id, req_ids, np.split(tokens,
+                                                 np.cumsum(lengths)[:-1])
+
+
+def reply(router, identity, batch_id, results):
+    router.send_multipart((identity, msgspec.msgpack.encode(
+        (batch_id, results))))
+
+
+def test_batch_encoding(vllm_config, router):
+    client = MooncakeLookupClient(vllm_config)
+    client.submit("a", torch.tensor([1, 2, 3]))
+    client.submit("b", torch.tensor([], dtype=torch.int64))
+    client.submit("c", torch.tensor([4, 5]))
+    client.flush()
+    assert not client.queued
+
+    _, batch_id, req_ids, tokens = recv_batch(router)
+    assert req_ids == ["a", "b", "c"]
+    assert [t.tolist() for t in tokens] == [[1, 2, 3], [], [4, 5]]
+    assert client.in_flight == {batch_id: ["a", "b", "c"]}
+    client.close()
+
+
+def test_replies_out_of_order(vllm_config, router):
+    client = MooncakeLookupClient(vllm_config)
+    client.submit("a", torch.tensor([1]))
+    client.flush()
+    client.submit("b", torch.tensor([2]))
+    client.flush()
+    assert client.is_pending("a") and client.is_pending("b")
+    identity, first, _, _ = recv_batch(router)
+    _, second, _, _ = recv_batch(router)
+
+    # The synchronous lookup collects the submitted results on the way.
+    reply(router, identity, second, [20])
+    reply(router, identity, first, [10])
+    thread = threading.Thread(
+        target=lambda: reply(router,
+                             *recv_batch(router)[:2], [30]))
+    thread.start()
+    assert client.lookup(torch.tensor([3]), "c") == 30
+    thread.join()
+
+    assert not client.is_pending("a") and not client.is_pending("b")
+    assert client.pop_result("a") == 10
+    assert client.pop_result("b") == 20
+    assert client.pop_result("a") is None
+    # The result of the synchronous lookup isn't kept.
+    assert not client.results
+    client.close()
+
+
+def test_pop_result_polls_replies(vllm_config, router):
+    client = MooncakeLookupClient(vllm_config)
+    client.submit("a", torch.tensor([1]))
+    assert client.pop_result("a") is None
+    assert client.is_pending("a")
+    client.flush()
+    identity, batch_id, _, _ = recv_batch(router)
+    assert client.pop_result("a") is None
+    reply(router, identity, batch_id, [7])
+    client.socket.poll(5000)
+    assert client.pop_result("a") == 7
+    assert not client.is_pending("a")
+    client.close()
+
+
+def test_discard(vllm_config, router):
+    client = MooncakeLookupClient(vllm_config)
+    client.submit("queued", torch.tensor([1]))
+    client.discard("queued")
+    assert not client.is_pending("queued")
+
+    client.submit("a", torch.tensor([1]))
+    client.submit("b", torch.tensor([2]))
+    client.flush()
+    client.discard("a")
+    assert not client.is_pending("a")
+    assert client.is_pending("b")
+    identity, batch_id, _, _ = recv_batch(router)
+    reply(router, identity, batch_id, [1, 2])
+    client.socket.poll(5000)
+    assert client.pop_result("b") == 2
+    assert not client.results
+    client.close()
+
+
+def test_server_answers_batches(vllm_config):
+    engine = MagicMock()
+    engine.lookup_scheduler.side_effect = \
+        lambda tokens, use_layerwise, req_id: int(tokens.sum())
+    server = MooncakeLookupServer(engine, vllm_config, False)
+    client = MooncakeLookupClient(vllm_config)
+    try:
+        assert client.lookup_batch(
+            [torch.tensor([1, 2]),
+             torch.tensor([3]),
+             torch.tensor([4, 5, 6])], ["a", None, "c"]) == [3, 3, 15]
+        assert client.lookup_batch([]) == []
+        assert not client.results
+    finally:
+        client.close()
+        server.close()
+
+
+def make_engine(present_keys, num_layers=2, tp_size=2):
+    engine = object.__new__(MooncakeEngine)
+    engine.metadata = MooncakeEngineMetadata("model", tp_size, 0,
+                                             torch.bfloat16,
+                                             (num_layers, 2, BLOCK_SIZE, 1, 8),
+                                             BLOCK_SIZE)
+    engine.token_database = ChunkedTokenDatabase(engine.metadata)
+    engine.num_layers = num_layers
+    engine.tp_size = tp_size
+    engine.m_store = MagicMock()
+    engine.m_store.batch_exists.side_effect = lambda keys: [
+        int(key in present_keys) for key in keys
+    ]
+    return engine
+
+
+def chunk_keys(engine, tokens):
+    return [key for _, _, key in engine.token_database.process_tokens(tokens)]
+
+
+def test_lookup_prefix_hits():
+    tokens = list(range(10))
+    engine = make_engine(set())
+    keys = chunk_keys(engine, tokens)
+    assert len(keys) == 3
+
+    # Chunks 0 and 2 are stored by worker 0, chunk 1 by both workers.
+    present = {keys[0].to_string(), keys[1].to_string(), keys[2].to_string()}
+    keys[1].worker_id = 1
+    present.add(keys[1].to_string())
+    engine = make_engine(present)
+    assert engine.lookup(tokens, False) == 10
+    # The scheduler needs the chunks of all the workers.
+    assert engine.lookup_scheduler(tokens, False) == 0
+    keys[0].worker_id = 1
+    present.add(keys[0].to_string())
+    engine = make_engine(present)
+    assert engine.lookup_scheduler(tokens, False) == 2 * BLOCK_SIZE
+    engine.m_store.batch_exists.assert_called_once()
+
+
+def test_lookup_prefix_hits_layerwise():
+    tokens = list(range(8))
+    keys = chunk_keys(make_engine(set()), tokens)
+    present = {key.to_string() for key in keys[0].split_layers(2)}
+    present.add(keys[1].split_layers(2)[0].to_string())
+    engine = make_engine(present)
+    # The second chunk misses its second layer.
+    assert engine.lookup_scheduler(tokens, True) == BLOCK_SIZE
+    present.add(keys[1].split_layers(2)[1].to_string())
+    assert make_engine(present).lookup(tokens, True) == 2 * BLOCK_SIZE
+
+
+def test_lookup_store_failure():
+    engine = make_engine(set())
+    engine.m_store.batch_exists.side_effect = RuntimeError("down")
+    assert engine.lookup(list(range(8)), False) == 0
+    assert engine.lookup(list(range(8)), True) == 0
+    assert engine.lookup([], False) == 0
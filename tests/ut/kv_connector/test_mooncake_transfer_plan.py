@@ -0,0 +1,74 @@
+import numpy as np
+
+from vllm_ascend.distributed.mooncake.transfer_plan import (KVTransferPlan,
+                                                            clip_runs,
+                                                            contiguous_runs)
+
+
+def test_contiguous_runs():
+    src_starts, dst_starts, run_lens = contiguous_runs(
+        [1, 2, 3, 5, 6, 9], [10, 11, 13, 14, 15, 16])
+    assert src_starts.tolist() == [1, 3, 5, 9]
+    assert dst_starts.tolist() == [10, 13, 14, 16]
+    assert run_lens.tolist() == [2, 1, 2, 1]
+
+
+def test_contiguous_runs_src_only():
+    src_starts, dst_starts, run_lens = contiguous_runs([4, 5, 6, 8])
+    assert src_starts.tolist() == [4, 8]
+    assert dst_starts.tolist() == [4, 8]
+    assert run_lens.tolist() == [3, 1]
+
+
+def test_contiguous_runs_empty():
+    src_starts, dst_starts, run_lens = contiguous_runs([], [])
+    assert src_starts.size == dst_starts.size == run_lens.size == 0
+
+
+def test_clip_runs():
+    offsets, lengths = clip_runs(np.array([100, 200, 300, 50]), 350)
+    assert offsets.tolist() == [0, 100, 300, 350]
+    assert lengths.tolist() == [100, 200, 50, 0]
+
+
+def test_build_matches_per_layer_loop():
+    src_bases = [0x1000, 0x9000, 0x20000, 0x28000]
+    dst_bases = [0x100000, 0x180000, 0x200000, 0x280000]
+    block_lens = [1024, 2048]
+    num_need_pulls, offset = 2, 1
+    local_block_ids, remote_block_ids = [1, 2, 3, 7], [4, 5, 6, 9]
+
+    plan = KVTransferPlan(src_bases,
+                          dst_bases,
+                          src_block_lens=block_lens,
+                          dst_block_lens=[
+                              block_len // num_need_pulls
+                              for block_len in block_lens
+                          ])
+    runs = contiguous_runs(local_block_ids, remote_block_ids)
+    src_list, dst_list, length_list = plan.build(*runs, src_offset=offset)
+
+    expected: tuple[list[int], list[int], list[int]] = ([], [], [])
+    for k, (src_base, dst_base) in enumerate(zip(src_bases, dst_bases)):
+        block_len = block_lens[k % 2]
+        inner_block_len = block_len // num_need_pulls
+        for local_start, remote_start, run_len in [(1, 4, 3), (7, 9, 1)]:
+            expected[0].append(src_base + local_start * block_len +
+                               offset * inner_block_len)
+            expected[1].append(dst_base + remote_start * inner_block_len)
+            expected[2].append(run_len * inner_block_len)
+    assert (src_list, dst_list, length_list) == expected
+    assert all(isinstance(addr, int) for addr in src_list)
+
+
+def test_build_selected_caches():
+    plan = KVTransferPlan([1000, 2000, 3000, 4000], [5000, 6000, 7000, 8000],
+                          src_block_lens=[10],
+                          dst_block_lens=[10])
+    src_list, dst_list, length_list = plan.build(np.array([1]),
+                                                 np.array([2]),
+                                                 np.array([3]),
+                                                 caches=slice(2, 4))
+    assert src_list == [3010, 4010]
+    assert dst_list == [7020, 8020]
+    assert length_list == [30, 30]
@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock, patch
+
+from vllm.distributed.kv_transfer.kv_connector.v1.offloading_connector import (
+    OffloadingConnector, OffloadingConnectorMetadata)
+
+from vllm_ascend.distributed.offloading_connector import NPUOffloadingConnector
+from vllm_ascend.kv_offload.npu import NPUOffloadingSpec
+
+
+def make_connector(spec):
+    connector = object.__new__(NPUOffloadingConnector)
+    connector.connector_worker = MagicMock()
+    connector.connector_worker.spec = spec
+    connector._connector_metadata = OffloadingConnectorMetadata({}, {})
+    return connector
+
+
+def test_transfers_are_flushed_after_submission():
+    spec = MagicMock(spec=NPUOffloadingSpec)
+    connector = make_connector(spec)
+    worker = connector.connector_worker
+    calls = MagicMock()
+    calls.attach_mock(worker.start_load_kv, "start_load_kv")
+    calls.attach_mock(worker.start_store_kv, "start_store_kv")
+    calls.attach_mock(spec.flush, "flush")
+
+    connector.start_load_kv(MagicMock())
+    connector.wait_for_save()
+    assert [call[0] for call in calls.mock_calls
+            ] == ["start_load_kv", "flush", "start_store_kv", "flush"]
+
+
+def test_other_specs_are_not_flushed():
+    spec = MagicMock()
+    connector = make_connector(spec)
+    connector.start_load_kv(MagicMock())
+    connector.wait_for_save()
+    spec.flush.assert_not_called()
+
+
+def test_transfers_are_deferred():
+    spec = object.__new__(NPUOffloadingSpec)
+    spec.defer_transfers = False
+
+    def init(connector, vllm_config, role):
+        connector.connector_worker = MagicMock()
+        connector.connector_worker.spec = spec
+
+    with patch.object(OffloadingConnector, "__init__", init):
+        NPUOffloadingConnector(MagicMock(), MagicMock())
+    assert spec.defer_transfers
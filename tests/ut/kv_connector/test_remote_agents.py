@@ -0,0 +1,59 @@
+from vllm.config import KVTransferConfig
+
+from vllm_ascend.distributed.remote_agents import (AgentMetadataCache,
+                                                   RemoteAgent,
+                                                   get_remote_agents)
+
+
+def make_kv_transfer_config(extra_config):
+    return KVTransferConfig(kv_connector="MooncakeConnector",
+                            kv_role="kv_consumer",
+                            kv_connector_extra_config=extra_config)
+
+
+def test_get_remote_agents():
+    assert get_remote_agents(None) == []
+    assert get_remote_agents(make_kv_transfer_config({})) == []
+    kv_transfer_config = make_kv_transfer_config({
+        "remote_agents": [
+            "10.0.0.1:30000",
+            {
+                "host": "10.0.0.2",
+                "port": "30100",
+                "tp_size": 4
+            },
+        ]
+    })
+    assert get_remote_agents(kv_transfer_config) == [
+        RemoteAgent("10.0.0.1", 30000),
+        RemoteAgent("10.0.0.2", 30100, 4),
+    ]
+
+
+def test_agent_metadata_cache(tmp_path):
+    assert AgentMetadataCache.from_config(make_kv_transfer_config({})) is None
+    cache = AgentMetadataCache.from_config(
+        make_kv_transfer_config({"agent_metadata_cache_dir": str(tmp_path)}))
+    assert cache is not None
+
+    metadata = {"host": "10.0.0.1", "te_rpc_port": 7777}
+    assert cache.get("engine/1", 6666) is None
+    cache.put("engine/1", 6666, metadata)
+    cache.put("engine/1", 6667, metadata)
+    cache.put("engine2", 6666, metadata)
+    # The cache survives the worker.
+    cache = AgentMetadataCache(str(tmp_path))
+    assert cache.get("engine/1", 6666) == metadata
+    assert cache.get("engine/1", 6668) is None
+
+    cache.invalidate("engine/1")
+    assert cache.get("engine/1", 6666) is None
+    assert cache.get("engine/1", 6667) is None
+    assert cache.get("engine2", 6666) == metadata
+
+
+def test_agent_metadata_cache_ignores_corrupted_files(tmp_path):
+    cache = AgentMetadataCache(str(tmp_path))
+    cache.put("engine", 6666, {"host": "10.0.0.1"})
+    (tmp_path / "engine" / "6666.json").write_text("{")
+    assert cache.get("engine", 6666) is None
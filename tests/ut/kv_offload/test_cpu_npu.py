@@ -0,0 +1,84 @@
+from contextlib import nullcontext
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import torch
+from vllm.v1.kv_offload.mediums import CPULoadStoreSpec, GPULoadStoreSpec
+
+from vllm_ascend.kv_offload.cpu_npu import (CpuNpuOffloadingHandler,
+                                            expand_block_ids)
+
+
+def test_expand_block_ids():
+    output = np.empty(12, dtype=np.int64)
+    expand_block_ids(np.array([0, 1, 3]), 4, output)
+    assert output.tolist() == [0, 1, 2, 3, 4, 5, 6, 7, 12, 13, 14, 15]
+
+    output = np.empty(10, dtype=np.int64)
+    expand_block_ids(np.array([0, 1, 3]), 4, output, skip_count=2)
+    assert output.tolist() == [2, 3, 4, 5, 6, 7, 12, 13, 14, 15]
+
+
+@patch("vllm_ascend.kv_offload.cpu_npu.is_pin_memory_available",
+       return_value=False)
+@patch("torch.npu", create=True)
+def test_jobs_are_coalesced(mock_npu, _):
+    mock_npu.stream.return_value = nullcontext()
+    gpu_caches = {f"layer{i}": torch.zeros(2, 8, 4, 1, 2) for i in range(2)}
+    handler = CpuNpuOffloadingHandler(gpu_block_size=4,
+                                      cpu_block_size=8,
+                                      num_cpu_blocks=4,
+                                      gpu_caches=gpu_caches,
+                                      attn_backends={},
+                                      defer_launch=True)
+    mock_npu.Event.reset_mock()
+    swap_blocks = MagicMock()
+    with patch("torch.ops._C_ascend", create=True) as ops:
+        ops.swap_blocks = swap_blocks
+        assert handler.transfer_async(
+            0, (GPULoadStoreSpec([1, 2]), CPULoadStoreSpec([0])))
+        assert handler.transfer_async(
+            1, (GPULoadStoreSpec([5]), CPULoadStoreSpec([3])))
+        assert handler.transfer_async(
+            2, (CPULoadStoreSpec([2]), GPULoadStoreSpec([6, 7])))
+        swap_blocks.assert_not_called()
+
+        handler.flush()
+
+    # One swap per layer, key and value, and direction.
+    assert swap_blocks.call_count == 2 * 2 * 2
+    d2h_mapping = swap_blocks.call_args_list[0].args[2]
+    assert d2h_mapping.tolist() == [[1, 0], [2, 1], [5, 7]]
+    h2d_mapping = swap_blocks.call_args_list[-1].args[2]
+    assert h2d_mapping.tolist() == [[4, 6], [5, 7]]
+    # The events are taken from the pool.
+    mock_npu.Event.assert_not_called()
+
+    finished = handler.get_finished()
+    assert sorted(finished) == [(0, True), (1, True), (2, True)]
+    assert handler.get_finished() == []
+
+
+@patch("vllm_ascend.kv_offload.cpu_npu.is_pin_memory_available",
+       return_value=False)
+@patch("torch.npu", create=True)
+def test_jobs_are_launched_when_not_deferred(mock_npu, _):
+    mock_npu.stream.return_value = nullcontext()
+    handler = CpuNpuOffloadingHandler(
+        gpu_block_size=4,
+        cpu_block_size=8,
+        num_cpu_blocks=4,
+        gpu_caches={"layer0": torch.zeros(2, 8, 4, 1, 2)},
+        attn_backends={})
+    swap_blocks = MagicMock()
+    with patch("torch.ops._C_ascend", create=True) as ops:
+        ops.swap_blocks = swap_blocks
+        assert handler.transfer_async(
+            0, (GPULoadStoreSpec([1, 2]), CPULoadStoreSpec([0])))
+        assert swap_blocks.call_count == 2
+        assert handler.transfer_async(
+            1, (CPULoadStoreSpec([2]), GPULoadStoreSpec([6, 7])))
+        assert swap_blocks.call_count == 4
+
+    assert handler.pending_jobs == {False: [], True: []}
+    assert sorted(handler.get_finished()) == [(0, True), (1, True)]
@@ -0,0 +1,50 @@
+import pytest
+import torch
+
+from vllm_ascend.kv_offload.kv_quant import (dequantize_kv_blocks,
+                                             get_kv_offload_dtype,
+                                             get_scale_shape,
+                                             quantize_kv_blocks)
+
+BLOCK_SHAPE = (3, 16, 2, 64)
+
+
+@pytest.mark.parametrize("name", ["int8", "fp8"])
+@pytest.mark.parametrize("granularity", ["token", "block"])
+def test_round_trip(name, granularity):
+    torch.manual_seed(0)
+    blocks = torch.randn(BLOCK_SHAPE, dtype=torch.bfloat16)
+    dtype = get_kv_offload_dtype(name)
+    quantized, scale = quantize_kv_blocks(blocks, dtype, granularity)
+    assert quantized.dtype == dtype
+    assert scale.shape == get_scale_shape(blocks.shape, granularity)
+
+    restored = dequantize_kv_blocks(quantized, scale, torch.bfloat16)
+    assert restored.dtype == torch.bfloat16
+    error = (restored.float() - blocks.float()).abs().max()
+    # int8 rounds to half a step, fp8 e4m3 keeps 3 mantissa bits.
+    bound = 0.5 / 127 if name == "int8" else 2**-4
+    assert error <= bound * blocks.float().abs().max() + 1e-2
+
+
+def test_zero_blocks_stay_zero():
+    blocks = torch.zeros(BLOCK_SHAPE, dtype=torch.float16)
+    quantized, scale = quantize_kv_blocks(blocks, torch.int8)
+    restored = dequantize_kv_blocks(quantized, scale, torch.float16)
+    assert torch.equal(restored, blocks)
+
+
+def test_token_scales_are_per_head_vector():
+    blocks = torch.ones(BLOCK_SHAPE)
+    blocks[0, 0, 0] *= 100
+    quantized, scale = quantize_kv_blocks(blocks, torch.int8, "token")
+    assert scale[0, 0, 0, 0] == pytest.approx(100 / 127)
+    assert scale[0, 1, 0, 0] == pytest.approx(1 / 127)
+    assert (quantized == 127).all()
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        get_kv_offload_dtype("int4")
+    with pytest.raises(ValueError):
+        get_scale_shape(torch.Size(BLOCK_SHAPE), "channel")
@@ -0,0 +1,60 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# This file is a part of the vllm-ascend project.
+#
+import numpy as np
+
+from vllm_ascend.spec_decode.draft_length import DraftLengthPolicy
+
+
+def test_update_counts_accepted_and_rejected():
+    policy = DraftLengthPolicy(3, 0.3, decay=0.5)
+    accepted = np.zeros(4, dtype=np.float32)
+    rejected = np.zeros(4, dtype=np.float32)
+
+    policy.update(accepted, rejected, np.array([0, 2]), np.array([3, 3]),
+                  np.array([4, 2]))
+    np.testing.assert_allclose(accepted, [3, 0, 1, 0])
+    np.testing.assert_allclose(rejected, [0, 0, 1, 0])
+
+    policy.update(accepted, rejected, np.array([2]), np.array([2]),
+                  np.array([3]))
+    np.testing.assert_allclose(accepted, [3, 0, 2.5, 0])
+    np.testing.assert_allclose(rejected, [0, 0, 0.5, 0])
+
+
+def test_get_draft_lengths():
+    policy = DraftLengthPolicy(4, 0.3)
+    # The acceptance rates are 1, 0.9, 0.5 and 0.1.
+    accepted = np.array([0, 8, 1, 0], dtype=np.float32)
+    rejected = np.array([0, 1, 2, 9], dtype=np.float32)
+
+    lengths = policy.get_draft_lengths(accepted, rejected)
+    np.testing.assert_array_equal(lengths, [4, 4, 1, 1])
+
+
+def test_get_draft_lengths_fills_graph_padding():
+    policy = DraftLengthPolicy(4, 0.3)
+    # The acceptance rates are 0.5, 0.6 and 0.2.
+    accepted = np.array([1, 0.5, 0], dtype=np.float32)
+    rejected = np.array([2, 1, 4], dtype=np.float32)
+    assert policy.get_draft_lengths(accepted, rejected).tolist() == [1, 2, 1]
+
+    # The step of 7 tokens is padded to 8, the spare token is the second draft
+    # token of the first request, accepted with probability 0.25.
+    policy.pad_num_tokens = lambda n: (n + 7) // 8 * 8
+    assert policy.get_draft_lengths(accepted, rejected).tolist() == [2, 2, 1]
+
+    # The requests can't draft more than the speculative tokens.
+    policy.pad_num_tokens = lambda n: 64
+    assert policy.get_draft_lengths(accepted, rejected).tolist() == [4, 4, 4]
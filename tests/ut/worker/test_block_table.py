@@ -0,0 +1,105 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# This file is a part of the vllm-ascend project.
+#
+from unittest.mock import patch
+
+import torch
+
+from vllm_ascend.worker.block_table import BlockTable
+
+MAX_NUM_REQS = 8
+MAX_NUM_BLOCKS_PER_REQ = 16
+
+
+def _make_block_table() -> BlockTable:
+    return BlockTable(block_size=128,
+                      max_num_reqs=MAX_NUM_REQS,
+                      max_num_blocks_per_req=MAX_NUM_BLOCKS_PER_REQ,
+                      max_num_batched_tokens=1024,
+                      pin_memory=False,
+                      device=torch.device("cpu"))
+
+
+def _assert_in_sync(block_table: BlockTable, num_reqs: int):
+    for row in range(num_reqs):
+        num_blocks = block_table.num_blocks_per_row[row]
+        assert torch.equal(block_table.block_table[row, :num_blocks],
+                           block_table.block_table_cpu[row, :num_blocks])
+
+
+def test_commit_uploads_dirty_entries_only():
+    block_table = _make_block_table()
+    for row in range(MAX_NUM_REQS):
+        block_table.add_row(list(range(row * 4 + 1, row * 4 + 4)), row)
+    block_table.commit_block_table(MAX_NUM_REQS)
+    _assert_in_sync(block_table, MAX_NUM_REQS)
+    assert not block_table.dirty_col_end.any()
+
+    block_table.append_row([100], 2)
+    block_table.move_row(7, 5)
+    assert block_table.dirty_col_start[2] == 3
+    assert block_table.dirty_col_end[2] == 4
+    assert block_table.dirty_col_start[5] == 0
+    assert block_table.dirty_col_end[5] == 3
+
+    with patch.object(block_table.block_table, "copy_") as mock_copy:
+        block_table.commit_block_table(MAX_NUM_REQS)
+    mock_copy.assert_not_called()
+    _assert_in_sync(block_table, MAX_NUM_REQS)
+    assert block_table.block_table[2, 3] == 100
+    assert not block_table.dirty_col_end.any()
+
+    # Nothing changed since the last upload.
+    with patch.object(block_table, "block_table") as mock_table:
+        block_table.commit_block_table(MAX_NUM_REQS)
+    mock_table.copy_.assert_not_called()
+    mock_table.view.assert_not_called()
+
+
+def test_commit_falls_back_to_full_copy():
+    block_table = _make_block_table()
+    for row in range(MAX_NUM_REQS):
+        block_table.add_row([row + 1], row)
+    block_table.commit_block_table(MAX_NUM_REQS)
+
+    for row in range(MAX_NUM_REQS):
+        block_table.append_row([row + 10], row)
+    with patch.object(block_table, "block_table") as mock_table:
+        block_table.commit_block_table(MAX_NUM_REQS)
+    mock_table.__getitem__.return_value.copy_.assert_called_once()
+    mock_table.view.assert_not_called()
+
+
+def test_rows_past_num_reqs_stay_dirty():
+    block_table = _make_block_table()
+    block_table.add_row([1, 2], 0)
+    block_table.add_row([3, 4], 6)
+    block_table.swap_row(0, 1)
+    block_table.commit_block_table(4)
+
+    _assert_in_sync(block_table, 4)
+    assert block_table.dirty_col_end[6] == 2
+    assert block_table.block_table[6, 0] == 0
+
+    block_table.commit_block_table(7)
+    _assert_in_sync(block_table, 7)
+    assert block_table.block_table[6, 1] == 4
+
+
+def test_clear_resets_dirty_rows():
+    block_table = _make_block_table()
+    block_table.add_row([1, 2], 0)
+    block_table.clear()
+    assert not block_table.dirty_col_end.any()
+    assert (block_table.dirty_col_start == MAX_NUM_BLOCKS_PER_REQ).all()
@@ -13,9 +13,12 @@
 
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
+import torch
 
 from vllm_ascend.ascend_forward_context import MoECommType
+from vllm_ascend.spec_decode.draft_length import DraftLengthPolicy
 from vllm_ascend.utils import AscendSocVersion
 from vllm_ascend.worker.model_runner_v1 import NPUModelRunner
 
@@ -109,3 +112,96 @@ def test_select_moe_comm_method_unsupported_soc():
          pytest.raises(ValueError, match=f"Unsupported soc_version: {unsupported_soc}"):
 
         NPUModelRunner._select_moe_comm_method(mock_runner, 100, False)
+
+
+def test_write_sampled_token_ids():
+    """
+    Tests that _write_sampled_token_ids appends the flattened sampled tokens
+    to the token ids of their requests and skips the requests without any.
+    """
+    mock_runner = MagicMock(spec=NPUModelRunner)
+    mock_runner.arange_np = np.arange(16, dtype=np.int32)
+    mock_runner.model_config = MagicMock(max_model_len=16)
+    mock_runner._get_cumsum_and_arange = \
+        lambda num_tokens: NPUModelRunner._get_cumsum_and_arange(
+            mock_runner, num_tokens)
+    input_batch = MagicMock()
+    input_batch.token_ids_cpu = np.zeros((4, 16), dtype=np.int32)
+    input_batch.num_tokens_no_spec = np.array([5, 9, 7, 3], dtype=np.int32)
+    # The second request has draft tokens, its num_tokens is kept as it is.
+    input_batch.num_tokens = np.array([5, 11, 7, 3], dtype=np.int32)
+    mock_runner.input_batch = input_batch
+
+    NPUModelRunner._write_sampled_token_ids(
+        mock_runner, np.array([2, 0, 1], dtype=np.int32),
+        np.array([11, 12, 13], dtype=np.int32))
+
+    assert input_batch.token_ids_cpu[0, 5:7].tolist() == [11, 12]
+    assert input_batch.token_ids_cpu[2, 7] == 13
+    assert not input_batch.token_ids_cpu[1].any()
+    assert input_batch.num_tokens_no_spec.tolist() == [7, 9, 8, 3]
+    assert input_batch.num_tokens.tolist() == [7, 11, 8, 3]
+
+    with pytest.raises(AssertionError, match="exceed the max model length"):
+        NPUModelRunner._write_sampled_token_ids(
+            mock_runner, np.array([0, 8], dtype=np.int32),
+            np.arange(8, dtype=np.int32))
+
+
+def test_take_draft_token_ids_truncates_drafts():
+    """
+    Tests that take_draft_token_ids only returns the draft tokens each
+    request is expected to accept.
+    """
+    mock_runner = MagicMock(spec=NPUModelRunner)
+    mock_runner.draft_length_policy = DraftLengthPolicy(3, 0.3)
+    input_batch = MagicMock()
+    input_batch.req_ids = ["a", "b"]
+    input_batch.num_reqs = 2
+    # The acceptance rates are 1 and 0.1.
+    input_batch.num_draft_accepted_cpu = np.array([0, 0, 5], dtype=np.float32)
+    input_batch.num_draft_rejected_cpu = np.array([0, 9, 5], dtype=np.float32)
+    mock_runner.input_batch = input_batch
+    mock_runner._draft_token_ids = torch.tensor([[1, 2, 3], [4, 5, 6]])
+
+    draft_token_ids = NPUModelRunner.take_draft_token_ids(mock_runner)
+
+    assert draft_token_ids.req_ids == ["a", "b"]
+    assert draft_token_ids.draft_token_ids == [[1, 2, 3], [4]]
+    assert mock_runner._draft_token_ids is None
+
+    mock_runner.draft_length_policy = None
+    mock_runner._draft_token_ids = [[1, 2, 3], [4, 5, 6]]
+    draft_token_ids = NPUModelRunner.take_draft_token_ids(mock_runner)
+    assert draft_token_ids.draft_token_ids == [[1, 2, 3], [4, 5, 6]]
+
+
+def test_update_draft_acceptance():
+    """
+    Tests that _update_draft_acceptance counts the accepted and rejected
+    draft tokens of the verified requests only.
+    """
+    mock_runner = MagicMock(spec=NPUModelRunner)
+    mock_runner.draft_length_policy = DraftLengthPolicy(3, 0.3, decay=0.5)
+    input_batch = MagicMock()
+    input_batch.req_id_to_index = {"a": 0, "b": 1, "c": 2, "d": 3}
+    input_batch.num_draft_accepted_cpu = np.ones(4, dtype=np.float32)
+    input_batch.num_draft_rejected_cpu = np.ones(4, dtype=np.float32)
+    mock_runner.input_batch = input_batch
+    # "a" accepts all of its draft tokens, "b" rejects its second one, the
+    # sample of the partial prefill "c" is discarded and "d" has no draft.
+    scheduler_output = MagicMock()
+    scheduler_output.scheduled_spec_decode_tokens = {
+        "a": [1, 2, 3],
+        "b": [4, 5, 6],
+        "c": [7],
+        "d": [],
+    }
+
+    NPUModelRunner._update_draft_acceptance(
+        mock_runner, scheduler_output, np.array([4, 2, 0, 1], dtype=np.int32))
+
+    np.testing.assert_allclose(input_batch.num_draft_accepted_cpu,
+                               [3.5, 1.5, 1, 1])
+    np.testing.assert_allclose(input_batch.num_draft_rejected_cpu,
+                               [0.5, 1.5, 1, 1])
@@ -63,6 +63,14 @@ class AscendConfig:
         self.gate_eplb = additional_config.get("gate_eplb", False)
         self.num_wait_worker_iterations = additional_config.get(
             "num_wait_worker_iterations", 30)
+        self.eplb_migration_budget_mb = additional_config.get(
+            "eplb_migration_budget_mb", 0)
+        self.eplb_load_forecaster = additional_config.get(
+            "eplb_load_forecaster", None)
+        self.eplb_min_rebalance_gain = additional_config.get(
+            "eplb_min_rebalance_gain", 0.0)
+        self.eplb_load_trace_dir = additional_config.get(
+            "eplb_load_trace_dir", None)
         self.chunked_prefill_for_mla = additional_config.get(
             "chunked_prefill_for_mla", False)
         self.enable_shared_expert_dp = additional_config.get(
@@ -130,6 +138,15 @@ class AscendConfig:
                     "Only support P node tp size lagger then D node tp size")
         self.SLO_limits_for_dynamic_batch = additional_config.get(
             "SLO_limits_for_dynamic_batch", -1)
+        self.dynamic_batch_online_calibration = additional_config.get(
+            "dynamic_batch_online_calibration", False)
+        self.dynamic_batch_profile_table = additional_config.get(
+            "dynamic_batch_profile_table", None)
+        self.adaptive_draft_token_cost = additional_config.get(
+            "adaptive_draft_token_cost", 0.0)
+        if not 0 <= self.adaptive_draft_token_cost < 1:
+            raise AssertionError(
+                "adaptive_draft_token_cost should be in the range [0, 1)")
 
 
 class TorchairGraphConfig:
@@ -12,20 +12,28 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from typing import Optional
+
 import torch
 
 
-def _generate_attn_mask(max_seq_len, dtype):
+def _get_mask_value(dtype: torch.dtype) -> float:
+    # Currently for fp16 dtype, the mask value should be set to -inf.
+    # TODO: Eliminate this part in the future.
+    return float('-inf') if dtype == torch.float16 else 1
+
+
+def _generate_attn_mask(max_seq_len, dtype, device=None):
     # Construct lower triangle matrix.
     mask_flag = torch.ones((max_seq_len, max_seq_len),
-                           dtype=torch.bool).tril_()
+                           dtype=torch.bool,
+                           device=device).tril_()
     # Create upper triangle matrix used to mark mask positions.
     mask_flag = ~mask_flag
-    # Currently for fp16 dtype, the mask value should be set to -inf.
-    # TODO: Eliminate this part in the future.
-    mask_value = float('-inf') if dtype == torch.float16 else 1
-    attn_mask = torch.zeros(size=(max_seq_len, max_seq_len), dtype=dtype) \
-        .masked_fill_(mask_flag, mask_value)
+    mask_value = _get_mask_value(dtype)
+    attn_mask = torch.zeros(size=(max_seq_len, max_seq_len),
+                            dtype=dtype,
+                            device=device).masked_fill_(mask_flag, mask_value)
     return attn_mask
 
 
@@ -45,8 +53,17 @@ class AttentionMaskBuilder:
 
         self._seq_len_cached = attn_mask.shape[0]
         self.attn_mask_cache = attn_mask
+        self._mask_value = _get_mask_value(dtype)
         self.device = device
-        self.pooling_mask = None
+        # One prefill mask per (device, dtype), built on the device and grown
+        # geometrically, but not past max_seq_len unless a longer sequence
+        # needs it. The mask of a step is sliced from it on the device. The
+        # KV cache profiling does not account for them.
+        self._max_seq_len = max_seq_len
+        self._device_masks: dict[tuple[torch.device, torch.dtype],
+                                 torch.Tensor] = {}
+        self._pooling_masks: dict[torch.device, torch.Tensor] = {}
+        self._chunked_prefill_bool_mask: Optional[torch.Tensor] = None
         if torch.version.cann.startswith("8.3"):
             assigned_mask_dim = 2048
             self.chunked_prefill_attn_mask = torch.triu(
@@ -69,18 +86,20 @@ class AttentionMaskBuilder:
     def get_attn_mask(self, max_seq_len: int, dtype: torch.dtype,
                       device: torch.device):
         if max_seq_len == 2048 and torch.version.cann.startswith("8.3"):
-            return self.chunked_prefill_attn_mask.to(torch.bool)
-        self._update_attn_cache(max_seq_len, dtype)
-        return self.attn_mask_cache[:max_seq_len, :max_seq_len].contiguous(
-        ).to(device, non_blocking=True)
+            if self._chunked_prefill_bool_mask is None:
+                self._chunked_prefill_bool_mask = \
+                    self.chunked_prefill_attn_mask.to(torch.bool)
+            return self._chunked_prefill_bool_mask
+        return self._get_device_mask(max_seq_len, dtype, device)
 
     def get_pooling_mask(self, device):
-        if self.pooling_mask is None:
+        pooling_mask = self._pooling_masks.get(device)
+        if pooling_mask is None:
             # the compressed attention mask for npu_fusion_attention sparse mode 4
-            self.pooling_mask = torch.triu(torch.ones(
-                2048, 2048), diagonal=1).to(torch.bool).to(device,
-                                                           non_blocking=True)
-        return self.pooling_mask
+            pooling_mask = torch.triu(torch.ones(2048, 2048, device=device),
+                                      diagonal=1).to(torch.bool)
+            self._pooling_masks[device] = pooling_mask
+        return pooling_mask
 
     def get_splitfuse_attn_mask(
         self,
@@ -95,21 +114,37 @@ class AttentionMaskBuilder:
             if dtype not in [torch.float16, torch.bfloat16]:
                 raise ValueError(
                     "splitfuse_attn_mask now only supports bf16 and fp16")
-            max_seq_len = max(seq_lens, default=0)
-            self._update_attn_cache(max_seq_len, dtype)
+            max_seq_len = int(seq_lens.max()) if seq_lens.numel() > 0 else 0
             # FIXME: Currently the mask value of chunked-prefill situation and Prefill-Only situation
             # is not the same. Fix this in the future when kernel is ready.
             mask_scale_factor = AttentionMaskBuilder.get_mask_scale_factor(
                 dtype)
-            attn_mask = torch.index_select(self.attn_mask_cache,
-                                           dim=0,
-                                           index=position)[:, :max_seq_len]
-            attn_mask *= mask_scale_factor
-            return attn_mask.contiguous().to(device, non_blocking=True)
+            # Row i of the causal mask masks the columns past position[i], the
+            # rows are built on the device rather than gathered from the cache.
+            position = position.to(device, non_blocking=True)
+            mask_flag = torch.arange(
+                max_seq_len,
+                device=device).unsqueeze(0) > position.unsqueeze(1)
+            attn_mask = torch.zeros(mask_flag.shape,
+                                    dtype=dtype,
+                                    device=device)
+            return attn_mask.masked_fill_(mask_flag,
+                                          self._mask_value * mask_scale_factor)
 
-    def _update_attn_cache(self, seqlen: int, dtype: torch.dtype):
-        if seqlen > self._seq_len_cached:
-            self._seq_len_cached = seqlen
-            self.attn_mask_cache = _generate_attn_mask(seqlen, dtype)
-        if self.attn_mask_cache.dtype != dtype:
-            self.attn_mask_cache = self.attn_mask_cache.to(dtype)
+    def _get_device_mask(self, seqlen: int, dtype: torch.dtype,
+                         device: torch.device) -> torch.Tensor:
+        key = (device, dtype)
+        device_mask = self._device_masks.get(key)
+        if device_mask is None or device_mask.shape[0] < seqlen:
+            num_cached = 0 if device_mask is None else device_mask.shape[0]
+            capacity = min(max(seqlen, 2 * num_cached),
+                           max(seqlen, self._max_seq_len))
+            # Release the smaller mask before building the new one.
+            self._device_masks.pop(key, None)
+            device_mask = None
+            device_mask = _generate_attn_mask(capacity, dtype, device)
+            self._device_masks[key] = device_mask
+        if device_mask.shape[0] == seqlen:
+            # Shared with the later steps, must not be modified in place.
+            return device_mask
+        return device_mask[:seqlen, :seqlen].contiguous()
@@ -196,6 +196,14 @@ class AscendMetadata:
     query_lens: torch.Tensor = None
     # Maximum query length in the batch (None for decoding).
     max_query_len: Optional[int] = None
+    # Maximum sequence length in the batch.
+    max_seq_len: Optional[int] = None
+    # Maximum sequence length of the prefills, set when there are prefills.
+    max_prefill_seq_len: Optional[int] = None
+    # Cumulative query and sequence lengths on the device, (batch_size + 1,),
+    # only built for the head size 192 vanilla chunked prefill.
+    cu_seqlen_q: Optional[torch.Tensor] = None
+    cu_seqlen_k: Optional[torch.Tensor] = None
 
     # ********************** KV Cache Related Properties ********************* #
     # Block addresses per sequence (Seq id -> list of physical block).
@@ -236,6 +244,8 @@ class AscendAttentionMetadataBuilder:
         self.max_num_blocks_per_req = cdiv(
             self.model_config.max_model_len,
             AscendAttentionBackend.get_supported_block_size()[0])
+        self.head_size = kv_cache_spec.head_size \
+            if kv_cache_spec is not None else None
 
     def reorder_batch(self, input_batch,
                       scheduler_output: "SchedulerOutput") -> bool:
@@ -351,6 +361,24 @@ class AscendAttentionMetadataBuilder:
                 pcp_allgather_restore_idx
                 if common_long_seq_metadata is not None else None)
 
+        # The lengths derived from the batch are computed once here, so that
+        # the layers do not have to sync or rebuild them.
+        max_prefill_seq_len = None
+        if num_prefills > 0:
+            max_prefill_seq_len = int(seq_lens[num_decode_tokens:].max())
+        cu_seqlen_q = cu_seqlen_k = None
+        # Only the states served by _forward_v1_style take the vanilla
+        # chunked prefill path of head size 192.
+        if self.head_size == 192 and attn_state in (
+                AscendAttentionState.ChunkedPrefill,
+                AscendAttentionState.SpecDecoding):
+            cu_seqlen_q = torch.zeros(num_reqs + 1, dtype=torch.int64)
+            cu_seqlen_k = torch.zeros(num_reqs + 1, dtype=torch.int64)
+            torch.cumsum(query_lens, dim=0, out=cu_seqlen_q[1:])
+            torch.cumsum(seq_lens[:num_reqs], dim=0, out=cu_seqlen_k[1:])
+            cu_seqlen_q = cu_seqlen_q.to(self.device, non_blocking=True)
+            cu_seqlen_k = cu_seqlen_k.to(self.device, non_blocking=True)
+
         decode_metadata = None
         if num_decodes > 0:
             common_long_seq_metadata = common_attn_metadata.prefill_context_parallel_metadata
@@ -372,6 +400,10 @@ class AscendAttentionMetadataBuilder:
             seq_lens=seq_lens,
             seq_lens_list=seq_lens.tolist(),
             max_query_len=common_attn_metadata.max_query_len,
+            max_seq_len=int(seq_lens.max()),
+            max_prefill_seq_len=max_prefill_seq_len,
+            cu_seqlen_q=cu_seqlen_q,
+            cu_seqlen_k=cu_seqlen_k,
             actual_seq_lengths_q=query_start_loc_cpu[1:].tolist(),
             slot_mapping=slot_mapping,
             attn_mask=attn_mask,
@@ -668,19 +700,11 @@ class AscendAttentionBackendImpl(AttentionImpl):
         # TODO: vanilla path will be removed after the kernel support
         # head_size 192 scenario.
         if self.head_size == 192:
-            cu_seqlen_q = [0] + attn_metadata.query_lens.tolist()
-            cu_seqlen_k = [0] + attn_metadata.seq_lens.tolist()
-            cu_seqlen_q = torch.tensor(cu_seqlen_q, device=query.device)
-            cu_seqlen_k = torch.tensor(cu_seqlen_k, device=query.device)
-            cu_seqlen_q = torch.cumsum(cu_seqlen_q, dim=0)
-            cu_seqlen_k = torch.cumsum(cu_seqlen_k, dim=0)
-            max_seqlen_q = torch.max(attn_metadata.query_lens)
-            max_seqlen_k = torch.max(attn_metadata.seq_lens)
-            vanilla_chunked_prefill(output, query, self.key_cache,
-                                    self.value_cache,
-                                    attn_metadata.block_tables, cu_seqlen_q,
-                                    cu_seqlen_k, max_seqlen_q, max_seqlen_k,
-                                    self.scale, None, True)
+            vanilla_chunked_prefill(
+                output, query, self.key_cache, self.value_cache,
+                attn_metadata.block_tables, attn_metadata.cu_seqlen_q,
+                attn_metadata.cu_seqlen_k, attn_metadata.max_query_len,
+                attn_metadata.max_seq_len, self.scale, None, True)
             return output
 
         # Use paged attention.
@@ -1030,8 +1054,7 @@ class AscendAttentionBackendImpl(AttentionImpl):
                 output_prefill = self._forward_prefill_cp(
                     prefill_query, key, value, attn_metadata)
             else:
-                max_prefill_seq_len = attn_metadata.seq_lens[
-                    attn_metadata.num_decode_tokens:].max().item()
+                max_prefill_seq_len = attn_metadata.max_prefill_seq_len
                 if attn_metadata.attn_mask is not None:
                     attn_metadata.attn_mask = attn_metadata.attn_mask[:
                                                                       max_prefill_seq_len, :
@@ -1141,8 +1164,7 @@ class AscendAttentionBackendImpl(AttentionImpl):
             intermediate_output = self._forward_pcp_dcp(
                 query, key, value, attn_metadata, output)
         elif attn_type == AttentionType.ENCODER_ONLY:
-            # TODO(zzzwwjj): Deal with this `cum_seq_len` more elegantly.
-            cum_seq_len = attn_metadata.query_start_loc[1:].tolist()
+            cum_seq_len = attn_metadata.actual_seq_lengths_q
             intermediate_output = torch_npu.npu_fusion_attention(
                 query,
                 key,
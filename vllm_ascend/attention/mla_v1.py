@@ -109,6 +109,10 @@ class AscendMLAPrefillMetadata:
         max_seq_lens: list[int]
         workspace: torch.Tensor
         chunk_seq_lens: torch.Tensor
+        # chunk_seq_lens on the device, and the seqlen of npu_ring_mla per
+        # chunk, i.e. [query_lens, chunk_seq_lens[i]] for the i-th chunk.
+        chunk_seq_lens_npu: torch.Tensor = None
+        chunk_ring_seq_lens: torch.Tensor = None
 
     attn_mask: torch.Tensor
     query_lens: torch.Tensor
@@ -440,6 +444,10 @@ class AscendMLAMetadataBuilder:
                              dim=1,
                              out=cu_seq_lens_cpu[:, 1:],
                              dtype=torch.int32)
+                prefill_query_lens = query_lens[reqs_start:].to(torch.int32)
+                chunk_ring_seq_lens = torch.stack((prefill_query_lens.expand(
+                    num_chunks, -1), chunk_seq_lens.to(torch.int32)),
+                                                  dim=1)
                 chunked_context_metadata = \
                     AscendMLAPrefillMetadata.ChunkedContextMetadata(
                     cu_seq_lens=cu_seq_lens_cpu.to(device, non_blocking=True),
@@ -448,6 +456,9 @@ class AscendMLAMetadataBuilder:
                     max_seq_lens=chunk_seq_lens.max(dim=1).values.tolist(),
                     chunk_seq_lens=chunk_seq_lens,
                     workspace=self.chunked_prefill_workspace,
+                    chunk_seq_lens_npu=chunk_seq_lens.to(device,
+                                                         non_blocking=True),
+                    chunk_ring_seq_lens=chunk_ring_seq_lens,
                 )
             prefill_input_positions = input_positions[tokens_start:]
             cos = self.cos_cache[
@@ -477,7 +488,8 @@ class AscendMLAMetadataBuilder:
             cos = common_attn_metadata.cos
             sin = common_attn_metadata.sin
             # Notice that num_decodes != num_decode_tokens in SpecDecoding Scenario
-            actual_seq_lengths_q = query_start_loc[1:num_decodes + 1].tolist()
+            actual_seq_lengths_q = query_start_loc_cpu[1:num_decodes +
+                                                       1].tolist()
             max_seq_lens = seq_lens[:num_decodes].max().item()
             seq_lens = seq_lens[:num_decodes]
             input_positions = input_positions[:num_decode_tokens]
@@ -916,7 +928,6 @@ class AscendMLAImpl(MLAAttentionImpl):
 
         iters = len(prefill_metadata.chunked_context.seq_tot)
 
-        seq_len1 = torch.tensor(prefill_metadata.query_lens, dtype=torch.int32)
         cache_kv_c = kv_c_and_k_pe_cache[0]
         cache_k_pe = kv_c_and_k_pe_cache[1]
         num_heads = cache_k_pe.size(2)
@@ -924,8 +935,7 @@ class AscendMLAImpl(MLAAttentionImpl):
         for i in range(iters):
             toks = prefill_metadata.chunked_context.seq_tot[i]
 
-            seq_len2 = prefill_metadata.chunked_context.chunk_seq_lens[i]
-            seq_len = torch.stack([seq_len1, seq_len2])
+            seq_len = prefill_metadata.chunked_context.chunk_ring_seq_lens[i]
             kv_c_normed = torch.empty(toks,
                                       num_heads,
                                       latent_kv_dim,
@@ -941,7 +951,7 @@ class AscendMLAImpl(MLAAttentionImpl):
                 cache_kv_c,
                 cache_k_pe,
                 prefill_metadata.block_table,
-                seq_len2.to(q_nope.device),
+                prefill_metadata.chunked_context.chunk_seq_lens_npu[i],
                 seq_starts=prefill_metadata.chunked_context.starts[i],
                 key=kv_c_normed,
                 value=k_pe,
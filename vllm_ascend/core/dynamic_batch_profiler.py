@@ -0,0 +1,209 @@
+#
+# Copyright (c) 2025 Huawei Technologies Co., Ltd. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# This file is a part of the vllm-ascend project.
+#
+"""Offline profiler producing the lookup table used by the dynamic batch
+scheduler.
+
+The table is a csv file with the columns ``ctx_len, d_num, chunk_size, cost``
+which is read by ``BudgetRefiner`` in ``scheduler_dynamic_batch.py``. Each row
+records the latency (in ms) of one scheduling step that runs ``d_num`` decode
+requests with an average context length of ``ctx_len`` together with a prefill
+chunk of ``chunk_size`` tokens.
+
+The cost of a step is supplied by a pluggable cost model, so the sweep can be
+driven by a real model step on NPU or by a synthetic latency function.
+
+Example::
+
+    python -m vllm_ascend.core.dynamic_batch_profiler \\
+        --cost-model my_pkg.cost:qwen14b_tp8 \\
+        --output /path/to/profile_table.csv
+"""
+import argparse
+import csv
+import importlib
+import itertools
+import os
+import time
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from vllm.logger import logger
+
+PROFILE_TABLE_COLUMNS = ("ctx_len", "d_num", "chunk_size", "cost")
+DEFAULT_PROFILE_TABLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "profile_table.csv")
+
+DEFAULT_CTX_LENS = (128, 256, 512, 1024, 2048, 4096, 8192)
+DEFAULT_D_NUMS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+DEFAULT_CHUNK_SIZES = (0, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+# A cost model maps (ctx_len, d_num, chunk_size) to the step latency in ms.
+CostModel = Callable[[int, int, int], float]
+ProfileRow = Tuple[int, int, int, float]
+
+
+class LinearCostModel:
+    """Synthetic cost model for dry runs and tests.
+
+    The step latency is modelled as a fixed overhead plus terms linear in the
+    attended decode tokens, the number of decode requests and the number of
+    prefill tokens. No device is required.
+    """
+
+    def __init__(self,
+                 base: float = 10.0,
+                 per_ctx_token: float = 1e-4,
+                 per_decode: float = 0.05,
+                 per_prefill_token: float = 0.01) -> None:
+        self.base = base
+        self.per_ctx_token = per_ctx_token
+        self.per_decode = per_decode
+        self.per_prefill_token = per_prefill_token
+
+    def __call__(self, ctx_len: int, d_num: int, chunk_size: int) -> float:
+        return (self.base + self.per_ctx_token * ctx_len * d_num +
+                self.per_decode * d_num + self.per_prefill_token * chunk_size)
+
+
+class TimedStepCostModel:
+    """Cost model measuring the wall time of a user supplied step function.
+
+    ``step_fn(ctx_len, d_num, chunk_size)`` should run one forward step of the
+    deployed model with the given batch composition. ``synchronize`` is called
+    before and after every step so asynchronous device work is accounted, e.g.
+    ``torch.npu.synchronize``. The median of ``num_repeats`` runs is reported.
+    """
+
+    def __init__(self,
+                 step_fn: Callable[[int, int, int], None],
+                 synchronize: Optional[Callable[[], None]] = None,
+                 num_warmup: int = 2,
+                 num_repeats: int = 5) -> None:
+        if num_repeats <= 0:
+            raise ValueError("num_repeats must be positive.")
+        self.step_fn = step_fn
+        self.synchronize = synchronize
+        self.num_warmup = num_warmup
+        self.num_repeats = num_repeats
+
+    def _sync(self) -> None:
+        if self.synchronize is not None:
+            self.synchronize()
+
+    def __call__(self, ctx_len: int, d_num: int, chunk_size: int) -> float:
+        for _ in range(self.num_warmup):
+            self.step_fn(ctx_len, d_num, chunk_size)
+        costs = []
+        for _ in range(self.num_repeats):
+            self._sync()
+            start = time.perf_counter()
+            self.step_fn(ctx_len, d_num, chunk_size)
+            self._sync()
+            costs.append((time.perf_counter() - start) * 1000)
+        costs.sort()
+        return costs[len(costs) // 2]
+
+
+def profile_dynamic_batch(
+    cost_model: CostModel,
+    ctx_lens: Iterable[int] = DEFAULT_CTX_LENS,
+    d_nums: Iterable[int] = DEFAULT_D_NUMS,
+    chunk_sizes: Iterable[int] = DEFAULT_CHUNK_SIZES,
+) -> List[ProfileRow]:
+    """Sweep the grid of (ctx_len, d_num, chunk_size) and evaluate the cost
+    model on each point."""
+    rows: List[ProfileRow] = []
+    grid = itertools.product(sorted(set(ctx_lens)), sorted(set(d_nums)),
+                             sorted(set(chunk_sizes)))
+    for ctx_len, d_num, chunk_size in grid:
+        cost = float(cost_model(ctx_len, d_num, chunk_size))
+        rows.append((ctx_len, d_num, chunk_size, cost))
+        logger.debug("ctx_len=%d, d_num=%d, chunk_size=%d, cost=%.3f ms",
+                     ctx_len, d_num, chunk_size, cost)
+    return rows
+
+
+def write_profile_table(rows: Sequence[ProfileRow],
+                        path: str = DEFAULT_PROFILE_TABLE_PATH) -> None:
+    """Write the profiled rows in the format read by ``BudgetRefiner``."""
+    dirname = os.path.dirname(os.path.abspath(path))
+    os.makedirs(dirname, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(PROFILE_TABLE_COLUMNS)
+        for ctx_len, d_num, chunk_size, cost in rows:
+            writer.writerow([ctx_len, d_num, chunk_size, f"{cost:.4f}"])
+    os.replace(tmp_path, path)
+    logger.info("Dynamic batch profile table with %d rows is saved to %s",
+                len(rows), path)
+
+
+def load_cost_model(spec: str) -> CostModel:
+    """Load a cost model from a ``module:attr`` spec. If ``attr`` is a class
+    or factory taking no arguments, it is instantiated first."""
+    module_name, sep, attr = spec.partition(":")
+    if not sep or not attr:
+        raise ValueError(
+            f"Invalid cost model spec '{spec}', expected 'module:attr'.")
+    obj = getattr(importlib.import_module(module_name), attr)
+    if isinstance(obj, type):
+        obj = obj()
+    return obj
+
+
+def _parse_int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate the lookup table of the dynamic batch "
+        "scheduler.")
+    parser.add_argument(
+        "--cost-model",
+        type=str,
+        default=None,
+        help="Cost model given as 'module:attr'. The attribute is either a "
+        "callable (ctx_len, d_num, chunk_size) -> ms or a class building "
+        "one. Defaults to the synthetic LinearCostModel.")
+    parser.add_argument("--ctx-lens",
+                        type=_parse_int_list,
+                        default=list(DEFAULT_CTX_LENS))
+    parser.add_argument("--d-nums",
+                        type=_parse_int_list,
+                        default=list(DEFAULT_D_NUMS))
+    parser.add_argument("--chunk-sizes",
+                        type=_parse_int_list,
+                        default=list(DEFAULT_CHUNK_SIZES))
+    parser.add_argument("--output",
+                        type=str,
+                        default=DEFAULT_PROFILE_TABLE_PATH)
+    args = parser.parse_args(argv)
+
+    if args.cost_model is None:
+        logger.warning("No cost model is given, the synthetic "
+                       "LinearCostModel is used to generate the table.")
+        cost_model: CostModel = LinearCostModel()
+    else:
+        cost_model = load_cost_model(args.cost_model)
+    rows = profile_dynamic_batch(cost_model, args.ctx_lens, args.d_nums,
+                                 args.chunk_sizes)
+    write_profile_table(rows, args.output)
+
+
+if __name__ == "__main__":
+    main()
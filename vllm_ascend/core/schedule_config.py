@@ -33,6 +33,7 @@ class AscendSchedulerConfig(SchedulerConfig):
         "vllm_ascend.core.scheduler.AscendScheduler")
     enable_pd_transfer: bool = False
     decode_max_num_seqs: int = 0
+    prefill_tokens_per_second: float = 0
 
     @classmethod
     def initialize_from_config(
@@ -53,6 +54,7 @@ class AscendSchedulerConfig(SchedulerConfig):
             "vllm_ascend.core.scheduler.AscendScheduler")
         scheduler_config["enable_pd_transfer"] = False
         scheduler_config["decode_max_num_seqs"] = 0
+        scheduler_config["prefill_tokens_per_second"] = 0
         # Override params in original SchedulerConfig with params in ascend_scheduler_config
         for k, _ in scheduler_config.items():
             if hasattr(ascend_scheduler_config, k):
@@ -95,6 +97,11 @@ class AscendSchedulerConfig(SchedulerConfig):
                 f"long_prefill_token_threshold must be non-negative, but got "
                 f"{self.long_prefill_token_threshold}")
 
+        if self.prefill_tokens_per_second < 0:
+            raise ValueError(
+                f"prefill_tokens_per_second must be non-negative, but got "
+                f"{self.prefill_tokens_per_second}")
+
         if self.policy != "fcfs":
             raise NotImplementedError(
                 f"currently AscendScheduler only supports fcfs policy, got {self.policy}"
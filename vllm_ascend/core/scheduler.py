@@ -32,6 +32,8 @@ from vllm.v1.outputs import ModelRunnerOutput
 from vllm.v1.request import Request, RequestStatus
 from vllm.v1.structured_output import StructuredOutputManager
 
+from vllm_ascend.distributed.kv_tier_oracle import (KVTierOracle,
+                                                    get_kv_load_latency)
 from vllm_ascend.utils import vllm_version_is
 
 
@@ -52,6 +54,10 @@ class AscendScheduler(Scheduler):
         self.phase = "" if not enable_pd_transfer else "prefill"
         self.decode_max_num_running_reqs = max(self.max_num_running_reqs,
                                                decode_max_num_seqs)
+        # 0 to always load the externally-cached tokens.
+        self.prefill_tokens_per_second = getattr(self.scheduler_config,
+                                                 'prefill_tokens_per_second',
+                                                 0)
 
     def __init__(
         self,
@@ -172,6 +178,14 @@ class AscendScheduler(Scheduler):
                     num_external_computed_tokens, load_kv_async = (
                         self.connector.get_num_new_matched_tokens(
                             request, num_new_local_computed_tokens))
+                    if num_external_computed_tokens is None:
+                        # The connector does not know the hit yet.
+                        skip_cur_request()
+                        continue
+                    if self._should_recompute_external_tokens(
+                            request, num_external_computed_tokens,
+                            load_kv_async):
+                        num_external_computed_tokens = 0
 
                 # Total computed tokens (local + external).
                 num_computed_tokens = (num_new_local_computed_tokens +
@@ -524,6 +538,29 @@ class AscendScheduler(Scheduler):
         self.finished_req_ids = set()  # type: ignore
         return scheduler_output
 
+    def _should_recompute_external_tokens(self, request: Request,
+                                          num_external_tokens: int,
+                                          load_kv_async: bool) -> bool:
+        """Whether prefilling the externally-cached tokens again is
+        estimated to be faster than loading them."""
+        # An asynchronous load is a remote prefill, the producer keeps the
+        # blocks until they are pulled.
+        if (self.prefill_tokens_per_second <= 0 or num_external_tokens == 0
+                or load_kv_async
+                or not isinstance(self.connector, KVTierOracle)):
+            return False
+        load_latency = get_kv_load_latency(
+            self.connector.get_kv_tier_estimates(request, num_external_tokens))
+        recompute_latency = (num_external_tokens /
+                             self.prefill_tokens_per_second)
+        if load_latency <= recompute_latency:
+            return False
+        logger.debug(
+            "Recompute %d external tokens of request %s: load %.2f ms, "
+            "recompute %.2f ms", num_external_tokens, request.request_id,
+            load_latency * 1e3, recompute_latency * 1e3)
+        return True
+
     def _check_watermark_for_prefill(self,
                                      request,
                                      num_new_tokens,
@@ -14,8 +14,11 @@
 # limitations under the License.
 # This file is a part of the vllm-ascend project.
 #
+import bisect
+import math
 import os
 import time
+from collections import deque
 from typing import Optional
 
 import pandas as pd
@@ -28,66 +31,195 @@ from vllm.v1.core.sched.output import NewRequestData, SchedulerOutput
 from vllm.v1.core.sched.request_queue import (SchedulingPolicy,
                                               create_request_queue)
 from vllm.v1.core.sched.scheduler import Scheduler
-from vllm.v1.engine import EngineCoreEventType
+from vllm.v1.engine import EngineCoreEventType, EngineCoreOutputs
 from vllm.v1.kv_cache_interface import KVCacheConfig
+from vllm.v1.outputs import ModelRunnerOutput
 from vllm.v1.request import Request, RequestStatus
 from vllm.v1.structured_output import StructuredOutputManager
 
+from vllm_ascend.core.dynamic_batch_profiler import DEFAULT_PROFILE_TABLE_PATH
 from vllm_ascend.utils import vllm_version_is
 
 
+class OnlineCostSurface:
+    """Step latency surface calibrated online for one (ctx_len, d_num) bucket.
+
+    The measured latencies are kept as an exponential moving average per
+    chunk size, so the surface follows drifting traffic. The chunk size to
+    latency curve is fitted as an isotonic (non-decreasing) function with the
+    pool adjacent violators algorithm and evaluated piecewise-linearly.
+    """
+
+    def __init__(self, ema_alpha: float = 0.1) -> None:
+        self.ema_alpha = ema_alpha
+        # chunk_size -> [cost, weight], the weight saturates so that the EMA
+        # of a bucket can still adapt.
+        self.samples: dict[int, list[float]] = {}
+        self._fitted: Optional[tuple[list[int], list[float]]] = None
+
+    def add(self, chunk_size: int, cost: float, weight: float = 1.0) -> None:
+        sample = self.samples.get(chunk_size)
+        if sample is None:
+            self.samples[chunk_size] = [cost, weight]
+        else:
+            sample[0] += self.ema_alpha * (cost - sample[0])
+            sample[1] = min(sample[1] + weight, 1 / self.ema_alpha)
+        self._fitted = None
+
+    def _fit(self) -> tuple[list[int], list[float]]:
+        if self._fitted is not None:
+            return self._fitted
+        chunks = sorted(self.samples)
+        # Each block is [sum of weighted costs, sum of weights, num points].
+        blocks: list[list[float]] = []
+        for chunk in chunks:
+            cost, weight = self.samples[chunk]
+            blocks.append([cost * weight, weight, 1])
+            while len(blocks) > 1 and (blocks[-2][0] / blocks[-2][1]
+                                       > blocks[-1][0] / blocks[-1][1]):
+                last = blocks.pop()
+                blocks[-1] = [a + b for a, b in zip(blocks[-1], last)]
+        costs: list[float] = []
+        for total, weight, num in blocks:
+            costs.extend([total / weight] * int(num))
+        self._fitted = (chunks, costs)
+        return self._fitted
+
+    def max_chunk_within(self, slo_limit: float,
+                         max_chunk: int) -> Optional[int]:
+        """Largest chunk size whose fitted latency does not exceed the SLO.
+        Returns None if nothing is known about this bucket."""
+        chunks, costs = self._fit()
+        if not chunks:
+            return None
+        idx = bisect.bisect_right(costs, slo_limit)
+        if idx == 0:
+            # Even the smallest observed chunk violates the SLO, probe a
+            # smaller one.
+            return chunks[0] // 2
+        if idx == len(chunks):
+            if len(chunks) == 1 or costs[-1] <= costs[-2]:
+                return max(chunks[-1], min(max_chunk, chunks[-1] * 2))
+            # Extrapolate the last segment up to the SLO.
+            slope = (costs[-1] - costs[-2]) / (chunks[-1] - chunks[-2])
+            chunk = chunks[-1] + (slo_limit - costs[-1]) / slope
+            return min(max_chunk, int(chunk))
+        lo_chunk, hi_chunk = chunks[idx - 1], chunks[idx]
+        lo_cost, hi_cost = costs[idx - 1], costs[idx]
+        ratio = (slo_limit - lo_cost) / (hi_cost - lo_cost)
+        return min(max_chunk, int(lo_chunk + ratio * (hi_chunk - lo_chunk)))
+
+
 class BudgetRefiner:
     """This budget refiner can make dynamic adjustment to the token budget 
-    in the chunked prefill scheduling strategy."""
+    in the chunked prefill scheduling strategy.
+
+    With ``online_calibration``, the measured latency of each step is fed
+    back into a per-bucket ``OnlineCostSurface`` seeded by the lookup table,
+    and the budget is the largest chunk still meeting the SLO."""
+
+    # Granularity (in tokens) of the chunk sizes calibrated online.
+    CHUNK_GRANULARITY = 64
 
-    def __init__(self, default_budget, slo_limit=-1) -> None:
+    def __init__(self,
+                 default_budget,
+                 slo_limit=-1,
+                 table_file_path=DEFAULT_PROFILE_TABLE_PATH,
+                 online_calibration=False) -> None:
         self.enabled = slo_limit > 0
+        self.online_calibration = online_calibration and self.enabled
+        # One entry per in-flight step, None for the steps without decode
+        # requests which are not timed.
+        self._pending_steps: deque[Optional[tuple[float, int, int,
+                                                  int]]] = deque()
+        self._last_decode_stats: Optional[tuple[float, int]] = None
         if not self.enabled:
             return
         logger.info(
             "Dynamic batch is enabled with SLO limit: {}, and chunked prefill is forced to be activated because dynamic batch relies on it"
             .format(str(slo_limit)))
         self.lookup: dict[tuple[int, int], int] = {}
-        self.context_keys: set[int] = set()
-        self.dnum_keys: set[int] = set()
+        # Sorted keys of the table, searched with bisect.
+        self.context_keys: list[int] = []
+        self.dnum_keys: list[int] = []
         self.default_budget = default_budget
-        self._read_lookup_table(slo_limit)
+        self.slo_limit = slo_limit
+        self.surfaces: dict[tuple[int, int], OnlineCostSurface] = {}
+        self._read_lookup_table(slo_limit, table_file_path)
 
-    def _read_lookup_table(self, slo_limit):
+    def _read_lookup_table(self, slo_limit, table_file_path):
         """Load the lookup table for dynamic budget."""
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        table_file_path = os.path.join(base_dir, "profile_table.csv")
         if not os.path.exists(table_file_path):
+            if self.online_calibration:
+                logger.info(
+                    "Lookup table '%s' is not found, the cost model of "
+                    "dynamic batch is calibrated online from scratch.",
+                    table_file_path)
+                return
             # proceed without dynamic batch
             logger.error(
                 "The dynamic batching feature requires the lookup table "
                 "'profile_table.csv', but it was not found at '%s'. "
-                "Please download the corresponding table file.",
+                "Please download the corresponding table file or generate "
+                "it with 'python -m vllm_ascend.core.dynamic_batch_profiler'.",
                 table_file_path)
             self.enabled = False
             return
         else:
             df = pd.read_csv(table_file_path)
+        context_keys = set()
+        dnum_keys = set()
         grouped = df.groupby(['ctx_len', 'd_num'])
         for (ctx_len, d_num), group in grouped:
+            ctx_len, d_num = int(ctx_len), int(d_num)
+            if self.online_calibration:
+                surface = self._get_surface((ctx_len, d_num))
+                for chunk_size, cost in zip(group['chunk_size'],
+                                            group['cost']):
+                    surface.add(int(chunk_size), float(cost))
+                context_keys.add(ctx_len)
+                dnum_keys.add(d_num)
             valid = group[group['cost'] <= slo_limit]
             if not valid.empty:
                 max_row = valid.loc[valid['chunk_size'].idxmax()]
                 self.lookup[(ctx_len, d_num)] = int(max_row['chunk_size'])
-                self.context_keys.add(ctx_len)
-                self.dnum_keys.add(d_num)
-        self.context_keys = set(sorted(self.context_keys))
-        self.dnum_keys = set(sorted(self.dnum_keys))
+                context_keys.add(ctx_len)
+                dnum_keys.add(d_num)
+        self.context_keys = sorted(context_keys)
+        self.dnum_keys = sorted(dnum_keys)
+
+    def _get_surface(self, key):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = OnlineCostSurface()
+        return surface
 
     def _align_key(self, value, valid_keys):
         """Align the minimum value within the valid_keys that is greater than the value."""
-        for k in valid_keys:
-            if k >= value:
-                return k
-        return None
+        idx = bisect.bisect_left(valid_keys, value)
+        if idx == len(valid_keys):
+            return None
+        return valid_keys[idx]
+
+    def _bucket_key(self, value, valid_keys):
+        """Bucket used by online calibration: the aligned table key, or the
+        next power of two beyond the table."""
+        aligned = self._align_key(value, valid_keys)
+        if aligned is not None:
+            return aligned
+        return 1 << max(0, math.ceil(value) - 1).bit_length()
 
     def _get_max_budget(self, num_deocde_tokens, num_decode):
         """Get the maximum budget according to the number of decoding tokens and the decoding requests."""
+        if self.online_calibration:
+            key = (self._bucket_key(num_deocde_tokens, self.context_keys),
+                   self._bucket_key(num_decode, self.dnum_keys))
+            surface = self.surfaces.get(key)
+            if surface is not None:
+                budget = surface.max_chunk_within(self.slo_limit,
+                                                  self.default_budget)
+                if budget is not None:
+                    return max(budget, self.CHUNK_GRANULARITY)
         aligned_ctx = self._align_key(num_deocde_tokens, self.context_keys)
         aligned_dnum = self._align_key(num_decode, self.dnum_keys)
         if aligned_ctx is None or aligned_dnum is None:
@@ -102,6 +234,7 @@ class BudgetRefiner:
 
     def refine_budget(self, running_request, budget):
         """Dynamically refine the token budget according to the running request."""
+        self._last_decode_stats = None
         if not self.enabled:
             return budget
         # assume all running request will be scheduled.
@@ -113,8 +246,37 @@ class BudgetRefiner:
         if num_decode <= 0:
             return budget
         num_deocde_tokens = sum(num_decode_token_lst) / num_decode
+        self._last_decode_stats = (num_deocde_tokens, num_decode)
         return self._get_max_budget(num_deocde_tokens, num_decode)
 
+    def on_step_scheduled(self, num_scheduled_tokens):
+        """Start timing the step just scheduled by the last refine_budget."""
+        if not self.online_calibration:
+            return
+        if self._last_decode_stats is None:
+            # Keep the steps in order with the on_step_finished calls.
+            self._pending_steps.append(None)
+            return
+        num_deocde_tokens, num_decode = self._last_decode_stats
+        key = (self._bucket_key(num_deocde_tokens, self.context_keys),
+               self._bucket_key(num_decode, self.dnum_keys))
+        # Round down so that a bucket never looks cheaper than it is.
+        chunk_size = (num_scheduled_tokens // self.CHUNK_GRANULARITY *
+                      self.CHUNK_GRANULARITY)
+        self._pending_steps.append(
+            (time.perf_counter(), key[0], key[1], chunk_size))
+
+    def on_step_finished(self):
+        """Record the latency of the oldest in-flight step."""
+        if not self._pending_steps:
+            return
+        step = self._pending_steps.popleft()
+        if step is None:
+            return
+        start, ctx_key, dnum_key, chunk_size = step
+        cost = (time.perf_counter() - start) * 1000
+        self._get_surface((ctx_key, dnum_key)).add(chunk_size, cost)
+
 
 class SchedulerDynamicBatch(Scheduler):
     """This Scheduler extends vllm's original v1 scheduler
@@ -141,7 +303,13 @@ class SchedulerDynamicBatch(Scheduler):
         self.running: list[Request] = []
         self.budget_refiner = BudgetRefiner(
             default_budget=self.scheduler_config.max_num_batched_tokens,
-            slo_limit=self.scheduler_config.SLO_limits_for_dynamic_batch)
+            slo_limit=self.scheduler_config.SLO_limits_for_dynamic_batch,
+            table_file_path=getattr(self.scheduler_config,
+                                    "dynamic_batch_profile_table", None)
+            or DEFAULT_PROFILE_TABLE_PATH,
+            online_calibration=getattr(self.scheduler_config,
+                                       "dynamic_batch_online_calibration",
+                                       False))
 
     def schedule(self) -> SchedulerOutput:
         # NOTE: This scheduling algorithm is developed based on the "super.schedule()"
@@ -526,6 +694,7 @@ class SchedulerDynamicBatch(Scheduler):
         # Check if the scheduling constraints are satisfied.
         total_num_scheduled_tokens = sum(num_scheduled_tokens.values())
         assert total_num_scheduled_tokens <= self.max_num_scheduled_tokens
+        self.budget_refiner.on_step_scheduled(total_num_scheduled_tokens)
         assert token_budget >= 0
         assert len(self.running) <= self.max_num_running_reqs
         # Since some requests in the RUNNING queue may not be scheduled in
@@ -612,3 +781,14 @@ class SchedulerDynamicBatch(Scheduler):
 
         self._update_after_schedule(scheduler_output)
         return scheduler_output
+
+    def update_from_output(
+        self,
+        scheduler_output: SchedulerOutput,
+        model_runner_output: ModelRunnerOutput,
+    ) -> dict[int, EngineCoreOutputs]:
+        # The step latency observed by the scheduler calibrates the budget
+        # refiner when online calibration is enabled.
+        self.budget_refiner.on_step_finished()
+        return super().update_from_output(scheduler_output,
+                                          model_runner_output)
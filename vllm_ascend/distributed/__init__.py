@@ -38,3 +38,8 @@ def register_connector():
         "MooncakeLayerwiseConnector",
         "vllm_ascend.distributed.mooncake_layerwise_connector",
         "MooncakeLayerwiseConnector")
+
+    KVConnectorFactory.register_connector(
+        "NPUOffloadingConnector",
+        "vllm_ascend.distributed.offloading_connector",
+        "NPUOffloadingConnector")
@@ -1,10 +1,10 @@
 # SPDX-License-Identifier: Apache-2.0
 # SPDX-FileCopyrightText: Copyright contributors to the vLLM project
 import copy
+import os
 import queue
 import threading
 import time
-from collections import defaultdict
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any, Optional, Sequence
 
@@ -14,6 +14,8 @@ from vllm.attention.layer import Attention
 from vllm.config import VllmConfig
 from vllm.distributed.kv_transfer.kv_connector.v1.base import (
     KVConnectorBase_V1, KVConnectorMetadata, KVConnectorRole)
+from vllm.distributed.kv_transfer.kv_connector.v1.metrics import \
+    KVConnectorStats
 from vllm.distributed.parallel_state import get_pp_group, get_tp_group
 from vllm.model_executor.layers.fused_moe import FusedMoE
 from vllm.utils import logger
@@ -24,6 +26,13 @@ from vllm.v1.kv_cache_interface import (FullAttentionSpec, KVCacheSpec,
 from vllm_ascend.ascend_config import get_ascend_config
 from vllm_ascend.distributed.cpu_offload_manager.metadata import (
     MetadataServer, MetadataServerProc, MLAConfig)
+from vllm_ascend.distributed.cpu_offload_manager.shm_ring import \
+    ShmNotificationRing
+from vllm_ascend.distributed.kv_tier_oracle import (KVLoadCostModel, KVTier,
+                                                    KVTierEstimate,
+                                                    KVTierOracle)
+from vllm_ascend.distributed.kv_transfer_stats import (
+    KVTransferStats, build_kv_connector_stats, get_kv_block_bytes)
 
 if TYPE_CHECKING:
     from vllm.attention.backends.abstract import AttentionMetadata
@@ -56,7 +65,7 @@ class CPUOffloadingConnectorMetadata(KVConnectorMetadata):
     finished_req_ids: set[str]
 
 
-class CPUOffloadingConnector(KVConnectorBase_V1):
+class CPUOffloadingConnector(KVConnectorBase_V1, KVTierOracle):
 
     def __init__(self, vllm_config: "VllmConfig", role: KVConnectorRole):
         if not vllm_config.cache_config.enable_prefix_caching:
@@ -113,6 +122,18 @@ class CPUOffloadingConnector(KVConnectorBase_V1):
         assert self.connector_worker is not None
         return self.connector_worker.get_finished(), None
 
+    def get_kv_connector_stats(self) -> Optional[KVConnectorStats]:
+        if self.connector_worker is None:
+            return None
+        return self.connector_worker.xfer_stats.collect()
+
+    @classmethod
+    def build_kv_connector_stats(
+            cls,
+            data: Optional[dict[str,
+                                Any]] = None) -> Optional[KVConnectorStats]:
+        return build_kv_connector_stats(data)
+
     # Scheduler-side methods
     # ==============================
 
@@ -124,6 +145,14 @@ class CPUOffloadingConnector(KVConnectorBase_V1):
                 request, num_computed_tokens)
         return 0, False
 
+    def get_kv_tier_estimates(
+            self, request: "Request",
+            num_external_tokens: int) -> list[KVTierEstimate]:
+        if self.connector_scheduler is not None:
+            return self.connector_scheduler.get_kv_tier_estimates(
+                request, num_external_tokens)
+        return []
+
     def update_state_after_alloc(self, request: "Request",
                                  blocks: "KVCacheBlocks",
                                  num_external_tokens: int):
@@ -164,6 +193,7 @@ class CPUOffloadingConnectorScheduler:
         else:
             self.swap_in_threshold = 0
         logger.info(f"swap_in_threshold: {self.swap_in_threshold}")
+        self.kv_load_cost = KVLoadCostModel(vllm_config, KVTier.CPU)
 
     def get_num_new_matched_tokens(
             self, ori_request: "Request",
@@ -180,6 +210,11 @@ class CPUOffloadingConnectorScheduler:
         else:
             return 0, load_async
 
+    def get_kv_tier_estimates(
+            self, request: "Request",
+            num_external_tokens: int) -> list[KVTierEstimate]:
+        return [self.kv_load_cost.estimate(num_external_tokens)]
+
     def update_state_after_alloc(self, request: "Request"):
         self.allocated_req_ids.add(request.request_id)
 
@@ -264,11 +299,10 @@ class CPUOffloadingConnectorWorker:
         self.save_stream = torch.npu.Stream()
         self.zmq_rpc_client = MetadataServer.ZMQRPCClient()
         self.load_block_mapping: list[tuple[int, int]] = []
-        self.save_input_queue: queue.Queue[tuple[str, ReqMeta]] = queue.Queue()
+        self.save_input_queue: queue.Queue[tuple[str, ReqMeta,
+                                                 float]] = queue.Queue()
         self.save_output_queue: queue.Queue[str] = queue.Queue()
-        self.save_thread = threading.Thread(target=self._save_listener)
-        self.save_thread.start()
-        self.done_sending_count: defaultdict[str, int] = defaultdict(int)
+        self.xfer_stats = KVTransferStats()
 
         # start metadata server to init cpu_kv_cache_manager and handle rpc requests
         # all dp shared the same metadata server, only start the process on data_rank 0
@@ -279,6 +313,15 @@ class CPUOffloadingConnectorWorker:
             config.kv_transfer_config = vllm_config.kv_transfer_config
             self.init_metadata_server(config)
         self._wait_for_metadata_process_start()
+        # The requests saved are reported to the metadata server through a
+        # shared memory ring, without a call nor a gather across the ranks.
+        worker_id = (f"{vllm_config.parallel_config.data_parallel_rank}_"
+                     f"{self.pp_rank}_{self.tp_rank}_{os.getpid()}")
+        self.save_notification_ring = ShmNotificationRing(
+            self.zmq_rpc_client.call("create_save_notification_ring",
+                                     worker_id))
+        self.save_thread = threading.Thread(target=self._save_listener)
+        self.save_thread.start()
 
     def init_metadata_server(self, vllm_config: VllmConfig):
         self.metadata_thread = threading.Thread(
@@ -312,13 +355,15 @@ class CPUOffloadingConnectorWorker:
                     (req.cpu_block_ids[i], req.gpu_block_ids[i]))
         for req_id in connector_metadata.finished_req_ids:
             if req_id in self.requests:
-                self.save_input_queue.put((req_id, self.requests[req_id]))
+                self.save_input_queue.put(
+                    (req_id, self.requests[req_id], time.perf_counter()))
 
     def clear_connector_metadata(self) -> None:
         self.load_block_mapping.clear()
 
     def register_kv_caches(self, kv_caches: dict[str, Sequence[torch.Tensor]]):
         self.gpu_kv_caches = kv_caches
+        self.block_bytes = get_kv_block_bytes(kv_caches)
         model_config = self.vllm_config.model_config
         mla_config: Optional[MLAConfig] = None
         if model_config.use_mla:
@@ -367,43 +412,16 @@ class CPUOffloadingConnectorWorker:
             done_sending.add(id)
         for id in done_sending:
             del self.requests[id]
-        if self.tp_world_size == 1:
-            return done_sending
-        if self.tp_rank == 0:
-            for req_id in done_sending:
-                self.done_sending_count[req_id] += 1
-            other_ranks_finished_ids: list[str] = []
-            for i in range(1, self.tp_world_size):
-                other_ranks_finished_ids.extend(
-                    self.tp_group.recv_object(src=i))
-            for req_id in other_ranks_finished_ids:
-                self.done_sending_count[req_id] += 1
-            all_done_sending: set[str] = set()
-            for req_id in list(self.done_sending_count.keys()):
-                if self.done_sending_count[req_id] == self.tp_world_size:
-                    del self.done_sending_count[req_id]
-                    all_done_sending.add(req_id)
-            # release cpu_kv_cache after request sending finished
-            # to avoid rpc blocking, use thread to call rpc asynchronously
-            sending_finished_thread = threading.Thread(
-                target=self._sending_finished, args=(all_done_sending, ))
-            sending_finished_thread.daemon = True
-            sending_finished_thread.start()
-
-            return all_done_sending
-        else:
-            self.tp_group.send_object(done_sending, dst=0)
-            return done_sending
-
-    def _sending_finished(self, all_done_sending):
-        for req_id in all_done_sending:
-            logger.debug(f"call cache_and_free_slots for req_id: {req_id}")
-            self.zmq_rpc_client.call("cache_and_free_slots", req_id)
+        # The requests are finished once every worker reported them, which
+        # the output aggregator of the executor takes care of.
+        return done_sending
 
     def _save_listener(self):
         save_block_mapping = []
         while True:
-            req_id, req = self.save_input_queue.get()
+            req_id, req, enqueue_time = self.save_input_queue.get()
+            start_time = time.perf_counter()
+            self.xfer_stats.record_queue_time(start_time - enqueue_time)
             for i in range(
                     req.num_cpu_computed_tokens // self.block_size,
                     min((req.num_computed_tokens + req.num_scheduled_tokens) //
@@ -417,6 +435,8 @@ class CPUOffloadingConnectorWorker:
                     start, step = self.tp_rank, self.tp_world_size
                 else:
                     start, step = 0, 1
+                num_saved_blocks = len(
+                    range(start, len(save_block_mapping), step))
                 for i in range(start, len(save_block_mapping), step):
                     gpu_block_id, cpu_block_id = save_block_mapping[i]
                     for cpu_kv_caches, gpu_kv_caches in zip(
@@ -427,6 +447,13 @@ class CPUOffloadingConnectorWorker:
                                 gpu_layer_part[gpu_block_id],
                                 non_blocking=True)
             self.save_stream.synchronize()
+            if num_saved_blocks > 0:
+                self.xfer_stats.record_transfer(
+                    num_saved_blocks * self.block_bytes,
+                    time.perf_counter() - start_time)
+            # The metadata server caches the blocks and frees the slots once
+            # every worker saved the request.
+            self.save_notification_ring.push(req_id.encode())
             self.save_output_queue.put(req_id)
             save_block_mapping.clear()
 
@@ -1,17 +1,21 @@
 import time
 from collections import defaultdict
-from typing import Optional
+from typing import Any, Callable, Optional
 
 from vllm.utils import logger, sha256
 from vllm.v1.core.block_pool import BlockPool
 from vllm.v1.core.kv_cache_utils import (BlockHash, KVCacheBlock,
-                                         PrefixCachingMetrics)
+                                         PrefixCachingMetrics,
+                                         make_block_hash_with_group_id)
 from vllm.v1.core.single_type_kv_cache_manager import \
     get_manager_for_kv_cache_spec
 from vllm.v1.kv_cache_interface import KVCacheSpec
 from vllm.v1.metrics.stats import PrefixCacheStats
 from vllm.v1.request import Request
 
+from vllm_ascend.distributed.cpu_offload_manager.disk_kv_cache import \
+    DiskKVCacheTier
+
 
 class CPUCacheStats:
 
@@ -56,6 +60,25 @@ class CPUCacheStats:
         self.prefix_cache_stats.requests = 1
 
 
+class SpillingBlockPool(BlockPool):
+    """BlockPool calling on_evict(block_id, block_hash) when a cached block
+    is evicted, before it gets reused."""
+
+    def __init__(self, num_gpu_blocks: int, enable_caching: bool,
+                 enable_kv_cache_events: bool, on_evict: Callable[[int, Any],
+                                                                  None]):
+        super().__init__(num_gpu_blocks, enable_caching,
+                         enable_kv_cache_events)
+        self.on_evict = on_evict
+
+    def _maybe_evict_cached_block(self, block: KVCacheBlock) -> bool:
+        block_hash = block.block_hash
+        evicted = super()._maybe_evict_cached_block(block)
+        if evicted:
+            self.on_evict(block.block_id, block_hash)
+        return evicted
+
+
 class CPUKVCacheManager:
 
     def __init__(
@@ -65,13 +88,21 @@ class CPUKVCacheManager:
         caching_hash_algo: str = "builtin",
         use_eagle: bool = False,
         enable_kv_cache_events: bool = False,
+        disk_tier: Optional[DiskKVCacheTier] = None,
     ) -> None:
         self.block_size = kv_cache_spec.block_size
         self.num_cpu_blocks = num_cpu_blocks
         self.caching_hash_fn = sha256 if caching_hash_algo == "sha256" else hash
         self.use_eagle = use_eagle
-        self.block_pool = BlockPool(self.num_cpu_blocks, True,
-                                    enable_kv_cache_events)
+        # The blocks evicted from the pool are spilled to disk_tier.
+        self.disk_tier = disk_tier
+        if disk_tier is not None:
+            self.block_pool = SpillingBlockPool(self.num_cpu_blocks, True,
+                                                enable_kv_cache_events,
+                                                disk_tier.spill)
+        else:
+            self.block_pool = BlockPool(self.num_cpu_blocks, True,
+                                        enable_kv_cache_events)
         self.single_type_manager = get_manager_for_kv_cache_spec(
             kv_cache_spec=kv_cache_spec,
             block_pool=self.block_pool,
@@ -111,6 +142,10 @@ class CPUKVCacheManager:
             kv_cache_spec=self.single_type_manager.kv_cache_spec,
             use_eagle=self.use_eagle,
         )
+        if self.disk_tier is not None:
+            computed_blocks = (self._promote_from_disk(request,
+                                                       computed_blocks[0],
+                                                       max_cache_hit_length), )
         num_computed_tokens = len(computed_blocks[0]) * self.block_size
         self.req_to_computed_blocks[request_id] = computed_blocks[0]
         # We should touch these blocks in the concurrent scenarios.
@@ -126,6 +161,43 @@ class CPUKVCacheManager:
 
         return num_computed_tokens, False
 
+    def _promote_from_disk(self, request: Request,
+                           computed_blocks: list[KVCacheBlock],
+                           max_cache_hit_length: int) -> list[KVCacheBlock]:
+        """Extend the CPU hit with the blocks following it on disk.
+
+        The disk blocks are read into new CPU blocks, cached under their
+        hashes like the blocks saved by the workers. The reads complete in
+        allocate_slots, before the blocks are loaded by the workers.
+        """
+        assert self.disk_tier is not None
+        num_cached_blocks = len(computed_blocks)
+        max_num_blocks = max_cache_hit_length // self.block_size
+        block_hashes = [
+            make_block_hash_with_group_id(block_hash, 0) for block_hash in
+            request.block_hashes[num_cached_blocks:max_num_blocks]
+        ]
+        num_promoted = min(len(self.disk_tier.match(block_hashes)),
+                           self.block_pool.get_num_free_blocks())
+        if num_promoted == 0:
+            return computed_blocks
+        # Hold the CPU hit so that allocating the promoted blocks does not
+        # evict it.
+        self.block_pool.touch((computed_blocks, ))
+        new_blocks = self.block_pool.get_new_blocks(num_promoted)
+        # The spills of the evicted blocks may have reused disk blocks.
+        disk_block_ids = self.disk_tier.match(block_hashes[:num_promoted])
+        for block, disk_block_id in zip(new_blocks, disk_block_ids):
+            self.disk_tier.load(block.block_id, disk_block_id)
+        promoted = new_blocks[:len(disk_block_ids)]
+        blocks = computed_blocks + promoted
+        self.block_pool.cache_full_blocks(request, blocks, num_cached_blocks,
+                                          len(blocks), self.block_size, 0)
+        # Back to the state of a plain CPU hit, touched by the caller.
+        self.block_pool.free_blocks(reversed(new_blocks[len(promoted):]))
+        self.block_pool.free_blocks(reversed(blocks))
+        return blocks
+
     def _release_ahead_touch(self, request_id: str):
         computed_blocks = self.req_to_computed_blocks[request_id]
         if computed_blocks:
@@ -165,6 +237,10 @@ class CPUKVCacheManager:
             req_to_new_blocks[request_id] = [
                 block.block_id for block in new_computed_blocks + new_blocks
             ]
+        if self.disk_tier is not None:
+            # The CPU blocks must be spilled and promoted before the workers
+            # write or load them.
+            self.disk_tier.wait()
         return req_to_new_blocks
 
     def record_request_cache_and_free_slots(self, request: Request):
@@ -178,7 +254,7 @@ class CPUKVCacheManager:
             f"Cache and free slots for request {request_id} in cpu_kv_cache_manager"
         )
         if request_id not in self.req_to_free:
-            logger.Error(
+            logger.error(
                 f"request {request_id} not in req_to_free, maybe bug!")
             return
         request = self.req_to_free[request_id]
@@ -0,0 +1,138 @@
+import math
+import os
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Sequence
+
+import numpy as np
+from vllm.utils import logger
+
+
+class DiskKVCacheTier:
+    """Spill tier of the CPU KV cache, in memory-mapped files on local disk.
+
+    The CPU blocks evicted from the block pool are written to a disk block
+    instead of being lost, and a prefix hit on disk is promoted back to a
+    CPU block. Every CPU buffer registered with add_buffer gets a file with
+    the same layout and num_blocks disk blocks, a block being copied between
+    the buffers and the files as a whole.
+
+    The copies run on a pool of I/O threads. A copy waits for the previous
+    pending copies touching the same CPU or disk block, wait() waits for all
+    of them and must be called before the CPU blocks are handed to the
+    workers.
+    """
+
+    def __init__(self, path: str, num_blocks: int, num_io_threads: int = 8):
+        if num_blocks <= 0:
+            raise ValueError(
+                "disk_swap_space_gb in kv_connector_extra_config is smaller "
+                "than one KV cache block of all the layers, increase it or "
+                "set it to 0 to disable the disk tier.")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.num_blocks = num_blocks
+        # [num_parts, num_blocks, block_bytes] views, num_parts being 2 when
+        # the K and V of a block are apart.
+        self.cpu_buffers: list[np.ndarray] = []
+        self.disk_buffers: list[np.memmap] = []
+        self.file_paths: list[str] = []
+        # block hash -> disk block, least recently used first.
+        self.index: OrderedDict[Any, int] = OrderedDict()
+        self.free_disk_blocks = list(range(num_blocks - 1, -1, -1))
+        self.executor = ThreadPoolExecutor(
+            max_workers=num_io_threads,
+            thread_name_prefix="cpu_offload_disk_io")
+        # ("cpu" | "disk", block id) -> last pending copy of the block.
+        self.pending: dict[tuple[str, int], Future] = {}
+        logger.info(f"disk kv cache tier: {num_blocks} blocks in {path}")
+
+    def add_buffer(self, name: str, buffer: Any, shape: tuple[int, int,
+                                                              int]) -> None:
+        """Register a CPU buffer of shape [num_parts, num_cpu_blocks,
+        block_bytes]."""
+        num_parts, _, block_bytes = shape
+        cpu_buffer = np.frombuffer(buffer,
+                                   dtype=np.uint8,
+                                   count=math.prod(shape)).reshape(shape)
+        file_path = os.path.join(self.path, f"{name}.bin")
+        disk_buffer = np.memmap(file_path,
+                                dtype=np.uint8,
+                                mode="w+",
+                                shape=(num_parts, self.num_blocks,
+                                       block_bytes))
+        self.cpu_buffers.append(cpu_buffer)
+        self.disk_buffers.append(disk_buffer)
+        self.file_paths.append(file_path)
+
+    def spill(self, cpu_block_id: int, block_hash: Any) -> None:
+        """Write an evicted CPU block to disk, evicting the least recently
+        used disk block when the tier is full."""
+        if block_hash in self.index:
+            self.index.move_to_end(block_hash)
+            return
+        if self.free_disk_blocks:
+            disk_block_id = self.free_disk_blocks.pop()
+        else:
+            _, disk_block_id = self.index.popitem(last=False)
+        self.index[block_hash] = disk_block_id
+        self._submit(self._copy_to_disk, cpu_block_id, disk_block_id)
+
+    def match(self, block_hashes: Sequence[Any]) -> list[int]:
+        """The disk blocks of the longest prefix of block_hashes on disk."""
+        disk_block_ids = []
+        for block_hash in block_hashes:
+            disk_block_id = self.index.get(block_hash)
+            if disk_block_id is None:
+                break
+            self.index.move_to_end(block_hash)
+            disk_block_ids.append(disk_block_id)
+        return disk_block_ids
+
+    def load(self, cpu_block_id: int, disk_block_id: int) -> None:
+        """Read a disk block into a CPU block."""
+        self._submit(self._copy_to_cpu, cpu_block_id, disk_block_id)
+
+    def wait(self) -> None:
+        """Wait for all the pending copies."""
+        pending = set(self.pending.values())
+        self.pending.clear()
+        for future in pending:
+            future.result()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        # Drop the views so that the shared memory can be closed.
+        self.cpu_buffers.clear()
+        self.disk_buffers.clear()
+        for file_path in self.file_paths:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    def _submit(self, copy_fn: Callable[[int, int], None], cpu_block_id: int,
+                disk_block_id: int) -> None:
+        keys = (("cpu", cpu_block_id), ("disk", disk_block_id))
+        # The copies are started in submission order, so the ones waited
+        # for are already running and cannot be starved by the waiters.
+        deps = [self.pending[key] for key in keys if key in self.pending]
+        future = self.executor.submit(self._copy_after, deps, copy_fn,
+                                      cpu_block_id, disk_block_id)
+        for key in keys:
+            self.pending[key] = future
+
+    @staticmethod
+    def _copy_after(deps: list[Future], copy_fn: Callable[[int, int], None],
+                    cpu_block_id: int, disk_block_id: int) -> None:
+        for dep in deps:
+            dep.result()
+        copy_fn(cpu_block_id, disk_block_id)
+
+    def _copy_to_disk(self, cpu_block_id: int, disk_block_id: int) -> None:
+        for cpu_buffer, disk_buffer in zip(self.cpu_buffers,
+                                           self.disk_buffers):
+            disk_buffer[:, disk_block_id] = cpu_buffer[:, cpu_block_id]
+
+    def _copy_to_cpu(self, cpu_block_id: int, disk_block_id: int) -> None:
+        for cpu_buffer, disk_buffer in zip(self.cpu_buffers,
+                                           self.disk_buffers):
+            cpu_buffer[:, cpu_block_id] = disk_buffer[:, disk_block_id]
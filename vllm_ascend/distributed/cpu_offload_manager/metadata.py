@@ -1,6 +1,7 @@
 import math
 import os
 import pickle
+from collections import defaultdict
 from dataclasses import dataclass
 from multiprocessing.shared_memory import SharedMemory
 from typing import Any, Callable, Optional
@@ -14,6 +15,10 @@ from vllm.v1.kv_cache_interface import AttentionSpec
 
 from vllm_ascend.distributed.cpu_offload_manager.cpu_kv_cache_manager import \
     CPUKVCacheManager
+from vllm_ascend.distributed.cpu_offload_manager.disk_kv_cache import \
+    DiskKVCacheTier
+from vllm_ascend.distributed.cpu_offload_manager.shm_ring import \
+    ShmNotificationRing
 from vllm_ascend.utils import vllm_version_is
 
 if vllm_version_is("0.11.0"):
@@ -47,6 +52,8 @@ def get_cpu_offload_connector(vllm_config: VllmConfig) -> KVTransferConfig:
 class MetadataServer:
     METADATA_SERVER_ADDRESS = f"ipc://{envs.VLLM_RPC_BASE_PATH}/metadata.ipc"
     DEFAULT_CPU_SWAP_SPACE_GB = 800
+    # How often the save notifications are drained when no call comes in.
+    NOTIFICATION_POLL_INTERVAL_MS = 5
 
     class ZMQRPCClient:
 
@@ -102,6 +109,15 @@ class MetadataServer:
             "cpu_swap_space_gb", MetadataServer.DEFAULT_CPU_SWAP_SPACE_GB)
         self.available_memory = available_memory_gb * 1024 * 1024 * 1024
         logger.info(f"cpu swap space: {self.available_memory} bytes")
+        # The blocks evicted from the cpu swap space are spilled to disk when
+        # disk_swap_space_gb is set.
+        self.available_disk = kv_transfer_config.get_from_extra_config(
+            "disk_swap_space_gb", 0) * 1024 * 1024 * 1024
+        self.disk_swap_path = kv_transfer_config.get_from_extra_config(
+            "disk_swap_path", "/tmp/vllm_ascend_kv_cache")
+        self.disk_io_threads = kv_transfer_config.get_from_extra_config(
+            "disk_io_threads", 8)
+        self.disk_tier: Optional[DiskKVCacheTier] = None
         self.ctx = zmq.Context()  # type: ignore
         self.socket = make_zmq_socket(
             self.ctx,
@@ -113,9 +129,15 @@ class MetadataServer:
             "init_cpu_kv_caches": self.init_cpu_kv_caches,
             "post_init": self.post_init,
             "ready": self.ready,
+            "create_save_notification_ring":
+            self.create_save_notification_ring,
         }
         self.shared_memory = {}  # type: ignore
         self.num_cpu_blocks = -1
+        # Every worker reports the requests it finished saving through its
+        # ring, a request is cached once all the workers of its engine did.
+        self.save_notification_rings: list[ShmNotificationRing] = []
+        self.num_saved_workers: defaultdict[str, int] = defaultdict(int)
 
     @staticmethod
     def _safe_create_shared_memory(name: str, size: int) -> SharedMemory:
@@ -130,6 +152,12 @@ class MetadataServer:
     def ready(self):
         return True
 
+    def create_save_notification_ring(self, worker_id: str) -> str:
+        ring = ShmNotificationRing(f"cpu_offload_saved_{worker_id}",
+                                   create=True)
+        self.save_notification_rings.append(ring)
+        return ring.name
+
     def init_cpu_kv_caches(
         self,
         pp_rank: int,
@@ -192,8 +220,11 @@ class MetadataServer:
         # do shared_memory() at least once
         logger.info(f"assign cpu num blocks: {self.num_cpu_blocks}")
         assert self.num_cpu_blocks >= 0
+        if self.available_disk > 0:
+            self.disk_tier = self._create_disk_tier()
         self.cpu_block_manager = CPUKVCacheManager(self.layer,
-                                                   self.num_cpu_blocks)
+                                                   self.num_cpu_blocks,
+                                                   disk_tier=self.disk_tier)
         self.functions.update({
             "get_matched_num_and_touch":
             self.cpu_block_manager.get_matched_num_and_touch,
@@ -205,7 +236,48 @@ class MetadataServer:
             self.cpu_block_manager.cache_and_free_slots,
         })
 
+    def _create_disk_tier(self) -> DiskKVCacheTier:
+        num_buffers = sum(
+            len(cached[0]) for cached in self.shared_memory.values())
+        num_disk_blocks = self.available_disk // (num_buffers *
+                                                  self.layer.page_size_bytes)
+        disk_tier = DiskKVCacheTier(self.disk_swap_path, num_disk_blocks,
+                                    self.disk_io_threads)
+        for shared_memory_dict, layer_size, _, mla_config in \
+                self.shared_memory.values():
+            # [num_blocks, ...] for mla, [2, num_blocks, ...] otherwise
+            num_parts = 1 if mla_config is not None else 2
+            num_blocks = layer_size[num_parts - 1]
+            block_bytes = self.layer.page_size_bytes // num_parts
+            for shm in shared_memory_dict.values():
+                disk_tier.add_buffer(shm.name, shm.buf,
+                                     (num_parts, num_blocks, block_bytes))
+        return disk_tier
+
     def serve_step(self):
+        if self.socket.poll(
+                timeout=MetadataServer.NOTIFICATION_POLL_INTERVAL_MS):
+            self._serve_call()
+        self._process_save_notifications()
+
+    def _process_save_notifications(self):
+        # The rings are kept until the cpu block manager exists.
+        if not hasattr(self, 'cpu_block_manager'):
+            return
+        for ring in self.save_notification_rings:
+            for message in ring.pop_all():
+                req_id = message.decode()
+                self.num_saved_workers[req_id] += 1
+                if self.num_saved_workers[req_id] < self.world_size:
+                    continue
+                del self.num_saved_workers[req_id]
+                logger.debug(f"call cache_and_free_slots for req_id: {req_id}")
+                try:
+                    self.cpu_block_manager.cache_and_free_slots(req_id)
+                except Exception as e:
+                    logger.exception(f"cache_and_free_slots error: {e}")
+
+    def _serve_call(self):
         client_id = self.socket.recv()
         _ = self.socket.recv()
         raw_msg = self.socket.recv()
@@ -228,6 +300,10 @@ class MetadataServer:
         self.socket.send(pickle.dumps(response))
 
     def shutdown(self):
+        if self.disk_tier is not None:
+            self.disk_tier.close()
+        for ring in self.save_notification_rings:
+            ring.close(unlink=True)
         self.socket.close()
         self.ctx.term()
         socket_path = MetadataServer.METADATA_SERVER_ADDRESS.replace(
@@ -0,0 +1,139 @@
+import hashlib
+import struct
+import sys
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+import numpy as np
+
+# int64 header: [num_slots, slot_bytes, ..., write count, ..., read count],
+# the counters on separate cache lines.
+_NUM_SLOTS, _SLOT_BYTES, _WRITE, _READ = 0, 1, 8, 16
+_HEADER_BYTES = 24 * 8
+# Slot header: stamp of the message and its length.
+_SLOT_HEADER = struct.Struct("<QH")
+
+
+def _stamp(index: int, message: bytes) -> int:
+    digest = hashlib.blake2b(message,
+                             digest_size=8,
+                             salt=index.to_bytes(8, "little")).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _open_untracked(name: str, create: bool, size: int = 0) -> SharedMemory:
+    # The consumer unlinks the ring, the resource trackers must not unlink
+    # it when a process exits.
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, create=create, size=size, track=False)
+    shm = SharedMemory(name=name, create=create, size=size)
+    resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore
+    return shm
+
+
+def _unlink_untracked(shm: SharedMemory) -> None:
+    if sys.version_info < (3, 13):
+        # unlink unregisters the segment from the resource tracker.
+        resource_tracker.register(shm._name, "shared_memory")  # type: ignore
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        if sys.version_info < (3, 13):
+            resource_tracker.unregister(
+                shm._name,  # type: ignore[attr-defined]
+                "shared_memory")
+
+
+class ShmNotificationRing:
+    """Single producer, single consumer ring of short messages in shared
+    memory.
+
+    The producer copies the message into the next slot and bumps the write
+    counter, the consumer reads every slot up to it and bumps the read
+    counter, neither takes a lock nor makes a syscall. The producer only
+    waits when the consumer is num_slots messages behind.
+
+    Python can't order the stores to shared memory for the other process,
+    which may see the write counter before the message on weakly ordered
+    CPUs such as aarch64. A slot is stamped with a hash of its index and
+    message instead, and the consumer stops at the first slot whose stamp
+    does not match yet, until the next pop_all.
+
+    The consumer creates and unlinks the ring, the producer attaches to it
+    by name.
+    """
+
+    def __init__(self,
+                 name: str,
+                 num_slots: int = 4096,
+                 slot_bytes: int = 256,
+                 create: bool = False):
+        if create:
+            try:
+                stale = SharedMemory(name=name, create=False)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = _open_untracked(name,
+                                       create=True,
+                                       size=_HEADER_BYTES +
+                                       num_slots * slot_bytes)
+            self.header = np.ndarray((_HEADER_BYTES // 8, ),
+                                     dtype=np.int64,
+                                     buffer=self.shm.buf)
+            self.header[:] = 0
+            self.header[_NUM_SLOTS] = num_slots
+            self.header[_SLOT_BYTES] = slot_bytes
+        else:
+            self.shm = _open_untracked(name, create=False)
+            self.header = np.ndarray((_HEADER_BYTES // 8, ),
+                                     dtype=np.int64,
+                                     buffer=self.shm.buf)
+        self.name = name
+        self.num_slots = int(self.header[_NUM_SLOTS])
+        self.slot_bytes = int(self.header[_SLOT_BYTES])
+        self.max_message_bytes = self.slot_bytes - _SLOT_HEADER.size
+
+    def push(self, message: bytes, timeout: Optional[float] = None) -> None:
+        if len(message) > self.max_message_bytes:
+            raise ValueError(f"Message of {len(message)} bytes does not fit "
+                             f"in a slot of {self.slot_bytes} bytes.")
+        write = int(self.header[_WRITE])
+        start = time.monotonic()
+        while write - int(self.header[_READ]) >= self.num_slots:
+            if timeout is not None and time.monotonic() - start > timeout:
+                raise TimeoutError
+            time.sleep(0.001)
+        offset = _HEADER_BYTES + write % self.num_slots * self.slot_bytes
+        self.shm.buf[offset + _SLOT_HEADER.size:offset + _SLOT_HEADER.size +
+                     len(message)] = message
+        _SLOT_HEADER.pack_into(self.shm.buf, offset, _stamp(write, message),
+                               len(message))
+        self.header[_WRITE] = write + 1
+
+    def pop_all(self) -> list[bytes]:
+        write = int(self.header[_WRITE])
+        read = int(self.header[_READ])
+        messages = []
+        for index in range(read, write):
+            offset = _HEADER_BYTES + index % self.num_slots * self.slot_bytes
+            stamp, length = _SLOT_HEADER.unpack_from(self.shm.buf, offset)
+            start = offset + _SLOT_HEADER.size
+            message = bytes(self.shm.buf[start:start +
+                                         min(length, self.max_message_bytes)])
+            if stamp != _stamp(index, message):
+                # The slot is not entirely visible yet.
+                break
+            messages.append(message)
+        self.header[_READ] = read + len(messages)
+        return messages
+
+    def close(self, unlink: bool = False) -> None:
+        # The views must be released before the segment is closed.
+        del self.header
+        self.shm.close()
+        if unlink:
+            _unlink_untracked(self.shm)
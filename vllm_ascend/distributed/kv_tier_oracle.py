@@ -0,0 +1,120 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from enum import Enum
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+from vllm.config import VllmConfig
+
+from vllm_ascend.utils import vllm_version_is
+
+if vllm_version_is("0.11.0"):
+    from vllm.utils import STR_DTYPE_TO_TORCH_DTYPE, get_dtype_size
+else:
+    from vllm.utils.torch_utils import STR_DTYPE_TO_TORCH_DTYPE, get_dtype_size
+
+if TYPE_CHECKING:
+    from vllm.v1.request import Request
+
+
+class KVTier(str, Enum):
+    LOCAL_HBM = "local_hbm"
+    CPU = "cpu"
+    STORE = "store"
+    REMOTE_PREFILL = "remote_prefill"
+
+
+# Bandwidth in GB/s and fixed latency in ms of a load from a tier, used when
+# kv_connector_extra_config does not set kv_load_bandwidth_gbps and
+# kv_load_latency_ms.
+DEFAULT_KV_LOAD_BANDWIDTH_GBPS = {
+    KVTier.CPU: 20.0,
+    KVTier.STORE: 10.0,
+    KVTier.REMOTE_PREFILL: 10.0,
+}
+DEFAULT_KV_LOAD_LATENCY_MS = {
+    KVTier.CPU: 0.1,
+    KVTier.STORE: 1.0,
+    KVTier.REMOTE_PREFILL: 2.0,
+}
+
+
+@dataclass
+class KVTierEstimate:
+    tier: KVTier
+    num_matched_tokens: int
+    # Estimated time to load the matched tokens into HBM, in seconds.
+    load_latency: float
+
+
+def get_kv_bytes_per_token(vllm_config: VllmConfig) -> int:
+    """Bytes of KV cache of a token on one rank, all layers included."""
+    model_config = vllm_config.model_config
+    parallel_config = vllm_config.parallel_config
+    cache_dtype = vllm_config.cache_config.cache_dtype
+    dtype = (model_config.dtype if cache_dtype == "auto" else
+             STR_DTYPE_TO_TORCH_DTYPE[cache_dtype])
+    # MLA caches one latent vector per token instead of a key and a value.
+    num_parts = 1 if model_config.use_mla else 2
+    return (model_config.get_num_layers(parallel_config) *
+            model_config.get_num_kv_heads(parallel_config) *
+            model_config.get_head_size() * num_parts * get_dtype_size(dtype))
+
+
+class KVLoadCostModel:
+    """Linear cost of loading the KV cache of tokens from a tier."""
+
+    def __init__(self, vllm_config: VllmConfig, tier: KVTier):
+        self.vllm_config = vllm_config
+        self.tier = tier
+        kv_transfer_config = vllm_config.kv_transfer_config
+        bandwidth_gbps = DEFAULT_KV_LOAD_BANDWIDTH_GBPS[tier]
+        latency_ms = DEFAULT_KV_LOAD_LATENCY_MS[tier]
+        if kv_transfer_config is not None:
+            bandwidth_gbps = float(
+                kv_transfer_config.get_from_extra_config(
+                    "kv_load_bandwidth_gbps", bandwidth_gbps))
+            latency_ms = float(
+                kv_transfer_config.get_from_extra_config(
+                    "kv_load_latency_ms", latency_ms))
+        self.bytes_per_second = bandwidth_gbps * 1e9
+        self.latency = latency_ms / 1e3
+
+    @cached_property
+    def bytes_per_token(self) -> int:
+        # The model config is complete once the first request comes.
+        return get_kv_bytes_per_token(self.vllm_config)
+
+    def estimate(self, num_tokens: int) -> KVTierEstimate:
+        load_latency = 0.0
+        if num_tokens > 0:
+            load_latency = (
+                self.latency +
+                num_tokens * self.bytes_per_token / self.bytes_per_second)
+        return KVTierEstimate(self.tier, num_tokens, load_latency)
+
+
+class KVTierOracle(ABC):
+    """Implemented by the KV connectors reporting where the external tokens
+    of a request come from and what loading them costs, so that the
+    scheduler can recompute them instead when that is faster."""
+
+    @abstractmethod
+    def get_kv_tier_estimates(
+            self, request: "Request",
+            num_external_tokens: int) -> list[KVTierEstimate]:
+        """
+        Args:
+            request (Request): the request object.
+            num_external_tokens (int): the number of tokens returned by
+                get_num_new_matched_tokens for this request.
+        Returns:
+            the estimates of the tiers the tokens are loaded from, the tokens
+            already in the local prefix cache being free.
+        """
+        pass
+
+
+def get_kv_load_latency(estimates: list[KVTierEstimate]) -> float:
+    return sum(estimate.load_latency for estimate in estimates
+               if estimate.tier != KVTier.LOCAL_HBM)
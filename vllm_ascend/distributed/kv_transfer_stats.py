@@ -0,0 +1,189 @@
+import math
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional, Union
+
+import torch
+from vllm.distributed.kv_transfer.kv_connector.v1.metrics import \
+    KVConnectorStats
+
+HISTOGRAMS = ("transfer_bytes", "transfer_time_ms", "transfer_gbps",
+              "queue_time_ms", "handshake_time_ms")
+COUNTERS = ("num_transfers", "num_failures", "num_retries",
+            "num_delayed_free_timeouts")
+
+# Bucket i of a histogram counts the values in [2^(i-1-_BUCKET_OFFSET),
+# 2^(i-_BUCKET_OFFSET)), the first and last buckets everything below and
+# above.
+NUM_BUCKETS = 64
+_BUCKET_OFFSET = 20
+
+
+def _bucket(value: float) -> int:
+    if value <= 0:
+        return 0
+    return min(max(math.frexp(value)[1] + _BUCKET_OFFSET, 0), NUM_BUCKETS - 1)
+
+
+def _bucket_upper_bound(index: int) -> float:
+    return 2.0**(index - _BUCKET_OFFSET)
+
+
+class _ThreadMetrics:
+    """Cumulative metrics written by a single thread."""
+
+    def __init__(self):
+        self.buckets = {name: [0] * NUM_BUCKETS for name in HISTOGRAMS}
+        self.sums = dict.fromkeys(HISTOGRAMS, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+
+@dataclass
+class AscendKVConnectorStats(KVConnectorStats):
+    """Transfer metrics of the KV connectors, sent from the workers to the
+    stats logger.
+
+    data holds, for every histogram, its bucket counts and the sum of its
+    values, and the value of every counter.
+    """
+
+    def __post_init__(self):
+        if not self.data:
+            self.reset()
+
+    def reset(self):
+        self.data = {
+            "buckets": {
+                name: [0] * NUM_BUCKETS
+                for name in HISTOGRAMS
+            },
+            "sums": dict.fromkeys(HISTOGRAMS, 0.0),
+            "counters": dict.fromkeys(COUNTERS, 0),
+        }
+
+    def is_empty(self) -> bool:
+        return not (any(self.data["counters"].values()) or any(
+            any(buckets) for buckets in self.data["buckets"].values()))
+
+    def aggregate(self, other: KVConnectorStats) -> KVConnectorStats:
+        for name, buckets in other.data["buckets"].items():
+            own = self.data["buckets"][name]
+            for index, count in enumerate(buckets):
+                own[index] += count
+        for name, value in other.data["sums"].items():
+            self.data["sums"][name] += value
+        for name, value in other.data["counters"].items():
+            self.data["counters"][name] += value
+        return self
+
+    def reduce(self) -> dict[str, Union[int, float]]:
+        metrics: dict[str, Union[int, float]] = dict(self.data["counters"])
+        for name in HISTOGRAMS:
+            buckets = self.data["buckets"][name]
+            count = sum(buckets)
+            if count == 0:
+                continue
+            metrics[f"{name}_avg"] = round(self.data["sums"][name] / count, 3)
+            # The quantiles are the upper bounds of their buckets.
+            for quantile in (50, 99):
+                rank = math.ceil(count * quantile / 100)
+                seen = 0
+                for index, bucket_count in enumerate(buckets):
+                    seen += bucket_count
+                    if seen >= rank:
+                        break
+                metrics[f"{name}_p{quantile}"] = round(
+                    _bucket_upper_bound(index), 3)
+        return metrics
+
+
+class KVTransferStats:
+    """Recorder of the transfer metrics of a KV connector worker.
+
+    Every thread records into its own histograms and counters, so recording
+    takes no lock. collect() sums them up and returns what was recorded
+    since the previous call, the metrics of a thread only ever growing.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._threads: list[_ThreadMetrics] = []
+        self._collected = _ThreadMetrics()
+
+    def _metrics(self) -> _ThreadMetrics:
+        metrics = getattr(self._local, "metrics", None)
+        if metrics is None:
+            metrics = self._local.metrics = _ThreadMetrics()
+            self._threads.append(metrics)
+        return metrics
+
+    def _observe(self, name: str, value: float) -> None:
+        metrics = self._metrics()
+        metrics.buckets[name][_bucket(value)] += 1
+        metrics.sums[name] += value
+
+    def _increment(self, name: str) -> None:
+        self._metrics().counters[name] += 1
+
+    def record_transfer(self, num_bytes: int, seconds: float) -> None:
+        self._increment("num_transfers")
+        self._observe("transfer_bytes", num_bytes)
+        self._observe("transfer_time_ms", seconds * 1e3)
+        if seconds > 0:
+            self._observe("transfer_gbps", num_bytes / seconds / 1e9)
+
+    def record_queue_time(self, seconds: float) -> None:
+        self._observe("queue_time_ms", seconds * 1e3)
+
+    def record_handshake_time(self, seconds: float) -> None:
+        self._observe("handshake_time_ms", seconds * 1e3)
+
+    def record_failure(self) -> None:
+        self._increment("num_failures")
+
+    def record_retry(self) -> None:
+        self._increment("num_retries")
+
+    def record_delayed_free_timeout(self) -> None:
+        self._increment("num_delayed_free_timeouts")
+
+    def collect(self) -> Optional[AscendKVConnectorStats]:
+        stats = AscendKVConnectorStats()
+        collected = self._collected
+        for name in HISTOGRAMS:
+            buckets = stats.data["buckets"][name]
+            for metrics in list(self._threads):
+                for index, count in enumerate(metrics.buckets[name]):
+                    buckets[index] += count
+                stats.data["sums"][name] += metrics.sums[name]
+            for index, count in enumerate(buckets):
+                buckets[index] = count - collected.buckets[name][index]
+                collected.buckets[name][index] = count
+            total = stats.data["sums"][name]
+            stats.data["sums"][name] = total - collected.sums[name]
+            collected.sums[name] = total
+        for name in COUNTERS:
+            total = sum(metrics.counters[name]
+                        for metrics in list(self._threads))
+            stats.data["counters"][name] = total - collected.counters[name]
+            collected.counters[name] = total
+        return None if stats.is_empty() else stats
+
+
+def build_kv_connector_stats(
+        data: Optional[dict[str, Any]] = None) -> AscendKVConnectorStats:
+    return AscendKVConnectorStats(
+        data=data) if data is not None else AscendKVConnectorStats()
+
+
+def get_kv_block_bytes(kv_caches: Any) -> int:
+    """Bytes of a block over all the layers of KV caches of shape
+    [num_blocks, ...], given as a dict or a list of tensors or of tuples of
+    tensors per layer."""
+    layers = kv_caches.values() if isinstance(kv_caches, dict) else kv_caches
+    num_bytes = 0
+    for layer in layers:
+        caches = (layer, ) if isinstance(layer, torch.Tensor) else layer
+        for cache in caches:
+            num_bytes += cache[0].numel() * cache.element_size()
+    return num_bytes
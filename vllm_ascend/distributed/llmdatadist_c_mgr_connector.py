@@ -10,6 +10,7 @@ from collections.abc import Iterator
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
+from functools import partial
 from typing import Any, Callable, Optional, Tuple
 
 import llm_datadist  # type: ignore
@@ -22,6 +23,8 @@ from vllm import envs
 from vllm.config import KVTransferConfig, VllmConfig
 from vllm.distributed.kv_transfer.kv_connector.v1.base import (
     KVConnectorBase_V1, KVConnectorMetadata, KVConnectorRole)
+from vllm.distributed.kv_transfer.kv_connector.v1.metrics import \
+    KVConnectorStats
 from vllm.distributed.parallel_state import (get_dcp_group, get_tp_group,
                                              get_world_group)
 from vllm.forward_context import ForwardContext
@@ -31,6 +34,12 @@ from vllm.v1.core.sched.output import SchedulerOutput
 from vllm.v1.request import Request, RequestStatus
 
 import vllm_ascend.envs as envs_ascend
+from vllm_ascend.distributed.kv_tier_oracle import (KVLoadCostModel, KVTier,
+                                                    KVTierEstimate,
+                                                    KVTierOracle)
+from vllm_ascend.distributed.kv_transfer_stats import (
+    KVTransferStats, build_kv_connector_stats, get_kv_block_bytes)
+from vllm_ascend.distributed.remote_agents import get_remote_agents
 from vllm_ascend.utils import (AscendSocVersion, get_ascend_soc_version,
                                prefill_context_parallel_enable,
                                vllm_version_is)
@@ -101,7 +110,7 @@ class LLMDataDistCMgrConnectorMetadata(KVConnectorMetadata):
         )
 
 
-class LLMDataDistCMgrConnector(KVConnectorBase_V1):
+class LLMDataDistCMgrConnector(KVConnectorBase_V1, KVTierOracle):
 
     def __init__(self, vllm_config: VllmConfig, role: KVConnectorRole):
         assert vllm_config.kv_transfer_config is not None
@@ -125,6 +134,13 @@ class LLMDataDistCMgrConnector(KVConnectorBase_V1):
         return self.connector_scheduler.get_num_new_matched_tokens(
             request, num_computed_tokens)
 
+    def get_kv_tier_estimates(
+            self, request: "Request",
+            num_external_tokens: int) -> list[KVTierEstimate]:
+        assert self.connector_scheduler is not None
+        return self.connector_scheduler.get_kv_tier_estimates(
+            request, num_external_tokens)
+
     def update_state_after_alloc(self, request: "Request",
                                  blocks: "KVCacheBlocks",
                                  num_external_tokens: int):
@@ -165,6 +181,20 @@ class LLMDataDistCMgrConnector(KVConnectorBase_V1):
         assert self.connector_worker is not None
         return self.connector_worker.get_finished(finished_req_ids)
 
+    def get_kv_connector_stats(self) -> Optional[KVConnectorStats]:
+        # Only the workers have transfer stats.
+        connector_worker = getattr(self, "connector_worker", None)
+        if connector_worker is None:
+            return None
+        return connector_worker.get_kv_connector_stats()
+
+    @classmethod
+    def build_kv_connector_stats(
+            cls,
+            data: Optional[dict[str,
+                                Any]] = None) -> Optional[KVConnectorStats]:
+        return build_kv_connector_stats(data)
+
     def start_load_kv(self, forward_context: "ForwardContext",
                       **kwargs) -> None:
         assert self.connector_worker is not None
@@ -209,6 +239,7 @@ class LLMDataDistCMgrConnectorScheduler():
 
         self._reqs_need_recv: dict[str, tuple[Request, list[int]]] = {}
         self._reqs_need_send: dict[str, float] = {}
+        self.kv_load_cost = KVLoadCostModel(vllm_config, KVTier.REMOTE_PREFILL)
 
     def get_num_new_matched_tokens(
             self, request: "Request",
@@ -243,6 +274,11 @@ class LLMDataDistCMgrConnectorScheduler():
         # No remote prefill for this request.
         return 0, False
 
+    def get_kv_tier_estimates(
+            self, request: "Request",
+            num_external_tokens: int) -> list[KVTierEstimate]:
+        return [self.kv_load_cost.estimate(num_external_tokens)]
+
     def update_state_after_alloc(self, request: Request, blocks: KVCacheBlocks,
                                  num_externel_tokens: int):
         params = request.kv_transfer_params
@@ -371,6 +407,9 @@ class LLMDataDistCMgrConnectorWorker():
 
         # linked_cluster record the cluster that already build the connection its format should be {"cluster_id": "comm_name"}
         self.linked_cluster: dict[Any, Any] = {}
+        # (remote host, remote port) -> cluster id of the agent there, so that
+        # the pulls from a linked agent skip the metadata exchange.
+        self.remote_agents: dict[tuple[str, int], int] = {}
         self.prefill_device_list: list[tuple[int, int]] = []
         self.decode_device_list: list[tuple[int, int]] = []
         global_rank_table = self.read_offline_rank_table()
@@ -385,6 +424,8 @@ class LLMDataDistCMgrConnectorWorker():
         self.done_receiving_counts: defaultdict[str,
                                                 set[int]] = defaultdict(set)
         self.reqs_to_send: dict[str, float] = {}
+        self.xfer_stats = KVTransferStats()
+        self.block_bytes = 0
 
     def listen_for_agent_metadata_req(self, event: threading.Event):
         assert self.local_agent_metadata is not None
@@ -534,6 +575,7 @@ class LLMDataDistCMgrConnectorWorker():
         # SFA case. [3 (k_normed, k_pe, k_idx), num_blocks, ...]
         # MHA case. [2 (k and v), num_blocks, ...]
         self.num_blocks = first_kv_cache.shape[0]
+        self.block_bytes = get_kv_block_bytes(kv_caches)
         block_rank = 3  # [block_size, latent_dim]
         block_shape = first_kv_cache.shape[-block_rank:]
 
@@ -662,6 +704,32 @@ class LLMDataDistCMgrConnectorWorker():
             name="metadata_agent_listener")
         self.metadata_agent_listener_t.start()
         self.ready_event.wait()
+        if self.llm_datadist_role == LLMRole.DECODER:
+            self._warmup_remote_agents()
+
+    def _warmup_remote_agents(self):
+        """Link with the agents of the remote engines listed in the config
+        ahead of their first request."""
+        for agent in get_remote_agents(self.kv_transfer_config):
+            _, remote_ports, _ = self._get_kv_split_metadata(
+                local_block_ids=[],
+                remote_block_ids=[],
+                remote_port=agent.port,
+                remote_tp_size=agent.tp_size or self.tp_size,
+                remote_cp_size=self.pcp_size,
+                remote_dcp_size=self.dcp_size,
+            )
+            for remote_port in remote_ports:
+                self.executor.submit(self._warmup_remote_agent, agent.host,
+                                     remote_port)
+
+    def _warmup_remote_agent(self, host: str, port: int):
+        try:
+            self.connect_to_remote_agent(host, port)
+        except Exception as e:
+            logger.warning(
+                f"Failed to warm up the link to remote agent {host}:{port}: {e}"
+            )
 
     def start_load_kv(self, metadata: LLMDataDistCMgrConnectorMetadata):
         futures = []
@@ -679,14 +747,16 @@ class LLMDataDistCMgrConnectorWorker():
                 remote_cp_size=meta.remote_cp_size,
                 remote_dcp_size=meta.remote_dcp_size,
             )
-            futures.append(future)
+            futures.append((future, meta.remote_host))
 
-        def handle_exception(future):
+        def handle_exception(remote_host, future):
             if future.exception():
                 logger.error(f"KV transfer task failed: {future.exception()}")
+                self.xfer_stats.record_failure()
+                self._forget_remote_agents(remote_host)
 
-        for future in futures:
-            future.add_done_callback(handle_exception)
+        for future, remote_host in futures:
+            future.add_done_callback(partial(handle_exception, remote_host))
         self.reqs_to_send.update(metadata.reqs_to_send)
 
     def add_remote_agent(self, metadata: LLMDataDistCMgrAgentMetadata) -> int:
@@ -833,21 +903,39 @@ class LLMDataDistCMgrConnectorWorker():
             f"Successfully remove remote client with cluster id {cluster_id} !"
         )
 
+    def _forget_remote_agents(self, host: str):
+        """Unlink the agents of a host a pull failed from, the next pull
+        links with them again."""
+        for (remote_host,
+             remote_port), cluster_id in list(self.remote_agents.items()):
+            if remote_host != host:
+                continue
+            self.remote_agents.pop((remote_host, remote_port), None)
+            if cluster_id in self.linked_cluster:
+                self.remove_remote_agent(cluster_id)
+
     def connect_to_remote_agent(self, host: str, port: int) -> int:
+        cluster_id = self.remote_agents.get((host, port))
+        if cluster_id is not None and cluster_id in self.linked_cluster:
+            return cluster_id
         url = f"tcp://{host}:{port}"
         logger.debug(f"Querying metadata from url: {url}")
         msg_encoder = msgspec.msgpack.Encoder()
         msg_send = msg_encoder.encode(
             [LLMDataDistCMgrEvent.ReqForMetadata, self.local_agent_metadata])
+        start_time = time.perf_counter()
         with zmq_ctx(zmq.REQ, url) as sock:  # type: ignore[attr-defined]
             logger.info("Try request remote metadata from socket......")
             sock.send(msg_send)
             metadata_bytes = sock.recv()
+            self.xfer_stats.record_handshake_time(time.perf_counter() -
+                                                  start_time)
             decoder = msgspec.msgpack.Decoder()
             metadata = decoder.decode(metadata_bytes)
             metadata = LLMDataDistCMgrAgentMetadata(**metadata)
             logger.info(f"recving metadata: {metadata}")
             cluster_id = self.add_remote_agent(metadata)
+        self.remote_agents[(host, port)] = cluster_id
         return cluster_id
 
     def send_finish_to_remote(self, host: str, ports: list[int], request_id):
@@ -973,6 +1061,7 @@ class LLMDataDistCMgrConnectorWorker():
                 remote_block_ids = remote_block_ids[-num_local_blocks:]
 
             logger.info(f"remote cluster id is: {remote_cluster_id}")
+            start_time = time.perf_counter()
             if self.use_mla:
                 remote_cache_key_k_normed = BlocksCacheKey(
                     cluster_id=remote_cluster_id, model_id=0)
@@ -1047,6 +1136,9 @@ class LLMDataDistCMgrConnectorWorker():
                     raise RuntimeError(
                         "LLMDataDistCMgrConnectorWorker: Timeout during pull_blocks, you can try to increase the sync_kv_timeout config or checking your connect status"
                     )
+            self.xfer_stats.record_transfer(
+                num_local_blocks * self.block_bytes,
+                time.perf_counter() - start_time)
         self.send_finish_to_remote(remote_ip, remote_ports, request_id)
         with self.thread_lock:
             self.finished_reqs.add(request_id)
@@ -1068,6 +1160,7 @@ class LLMDataDistCMgrConnectorWorker():
                 if req_id in self.reqs_to_send:
                     self.finished_reqs.add(req_id)
                     del self.reqs_to_send[req_id]
+                    self.xfer_stats.record_delayed_free_timeout()
             req_ids_to_ret = copy.deepcopy(self.finished_reqs)
             self.finished_reqs.clear()
         if self.llm_datadist_role == LLMRole.PROMPT:
@@ -1075,6 +1168,9 @@ class LLMDataDistCMgrConnectorWorker():
         else:
             return None, req_ids_to_ret
 
+    def get_kv_connector_stats(self) -> Optional[KVConnectorStats]:
+        return self.xfer_stats.collect()
+
 
 # adopt this from  https://github.com/vllm-project/vllm/blob/main/vllm/distributed/kv_transfer/kv_connector/v1/nixl_connector.py
 @contextlib.contextmanager
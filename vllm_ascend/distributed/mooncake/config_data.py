@@ -2,8 +2,10 @@ import array
 import hashlib
 import json
 import os
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Iterable, List, Optional, Tuple, Union
+from typing import Callable, Iterable, List, Optional, Tuple, Union
 
 import torch
 from vllm.distributed.kv_transfer.kv_connector.v1.base import \
@@ -104,13 +106,52 @@ class LayerMooncakeEngineKey(MooncakeEngineKey):
                 f"@{self.worker_id}@{self.chunk_hash}@{self.layer_id}")
 
 
+PREFIX_HASH_ALGORITHMS = ("sha256", "blake2b", "xxh3_128", "blake3")
+
+
+def get_prefix_hash_fn(algorithm: str) -> Callable[[bytes], bytes]:
+    """Digest function of a prefix hash algorithm, the optional ones are
+    imported lazily so that they are only required when selected."""
+    if algorithm == "sha256":
+        return lambda data: hashlib.sha256(data).digest()
+    if algorithm == "blake2b":
+        return lambda data: hashlib.blake2b(data, digest_size=16).digest()
+    if algorithm == "xxh3_128":
+        try:
+            import xxhash  # type: ignore
+        except ImportError as e:
+            raise ImportError("Please install xxhash to use the xxh3_128 "
+                              "prefix hash algorithm.") from e
+        return xxhash.xxh3_128_digest
+    if algorithm == "blake3":
+        try:
+            from blake3 import blake3  # type: ignore
+        except ImportError as e:
+            raise ImportError("Please install blake3 to use the blake3 "
+                              "prefix hash algorithm.") from e
+        return lambda data: blake3(data).digest()
+    raise ValueError(f"Unknown prefix hash algorithm {algorithm}, supported "
+                     f"algorithms are {PREFIX_HASH_ALGORITHMS}.")
+
+
 class ChunkedTokenDatabase():
 
     def __init__(
         self,
         metadata: MooncakeEngineMetadata,
+        hash_algorithm: str = "sha256",
+        max_memoized_requests: int = 256,
     ):
         self.metadata = metadata
+        self.hash_algorithm = hash_algorithm
+        self._hash_fn = get_prefix_hash_fn(hash_algorithm)
+        # req_id -> (token bytes of the hashed chunks, prefix hash state after
+        # every chunk), so that the hashes of a growing sequence are only
+        # computed for the new chunks.
+        self._memoized_prefix_hashes: OrderedDict[str, tuple[
+            bytes, list[bytes]]] = OrderedDict()
+        self.max_memoized_requests = max_memoized_requests
+        self._memo_lock = threading.Lock()
 
     def _make_key_by_hash(self,
                           chunk_hash: str,
@@ -123,48 +164,83 @@ class ChunkedTokenDatabase():
             chunk_hash,
         )
 
-    def _hash(
-        self,
-        tokens: Union[torch.Tensor, List[int]],
-        prefix_hash: str,
-    ) -> str:
-        # TODO: change it to a more efficient hash function
-        if isinstance(tokens, torch.Tensor):
-            tokens_bytes = tokens.cpu().to(torch.uint32).numpy().tobytes()
-        elif isinstance(tokens, list):
-            tokens_bytes = array.array("I", tokens).tobytes()
-        return hashlib.sha256(prefix_hash.encode("ascii") +
-                              tokens_bytes).hexdigest()
-
-    def _chunk_tokens(
-        self,
-        tokens: Union[torch.Tensor, List[int]],
-    ) -> Iterable[Union[torch.Tensor, List[int]]]:
-        """
-        Chunk the tokens into chunks of size self.metadata.block_size.
-
-        :param tokens: the input tokens, with shape [seq_len]
-            device: the target device after chunking
+    def _hash(self, tokens_bytes: bytes, prefix_state: bytes) -> bytes:
+        """Chain the prefix hash state with the bytes of the next chunk."""
+        if self.hash_algorithm == "sha256":
+            # Hex string chaining, kept for the keys already in the store.
+            return hashlib.sha256(prefix_state +
+                                  tokens_bytes).hexdigest().encode("ascii")
+        return self._hash_fn(prefix_state + tokens_bytes)
 
-        :return: a generator of chunks of tokens, each with
-                shape [metadata.block_size]
-        """
-        for i in range(0, len(tokens), self.metadata.block_size):
-            yield tokens[i:i + self.metadata.block_size]
+    def _chunk_hash(self, state: bytes) -> str:
+        if self.hash_algorithm == "sha256":
+            return state.decode("ascii")
+        # Tagged so that the keys of different algorithms never collide.
+        return f"{self.hash_algorithm}:{state.hex()}"
 
-    def _prefix_hash(
-        self,
-        token_chunks: Iterable[Union[torch.Tensor, List[int]]],
-    ) -> Iterable[str]:
-        prefix_hash = ''
-        for token_chunk in token_chunks:
-            prefix_hash = self._hash(token_chunk, prefix_hash)
-            yield prefix_hash
+    @staticmethod
+    def _tokens_to_bytes(tokens: Union[torch.Tensor, List[int]]) -> bytes:
+        # One device to host copy for the whole sequence.
+        if isinstance(tokens, torch.Tensor):
+            return tokens.cpu().to(torch.uint32).numpy().tobytes()
+        return array.array("I", tokens).tobytes()
+
+    def _prefix_hash(self,
+                     tokens: Union[torch.Tensor, List[int]],
+                     req_id: Optional[str] = None) -> list[str]:
+        """Prefix hash of every chunk of block_size tokens, the last one
+        possibly partial."""
+        tokens_bytes = self._tokens_to_bytes(tokens)
+        chunk_bytes = self.metadata.block_size * 4
+        num_full_chunks = len(tokens_bytes) // chunk_bytes
+
+        states: list[bytes] = []
+        memo = None
+        memo_hit = False
+        if req_id is not None:
+            with self._memo_lock:
+                memo = self._memoized_prefix_hashes.get(req_id)
+                if memo is not None:
+                    self._memoized_prefix_hashes.move_to_end(req_id)
+        if memo is not None:
+            num_reused = min(len(memo[1]), num_full_chunks)
+            reused_bytes = num_reused * chunk_bytes
+            if memoryview(memo[0])[:reused_bytes] == memoryview(
+                    tokens_bytes)[:reused_bytes]:
+                states = memo[1][:num_reused]
+                memo_hit = True
+
+        prefix_state = states[-1] if states else b""
+        for offset in range(
+                len(states) * chunk_bytes, len(tokens_bytes), chunk_bytes):
+            prefix_state = self._hash(
+                tokens_bytes[offset:offset + chunk_bytes], prefix_state)
+            states.append(prefix_state)
+
+        # A shorter prefix of the memoized sequence leaves the memo as is.
+        if req_id is not None and num_full_chunks > 0 and not (
+                memo_hit and memo is not None
+                and num_full_chunks <= len(memo[1])):
+            with self._memo_lock:
+                self._memoized_prefix_hashes[req_id] = (
+                    tokens_bytes[:num_full_chunks * chunk_bytes],
+                    states[:num_full_chunks])
+                self._memoized_prefix_hashes.move_to_end(req_id)
+                while len(self._memoized_prefix_hashes
+                          ) > self.max_memoized_requests:
+                    self._memoized_prefix_hashes.popitem(last=False)
+        return [self._chunk_hash(state) for state in states]
+
+    def discard_request(self, req_id: str) -> None:
+        """Drop the memoized prefix hashes of a finished request."""
+        with self._memo_lock:
+            self._memoized_prefix_hashes.pop(req_id, None)
 
     def process_tokens(
         self,
         tokens: Union[torch.Tensor, List[int]],
         mask: Optional[torch.Tensor] = None,
+        req_id: Optional[str] = None,
     ) -> Iterable[Tuple[int, int, MooncakeEngineKey]]:
         """Process the tokens and return the corresponding cache engine keys.
 
@@ -175,8 +251,9 @@ class ChunkedTokenDatabase():
             FFFFFTTTTTTT, where True means the tokens needs to be matched,
             and the Falses will ALWAYS be at the PREFIX of the tensor.
 
-        :param bool make_key: Whether to make the cache engine key or not.
-            If False, the hash value will be returned instead.
+        :param Optional[str] req_id: The request the tokens belong to. When
+            given, the prefix hashes are memoized and only the chunks added
+            since the last call of the request are hashed.
 
         :returns: A iterable of tuples with three elements. The first element
             is the start index of the tokens for the key. The second element
@@ -197,8 +274,7 @@ class ChunkedTokenDatabase():
             )
         total_len = len(tokens)
 
-        token_chunks = self._chunk_tokens(tokens)
-        prefix_hashes = self._prefix_hash(token_chunks)
+        prefix_hashes = self._prefix_hash(tokens, req_id)
 
         start_idx = 0
         for chunk_id, hash_val in enumerate(prefix_hashes):
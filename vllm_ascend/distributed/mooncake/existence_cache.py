@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Sequence
+
+
+class KeyExistenceCache:
+    """Bounded LRU index of the store keys known to be present or absent.
+
+    Spares the store a batch_exists round trip for the keys looked up or
+    stored recently. Keys are recorded present once their put succeeded or
+    the store reported them, absent when the store did not hold them. An
+    entry expires after its TTL, the absent ones after a shorter TTL since
+    another instance may store the key at any time, and is dropped when a
+    get of the key fails.
+
+    The index is exact: a false positive would let the scheduler count
+    tokens the store cannot serve.
+    """
+
+    def __init__(self,
+                 capacity: int,
+                 ttl: float = 10.0,
+                 negative_ttl: float = 1.0):
+        assert capacity > 0
+        self.capacity = capacity
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # key -> (exists, expiry time)
+        self._entries: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, keys: Sequence[str]) -> list[Optional[bool]]:
+        """Whether each key is present, None when it is not known."""
+        now = time.monotonic()
+        result: list[Optional[bool]] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    result.append(None)
+                elif entry[1] <= now:
+                    del self._entries[key]
+                    result.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    result.append(entry[0])
+        return result
+
+    def record(self, keys: Iterable[str], exists: Iterable[bool]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key, present in zip(keys, exists):
+                ttl = self.ttl if present else self.negative_ttl
+                self._entries[key] = (bool(present), now + ttl)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def record_present(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        self.record(keys, [True] * len(keys))
+
+    def invalidate(self, keys: Optional[Iterable[str]] = None) -> None:
+        """Forget the keys, all of them when keys is None."""
+        with self._lock:
+            if keys is None:
+                self._entries.clear()
+                return
+            for key in keys:
+                self._entries.pop(key, None)
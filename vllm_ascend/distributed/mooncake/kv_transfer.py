@@ -1,11 +1,13 @@
 import queue
 import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional
 
 import torch
 from vllm.utils import logger
 
+from vllm_ascend.distributed.kv_transfer_stats import KVTransferStats
 from vllm_ascend.distributed.mooncake.config_data import (
     ChunkedTokenDatabase, LasyerMultiBlockReqMeta)
 from vllm_ascend.distributed.mooncake.mooncake_store import Mooncakestore
@@ -13,10 +15,17 @@ from vllm_ascend.distributed.mooncake.mooncake_store import Mooncakestore
 
 class KVTransferThread(threading.Thread):
 
-    def __init__(self, tp_rank: int, tp_size: int, m_store: Mooncakestore,
+    def __init__(self,
+                 tp_rank: int,
+                 tp_size: int,
+                 m_store: Mooncakestore,
                  local_kv_caches_base_addr: list[int],
-                 token_database: ChunkedTokenDatabase, block_len: list[int],
-                 block_size: int, ready_event: threading.Event, name: str):
+                 token_database: ChunkedTokenDatabase,
+                 block_len: list[int],
+                 block_size: int,
+                 ready_event: threading.Event,
+                 name: str,
+                 stats: Optional[KVTransferStats] = None):
         super().__init__(daemon=True, name=name)
         self.tp_rank = tp_rank
         self.tp_size = tp_size
@@ -34,6 +43,7 @@ class KVTransferThread(threading.Thread):
         # TODO(jianzs): make this configurable
         self.executor = ThreadPoolExecutor(max_workers=32)
         self.finished_requests: set[str] = set()
+        self.stats = stats or KVTransferStats()
 
     def prepare_value(self, start: int, end: int, block_ids: list[int]):
         addr_list = []
@@ -84,6 +94,7 @@ class KVTransferThread(threading.Thread):
             "block_ids": block_ids,
             "mask": mask,
             "is_last_chunk": is_last_chunk,
+            "enqueue_time": time.perf_counter(),
         })
         self.request_queue.put(req)
 
@@ -112,9 +123,13 @@ class KVTransferThread(threading.Thread):
                     logger.warning("Received a None request!")
                     self.request_queue.task_done()
                     continue
+                if isinstance(request_data, dict):
+                    self.stats.record_queue_time(time.perf_counter() -
+                                                 request_data["enqueue_time"])
                 self._handle_request(request_data)
             except Exception as e:
                 logger.error(f"Error in KVCacheTransferThread: {e}")
+                self.stats.record_failure()
 
     def _handle_request(self, req_meta: dict[str, Any]):
         pass
@@ -122,10 +137,16 @@ class KVTransferThread(threading.Thread):
 
 class KVCacheStoreSendingThread(KVTransferThread):
 
-    def __init__(self, tp_rank: int, tp_size: int, m_store: Mooncakestore,
+    def __init__(self,
+                 tp_rank: int,
+                 tp_size: int,
+                 m_store: Mooncakestore,
                  local_kv_caches_base_addr: list[int],
-                 token_database: ChunkedTokenDatabase, block_len: list[int],
-                 block_size: int, ready_event: threading.Event):
+                 token_database: ChunkedTokenDatabase,
+                 block_len: list[int],
+                 block_size: int,
+                 ready_event: threading.Event,
+                 stats: Optional[KVTransferStats] = None):
         super().__init__(tp_rank,
                          tp_size,
                          m_store,
@@ -134,7 +155,8 @@ class KVCacheStoreSendingThread(KVTransferThread):
                          block_len,
                          block_size,
                          ready_event,
-                         name="KVCacheSendingThread")
+                         name="KVCacheSendingThread",
+                         stats=stats)
 
     def _handle_request(self, req_meta: dict[str, Any]):
         tokens = req_meta["tokens"]
@@ -148,7 +170,7 @@ class KVCacheStoreSendingThread(KVTransferThread):
             key_list = []
             blockIds = []
             for start, end, key in self.token_database.process_tokens(
-                    tokens, mask):
+                    tokens, mask, req_id):
                 addr, size, block_id = self.prepare_value(
                     start, end, block_ids)
                 key_list.append(key.to_string())
@@ -156,13 +178,21 @@ class KVCacheStoreSendingThread(KVTransferThread):
                 size_list.append(size)
                 blockIds.append(block_id)
             torch.npu.current_stream().synchronize()
+            start_time = time.perf_counter()
             self.m_store.put_batch(key_list, addr_list, size_list, blockIds)
+            num_bytes = sum(map(sum, size_list))
         else:
             torch.npu.current_stream().synchronize()
+            start_time = time.perf_counter()
+            num_bytes = 0
             for start, end, key in self.token_database.process_tokens(
-                    tokens, mask):
+                    tokens, mask, req_id):
                 addr, size, _ = self.prepare_value(start, end, block_ids)
                 self.m_store.put(key, addr, size)
+                num_bytes += sum(size)
+        if num_bytes:
+            self.stats.record_transfer(num_bytes,
+                                       time.perf_counter() - start_time)
         if is_last_chunk:
             self.set_finished_request(req_id)
         self.request_queue.task_done()
@@ -170,10 +200,16 @@ class KVCacheStoreSendingThread(KVTransferThread):
 
 class KVCacheStoreRecvingThread(KVTransferThread):
 
-    def __init__(self, tp_rank: int, tp_size: int, m_store: Mooncakestore,
+    def __init__(self,
+                 tp_rank: int,
+                 tp_size: int,
+                 m_store: Mooncakestore,
                  local_kv_caches_base_addr: list[int],
-                 token_database: ChunkedTokenDatabase, block_len: list[int],
-                 block_size: int, ready_event: threading.Event):
+                 token_database: ChunkedTokenDatabase,
+                 block_len: list[int],
+                 block_size: int,
+                 ready_event: threading.Event,
+                 stats: Optional[KVTransferStats] = None):
         super().__init__(tp_rank,
                          tp_size,
                          m_store,
@@ -182,7 +218,8 @@ class KVCacheStoreRecvingThread(KVTransferThread):
                          block_len,
                          block_size,
                          ready_event,
-                         name="KVCacheStoreRecvingThread")
+                         name="KVCacheStoreRecvingThread",
+                         stats=stats)
 
     def _handle_request(self, req_meta: dict[str, Any]):
         tokens = req_meta["tokens"]
@@ -195,30 +232,44 @@ class KVCacheStoreRecvingThread(KVTransferThread):
             key_list = []
             blockIds = []
             for start, end, key in self.token_database.process_tokens(
-                    tokens, mask):
+                    tokens, mask, req_id):
                 addr, size, block_id = self.prepare_value(
                     start, end, block_ids)
                 key_list.append(key.to_string())
                 addr_list.append(addr)
                 size_list.append(size)
                 blockIds.append(block_id)
+            start_time = time.perf_counter()
             self.m_store.get_batch(key_list, addr_list, size_list, blockIds)
+            num_bytes = sum(map(sum, size_list))
         else:
+            start_time = time.perf_counter()
+            num_bytes = 0
             for start, end, key in self.token_database.process_tokens(
-                    tokens, mask):
+                    tokens, mask, req_id):
                 addr, size, _ = self.prepare_value(start, end, block_ids)
                 self.m_store.get(key, addr, size)
+                num_bytes += sum(size)
+        if num_bytes:
+            self.stats.record_transfer(num_bytes,
+                                       time.perf_counter() - start_time)
         self.set_finished_request(req_id)
         self.request_queue.task_done()
 
 
 class KVCacheStoreLayerSendingThread(KVTransferThread):
 
-    def __init__(self, tp_rank: int, tp_size: int, m_store: Mooncakestore,
+    def __init__(self,
+                 tp_rank: int,
+                 tp_size: int,
+                 m_store: Mooncakestore,
                  local_kv_caches_base_addr: list[int],
-                 token_database: ChunkedTokenDatabase, block_len: list[int],
-                 block_size: int, ready_event: threading.Event,
-                 num_layers: int):
+                 token_database: ChunkedTokenDatabase,
+                 block_len: list[int],
+                 block_size: int,
+                 ready_event: threading.Event,
+                 num_layers: int,
+                 stats: Optional[KVTransferStats] = None):
         super().__init__(tp_rank,
                          tp_size,
                          m_store,
@@ -227,7 +278,8 @@ class KVCacheStoreLayerSendingThread(KVTransferThread):
                          block_len,
                          block_size,
                          ready_event,
-                         name="KVCacheStoreLayerSendingThread")
+                         name="KVCacheStoreLayerSendingThread",
+                         stats=stats)
         self.final_layer_id = num_layers - 1
 
     def add_request(  # type: ignore[override]
@@ -237,12 +289,18 @@ class KVCacheStoreLayerSendingThread(KVTransferThread):
     def _handle_request(  # type: ignore[override]
             self, req_meta: LasyerMultiBlockReqMeta):
         torch.npu.current_stream().synchronize()
+        start_time = time.perf_counter()
+        num_bytes = 0
         for index, key in enumerate(req_meta.keys):
             addr, size = self.prepare_value_layer(req_meta.starts[index],
                                                   req_meta.ends[index],
                                                   req_meta.block_ids,
                                                   req_meta.layer_id)
             self.m_store.put(key, addr, size)
+            num_bytes += sum(size)
+        if num_bytes:
+            self.stats.record_transfer(num_bytes,
+                                       time.perf_counter() - start_time)
         if req_meta.layer_id == self.final_layer_id:
             self.set_finished_request(req_meta.req_id)
         self.request_queue.task_done()
@@ -250,11 +308,17 @@ class KVCacheStoreLayerSendingThread(KVTransferThread):
 
 class KVCacheStoreLayerRecvingThread(KVTransferThread):
 
-    def __init__(self, tp_rank: int, tp_size: int, m_store: Mooncakestore,
+    def __init__(self,
+                 tp_rank: int,
+                 tp_size: int,
+                 m_store: Mooncakestore,
                  local_kv_caches_base_addr: list[int],
-                 token_database: ChunkedTokenDatabase, block_len: list[int],
-                 block_size: int, ready_event: threading.Event,
-                 get_event: threading.Event):
+                 token_database: ChunkedTokenDatabase,
+                 block_len: list[int],
+                 block_size: int,
+                 ready_event: threading.Event,
+                 get_event: threading.Event,
+                 stats: Optional[KVTransferStats] = None):
         super().__init__(tp_rank,
                          tp_size,
                          m_store,
@@ -263,7 +327,8 @@ class KVCacheStoreLayerRecvingThread(KVTransferThread):
                          block_len,
                          block_size,
                          ready_event,
-                         name="KVCacheStoreLayerRecvingThread")
+                         name="KVCacheStoreLayerRecvingThread",
+                         stats=stats)
         self.get_event = get_event
 
     def add_request(  # type: ignore[override]
@@ -272,11 +337,17 @@ class KVCacheStoreLayerRecvingThread(KVTransferThread):
 
     def _handle_request(  # type: ignore[override]
             self, req_meta: LasyerMultiBlockReqMeta):
+        start_time = time.perf_counter()
+        num_bytes = 0
         for index, key in enumerate(req_meta.keys):
             addr, size = self.prepare_value_layer(req_meta.starts[index],
                                                   req_meta.ends[index],
                                                   req_meta.block_ids,
                                                   req_meta.layer_id)
             self.m_store.get(key, addr, size)
+            num_bytes += sum(size)
+        if num_bytes:
+            self.stats.record_transfer(num_bytes,
+                                       time.perf_counter() - start_time)
         self.request_queue.task_done()
         self.get_event.set()
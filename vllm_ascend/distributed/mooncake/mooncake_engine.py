@@ -5,13 +5,18 @@ import time
 from typing import Generator, List, Optional, Union
 
 # Third Party
+import numpy as np
 import torch
 from vllm.config import VllmConfig
+from vllm.distributed.kv_transfer.kv_connector.v1.metrics import \
+    KVConnectorStats
 from vllm.utils import logger
 
+from vllm_ascend.distributed.kv_transfer_stats import KVTransferStats
 from vllm_ascend.distributed.mooncake.config_data import (
     ChunkedTokenDatabase, LasyerMultiBlockReqMeta, MooncakeConnectorMetadata,
     MooncakeEngineMetadata)
+from vllm_ascend.distributed.mooncake.existence_cache import KeyExistenceCache
 from vllm_ascend.distributed.mooncake.kv_transfer import (
     KVCacheStoreLayerRecvingThread, KVCacheStoreLayerSendingThread,
     KVCacheStoreRecvingThread, KVCacheStoreSendingThread, KVTransferThread)
@@ -49,6 +54,7 @@ class MooncakeEngine:
             "register_buffer", False)
         self.block_size = vllm_config.cache_config.block_size
         self.current_layer = 0
+        self.xfer_stats = KVTransferStats()
         # self.use_mla = first_kv_cache_tuple[0].size(
         #     -1) != first_kv_cache_tuple[1].size(-1)
         self.num_layers = model_config.get_num_layers(parallel_config)
@@ -73,9 +79,22 @@ class MooncakeEngine:
             self.use_mla,
         )
 
-        self.token_database = ChunkedTokenDatabase(self.metadata)
-
-        self.m_store = Mooncakestore(parallel_config)
+        self.token_database = ChunkedTokenDatabase(
+            self.metadata,
+            vllm_config.kv_transfer_config.kv_connector_extra_config.get(
+                "prefix_hash_algorithm", "sha256"))
+
+        existence_cache = None
+        existence_cache_size = vllm_config.kv_transfer_config.kv_connector_extra_config.get(
+            "existence_cache_size", 0)
+        if existence_cache_size > 0:
+            existence_cache = KeyExistenceCache(
+                existence_cache_size,
+                vllm_config.kv_transfer_config.kv_connector_extra_config.get(
+                    "existence_cache_ttl", 10.0),
+                vllm_config.kv_transfer_config.kv_connector_extra_config.get(
+                    "existence_cache_negative_ttl", 1.0))
+        self.m_store = Mooncakestore(parallel_config, existence_cache)
 
         self.kv_send_thread: Optional[KVTransferThread] = None
         self.kv_recv_thread: Optional[KVTransferThread] = None
@@ -140,13 +159,13 @@ class MooncakeEngine:
                     self.tp_rank, self.tp_size, self.m_store,
                     self.kv_caches_base_addr, self.token_database,
                     self.block_len, self.block_size, ready_event_sending,
-                    self.num_layers)
+                    self.num_layers, self.xfer_stats)
                 self.kv_send_thread.start()
             ready_event = threading.Event()
             self.kv_recv_thread = KVCacheStoreLayerRecvingThread(
                 self.tp_rank, self.tp_size, self.m_store,
                 self.kv_caches_base_addr, self.token_database, self.block_len,
-                self.block_size, ready_event, self.get_event)
+                self.block_size, ready_event, self.get_event, self.xfer_stats)
             self.kv_recv_thread.start()
             ready_event.wait()
         else:
@@ -155,14 +174,16 @@ class MooncakeEngine:
                 self.kv_send_thread = KVCacheStoreSendingThread(
                     self.tp_rank, self.tp_size, self.m_store,
                     self.kv_caches_base_addr, self.token_database,
-                    self.block_len, self.block_size, ready_event_sending)
+                    self.block_len, self.block_size, ready_event_sending,
+                    self.xfer_stats)
                 self.kv_send_thread.start()
             if self.load_async:
                 ready_event = threading.Event()
                 self.kv_recv_thread = KVCacheStoreRecvingThread(
                     self.tp_rank, self.tp_size, self.m_store,
                     self.kv_caches_base_addr, self.token_database,
-                    self.block_len, self.block_size, ready_event)
+                    self.block_len, self.block_size, ready_event,
+                    self.xfer_stats)
                 self.kv_recv_thread.start()
                 ready_event.wait()
 
@@ -219,21 +240,30 @@ class MooncakeEngine:
                         key_list = []
                         blockIds = []
                         for start, end, key in self.token_database.process_tokens(
-                                tokens, token_mask):
+                                tokens, token_mask, req_id):
                             addr, size, block_id = self.prepare_value(
                                 start, end, request.block_ids)
                             key_list.append(key.to_string())
                             addr_list.append(addr)
                             size_list.append(size)
                             blockIds.append(block_id)
+                        start_time = time.perf_counter()
                         self.m_store.get_batch(key_list, addr_list, size_list,
                                                blockIds)
+                        num_bytes = sum(map(sum, size_list))
                     else:
+                        start_time = time.perf_counter()
+                        num_bytes = 0
                         for start, end, key in self.token_database.process_tokens(
-                                tokens, token_mask):
+                                tokens, token_mask, req_id):
                             addr, size, _ = self.prepare_value(
                                 start, end, request.block_ids)
                             self.m_store.get(key, addr, size)
+                            num_bytes += sum(size)
+                    if num_bytes:
+                        self.xfer_stats.record_transfer(
+                            num_bytes,
+                            time.perf_counter() - start_time)
 
     def prepare_value(self, start: int, end: int, block_ids: list[int]):
         addr_list = []
@@ -394,7 +424,7 @@ class MooncakeEngine:
         keys = []
         first_flag = True
         for start, end, key in self.token_database.process_tokens(
-                tokens, mask):
+                tokens, mask, req_id):
             keys_multi_layer = key.split_layers(self.num_layers)
             starts.append(start)
             ends.append(end)
@@ -467,7 +497,7 @@ class MooncakeEngine:
         ends = []
         keys = []
         for start, end, key in self.token_database.process_tokens(
-                tokens, mask):
+                tokens, mask, req_id):
             keys_multi_layer = key.split_layers(self.num_layers)
             starts.append(start)
             ends.append(end)
@@ -498,6 +528,8 @@ class MooncakeEngine:
             self.kv_recv_thread.
             get_and_clear_finished_requests(  # type: ignore[union-attr]
             ) if self.load_async else set())
+        for req_id in done_sending:
+            self.token_database.discard_request(req_id)
 
         logger.debug(
             "Number of completed KV cache send requests: %d, receive "
@@ -505,6 +537,9 @@ class MooncakeEngine:
             self.tp_rank)
         return done_sending, done_recving
 
+    def get_kv_connector_stats(self) -> Optional[KVConnectorStats]:
+        return self.xfer_stats.collect()
+
     def wait_layer_transfer_finish(self):
         time.sleep(10)
         pass
@@ -513,114 +548,89 @@ class MooncakeEngine:
         self,
         tokens: Union[torch.Tensor, List[int]],
         use_layerwise: bool,
+        req_id: Optional[str] = None,
     ) -> int:
         """
         Checks the existence of KV cache of the tokens from the cache engine.
         :param tokens: the input tokens, with shape [seq_len]
+        :param req_id: the request of the tokens, if known, which lets the
+            prefix hashes of its previous lookups be reused
         :return: An int indicating how many prefix tokens are cached.
         """
-        end = 0
-        keys = []
-        try:
-            if use_layerwise:
-                for start, end, key in self.token_database.process_tokens(
-                        tokens):
-                    keys_multi_layer = key.split_layers(self.num_layers)
-                    for item in keys_multi_layer:
-                        keys.append(item.to_string())
-                    # batch is_exists
-                    ress = self.m_store.batch_exists(keys)
-                    res = 1
-                    for value in ress:
-                        if value != 1:
-                            res = 0
-                            break
-                    if res == 1:
-                        continue
-                    else:
-                        return start
-            else:
-                starts = []
-                for start, end, key in self.token_database.process_tokens(
-                        tokens):
-                    keys.append(key.to_string())
-                    starts.append(start)
-                res = self.m_store.batch_exists(
-                    keys)  # type: ignore[assignment]
-                for index, value in enumerate(res):  # type: ignore[arg-type]
-                    if value != 1:
-                        return starts[index]
-            # all tokens where found, return the maximal end
-        except Exception as e:
-            logger.error(f"Remote connection failed in contains: {e}")
-            return start
-        return end
+        return self._lookup(tokens, use_layerwise, req_id, all_workers=False)
 
     def lookup_scheduler(
         self,
         tokens: Union[torch.Tensor, List[int]],
         use_layerwise: bool,
+        req_id: Optional[str] = None,
     ) -> int:
         """
-        Checks the existence of KV cache of the tokens from the cache engine.
+        Checks the existence of KV cache of the tokens from the cache engine,
+        for all the TP ranks.
         :param tokens: the input tokens, with shape [seq_len]
+        :param req_id: the request of the tokens, if known, which lets the
+            prefix hashes of its previous lookups be reused
         :return: An int indicating how many prefix tokens are cached.
         """
-        end = 0
-        keys = []
+        return self._lookup(tokens,
+                            use_layerwise,
+                            req_id,
+                            all_workers=not use_layerwise)
+
+    def _lookup(self, tokens: Union[torch.Tensor,
+                                    List[int]], use_layerwise: bool,
+                req_id: Optional[str], all_workers: bool) -> int:
+        """Number of prefix tokens whose chunks are in the store for this
+        worker, or for all the TP workers with all_workers, and for every
+        layer in layerwise mode.
+
+        The keys of all the chunks, workers and layers are generated from the
+        chunk hashes and checked with a single batch_exists call.
+        """
+        starts: list[int] = []
+        ends: list[int] = []
+        chunk_hashes: list[str] = []
+        for start, end, key in self.token_database.process_tokens(
+                tokens, req_id=req_id):
+            starts.append(start)
+            ends.append(end)
+            chunk_hashes.append(key.chunk_hash)
+        if not chunk_hashes:
+            return 0
+
+        prefix = f"{self.metadata.model_name}@{self.metadata.world_size}@"
+        if use_layerwise:
+            # [chunk, layer]
+            worker_prefix = f"{prefix}{self.metadata.worker_id}@"
+            keys = [
+                f"{worker_prefix}{chunk_hash}@{layer_id}"
+                for chunk_hash in chunk_hashes
+                for layer_id in range(self.num_layers)
+            ]
+            shape = (len(chunk_hashes), self.num_layers)
+        else:
+            # [worker, chunk]
+            worker_ids = range(
+                self.tp_size) if all_workers else [self.metadata.worker_id]
+            keys = [
+                f"{prefix}{worker_id}@{chunk_hash}" for worker_id in worker_ids
+                for chunk_hash in chunk_hashes
+            ]
+            shape = (len(worker_ids), len(chunk_hashes))
         try:
-            if use_layerwise:
-                for start, end, key in self.token_database.process_tokens(
-                        tokens):
-                    keys_multi_layer = key.split_layers(self.num_layers)
-                    for item in keys_multi_layer:
-                        keys.append(item.to_string())
-                    # batch is_exists
-                    ress = self.m_store.batch_exists(keys)
-                    res = 1
-                    for value in ress:
-                        if value != 1:
-                            res = 0
-                            break
-                    if res == 1:
-                        continue
-                    else:
-                        return start
-            else:
-                starts = []
-                for start, end, key in self.token_database.process_tokens(
-                        tokens):
-                    keys.append(key.to_string())
-                    starts.append(start)
-                multi_tp_keys = keys[:]
-                for i in range(1, self.tp_size):
-                    for item in keys:
-                        new_str = item.replace(  # type: ignore[attr-defined]
-                            "@0", f"@{i}", 1)
-                        multi_tp_keys.append(new_str)
-                res = self.m_store.batch_exists(
-                    multi_tp_keys)  # type: ignore[assignment]
-                num_block = len(keys)
-                multi_tp_values = [
-                    res[i * num_block:(i + 1) *
-                        num_block]  # type: ignore[index]
-                    for i in range(self.tp_size)
-                ]
-                index = self.find_min_first_non_one_index(multi_tp_values)
-                if index != -1:
-                    return starts[index]
-        # all tokens where found, return the maximal end
+            exists = np.asarray(self.m_store.batch_exists(keys)).reshape(shape)
         except Exception as e:
             logger.error(f"Remote connection failed in contains: {e}")
-            return start
-        return end
-
-    def find_min_first_non_one_index(self, arr):
-        try:
-            return min(idx for row in arr for idx, val in enumerate(row)
-                       if val != 1)
-        except ValueError:
-            return -1
+            # None of the chunks is confirmed to be in the store.
+            return 0
+        missing = exists != 1
+        missing_chunks = missing.any(axis=1) if use_layerwise else \
+            missing.any(axis=0)
+        if missing_chunks.any():
+            return starts[int(missing_chunks.argmax())]
+        # all tokens where found, return the maximal end
+        return ends[-1]
 
     def close(self) -> None:
         """Close the cache engine and free all the resources"""
@@ -1,5 +1,6 @@
 # Standard
 import os
+from typing import Optional
 
 # Third Party
 from mooncake.store import ReplicateConfig  # type: ignore
@@ -8,6 +9,7 @@ from vllm.distributed.parallel_state import get_tensor_model_parallel_rank
 from vllm.utils import get_ip, logger
 
 from vllm_ascend.distributed.mooncake.config_data import MooncakeEngineKey
+from vllm_ascend.distributed.mooncake.existence_cache import KeyExistenceCache
 from vllm_ascend.distributed.mooncake.transfer_engine import get_global_te
 
 from .config_data import MooncakeStoreConfig
@@ -18,7 +20,9 @@ BASE_PORT = int(os.getenv("VLLM_BASE_PORT", "8790"))
 
 class Mooncakestore():
 
-    def __init__(self, parallel_config: ParallelConfig):
+    def __init__(self,
+                 parallel_config: ParallelConfig,
+                 existence_cache: Optional[KeyExistenceCache] = None):
         try:
             from mooncake.store import MooncakeDistributedStore  # type: ignore
         except ImportError as e:
@@ -38,6 +42,8 @@ class Mooncakestore():
         assert len(device_ids_list) > tp_rank
         device_id = device_ids_list[tp_rank]
         self.config = MooncakeStoreConfig.load_from_env()
+        # Answers batch_exists for the keys put or looked up recently.
+        self.existence_cache = existence_cache
         self.store = MooncakeDistributedStore()
         if self.config.protocol == "ascend" and not self.config.use_ascend_direct:
             local_hostname = get_ip() + ":" + str(BASE_PORT + int(device_id)) + \
@@ -69,7 +75,18 @@ class Mooncakestore():
         return self.store.is_exist(key.to_string()) == 1
 
     def batch_exists(self, keys: list[str]) -> list[int]:
-        return self.store.batch_is_exist(keys)
+        if self.existence_cache is None:
+            return self.store.batch_is_exist(keys)
+        known = self.existence_cache.lookup(keys)
+        unknown = [i for i, exists in enumerate(known) if exists is None]
+        if unknown:
+            unknown_keys = [keys[i] for i in unknown]
+            res = self.store.batch_is_exist(unknown_keys)
+            self.existence_cache.record(unknown_keys,
+                                        [value == 1 for value in res])
+            for i, value in zip(unknown, res):
+                known[i] = value == 1
+        return [1 if exists else 0 for exists in known]
 
     def register_buffer(self, ptr, length):
         return self.store.register_buffer(ptr, length)
@@ -82,8 +99,13 @@ class Mooncakestore():
             for value in res:
                 if value < 0:
                     logger.error(f"Failed to get key {keys},res:{res}")
+            if self.existence_cache is not None:
+                self.existence_cache.invalidate(
+                    key for key, value in zip(keys, res) if value < 0)
         except Exception as e:
             logger.error(f"Failed to get key {keys}. {e}")
+            if self.existence_cache is not None:
+                self.existence_cache.invalidate(keys)
 
     def put_batch(self, keys: list[str], addrs: list[list[int]],
                   sizes: list[list[int]], block_ids: list[int]):
@@ -96,6 +118,9 @@ class Mooncakestore():
             for value in res:
                 if value < 0:
                     logger.error(f"Failed to put key {keys},res:{res}")
+            if self.existence_cache is not None:
+                self.existence_cache.record_present(
+                    key for key, value in zip(keys, res) if value >= 0)
         except Exception as e:
             logger.error(f"Failed to put key {keys},error:{e}")
 
@@ -106,8 +131,12 @@ class Mooncakestore():
             res = self.store.batch_get_into_ascend(key_str, addr, size)
             if res[0] != expect_res:
                 logger.error(f"Failed to get key: [{key_str}] .")
+                if self.existence_cache is not None:
+                    self.existence_cache.invalidate([key_str])
         except Exception:
             logger.error(f"Failed to get key: [{key_str}] .")
+            if self.existence_cache is not None:
+                self.existence_cache.invalidate([key_str])
         return res
 
     def put(self, key: MooncakeEngineKey, addr: list[int], size: list[int]):
@@ -116,6 +145,8 @@ class Mooncakestore():
             ret = self.store.batch_put_from_ascend(key_str, addr, size)
             if ret[0] != 0:
                 logger.error(f"Failed to put key {key_str}.")
+            elif self.existence_cache is not None:
+                self.existence_cache.record_present([key_str])
         except Exception:
             logger.error(f"Failed to put key {key_str}.")
 
@@ -1,6 +1,9 @@
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional
 
+import msgspec
+import numpy as np
 import torch
 import vllm.envs as envs
 import zmq
@@ -8,19 +11,24 @@ from vllm.attention.backends.abstract import AttentionMetadata
 from vllm.config import VllmConfig
 from vllm.distributed.kv_transfer.kv_connector.v1.base import (
     KVConnectorBase_V1, KVConnectorMetadata, KVConnectorRole)
+from vllm.distributed.kv_transfer.kv_connector.v1.metrics import \
+    KVConnectorStats
 from vllm.forward_context import ForwardContext
 from vllm.utils import logger, make_zmq_socket
 from vllm.v1.core.kv_cache_manager import KVCacheBlocks
 from vllm.v1.core.sched.output import SchedulerOutput
 from vllm.v1.request import Request
-from vllm.v1.serial_utils import MsgpackDecoder, MsgpackEncoder
 
+from vllm_ascend.distributed.kv_tier_oracle import (KVLoadCostModel, KVTier,
+                                                    KVTierEstimate,
+                                                    KVTierOracle)
+from vllm_ascend.distributed.kv_transfer_stats import build_kv_connector_stats
 from vllm_ascend.distributed.mooncake.config_data import (
     LoadSpec, MooncakeConnectorMetadata, ReqMeta, RequestTracker)
 from vllm_ascend.distributed.mooncake.mooncake_engine import MooncakeEngine
 
 
-class MooncakeConnectorV1(KVConnectorBase_V1):
+class MooncakeConnectorV1(KVConnectorBase_V1, KVTierOracle):
 
     def __init__(self, vllm_config: VllmConfig, role: KVConnectorRole):
         super().__init__(vllm_config=vllm_config, role=role)
@@ -60,6 +68,13 @@ class MooncakeConnectorV1(KVConnectorBase_V1):
         return self.connector_scheduler.get_num_new_matched_tokens(
             request, num_computed_tokens)
 
+    def get_kv_tier_estimates(
+            self, request: "Request",
+            num_external_tokens: int) -> list[KVTierEstimate]:
+        assert self.connector_scheduler is not None
+        return self.connector_scheduler.get_kv_tier_estimates(
+            request, num_external_tokens)
+
     def update_state_after_alloc(self, request: "Request",
                                  blocks: "KVCacheBlocks",
                                  num_external_tokens: int):
@@ -144,6 +159,20 @@ class MooncakeConnectorV1(KVConnectorBase_V1):
 
         return sended_and_finished, done_recving
 
+    def get_kv_connector_stats(self) -> Optional[KVConnectorStats]:
+        # Only the workers have transfer stats.
+        connector_worker = getattr(self, "connector_worker", None)
+        if connector_worker is None:
+            return None
+        return connector_worker.get_kv_connector_stats()
+
+    @classmethod
+    def build_kv_connector_stats(
+            cls,
+            data: Optional[dict[str,
+                                Any]] = None) -> Optional[KVConnectorStats]:
+        return build_kv_connector_stats(data)
+
 
 def get_zmq_rpc_path_mooncake(
     vllm_config: Optional["VllmConfig"] = None, ) -> str:
@@ -167,6 +196,10 @@ class MooncakeStoreConnectorV1Scheduler:
             "consumer_is_to_load", False)
         self.load_async = vllm_config.kv_transfer_config.kv_connector_extra_config.get(
             "load_async", False)
+        # Whether get_num_new_matched_tokens defers the requests whose lookup
+        # is in flight instead of waiting for it.
+        self.lookup_async = vllm_config.kv_transfer_config.kv_connector_extra_config.get(
+            "lookup_async", False)
         # request_id -> (vllm cached tokes, mooncake cached tokens)
         self.load_specs: dict[str, LoadSpec] = {}
         self._block_size = vllm_config.cache_config.block_size
@@ -178,6 +211,7 @@ class MooncakeStoreConnectorV1Scheduler:
                 "discard_partial_chunks", True))
         self._unfinished_requests: dict[str, tuple[Request, list[int]]] = {}
         self._unfinished_request_ids: set[str] = set()
+        self.kv_load_cost = KVLoadCostModel(vllm_config, KVTier.STORE)
 
     def get_num_new_matched_tokens(
         self,
@@ -199,15 +233,20 @@ class MooncakeStoreConnectorV1Scheduler:
         if self.kv_role == "kv_consumer" and not self.consumer_is_to_load:
             return 0, False
 
-        if self._discard_partial_chunks:
-            token_block_end = len(request.prompt_token_ids
-                                  ) // self._block_size * self._block_size
-            token_ids = torch.tensor(
-                request.prompt_token_ids[:token_block_end])
+        if self.lookup_async:
+            # The lookups of a scheduler step are sent as one batch by
+            # build_connector_meta, the request is retried once the result
+            # is back.
+            hit_tokens = self.client.pop_result(request.request_id)
+            if hit_tokens is None:
+                if not self.client.is_pending(request.request_id):
+                    self.client.submit(request.request_id,
+                                       self._lookup_token_ids(request))
+                return None, False  # type: ignore[return-value]
+            num_external_hit_tokens = hit_tokens
         else:
-            token_ids = torch.tensor(request.prompt_token_ids)
-
-        num_external_hit_tokens = self.client.lookup(token_ids)
+            num_external_hit_tokens = self.client.lookup(
+                self._lookup_token_ids(request), request.request_id)
 
         if num_external_hit_tokens == request.num_tokens:
             num_external_hit_tokens -= 1
@@ -233,6 +272,11 @@ class MooncakeStoreConnectorV1Scheduler:
 
         return need_to_allocate, self.load_async
 
+    def get_kv_tier_estimates(
+            self, request: "Request",
+            num_external_tokens: int) -> list[KVTierEstimate]:
+        return [self.kv_load_cost.estimate(num_external_tokens)]
+
     def update_state_after_alloc(self, request: "Request",
                                  blocks: "KVCacheBlocks",
                                  num_external_tokens: int):
@@ -269,6 +313,13 @@ class MooncakeStoreConnectorV1Scheduler:
 
         self.load_specs[request.request_id].can_load = True
 
+    def _lookup_token_ids(self, request: "Request") -> torch.Tensor:
+        if self._discard_partial_chunks:
+            token_block_end = len(request.prompt_token_ids
+                                  ) // self._block_size * self._block_size
+            return torch.tensor(request.prompt_token_ids[:token_block_end])
+        return torch.tensor(request.prompt_token_ids)
+
     def build_connector_meta(
             self, scheduler_output: SchedulerOutput) -> KVConnectorMetadata:
         """Attach the connector metadata to the request object.
@@ -280,6 +331,8 @@ class MooncakeStoreConnectorV1Scheduler:
         Args:
             scheduler_output (SchedulerOutput): the scheduler output object.
         """
+        if self.lookup_async:
+            self.client.flush()
 
         force_skip_save = self.kv_role == "kv_consumer"
 
@@ -418,6 +471,8 @@ class MooncakeStoreConnectorV1Scheduler:
         Once a request is finished, determine whether request blocks
         should be freed now or will be sent asynchronously and freed later.
         """
+        if self.lookup_async:
+            self.client.discard(request.request_id)
         if self.kv_role == "kv_consumer":
             return False, None
         tracker = self._request_trackers.get(request.request_id)
@@ -431,30 +486,119 @@ class MooncakeStoreConnectorV1Scheduler:
 
 
 class MooncakeLookupClient:
+    """Sends the lookups of the scheduler to the MooncakeLookupServer.
+
+    A lookup message carries a batch of requests: a msgpack header with the
+    batch id, the request ids and the number of tokens of every request,
+    followed by their token ids concatenated as int64. The reply is the
+    batch id and the number of hit tokens of every request. Batches are
+    either sent and waited for with lookup_batch, or queued with submit,
+    sent by flush and collected with pop_result.
+    """
 
     def __init__(self, vllm_config: "VllmConfig"):
-        self.encoder = MsgpackEncoder()
         self.ctx = zmq.Context()  # type: ignore[attr-defined]
         socket_path = get_zmq_rpc_path_mooncake(vllm_config)
         self.socket = make_zmq_socket(
             self.ctx,
             socket_path,
-            zmq.REQ,  # type: ignore[attr-defined]
+            zmq.DEALER,  # type: ignore[attr-defined]
             bind=False,
         )
-
-    def lookup(self, token_ids: torch.Tensor) -> int:
-        request = self.encoder.encode(token_ids)
-        self.socket.send_multipart(request, copy=False)
-        resp = self.socket.recv()
-        result = int.from_bytes(resp, "big")
-        return result
+        self.next_batch_id = 0
+        # Lookups queued for the next flush, request_id -> token ids.
+        self.queued: dict[str, torch.Tensor] = {}
+        # batch id -> request ids of the batches sent and not answered.
+        self.in_flight: dict[int, list[Optional[str]]] = {}
+        self.results: dict[str, int] = {}
+
+    def lookup(self,
+               token_ids: torch.Tensor,
+               req_id: Optional[str] = None) -> int:
+        return self.lookup_batch([token_ids], [req_id])[0]
+
+    def lookup_batch(
+            self,
+            token_ids_list: list[torch.Tensor],
+            req_ids: Optional[list[Optional[str]]] = None) -> list[int]:
+        """Look up a batch of requests in one round trip."""
+        req_ids = req_ids or [None] * len(token_ids_list)
+        batch_id = self._send(token_ids_list, req_ids)
+        while True:
+            reply_id, results = self._recv()
+            if reply_id == batch_id:
+                # The results are returned, only the submitted lookups are
+                # kept for pop_result.
+                for req_id in req_ids:
+                    if req_id is not None:
+                        self.results.pop(req_id, None)
+                return results
+
+    def submit(self, req_id: str, token_ids: torch.Tensor) -> None:
+        self.queued[req_id] = token_ids
+
+    def flush(self) -> None:
+        """Send the queued lookups as one batch."""
+        if not self.queued:
+            return
+        req_ids: list[Optional[str]] = list(self.queued)
+        self._send(list(self.queued.values()), req_ids)
+        self.queued.clear()
+
+    def is_pending(self, req_id: str) -> bool:
+        return req_id in self.queued or any(
+            req_id in req_ids for req_ids in self.in_flight.values())
+
+    def pop_result(self, req_id: str) -> Optional[int]:
+        """The result of a submitted lookup, None if it is not back yet."""
+        while self.socket.poll(0):
+            self._recv()
+        return self.results.pop(req_id, None)
+
+    def discard(self, req_id: str) -> None:
+        self.queued.pop(req_id, None)
+        self.results.pop(req_id, None)
+        # Drop the result of an in flight lookup when it comes back.
+        for req_ids in self.in_flight.values():
+            for idx, in_flight_id in enumerate(req_ids):
+                if in_flight_id == req_id:
+                    req_ids[idx] = None
+
+    def _send(self, token_ids_list: list[torch.Tensor],
+              req_ids: list[Optional[str]]) -> int:
+        batch_id = self.next_batch_id
+        self.next_batch_id += 1
+        tokens = [
+            np.asarray(token_ids, dtype=np.int64)
+            for token_ids in token_ids_list
+        ]
+        header = msgspec.msgpack.encode(
+            (batch_id, req_ids, [len(t) for t in tokens]))
+        payload = np.concatenate(tokens) if tokens else np.empty(
+            0, dtype=np.int64)
+        self.socket.send_multipart((header, payload), copy=False)
+        self.in_flight[batch_id] = list(req_ids)
+        return batch_id
+
+    def _recv(self) -> tuple[int, list[int]]:
+        batch_id, results = msgspec.msgpack.decode(self.socket.recv())
+        req_ids = self.in_flight.pop(batch_id, [])
+        for req_id, result in zip(req_ids, results):
+            if req_id is not None:
+                self.results[req_id] = result
+        return batch_id, results
 
     def close(self):
         self.socket.close(linger=0)
 
 
 class MooncakeLookupServer:
+    """Answers the lookups of MooncakeLookupClient.
+
+    The socket is only used by the IO thread, the requests of a batch are
+    looked up by a pool of workers which hand the reply of a batch back to
+    the IO thread through an inproc socket.
+    """
 
     def __init__(
         self,
@@ -462,31 +606,89 @@ class MooncakeLookupServer:
         vllm_config: "VllmConfig",
         use_layerwise: bool,
     ):
-        self.decoder = MsgpackDecoder(torch.Tensor)
         self.ctx = zmq.Context()  # type: ignore[attr-defined]
         socket_path = get_zmq_rpc_path_mooncake(vllm_config)
         self.socket = make_zmq_socket(
             self.ctx,
             socket_path,
-            zmq.REP,  # type: ignore[attr-defined]
+            zmq.ROUTER,  # type: ignore[attr-defined]
             bind=True,
         )
+        self.reply_path = f"inproc://mooncake_lookup_replies_{id(self)}"
+        self.reply_socket = self.ctx.socket(zmq.PULL)  # type: ignore
+        self.reply_socket.bind(self.reply_path)
+        self.local = threading.local()
 
         self.mooncake_engine = mooncake_engine
+        self.use_layerwise = use_layerwise
+        num_workers = vllm_config.kv_transfer_config.get_from_extra_config(
+            "lookup_server_workers", 4)
+        self.executor = ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix="mooncake_lookup")
         self.running = True
 
         def process_request():
+            poller = zmq.Poller()  # type: ignore[attr-defined]
+            poller.register(self.socket, zmq.POLLIN)  # type: ignore
+            poller.register(self.reply_socket, zmq.POLLIN)  # type: ignore
             while self.running:
-                frames = self.socket.recv_multipart(copy=False)
-                token_ids = self.decoder.decode(frames)
-                result = self.mooncake_engine.lookup_scheduler(
-                    token_ids, use_layerwise)
-                response = result.to_bytes(4, "big")
-                self.socket.send(response)
+                events = dict(poller.poll(timeout=100))
+                if self.reply_socket in events:
+                    self.socket.send_multipart(
+                        self.reply_socket.recv_multipart())
+                if self.socket in events:
+                    identity, header, payload = self.socket.recv_multipart()
+                    self._dispatch(identity, header, payload)
 
         self.thread = threading.Thread(target=process_request, daemon=True)
         self.thread.start()
 
+    def _dispatch(self, identity: bytes, header: bytes, payload: bytes):
+        batch_id, req_ids, lengths = msgspec.msgpack.decode(header)
+        tokens = np.frombuffer(payload, dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        batch = {
+            "identity": identity,
+            "batch_id": batch_id,
+            "results": [0] * len(req_ids),
+            "remaining": len(req_ids),
+            "lock": threading.Lock(),
+        }
+        if not req_ids:
+            self._reply(batch)
+        for idx, req_id in enumerate(req_ids):
+            self.executor.submit(
+                self._lookup, batch, idx, req_id,
+                torch.from_numpy(tokens[offsets[idx]:offsets[idx + 1]]))
+
+    def _lookup(self, batch: dict[str, Any], idx: int, req_id: Optional[str],
+                token_ids: torch.Tensor):
+        try:
+            result = self.mooncake_engine.lookup_scheduler(
+                token_ids, self.use_layerwise, req_id)
+        except Exception as e:
+            logger.error(f"Mooncake lookup failed for request {req_id}: {e}")
+            result = 0
+        with batch["lock"]:
+            batch["results"][idx] = result
+            batch["remaining"] -= 1
+            done = batch["remaining"] == 0
+        if done:
+            self._reply(batch)
+
+    def _reply(self, batch: dict[str, Any]):
+        # zmq sockets are not thread safe, every worker has its own.
+        sock = getattr(self.local, "socket", None)
+        if sock is None:
+            sock = self.ctx.socket(zmq.PUSH)  # type: ignore[attr-defined]
+            sock.connect(self.reply_path)
+            self.local.socket = sock
+        sock.send_multipart((batch["identity"],
+                             msgspec.msgpack.encode(
+                                 (batch["batch_id"], batch["results"]))))
+
     def close(self):
+        self.running = False
+        self.thread.join()
+        self.executor.shutdown(wait=False)
         self.socket.close(linger=0)
-        # TODO: close the thread!
@@ -0,0 +1,104 @@
+from typing import Optional, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+
+def contiguous_runs(
+    src: Sequence[int],
+    dst: Optional[Sequence[int]] = None
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64],
+           npt.NDArray[np.int64]]:
+    """Split the block ids into runs that are contiguous in src, and in dst
+    when it is given.
+
+    RETURNED: (src_starts, dst_starts, run_lens), dst_starts is src_starts
+    when dst is not given.
+    """
+    src_indices = np.asarray(src, dtype=np.int64)
+    if src_indices.size == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    brk = np.diff(src_indices) != 1
+    dst_indices = src_indices
+    if dst is not None:
+        dst_indices = np.asarray(dst, dtype=np.int64)
+        brk |= np.diff(dst_indices) != 1
+    starts = np.concatenate(([0], np.flatnonzero(brk) + 1))
+    run_lens = np.diff(np.append(starts, src_indices.size))
+    return src_indices[starts], dst_indices[starts], run_lens
+
+
+def clip_runs(
+        run_bytes: npt.NDArray[np.int64],
+        limit: int) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """Lay the runs out back to back from offset 0 and truncate them at
+    limit bytes, the runs past it get a zero length.
+
+    RETURNED: (offsets, lengths) of the runs
+    """
+    ends = np.minimum(np.cumsum(run_bytes), limit)
+    offsets = np.concatenate(([0], ends[:-1])).astype(np.int64)
+    return offsets, ends - offsets
+
+
+class KVTransferPlan:
+    """Address layout of a pair of KV caches transferred with Mooncake.
+
+    Holds, for every cache tensor (layer and K/V), its source and
+    destination base address and the bytes per block on both sides, so that
+    the src/dst/length lists of a transfer are built by broadcasting the
+    caches against the contiguous block runs instead of nested Python
+    loops. The plan only depends on the remote engine, so it is built once
+    and reused by every request pulling from or pushing to it.
+    """
+
+    def __init__(self,
+                 src_base_addrs: Sequence[int],
+                 dst_base_addrs: Sequence[int],
+                 src_block_lens: Sequence[int],
+                 dst_block_lens: Sequence[int],
+                 transfer_block_lens: Optional[Sequence[int]] = None):
+        self.src_base_addrs = np.asarray(src_base_addrs, dtype=np.int64)
+        self.dst_base_addrs = np.asarray(dst_base_addrs, dtype=np.int64)
+        assert self.src_base_addrs.shape == self.dst_base_addrs.shape
+        num_caches = len(self.src_base_addrs)
+        self.src_block_lens = np.resize(
+            np.asarray(src_block_lens, dtype=np.int64), num_caches)
+        self.dst_block_lens = np.resize(
+            np.asarray(dst_block_lens, dtype=np.int64), num_caches)
+        # Bytes moved per block, the whole destination block by default.
+        self.transfer_block_lens = self.dst_block_lens if \
+            transfer_block_lens is None else np.resize(
+                np.asarray(transfer_block_lens, dtype=np.int64), num_caches)
+
+    def __len__(self) -> int:
+        return len(self.src_base_addrs)
+
+    def build(
+        self,
+        src_starts: npt.NDArray[np.int64],
+        dst_starts: npt.NDArray[np.int64],
+        run_lens: npt.NDArray[np.int64],
+        src_offset: int = 0,
+        caches: slice = slice(None)
+    ) -> tuple[list[int], list[int], list[int]]:
+        """Build the src/dst/length lists of a transfer, cache major.
+
+        src_starts, dst_starts, run_lens: the contiguous block runs, see
+        contiguous_runs.
+        src_offset: offset of the source in every block, in units of the
+        bytes moved per block.
+        caches: the cache tensors to transfer, all of them by default.
+        """
+        src_base = self.src_base_addrs[caches, None]
+        dst_base = self.dst_base_addrs[caches, None]
+        src_block_len = self.src_block_lens[caches, None]
+        dst_block_len = self.dst_block_lens[caches, None]
+        transfer_len = self.transfer_block_lens[caches, None]
+
+        src = src_base + src_starts * src_block_len + src_offset * transfer_len
+        dst = dst_base + dst_starts * dst_block_len
+        length = np.broadcast_to(run_lens * transfer_len, src.shape)
+        return (src.ravel().tolist(), dst.ravel().tolist(),
+                length.ravel().tolist())
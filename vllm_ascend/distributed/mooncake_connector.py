@@ -9,13 +9,13 @@ import threading
 import time
 from collections import defaultdict, deque
 from collections.abc import Iterator
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import partial
 from typing import TYPE_CHECKING, Any, List, Optional, OrderedDict, Tuple
 
 import msgspec
 import numpy as np
-import numpy.typing as npt
 import torch
 import torch_npu
 import zmq
@@ -24,6 +24,8 @@ from vllm import envs
 from vllm.config import VllmConfig
 from vllm.distributed.kv_transfer.kv_connector.v1.base import (
     KVConnectorBase_V1, KVConnectorMetadata, KVConnectorRole)
+from vllm.distributed.kv_transfer.kv_connector.v1.metrics import \
+    KVConnectorStats
 from vllm.distributed.parallel_state import (get_tensor_model_parallel_rank,
                                              get_tp_group)
 from vllm.utils import logger
@@ -32,7 +34,18 @@ from vllm.v1.request import RequestStatus
 
 import vllm_ascend.envs as envs_ascend
 from vllm_ascend.ascend_config import get_ascend_config, init_ascend_config
+from vllm_ascend.distributed.kv_tier_oracle import (KVLoadCostModel, KVTier,
+                                                    KVTierEstimate,
+                                                    KVTierOracle)
+# yapf: disable
+from vllm_ascend.distributed.kv_transfer_stats import (
+    KVTransferStats, build_kv_connector_stats)
+# yapf: enable
 from vllm_ascend.distributed.mooncake.transfer_engine import get_global_te
+from vllm_ascend.distributed.mooncake.transfer_plan import (KVTransferPlan,
+                                                            contiguous_runs)
+from vllm_ascend.distributed.remote_agents import (AgentMetadataCache,
+                                                   get_remote_agents)
 from vllm_ascend.utils import vllm_version_is
 
 if vllm_version_is("0.11.0"):
@@ -68,9 +81,10 @@ class ReqMeta:
 
 class KVCacheTaskTracker:
 
-    def __init__(self):
+    def __init__(self, stats: Optional[KVTransferStats] = None):
         super().__init__()
 
+        self.stats = stats
         self.done_task_lock = threading.Lock()
         self.finished_requests: set[str] = set()
         # Only used in prefill node. Tracks requests whose kv blocks freeing is
@@ -79,13 +93,25 @@ class KVCacheTaskTracker:
         # be force-freed.
         self.record_finished_requests: set[str] = set()
         self.delayed_free_requests: OrderedDict[str, float] = OrderedDict()
+        # Only used in decode node with pipelined pulls. Layers whose KV
+        # cache has already landed, for the requests still being received.
+        self.ready_layers: dict[str, set[str]] = defaultdict(set)
 
     def add_not_transfer_request(self, request_id: str):
         with self.done_task_lock:
             self.finished_requests.add(request_id)
 
+    def update_ready_layers(self, request_id: str, layer_names: list[str]):
+        with self.done_task_lock:
+            self.ready_layers[request_id].update(layer_names)
+
+    def get_ready_layers(self, request_id: str) -> set[str]:
+        with self.done_task_lock:
+            return set(self.ready_layers.get(request_id, ()))
+
     def update_done_task_count(self, request_id: str):
         with self.done_task_lock:
+            self.ready_layers.pop(request_id, None)
             self.finished_requests.add(request_id)
             if request_id in self.delayed_free_requests:
                 self._remove_delayed_requests(request_id)
@@ -126,6 +152,8 @@ class KVCacheTaskTracker:
                 self.delayed_free_requests.popitem(last=False)
                 expired_requests.add(request_id)
                 logger.info("Force freed request: %s", request_id)
+                if self.stats is not None:
+                    self.stats.record_delayed_free_timeout()
             else:
                 break
         return expired_requests
@@ -137,10 +165,16 @@ class KVCacheTaskTracker:
 
 class KVCacheSendingThread(threading.Thread):
 
-    def __init__(self, tp_rank: int, decode_tp_size: int, local_engine_id: str,
-                 side_channel_host: str, side_channel_port: int,
-                 metadata: MooncakeAgentMetadata, ready_event: threading.Event,
-                 kv_caches: dict[str, Any]):
+    def __init__(self,
+                 tp_rank: int,
+                 decode_tp_size: int,
+                 local_engine_id: str,
+                 side_channel_host: str,
+                 side_channel_port: int,
+                 metadata: MooncakeAgentMetadata,
+                 ready_event: threading.Event,
+                 kv_caches: dict[str, Any],
+                 stats: Optional[KVTransferStats] = None):
         super().__init__(daemon=True, name="KVCacheSendingThread")
         self.tp_rank = tp_rank
         self.decode_tp_size = decode_tp_size
@@ -150,8 +184,9 @@ class KVCacheSendingThread(threading.Thread):
         self.metadata = metadata
         self.ready_event = ready_event
         self.kv_caches = kv_caches
+        self.stats = stats or KVTransferStats()
 
-        self.task_tracker = KVCacheTaskTracker()
+        self.task_tracker = KVCacheTaskTracker(self.stats)
 
     def get_and_clear_finished_requests(self) -> set[str]:
         """
@@ -221,6 +256,7 @@ class KVCacheSendingThread(threading.Thread):
                                 logger.debug(
                                     "Socket not ready, retrying to send ACK for "
                                     "request %s", msg[1])
+                                self.stats.record_retry()
                                 time.sleep(0.01)
                     else:
                         logger.error(
@@ -233,11 +269,21 @@ class KVCacheSendingThread(threading.Thread):
 
 class KVCacheRecvingThread(threading.Thread):
 
-    def __init__(self, tp_rank: int, tp_size: int, engine: TransferEngine,
-                 local_engine_id: str, local_handshake_port: int,
-                 local_kv_caches_base_addr: list[int], block_len: list[int],
-                 ready_event: threading.Event, vllm_config: VllmConfig,
-                 kv_caches: dict[str, Any]):
+    def __init__(self,
+                 tp_rank: int,
+                 tp_size: int,
+                 engine: TransferEngine,
+                 local_engine_id: str,
+                 local_handshake_port: int,
+                 local_kv_caches_base_addr: list[int],
+                 block_len: list[int],
+                 ready_event: threading.Event,
+                 vllm_config: VllmConfig,
+                 kv_caches: dict[str, Any],
+                 pull_layer_group_size: int = 0,
+                 stats: Optional[KVTransferStats] = None,
+                 metadata_cache: Optional[AgentMetadataCache] = None,
+                 health_check_interval: float = 0):
         super().__init__(daemon=True, name="KVCacheRecvingThread")
         self.tp_rank = tp_rank
         self.tp_size = tp_size
@@ -253,6 +299,16 @@ class KVCacheRecvingThread(threading.Thread):
             local_kv_caches_base_addr
         self.remote_te_port: dict[str, dict[int, int]] = \
             defaultdict(dict)
+        # (remote host, remote handshake port) -> id of the engine last seen
+        # there.
+        self.remote_engine_ids: dict[tuple[str, int], str] = {}
+        self.metadata_cache = metadata_cache
+        # Seconds the thread waits idle before it checks that the remote
+        # engines it knows are still alive, 0 to never check them.
+        self.health_check_interval = health_check_interval
+        # (remote engine id, remote handshake port, num_need_pulls) ->
+        # address plan of the pulls from that engine.
+        self.transfer_plans: dict[tuple[str, int, int], KVTransferPlan] = {}
         self.block_len = block_len
         # TODO(jianzs): find a better way to detect MLA.
         self.use_mla = len(block_len) == 2
@@ -260,8 +316,16 @@ class KVCacheRecvingThread(threading.Thread):
 
         self.request_queue: queue.Queue[Any] = queue.Queue()
         self.executor = ThreadPoolExecutor(max_workers=32)
+        # Number of layers read by one transfer of a pipelined pull, 0 reads
+        # all the layers of a pull with one blocking transfer instead.
+        self.pull_layer_group_size = pull_layer_group_size
+        self.pull_lock = threading.Lock()
+        # request id -> pulls of the request that are not finished yet, only
+        # used by the receiving thread.
+        self.pending_pulls: dict[str, int] = {}
 
-        self.task_tracker = KVCacheTaskTracker()
+        self.stats = stats or KVTransferStats()
+        self.task_tracker = KVCacheTaskTracker(self.stats)
 
         self.encoder = msgspec.msgpack.Encoder()
         self.decoder = msgspec.msgpack.Decoder(MooncakeAgentMetadata)
@@ -276,6 +340,7 @@ class KVCacheRecvingThread(threading.Thread):
         self.model_config = self.vllm_config.model_config
         self.num_key_value_heads = self.model_config.hf_config.num_key_value_heads
         self.kv_caches = kv_caches
+        self.layer_names = list(kv_caches)
 
     def add_request(self, request_id: str, local_block_ids: list[int],
                     remote_block_ids: list[int], remote_engine_id: str,
@@ -291,7 +356,8 @@ class KVCacheRecvingThread(threading.Thread):
             "remote_host": remote_host,
             "remote_handshake_port": remote_handshake_port,
             "offset": offset,
-            "num_need_pulls": num_need_pulls
+            "num_need_pulls": num_need_pulls,
+            "enqueue_time": time.perf_counter()
         })
 
     def get_and_clear_finished_requests(self) -> set[str]:
@@ -302,17 +368,40 @@ class KVCacheRecvingThread(threading.Thread):
         """
         return self.task_tracker.get_and_clear_finished_requests()
 
+    def get_ready_layers(self, request_id: str) -> set[str]:
+        """Names of the layers whose KV cache has already been received for
+        a request still in flight, only tracked by pipelined pulls."""
+        return self.task_tracker.get_ready_layers(request_id)
+
     def run(self):
         """Run the thread to handle KV cache transfer requests."""
         self.ready_event.set()
         while True:
             try:
-                request_data = self.request_queue.get()
+                try:
+                    request_data = self.request_queue.get(
+                        timeout=self.health_check_interval or None)
+                except queue.Empty:
+                    self._check_remote_agents()
+                    continue
                 if request_data is None:
                     logger.warning("Received a None request!")
                     self.request_queue.task_done()
                     continue
-                self._handle_request(request_data)
+                if request_data.get("pull_done"):
+                    self._finish_pull(request_data)
+                    continue
+                if request_data.get("warmup"):
+                    self._warmup_remote_agent(request_data)
+                    continue
+                enqueue_time = request_data.get("enqueue_time")
+                if enqueue_time is not None:
+                    self.stats.record_queue_time(time.perf_counter() -
+                                                 enqueue_time)
+                if self.pull_layer_group_size > 0:
+                    self._submit_pull(request_data)
+                else:
+                    self._handle_request(request_data)
             except Exception as e:
                 logger.error(f"Error in KVCacheTransferThread: {e}")
 
@@ -332,6 +421,7 @@ class KVCacheRecvingThread(threading.Thread):
         except Exception as e:
             logger.error("Failed to transfer KV cache for request "
                          f"{request_id}: {e}")
+            self._on_pull_failed(req_meta)
         finally:
             # Always send the done signal to the remote host to ensure proper
             # resource cleanup. Failing to do so may cause a memory leak on the
@@ -345,19 +435,58 @@ class KVCacheRecvingThread(threading.Thread):
     def _transfer_kv_cache(self, req_meta: dict[str, Any]):
         """Handle a KV cache transfer request."""
         request_id = req_meta["request_id"]
+        offset = req_meta["offset"]
+        pull = self._prepare_pull(req_meta)
+        if pull is None:
+            return
+        session_id, plan, runs = pull
+        local_starts, remote_starts, run_lens = runs
+
+        req_start_time = time.perf_counter()
+        src_list, dst_list, length_list = plan.build(local_starts,
+                                                     remote_starts,
+                                                     run_lens,
+                                                     src_offset=offset)
+
+        ret = self.engine.batch_transfer_sync_read(session_id, src_list,
+                                                   dst_list, length_list)
+        if ret < 0:
+            logger.error("Mooncake transfer failed for request %s",
+                         req_meta["request_id"])
+            raise RuntimeError(f"Mooncake transfer failed, ret: {ret}")
+
+        req_end_time = time.perf_counter()
+        self.stats.record_transfer(sum(length_list),
+                                   req_end_time - req_start_time)
+        req_transfer_elapsed = (req_end_time - req_start_time) * 1000
+        logger.info(
+            "KV cache transfer for request %s took %.2f ms (%d groups,"
+            " %d blocks). local_ip %s local_device_id %s remote_session_id %s",
+            request_id, req_transfer_elapsed, len(run_lens),
+            len(req_meta["local_block_ids"]), get_ip(), self.tp_rank,
+            session_id)
+        if self.num_need_pulls > 1 and offset == self.num_need_pulls - 1:
+            self._cat_kv_cache(req_meta["local_block_ids"])
+
+    def _prepare_pull(
+        self, req_meta: dict[str, Any]
+    ) -> Optional[tuple[str, KVTransferPlan, tuple[np.ndarray, np.ndarray,
+                                                   np.ndarray]]]:
+        """Session, address plan and contiguous block runs (local starts,
+        remote starts, lengths) of a pull, None if there is nothing to read.
+        """
         remote_block_ids = req_meta["remote_block_ids"]
         local_block_ids = req_meta["local_block_ids"]
         remote_engine_id = req_meta["remote_engine_id"]
         remote_host = req_meta["remote_host"]
         remote_handshake_port = req_meta["remote_handshake_port"]
-        offset = req_meta["offset"]
         self.num_need_pulls = req_meta["num_need_pulls"]
 
         # Full prefix cache hit: do not need to read remote blocks, just notify
         # P worker that we have the blocks we need.
         num_local_blocks = len(local_block_ids)
         if num_local_blocks == 0:
-            return
+            return None
 
         num_remote_blocks = len(remote_block_ids)
         assert num_local_blocks <= num_remote_blocks
@@ -367,65 +496,175 @@ class KVCacheRecvingThread(threading.Thread):
         # Check if we have the remote metadata cached.
         if remote_engine_id not in self.kv_caches_base_addr or \
             remote_handshake_port not in self.kv_caches_base_addr[remote_engine_id]:
-            self._get_remote_metadata(remote_host, remote_handshake_port)
+            if not self._load_cached_metadata(remote_engine_id, remote_host,
+                                              remote_handshake_port):
+                self._get_remote_metadata(remote_host, remote_handshake_port)
 
         if self.num_need_pulls == 1:
-            grouped_remote_block_ids, grouped_local_block_ids = \
-                    group_concurrent_contiguous(remote_block_ids, local_block_ids)
+            local_starts, remote_starts, run_lens = contiguous_runs(
+                local_block_ids, remote_block_ids)
         else:
-            remote_block_ids = list(map(lambda x: [x], remote_block_ids))
-            local_block_ids = list(map(lambda x: [x], local_block_ids))
-            grouped_remote_block_ids, grouped_local_block_ids = remote_block_ids, local_block_ids
-        num_transfer_groups = len(grouped_remote_block_ids)
-
-        remote_kv_caches_base_addrs = \
-            self.kv_caches_base_addr[remote_engine_id][remote_handshake_port]
-        local_kv_caches_base_addrs = \
-            self.kv_caches_base_addr[self.local_engine_id][self.local_handshake_port]
+            # Every block is pulled on its own, the pulls of a request being
+            # interleaved in the local blocks.
+            local_starts = np.asarray(local_block_ids, dtype=np.int64)
+            remote_starts = np.asarray(remote_block_ids, dtype=np.int64)
+            run_lens = np.ones_like(local_starts)
+
         remote_transfer_port = self.remote_te_port[remote_engine_id][
             remote_handshake_port]
-        num_blocks = len(local_block_ids)
         session_id = f"{remote_host}:{remote_transfer_port}"
+        plan = self._get_transfer_plan(remote_engine_id, remote_handshake_port)
+        return session_id, plan, (local_starts, remote_starts, run_lens)
 
-        req_start_time = time.perf_counter()
-        src_list, dst_list, length_list = [], [], []
-        for k, (src_layer_base_addr, dst_layer_base_addr) in enumerate(
-                zip(local_kv_caches_base_addrs, remote_kv_caches_base_addrs)):
-            if self.use_mla:
-                block_len = (self.block_len[k % 2])
-            elif self.use_sparse:
-                block_len = (self.block_len[k % 3])
-            else:
-                block_len = (self.block_len[0])
-            inner_block_len = block_len // self.num_need_pulls
-            for remote_block_id, local_block_id in zip(
-                    grouped_remote_block_ids, grouped_local_block_ids):
-                src = src_layer_base_addr + local_block_id[
-                    0] * block_len + offset * inner_block_len
-                dst = dst_layer_base_addr + remote_block_id[0] * inner_block_len
-                length = inner_block_len * len(local_block_id)
-                src_list.append(src)
-                dst_list.append(dst)
-                length_list.append(length)
+    def _submit_pull(self, req_meta: dict[str, Any]):
+        """Pipelined version of _handle_request.
 
+        The layers of the pull are read in groups of pull_layer_group_size
+        layers by the executor, so that the pulls of several requests share
+        the link instead of queueing behind each other, and the layers of a
+        request are published as ready as soon as they land.
+        """
+        request_id = req_meta["request_id"]
+        transfers = []
+        failed = False
+        try:
+            pull = self._prepare_pull(req_meta)
+            if pull is not None:
+                session_id, plan, runs = pull
+                num_layers = max(len(self.layer_names), 1)
+                caches_per_layer = max(len(plan) // num_layers, 1)
+                for start in range(0, num_layers, self.pull_layer_group_size):
+                    end = min(start + self.pull_layer_group_size, num_layers)
+                    caches = slice(start * caches_per_layer,
+                                   end * caches_per_layer)
+                    transfers.append((range(start, end),
+                                      plan.build(*runs,
+                                                 src_offset=req_meta["offset"],
+                                                 caches=caches)))
+        except Exception as e:
+            logger.error("Failed to transfer KV cache for request "
+                         f"{request_id}: {e}")
+            failed = True
+            transfers = []
+        finally:
+            self.request_queue.task_done()
+
+        if not transfers:
+            self._queue_finish_pull(req_meta, failed)
+            return
+        state = {"remaining": len(transfers), "failed": False}
+        for layers, (src_list, dst_list, length_list) in transfers:
+            future = self.executor.submit(self._read_layer_group, session_id,
+                                          src_list, dst_list, length_list)
+            future.add_done_callback(
+                partial(self._on_layer_group_done, req_meta, state, layers))
+
+    def _read_layer_group(self, session_id: str, src_list: list[int],
+                          dst_list: list[int], length_list: list[int]) -> int:
+        start_time = time.perf_counter()
         ret = self.engine.batch_transfer_sync_read(session_id, src_list,
                                                    dst_list, length_list)
-        if ret < 0:
-            logger.error("Mooncake transfer failed for request %s",
-                         req_meta["request_id"])
-            raise RuntimeError(f"Mooncake transfer failed, ret: {ret}")
-
-        req_end_time = time.perf_counter()
-        req_transfer_elapsed = (req_end_time - req_start_time) * 1000
-        logger.info(
-            "KV cache transfer for request %s took %.2f ms (%d groups,"
-            " %d blocks). local_ip %s local_device_id %s remote_session_id %s",
-            request_id, req_transfer_elapsed, num_transfer_groups, num_blocks,
-            get_ip(), self.tp_rank, session_id)
-        if self.num_need_pulls > 1 and offset == self.num_need_pulls - 1:
-            self._cat_kv_cache(grouped_local_block_ids)
-
-    def _cat_kv_cache(self, block_ids: list[list[int]]):
+        if ret >= 0:
+            self.stats.record_transfer(sum(length_list),
+                                       time.perf_counter() - start_time)
+        return ret
+
+    def _on_layer_group_done(self, req_meta: dict[str, Any], state: dict[str,
+                                                                         int],
+                             layers: range, future: Future):
+        request_id = req_meta["request_id"]
+        failed = False
+        try:
+            ret = future.result()
+            if ret < 0:
+                logger.error(
+                    "Mooncake transfer of layers %d-%d failed for request "
+                    "%s, ret: %d", layers.start, layers.stop - 1, request_id,
+                    ret)
+                failed = True
+            elif req_meta["num_need_pulls"] == 1:
+                # With several pulls, the layers are only usable once the
+                # heads of all the pulls are merged.
+                self.task_tracker.update_ready_layers(
+                    request_id, self.layer_names[layers.start:layers.stop])
+        except Exception as e:
+            logger.error("Failed to transfer KV cache for request "
+                         f"{request_id}: {e}")
+            failed = True
+        with self.pull_lock:
+            state["remaining"] -= 1
+            state["failed"] |= failed
+            pull_done = state["remaining"] == 0
+        if pull_done:
+            self._queue_finish_pull(req_meta, bool(state["failed"]))
+
+    def _queue_finish_pull(self, req_meta: dict[str, Any],
+                           failed: bool) -> None:
+        # The remote sockets, their poller and the remote metadata are only
+        # used by the receiving thread, not by the executor callbacks.
+        self.request_queue.put(
+            dict(req_meta, pull_done=True, pull_failed=failed))
+
+    def _finish_pull(self, req_meta: dict[str, Any]):
+        """Release the remote blocks of a pipelined pull and report the
+        request once all its pulls are finished, whatever their order."""
+        request_id = req_meta["request_id"]
+        num_need_pulls = req_meta["num_need_pulls"]
+        try:
+            if req_meta["pull_failed"]:
+                self._on_pull_failed(req_meta)
+            # Always send the done signal to the remote host to ensure proper
+            # resource cleanup.
+            self._send_done_recv_signal(request_id, req_meta["remote_host"],
+                                        req_meta["remote_handshake_port"])
+        except Exception as e:
+            logger.error("Failed to send the done signal of request "
+                         f"{request_id}: {e}")
+        finally:
+            self.request_queue.task_done()
+        remaining = self.pending_pulls.get(request_id, num_need_pulls) - 1
+        if remaining > 0:
+            self.pending_pulls[request_id] = remaining
+            return
+        self.pending_pulls.pop(request_id, None)
+        if num_need_pulls > 1:
+            self._merge_pulls(req_meta)
+        self.task_tracker.update_done_task_count(request_id)
+
+    def _merge_pulls(self, req_meta: dict[str, Any]):
+        """Merge the heads of the pulls of a request, like in the blocking
+        mode."""
+        try:
+            if req_meta["local_block_ids"]:
+                self._cat_kv_cache(req_meta["local_block_ids"])
+        except Exception as e:
+            logger.error("Failed to merge the KV cache pulls of request "
+                         f"{req_meta['request_id']}: {e}")
+
+    def _get_transfer_plan(self, remote_engine_id: str,
+                           remote_handshake_port: int) -> KVTransferPlan:
+        """Address plan of the pulls from a remote engine, built once per
+        remote engine and number of pulls."""
+        plan_key = (remote_engine_id, remote_handshake_port,
+                    self.num_need_pulls)
+        plan = self.transfer_plans.get(plan_key)
+        if plan is None:
+            local_base_addrs = self.kv_caches_base_addr[self.local_engine_id][
+                self.local_handshake_port]
+            # The block lengths cycle over the caches of a layer: K/V, the
+            # MLA nope/rope caches or the sparse indexer cache.
+            block_lens = np.resize(np.asarray(self.block_len, dtype=np.int64),
+                                   len(local_base_addrs))
+            plan = KVTransferPlan(local_base_addrs,
+                                  self.kv_caches_base_addr[remote_engine_id]
+                                  [remote_handshake_port],
+                                  src_block_lens=block_lens,
+                                  dst_block_lens=block_lens //
+                                  self.num_need_pulls)
+            self.transfer_plans[plan_key] = plan
+        return plan
+
+    def _cat_kv_cache(self, block_ids: list[int]):
         # Get necessary parameters
         k_cache = list(self.kv_caches.values())[0][0]
         kv_shape = k_cache.shape
@@ -436,9 +675,8 @@ class KVCacheRecvingThread(threading.Thread):
         num_kv_head = max(
             self.model_config.hf_config.num_key_value_heads // self.tp_size, 1)
 
-        flat_block_ids = [item for sublist in block_ids for item in sublist]
-        block_ids_tensor = torch.tensor(flat_block_ids, dtype=torch.int32)
-        num_blocks = len(flat_block_ids)
+        block_ids_tensor = torch.tensor(block_ids, dtype=torch.int32)
+        num_blocks = len(block_ids)
         block_len = num_blocks * block_size
 
         # Create device tensors for copy operations
@@ -514,22 +752,55 @@ class KVCacheRecvingThread(threading.Thread):
         return buffer.contiguous().view(block_len, num_kv_head, -1)
 
     def _get_remote_metadata(self, remote_host: str,
-                             remote_handshake_port: int) -> None:
-        """Get the metadata from the remote host."""
+                             remote_handshake_port: int) -> str:
+        """Get the metadata from the remote host, returns its engine id."""
         sock: Optional[zmq.Socket] = None  # type: ignore
+        start_time = time.perf_counter()
         try:
             sock = self._get_remote_socket(remote_host, remote_handshake_port)
-            ensure_zmq_send(sock, self.encoder.encode((GET_META_MSG, "")))
-            metadata_bytes = ensure_zmq_recv(sock, self.remote_poller)
+            ensure_zmq_send(sock,
+                            self.encoder.encode((GET_META_MSG, "")),
+                            stats=self.stats)
+            metadata_bytes = ensure_zmq_recv(sock,
+                                             self.remote_poller,
+                                             stats=self.stats)
             agent_meta = self.decoder.decode(metadata_bytes)
             engine_id = agent_meta.engine_id
             assert engine_id != self.local_engine_id, (
                 f"Conflict engine id {engine_id} with local engine id "
                 f"{self.local_engine_id}.")
+            if self.kv_caches_base_addr[engine_id].get(
+                    remote_handshake_port) != agent_meta.kv_caches_base_addr:
+                # The remote may have restarted with another layout.
+                for plan_key in list(self.transfer_plans):
+                    if plan_key[:2] == (engine_id, remote_handshake_port):
+                        self.transfer_plans.pop(plan_key, None)
             self.kv_caches_base_addr[engine_id][remote_handshake_port] = \
                 agent_meta.kv_caches_base_addr
             self.remote_te_port[engine_id][remote_handshake_port] = \
                 agent_meta.te_rpc_port
+            # Another engine listening there means the previous one is gone.
+            previous_engine_id = self.remote_engine_ids.get(
+                (remote_host, remote_handshake_port))
+            if previous_engine_id not in (None, engine_id):
+                self._invalidate_remote_metadata(previous_engine_id,
+                                                 remote_handshake_port)
+            self.remote_engine_ids[(remote_host,
+                                    remote_handshake_port)] = engine_id
+            if self.metadata_cache is not None:
+                self.metadata_cache.put(
+                    engine_id, remote_handshake_port, {
+                        "host": remote_host,
+                        "te_rpc_port": agent_meta.te_rpc_port,
+                        "kv_caches_base_addr": agent_meta.kv_caches_base_addr,
+                    })
+            self.stats.record_handshake_time(time.perf_counter() - start_time)
+            return engine_id
+        except Exception:
+            if sock is not None:
+                self._close_remote_socket(sock)
+                sock = None
+            raise
         finally:
             if sock is not None:
                 self._return_remote_socket(sock, remote_host,
@@ -537,6 +808,106 @@ class KVCacheRecvingThread(threading.Thread):
                 logger.debug("Returned socket to pool for %s:%d", remote_host,
                              remote_handshake_port)
 
+    def _load_cached_metadata(self, remote_engine_id: str, remote_host: str,
+                              remote_handshake_port: int) -> bool:
+        """Load the metadata of a remote engine from the metadata cache,
+        returns whether it was cached."""
+        if self.metadata_cache is None:
+            return False
+        cached = self.metadata_cache.get(remote_engine_id,
+                                         remote_handshake_port)
+        if cached is None or cached["host"] != remote_host:
+            return False
+        self.kv_caches_base_addr[remote_engine_id][remote_handshake_port] = \
+            cached["kv_caches_base_addr"]
+        self.remote_te_port[remote_engine_id][remote_handshake_port] = \
+            cached["te_rpc_port"]
+        self.remote_engine_ids[(remote_host,
+                                remote_handshake_port)] = remote_engine_id
+        logger.debug("Loaded the cached metadata of engine %s for %s:%d",
+                     remote_engine_id, remote_host, remote_handshake_port)
+        return True
+
+    def _invalidate_remote_metadata(self, remote_engine_id: str,
+                                    remote_handshake_port: int) -> None:
+        """Forget the metadata of a remote engine, so that the next pull
+        from it handshakes again."""
+        self.kv_caches_base_addr.get(remote_engine_id,
+                                     {}).pop(remote_handshake_port, None)
+        self.remote_te_port.get(remote_engine_id,
+                                {}).pop(remote_handshake_port, None)
+        for plan_key in list(self.transfer_plans):
+            if plan_key[:2] == (remote_engine_id, remote_handshake_port):
+                self.transfer_plans.pop(plan_key, None)
+        if self.metadata_cache is not None:
+            self.metadata_cache.invalidate(remote_engine_id)
+
+    def _on_pull_failed(self, req_meta: dict[str, Any]) -> None:
+        self.stats.record_failure()
+        # The metadata may be stale, e.g. when it was cached before the
+        # remote engine restarted.
+        self._invalidate_remote_metadata(req_meta["remote_engine_id"],
+                                         req_meta["remote_handshake_port"])
+
+    def warmup(self, remote_host: str,
+               remote_handshake_ports: list[int]) -> None:
+        """Handshake with the ranks of a remote engine and open the transfer
+        sessions to them ahead of its first request.
+
+        The warm-up runs on the receiving thread, which owns the remote
+        sockets and metadata, before the requests queued after it.
+        """
+        for remote_handshake_port in remote_handshake_ports:
+            self.request_queue.put({
+                "remote_host": remote_host,
+                "remote_handshake_port": remote_handshake_port,
+                "warmup": True
+            })
+
+    def _warmup_remote_agent(self, req_meta: dict[str, Any]) -> None:
+        remote_host = req_meta["remote_host"]
+        remote_handshake_port = req_meta["remote_handshake_port"]
+        try:
+            engine_id = self._get_remote_metadata(remote_host,
+                                                  remote_handshake_port)
+            te_rpc_port = self.remote_te_port[engine_id][remote_handshake_port]
+            session_id = f"{remote_host}:{te_rpc_port}"
+            local_base_addr = self.kv_caches_base_addr[self.local_engine_id][
+                self.local_handshake_port][0]
+            remote_base_addr = self.kv_caches_base_addr[engine_id][
+                remote_handshake_port][0]
+            # Block 0 is the null block of vLLM on both sides, reading into
+            # it only sets up the session.
+            ret = self.engine.batch_transfer_sync_read(session_id,
+                                                       [local_base_addr],
+                                                       [remote_base_addr],
+                                                       [min(self.block_len)])
+            if ret < 0:
+                raise RuntimeError(f"Mooncake transfer failed, ret: {ret}")
+            logger.info("Warmed up the connection to %s:%d", remote_host,
+                        remote_handshake_port)
+        except Exception as e:
+            logger.warning("Failed to warm up the connection to %s:%d: %s",
+                           remote_host, remote_handshake_port, e)
+        finally:
+            self.request_queue.task_done()
+
+    def _check_remote_agents(self) -> None:
+        """Handshake again with the remote engines the thread knows, and
+        forget the ones that do not answer, with their pooled sockets, so
+        that the next pull from them starts from a fresh handshake."""
+        for remote_host, remote_handshake_port in list(self.remote_engine_ids):
+            try:
+                self._get_remote_metadata(remote_host, remote_handshake_port)
+            except Exception as e:
+                logger.warning("Remote agent %s:%d did not answer: %s",
+                               remote_host, remote_handshake_port, e)
+                engine_id = self.remote_engine_ids.pop(
+                    (remote_host, remote_handshake_port))
+                self._invalidate_remote_metadata(engine_id,
+                                                 remote_handshake_port)
+                self._close_remote_sockets(remote_host, remote_handshake_port)
+
     def _send_done_recv_signal(self, request_id: str, remote_host: str,
                                remote_handshake_port: int):
         logger.debug("Sending done recving signal for request %s to %s:%d",
@@ -545,10 +916,11 @@ class KVCacheRecvingThread(threading.Thread):
         try:
             sock = self._get_remote_socket(remote_host, remote_handshake_port)
             data_bytes = self.encoder.encode((DONE_RECVING_MSG, request_id))
-            ensure_zmq_send(sock, data_bytes)
+            ensure_zmq_send(sock, data_bytes, stats=self.stats)
             resp = ensure_zmq_recv(sock,
                                    self.remote_poller,
-                                   timeout=self.timeout)
+                                   timeout=self.timeout,
+                                   stats=self.stats)
             logger.debug(
                 f"Received response for request {request_id}: {resp.decode('utf-8')}"
             )
@@ -557,6 +929,11 @@ class KVCacheRecvingThread(threading.Thread):
                              request_id, remote_host, remote_handshake_port)
                 raise RuntimeError(
                     f"Failed to receive ACK, resp: {resp.decode('utf-8')}")
+        except Exception:
+            if sock is not None:
+                self._close_remote_socket(sock)
+                sock = None
+            raise
         finally:
             if sock is not None:
                 self._return_remote_socket(sock, remote_host,
@@ -595,6 +972,22 @@ class KVCacheRecvingThread(threading.Thread):
         with self.remote_sockets_lock:
             self.remote_sockets[remote_path].append(sock)
 
+    def _close_remote_socket(self, sock: zmq.Socket) -> None:  # type: ignore
+        """Close a socket that failed instead of returning it to the pool,
+        a REQ socket being unusable after a send or a receive failed."""
+        with self.remote_sockets_lock:
+            self.remote_poller.unregister(sock)
+        sock.close(linger=0)
+
+    def _close_remote_sockets(self, remote_host: str,
+                              remote_handshake_port: int) -> None:
+        """Close the pooled sockets to a remote host."""
+        remote_path = make_zmq_path("tcp", remote_host, remote_handshake_port)
+        with self.remote_sockets_lock:
+            socks = self.remote_sockets.pop(remote_path, ())
+        for sock in socks:
+            self._close_remote_socket(sock)
+
 
 class MooncakeConnectorMetadata(KVConnectorMetadata):
 
@@ -617,7 +1010,7 @@ class MooncakeConnectorMetadata(KVConnectorMetadata):
         )
 
 
-class MooncakeConnector(KVConnectorBase_V1):
+class MooncakeConnector(KVConnectorBase_V1, KVTierOracle):
 
     def __init__(self, vllm_config: VllmConfig, role: KVConnectorRole):
         assert vllm_config.kv_transfer_config is not None
@@ -643,6 +1036,13 @@ class MooncakeConnector(KVConnectorBase_V1):
         return self.connector_scheduler.get_num_new_matched_tokens(
             request, num_computed_tokens)
 
+    def get_kv_tier_estimates(
+            self, request: "Request",
+            num_external_tokens: int) -> list[KVTierEstimate]:
+        assert self.connector_scheduler is not None
+        return self.connector_scheduler.get_kv_tier_estimates(
+            request, num_external_tokens)
+
     def update_state_after_alloc(self, request: "Request",
                                  blocks: "KVCacheBlocks",
                                  num_external_tokens: int):
@@ -678,6 +1078,18 @@ class MooncakeConnector(KVConnectorBase_V1):
         assert self.connector_worker is not None
         return self.connector_worker.get_finished()
 
+    def get_kv_connector_stats(self) -> Optional[KVConnectorStats]:
+        if self.connector_worker is None:
+            return None
+        return self.connector_worker.get_kv_connector_stats()
+
+    @classmethod
+    def build_kv_connector_stats(
+            cls,
+            data: Optional[dict[str,
+                                Any]] = None) -> Optional[KVConnectorStats]:
+        return build_kv_connector_stats(data)
+
     def start_load_kv(self, forward_context: "ForwardContext",
                       **kwargs) -> None:
         assert self.connector_worker is not None
@@ -725,6 +1137,7 @@ class MooncakeConnectorScheduler:
         # the scheduler. Used to make metadata passed to Worker.
         self._reqs_need_recv: dict[str, tuple[Request, list[int]]] = {}
         self._reqs_need_send: dict[str, float] = {}
+        self.kv_load_cost = KVLoadCostModel(vllm_config, KVTier.REMOTE_PREFILL)
 
     def get_num_new_matched_tokens(
             self, request: "Request",
@@ -760,6 +1173,11 @@ class MooncakeConnectorScheduler:
         # No remote prefill for this request.
         return 0, False
 
+    def get_kv_tier_estimates(
+            self, request: "Request",
+            num_external_tokens: int) -> list[KVTierEstimate]:
+        return [self.kv_load_cost.estimate(num_external_tokens)]
+
     def update_state_after_alloc(self, request: "Request",
                                  blocks: "KVCacheBlocks",
                                  num_external_tokens: int):
@@ -870,6 +1288,7 @@ class MooncakeConnectorWorker:
         self.dp_rank = vllm_config.parallel_config.data_parallel_rank
         self.dp_size = vllm_config.parallel_config.data_parallel_size_local
         self.kv_caches: dict[str, torch.Tensor] = {}
+        self.xfer_stats = KVTransferStats()
         self.side_channel_host = get_ip()
         self.max_device_id = self.tp_size * self.dp_size
         self.kv_role = vllm_config.kv_transfer_config.kv_role
@@ -916,6 +1335,15 @@ class MooncakeConnectorWorker:
         # Background thread for sending or receiving KV caches.
         self.kv_send_thread: Optional[KVCacheSendingThread] = None
         self.kv_recv_thread: Optional[KVCacheRecvingThread] = None
+        # Pipelined pulls read the layers in groups of this many layers.
+        self.pull_layer_group_size = int(
+            vllm_config.kv_transfer_config.get_from_extra_config(
+                'pull_layer_group_size', 0))
+        # Seconds of idleness after which the receiving thread checks the
+        # remote engines it knows, 0 to never check them.
+        self.remote_health_check_interval = float(
+            vllm_config.kv_transfer_config.get_from_extra_config(
+                'remote_health_check_interval', 0))
 
         # kv_transfer variables
         self.vllm_config = vllm_config
@@ -1057,15 +1485,32 @@ class MooncakeConnectorWorker:
             self.kv_send_thread = KVCacheSendingThread(
                 self.tp_rank, self._decode_tp_size, self.engine_id,
                 self.side_channel_host, self.side_channel_port, metadata,
-                ready_event, self.kv_caches)
+                ready_event, self.kv_caches, self.xfer_stats)
             self.kv_send_thread.start()
         else:
             self.kv_recv_thread = KVCacheRecvingThread(
                 self.tp_rank, self.tp_size, self.engine, self.engine_id,
                 self.handshake_port, kv_caches_base_addr, self.block_len,
-                ready_event, self.vllm_config, self.kv_caches)
+                ready_event, self.vllm_config, self.kv_caches,
+                self.pull_layer_group_size, self.xfer_stats,
+                AgentMetadataCache.from_config(
+                    self.vllm_config.kv_transfer_config),
+                self.remote_health_check_interval)
             self.kv_recv_thread.start()
         ready_event.wait()
+        if self.kv_recv_thread is not None:
+            self._warmup_remote_agents()
+
+    def _warmup_remote_agents(self):
+        assert self.kv_recv_thread is not None
+        if self._prefill_tp_size == self._decode_tp_size:
+            remote_tp_ranks = [self.tp_rank]
+        else:
+            # The ranks pulled from depend on the request.
+            remote_tp_ranks = list(range(self._prefill_tp_size))
+        for agent in get_remote_agents(self.vllm_config.kv_transfer_config):
+            self.kv_recv_thread.warmup(
+                agent.host, [agent.port + rank for rank in remote_tp_ranks])
 
     def _register(self, ptr, length):
         logger.debug(
@@ -1090,6 +1535,15 @@ class MooncakeConnectorWorker:
                 "requests: %d", len(done_sending), len(done_recving))
         return done_sending, done_recving
 
+    def get_kv_connector_stats(self) -> Optional[KVConnectorStats]:
+        return self.xfer_stats.collect()
+
+    def get_ready_layers(self, request_id: str) -> set[str]:
+        """Layers already received for a request still being pulled."""
+        if self.kv_recv_thread is None:
+            return set()
+        return self.kv_recv_thread.get_ready_layers(request_id)
+
     def start_load_kv(self, metadata: MooncakeConnectorMetadata):
         """Start loading KV blocks from remote engine."""
         for req_id, meta in metadata.requests.items():
@@ -1187,23 +1641,18 @@ def zmq_ctx(socket_type: Any,
 
 
 def group_concurrent_contiguous(
-    src: List[int], dst: List[int]
-) -> Tuple[List[npt.NDArray[np.int64]], List[npt.NDArray[np.int64]]]:
-    """Vectorised NumPy implementation."""
-    src_indices: npt.NDArray[np.int64] = np.array(src, dtype=np.int64)
-    dst_indices: npt.NDArray[np.int64] = np.array(dst, dtype=np.int64)
-
-    if src_indices.size == 0:
-        return [], []
-
-    brk = np.where((np.diff(src_indices) != 1)
-                   | (np.diff(dst_indices) != 1))[0] + 1
-    src_groups = np.split(src_indices, brk)
-    dst_groups = np.split(dst_indices, brk)
-
-    src_groups = [g.tolist() for g in src_groups]
-    dst_groups = [g.tolist() for g in dst_groups]
-
+        src: List[int],
+        dst: List[int]) -> Tuple[List[List[int]], List[List[int]]]:
+    """Group the block ids into runs contiguous in both src and dst."""
+    src_starts, dst_starts, run_lens = contiguous_runs(src, dst)
+    src_groups = [
+        list(range(start, start + n))
+        for start, n in zip(src_starts.tolist(), run_lens.tolist())
+    ]
+    dst_groups = [
+        list(range(start, start + n))
+        for start, n in zip(dst_starts.tolist(), run_lens.tolist())
+    ]
     return src_groups, dst_groups
 
 
@@ -1220,7 +1669,8 @@ def string_to_int64_hash(input_str):
 def ensure_zmq_send(
         socket: zmq.Socket,  # type: ignore
         data: bytes,
-        max_retries: int = 3):
+        max_retries: int = 3,
+        stats: Optional[KVTransferStats] = None):
     retries_left = max_retries
     while True:
         try:
@@ -1232,6 +1682,8 @@ def ensure_zmq_send(
                 logger.warning(
                     f"Send failed: {e}, retrying... ({retries_left} "
                     "attempts left)")
+                if stats is not None:
+                    stats.record_retry()
                 time.sleep(0.1)
             else:
                 logger.error(f"Send failed after all retries: {e}")
@@ -1243,7 +1695,8 @@ def ensure_zmq_recv(
         socket: zmq.Socket,  # type: ignore
         poller: zmq.Poller,  # type: ignore
         timeout: float = 1.0,
-        max_retries: int = 3) -> bytes:
+        max_retries: int = 3,
+        stats: Optional[KVTransferStats] = None) -> bytes:
     retries_left = max_retries
     while True:
         try:
@@ -1257,6 +1710,8 @@ def ensure_zmq_recv(
             if retries_left > 0:
                 logger.warning(f"Receive failed: {e}, retrying... "
                                f"({retries_left} attempts left)")
+                if stats is not None:
+                    stats.record_retry()
                 time.sleep(0.1)
             else:
                 logger.error(f"Receive failed after all retries: {e}")
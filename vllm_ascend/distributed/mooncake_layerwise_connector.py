@@ -16,7 +16,6 @@ from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
 import httpx
 import msgspec
 import numpy as np
-import numpy.typing as npt
 import torch
 import zmq
 from mooncake.engine import TransferEngine  # type: ignore
@@ -24,6 +23,8 @@ from vllm import envs
 from vllm.config import VllmConfig, get_current_vllm_config
 from vllm.distributed.kv_transfer.kv_connector.v1.base import (
     KVConnectorBase_V1, KVConnectorMetadata, KVConnectorRole)
+from vllm.distributed.kv_transfer.kv_connector.v1.metrics import \
+    KVConnectorStats
 from vllm.distributed.parallel_state import (get_tensor_model_parallel_rank,
                                              get_tp_group, get_world_group)
 from vllm.utils import logger
@@ -32,6 +33,16 @@ from vllm.v1.request import RequestStatus
 
 import vllm_ascend.envs as envs_ascend
 from vllm_ascend.ascend_config import get_ascend_config
+from vllm_ascend.distributed.kv_tier_oracle import (KVLoadCostModel, KVTier,
+                                                    KVTierEstimate,
+                                                    KVTierOracle)
+# yapf: disable
+from vllm_ascend.distributed.kv_transfer_stats import (
+    KVTransferStats, build_kv_connector_stats)
+# yapf: enable
+from vllm_ascend.distributed.mooncake.transfer_plan import (KVTransferPlan,
+                                                            clip_runs,
+                                                            contiguous_runs)
 from vllm_ascend.distributed.utils import (align_memory,
                                            kv_alltoall_and_rearrange)
 from vllm_ascend.utils import vllm_version_is
@@ -89,9 +100,11 @@ class KVCacheTaskTracker:
     def __init__(self,
                  target_count: int = 1,
                  on_done: Callable[[str], None] = lambda x: None,
-                 on_timeout: Callable[[set[str]], Any] = lambda x: None):
+                 on_timeout: Callable[[set[str]], Any] = lambda x: None,
+                 stats: Optional[KVTransferStats] = None):
         super().__init__()
         self.target_count = target_count
+        self.stats = stats
         self.done_task_lock = threading.Lock()
         self.done_task_counts: defaultdict[str, int] = defaultdict(int)
         self.finished_requests: set[str] = set()
@@ -150,6 +163,8 @@ class KVCacheTaskTracker:
                 self.delayed_free_requests.pop(request_id)
                 expired_requests.add(request_id)
                 logger.info("Force freed request: %s", request_id)
+                if self.stats is not None:
+                    self.stats.record_delayed_free_timeout()
             else:
                 break
         return expired_requests
@@ -163,13 +178,22 @@ class KVCacheTaskTracker:
 
 class KVCacheSendingLayerThread(threading.Thread):
 
-    def __init__(self, tp_rank: int, tp_size: int, decode_tp_size: int,
-                 local_engine_id: str, side_channel_host: str,
-                 side_channel_port: int, metadata: MooncakeAgentMetadata,
-                 ready_event: threading.Event, total_layers: int,
-                 engine: TransferEngine, local_kv_base_addr: list[int],
-                 block_len: list[int], use_mla: bool,
-                 first_kv_cache: torch.Tensor):
+    def __init__(self,
+                 tp_rank: int,
+                 tp_size: int,
+                 decode_tp_size: int,
+                 local_engine_id: str,
+                 side_channel_host: str,
+                 side_channel_port: int,
+                 metadata: MooncakeAgentMetadata,
+                 ready_event: threading.Event,
+                 total_layers: int,
+                 engine: TransferEngine,
+                 local_kv_base_addr: list[int],
+                 block_len: list[int],
+                 use_mla: bool,
+                 first_kv_cache: torch.Tensor,
+                 stats: Optional[KVTransferStats] = None):
         super().__init__(daemon=True, name="KVCacheSendingLayerThread")
         self.tp_rank = tp_rank
         self.tp_size = tp_size
@@ -177,12 +201,14 @@ class KVCacheSendingLayerThread(threading.Thread):
         self.local_engine_id = local_engine_id
         self.side_channel_host = side_channel_host
         self.side_channel_port = side_channel_port
+        self.stats = stats or KVTransferStats()
         self.task_tracker = KVCacheTaskTracker(total_layers,
                                                on_done=self._post_transfer,
-                                               on_timeout=self._abort_requests)
+                                               on_timeout=self._abort_requests,
+                                               stats=self.stats)
         self.send_layer_thread = SendingLayerThread(
             self.task_tracker, total_layers, engine, local_kv_base_addr,
-            block_len, use_mla, self.tp_rank, first_kv_cache)
+            block_len, use_mla, self.tp_rank, first_kv_cache, self.stats)
         self.ready_decode = dict[str, DecodeMooncakeAgentMetadata]()
         self.pending_decode = dict[str,
                                    list[tuple[list[int], int, torch.Tensor,
@@ -275,10 +301,16 @@ class KVCacheSendingLayerThread(threading.Thread):
 
 class SendingLayerThread(threading.Thread):
 
-    def __init__(self, task_tracker: KVCacheTaskTracker, total_layers: int,
-                 engine: TransferEngine, local_kv_base_addr: list[int],
-                 block_len: list[int], use_mla: bool, tp_rank: int,
-                 first_kv_cache: torch.Tensor):
+    def __init__(self,
+                 task_tracker: KVCacheTaskTracker,
+                 total_layers: int,
+                 engine: TransferEngine,
+                 local_kv_base_addr: list[int],
+                 block_len: list[int],
+                 use_mla: bool,
+                 tp_rank: int,
+                 first_kv_cache: torch.Tensor,
+                 stats: Optional[KVTransferStats] = None):
         super().__init__(daemon=True, name="KVCacheRecvingPrefillerByeThread")
         self.send_queue = queue.Queue[tuple[DecodeMooncakeAgentMetadata, str,
                                             list[int], int, torch.Tensor,
@@ -286,12 +318,23 @@ class SendingLayerThread(threading.Thread):
         self.completion_event: Optional[threading.Event] = None
         self.completion_event_count: int
         self.task_tracker = task_tracker
+        self.stats = stats or KVTransferStats()
         self.total_layers = total_layers
         self.local_kv_base_addr = local_kv_base_addr
         self.block_len = block_len
         self.use_mla = use_mla
         self.engine = engine
         self.tp_rank = tp_rank
+        # (remote host, remote te port) -> (remote base addresses, address
+        # plan of the pushes to that remote).
+        self.transfer_plans: dict[tuple[str, int], tuple[list[int],
+                                                         KVTransferPlan]] = {}
+        # Contiguous block runs of the last request sent, the same for all
+        # its layers.
+        self.block_runs_cache: Optional[tuple[str, list[int],
+                                              Optional[list[int]],
+                                              tuple[np.ndarray, np.ndarray,
+                                                    np.ndarray]]] = None
         self.pd_tp_ratio = get_ascend_config().pd_tp_ratio
         self.num_head_replica = get_ascend_config().num_head_replica
         self.pd_head_ratio = get_ascend_config().pd_head_ratio
@@ -350,6 +393,7 @@ class SendingLayerThread(threading.Thread):
         except Exception as e:
             logger.error("Failed to transfer KV cache for request "
                          f"{request_id}: {e}")
+            self.stats.record_failure()
         finally:
             self.task_tracker.update_done_task_count(request_id)
             self.send_queue.task_done()
@@ -369,36 +413,19 @@ class SendingLayerThread(threading.Thread):
         if self.tp_rank % self.num_head_replica != 0:
             pass
         elif self.pd_head_ratio == 1:
-            layer_local_kv_base_addr = [
-                self.local_kv_base_addr[i]
-                for i in [2 * layer_index, 2 * layer_index + 1]
-            ]
-            layer_remote_kv_base_addr = [
-                remote_kv_base_addrs[i]
-                for i in [2 * layer_index, 2 * layer_index + 1]
-            ]
-            grouped_remote_block_ids, grouped_local_block_ids = \
-                group_concurrent_contiguous(remote_block_ids, local_block_ids)
+            plan = self._get_transfer_plan(req_meta)
+            remote_starts, local_starts, run_lens = self._get_block_runs(
+                req_meta.req_id, remote_block_ids, local_block_ids)
 
             session_id = f"{remote_host}:{remote_te_port}"
-            src_list, dst_list, length_list = [], [], []
-            for k, (src_layer_base_addr, dst_layer_base_addr) in enumerate(
-                    zip(layer_local_kv_base_addr, layer_remote_kv_base_addr)):
-                block_len = self.block_len[
-                    k % 2] if self.use_mla else self.block_len[0]
-                for group_remote_block_id, group_local_block_id in zip(
-                        grouped_remote_block_ids, grouped_local_block_ids):
-                    src = src_layer_base_addr + group_local_block_id[
-                        0] * block_len
-                    dst = dst_layer_base_addr + group_remote_block_id[
-                        0] * block_len
-                    length = len(group_local_block_id) * block_len
-                    src_list.append(src)
-                    dst_list.append(dst)
-                    length_list.append(length)
+            src_list, dst_list, length_list = plan.build(
+                local_starts,
+                remote_starts,
+                run_lens,
+                caches=slice(2 * layer_index, 2 * layer_index + 2))
             torch.npu.synchronize()
-            ret = self.engine.batch_transfer_sync_write(
-                session_id, src_list, dst_list, length_list)
+            ret = self._write_blocks(session_id, src_list, dst_list,
+                                     length_list)
 
             if ret < 0:
                 logger.error("Mooncake transfer failed for request %s",
@@ -410,48 +437,36 @@ class SendingLayerThread(threading.Thread):
             self.k_buffer[:key.shape[0]].copy_(key)  # [:4, 128] ->
             self.v_buffer[:value.shape[0]].copy_(value)
 
-            layer_local_kv_base_addr = [
-                self.k_buffer.data_ptr(),
-                self.v_buffer.data_ptr()
-            ]
-
-            layer_remote_kv_base_addr = [
-                remote_kv_base_addrs[i]
-                for i in [2 * layer_index, 2 * layer_index + 1]
-            ]
+            layer_local_kv_base_addr = np.array(
+                [self.k_buffer.data_ptr(),
+                 self.v_buffer.data_ptr()],
+                dtype=np.int64)
+            layer_remote_kv_base_addr = np.array(
+                remote_kv_base_addrs[2 * layer_index:2 * layer_index + 2],
+                dtype=np.int64)
 
-            grouped_remote_block_ids, _ = group_concurrent_contiguous(
-                remote_block_ids)
+            remote_starts, _, run_lens = self._get_block_runs(
+                req_meta.req_id, remote_block_ids)
 
             session_id = f"{remote_host}:{remote_te_port}"
-            src_list, dst_list, length_list = [], [], []
-            for k, (src_layer_base_addr, dst_layer_base_addr) in enumerate(
-                    zip(layer_local_kv_base_addr, layer_remote_kv_base_addr)):
-                src_layer_addr = src_layer_base_addr
-                for group_remote_block_id in grouped_remote_block_ids:
-                    block_len = self.block_len[0]
-                    remote_block_len = self.block_len[0] * self.pd_head_ratio
-                    src_list.append(src_layer_addr)
-
-                    if src_layer_addr + len(
-                            group_remote_block_id
-                    ) * block_len > src_layer_base_addr + key.numel(
-                    ) * key.element_size():
-                        length = src_layer_base_addr + key.numel(
-                        ) * key.element_size() - src_layer_addr
-                    else:
-                        length = len(group_remote_block_id) * block_len
-                    length_list.append(length)
-
-                    dst_list.append(dst_layer_base_addr +
-                                    group_remote_block_id[0] *
-                                    remote_block_len + length *
-                                    ((self.tp_rank // self.num_head_replica) %
-                                     self.pd_head_ratio))
-                    src_layer_addr += length
+            block_len = self.block_len[0]
+            remote_block_len = self.block_len[0] * self.pd_head_ratio
+            # The heads of this rank are packed in the buffers, the runs are
+            # read back to back and the last ones are truncated to the size
+            # of the key.
+            offsets, lengths = clip_runs(run_lens * block_len,
+                                         key.numel() * key.element_size())
+            head_offset = (self.tp_rank //
+                           self.num_head_replica) % self.pd_head_ratio
+            src = layer_local_kv_base_addr[:, None] + offsets
+            dst = layer_remote_kv_base_addr[:, None] + \
+                remote_starts * remote_block_len + lengths * head_offset
+            src_list = src.ravel().tolist()
+            dst_list = dst.ravel().tolist()
+            length_list = np.broadcast_to(lengths, src.shape).ravel().tolist()
             torch.npu.synchronize()
-            ret = self.engine.batch_transfer_sync_write(
-                session_id, src_list, dst_list, length_list)
+            ret = self._write_blocks(session_id, src_list, dst_list,
+                                     length_list)
             if ret < 0:
                 logger.error("Mooncake transfer failed for request %s",
                              req_meta.req_id)
@@ -462,6 +477,51 @@ class SendingLayerThread(threading.Thread):
                 self.completion_event.set()
                 self.completion_event = None
 
+    def _write_blocks(self, session_id: str, src_list: list[int],
+                      dst_list: list[int], length_list: list[int]) -> int:
+        start_time = time.perf_counter()
+        ret = self.engine.batch_transfer_sync_write(session_id, src_list,
+                                                    dst_list, length_list)
+        if ret >= 0:
+            self.stats.record_transfer(sum(length_list),
+                                       time.perf_counter() - start_time)
+        return ret
+
+    def _get_transfer_plan(
+            self, req_meta: DecodeMooncakeAgentMetadata) -> KVTransferPlan:
+        """Address plan of the pushes to the remote of req_meta, rebuilt only
+        when the remote comes back with another layout."""
+        plan_key = (req_meta.host, req_meta.te_rpc_port)
+        cached = self.transfer_plans.get(plan_key)
+        if cached is not None and cached[0] == req_meta.kv_caches_base_addr:
+            return cached[1]
+        block_lens = self.block_len[:2] if self.use_mla else self.block_len[:1]
+        plan = KVTransferPlan(self.local_kv_base_addr,
+                              req_meta.kv_caches_base_addr,
+                              src_block_lens=block_lens,
+                              dst_block_lens=block_lens)
+        self.transfer_plans[plan_key] = (list(req_meta.kv_caches_base_addr),
+                                         plan)
+        return plan
+
+    def _get_block_runs(
+        self,
+        req_id: str,
+        remote_block_ids: list[int],
+        local_block_ids: Optional[list[int]] = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Contiguous block runs of a request, computed on its first layer
+        and reused for the next ones."""
+        cached = self.block_runs_cache
+        if cached is not None and cached[0] == req_id and \
+                cached[1] == remote_block_ids and cached[2] == local_block_ids:
+            return cached[3]
+        runs = contiguous_runs(remote_block_ids, local_block_ids)
+        self.block_runs_cache = (req_id, list(remote_block_ids),
+                                 None if local_block_ids is None else
+                                 list(local_block_ids), runs)
+        return runs
+
     def add_event(self, event: threading.Event, count: int) -> None:
         self.completion_event = event
         self.completion_event_count = count
@@ -551,7 +611,7 @@ class MooncakeLayerwiseConnectorMetadata(KVConnectorMetadata):
         )
 
 
-class MooncakeLayerwiseConnector(KVConnectorBase_V1):
+class MooncakeLayerwiseConnector(KVConnectorBase_V1, KVTierOracle):
 
     def __init__(self, vllm_config: VllmConfig, role: KVConnectorRole):
         assert vllm_config.kv_transfer_config is not None
@@ -578,6 +638,13 @@ class MooncakeLayerwiseConnector(KVConnectorBase_V1):
         return self.connector_scheduler.get_num_new_matched_tokens(
             request, num_computed_tokens)
 
+    def get_kv_tier_estimates(
+            self, request: "Request",
+            num_external_tokens: int) -> list[KVTierEstimate]:
+        assert self.connector_scheduler is not None
+        return self.connector_scheduler.get_kv_tier_estimates(
+            request, num_external_tokens)
+
     def update_state_after_alloc(self, request: "Request",
                                  blocks: "KVCacheBlocks",
                                  num_external_tokens: int):
@@ -617,6 +684,18 @@ class MooncakeLayerwiseConnector(KVConnectorBase_V1):
         assert self.connector_worker is not None
         return self.connector_worker.get_finished()
 
+    def get_kv_connector_stats(self) -> Optional[KVConnectorStats]:
+        if self.connector_worker is None:
+            return None
+        return self.connector_worker.get_kv_connector_stats()
+
+    @classmethod
+    def build_kv_connector_stats(
+            cls,
+            data: Optional[dict[str,
+                                Any]] = None) -> Optional[KVConnectorStats]:
+        return build_kv_connector_stats(data)
+
     def start_load_kv(self, forward_context: "ForwardContext",
                       **kwargs) -> None:
         assert self.connector_worker is not None
@@ -670,6 +749,7 @@ class MooncakeLayerwiseConnectorScheduler:
         # the scheduler. Used to make metadata passed to Worker.
         self._reqs_need_recv: dict[str, tuple[Request, list[int]]] = {}
         self._reqs_need_send: dict[str, float] = {}
+        self.kv_load_cost = KVLoadCostModel(vllm_config, KVTier.REMOTE_PREFILL)
         self._reqs_need_send_layerwise: dict[str, tuple[str, int,
                                                         list[int]]] = {}
 
@@ -709,6 +789,11 @@ class MooncakeLayerwiseConnectorScheduler:
         # No remote prefill for this request.
         return 0, False
 
+    def get_kv_tier_estimates(
+            self, request: "Request",
+            num_external_tokens: int) -> list[KVTierEstimate]:
+        return [self.kv_load_cost.estimate(num_external_tokens)]
+
     def update_state_after_alloc(self, request: "Request",
                                  blocks: "KVCacheBlocks",
                                  num_external_tokens: int):
@@ -875,6 +960,7 @@ class MooncakeLayerwiseConnectorWorker:
         self.dp_rank = vllm_config.parallel_config.data_parallel_rank_local
         self.dp_size = vllm_config.parallel_config.data_parallel_size_local
         self.kv_caches: dict[str, torch.Tensor] = {}
+        self.xfer_stats = KVTransferStats()
         self.side_channel_host = get_ip()
         self.max_device_id = self.tp_size * self.dp_size
         self.kv_role = vllm_config.kv_transfer_config.kv_role
@@ -1041,7 +1127,7 @@ class MooncakeLayerwiseConnectorWorker:
                 self.engine_id, self.side_channel_host, self.side_channel_port,
                 metadata, ready_event, self.total_layers, self.engine,
                 kv_caches_base_addr, self.block_len, self.use_mla,
-                self.first_kv_cache)
+                self.first_kv_cache, self.xfer_stats)
             self.kv_send_layer_thread.start()
         else:
             self.kv_recv_layer_thread = KVCacheRecvingLayerThread(
@@ -1076,6 +1162,9 @@ class MooncakeLayerwiseConnectorWorker:
                 "requests: %d", len(done_sending), len(done_recving))
         return done_sending, done_recving
 
+    def get_kv_connector_stats(self) -> Optional[KVConnectorStats]:
+        return self.xfer_stats.collect()
+
     def start_load_kv(self, metadata: MooncakeLayerwiseConnectorMetadata):
         """Start loading KV blocks from remote engine."""
         self.current_layer = 0
@@ -1255,38 +1344,22 @@ def zmq_ctx(socket_type: Any,
 
 
 def group_concurrent_contiguous(
-    src: List[int],
-    dst: List[int] = []
-) -> Tuple[List[npt.NDArray[np.int64]], List[npt.NDArray[np.int64]]]:
-    """Vectorised NumPy implementation."""
+        src: List[int],
+        dst: List[int] = []) -> Tuple[List[List[int]], List[List[int]]]:
+    """Group the block ids into runs contiguous in src, and in dst when it
+    is given."""
+    src_starts, dst_starts, run_lens = contiguous_runs(src, dst or None)
+    src_groups = [
+        list(range(start, start + n))
+        for start, n in zip(src_starts.tolist(), run_lens.tolist())
+    ]
     if not dst:
-        src_only_indices: npt.NDArray[np.int64] = np.array(src, dtype=np.int64)
-
-        if src_only_indices.size == 0:
-            return [], []
-
-        brk = np.where((np.diff(src_only_indices) != 1))[0] + 1
-        src_groups = np.split(src_only_indices, brk)
-        src_groups = [g.tolist() for g in src_groups]
-
         return src_groups, []
-
-    else:
-        src_indices: npt.NDArray[np.int64] = np.array(src, dtype=np.int64)
-        dst_indices: npt.NDArray[np.int64] = np.array(dst, dtype=np.int64)
-
-        if src_indices.size == 0:
-            return [], []
-
-        brk = np.where((np.diff(src_indices) != 1)
-                       | (np.diff(dst_indices) != 1))[0] + 1
-        src_groups = np.split(src_indices, brk)
-        dst_groups = np.split(dst_indices, brk)
-
-        src_groups = [g.tolist() for g in src_groups]
-        dst_groups = [g.tolist() for g in dst_groups]
-
-        return src_groups, dst_groups
+    dst_groups = [
+        list(range(start, start + n))
+        for start, n in zip(dst_starts.tolist(), run_lens.tolist())
+    ]
+    return src_groups, dst_groups
 
 
 def string_to_int64_hash(input_str):
@@ -0,0 +1,51 @@
+from vllm.config import VllmConfig
+from vllm.distributed.kv_transfer.kv_connector.v1.base import KVConnectorRole
+from vllm.distributed.kv_transfer.kv_connector.v1.offloading_connector import \
+    OffloadingConnector
+from vllm.forward_context import ForwardContext
+
+from vllm_ascend.kv_offload.npu import NPUOffloadingSpec
+
+
+class NPUOffloadingConnector(OffloadingConnector):
+    """OffloadingConnector launching the transfers of a step at once.
+
+    With the NPUOffloadingSpec, the handler of this connector queues the jobs
+    submitted by the worker, and they are launched once all the jobs of a
+    step are submitted: the loads before the forward and the stores after
+    it, one transfer per direction whatever the number of requests. The
+    plain OffloadingConnector launches every job as it is submitted.
+
+    It is selected with the same kv_connector_extra_config as the
+    OffloadingConnector, e.g.:
+
+        --kv-transfer-config '{"kv_connector": "NPUOffloadingConnector",
+            "kv_role": "kv_both",
+            "kv_connector_extra_config": {
+                "spec_name": "NPUOffloadingSpec",
+                "spec_module_path": "vllm_ascend.kv_offload.npu",
+                "num_cpu_blocks": 1000}}'
+    """
+
+    def __init__(self, vllm_config: VllmConfig, role: KVConnectorRole):
+        super().__init__(vllm_config, role)
+        if self.connector_worker is not None and isinstance(
+                self.connector_worker.spec, NPUOffloadingSpec):
+            # Set before the handler is created with the kv caches.
+            self.connector_worker.spec.defer_transfers = True
+
+    def start_load_kv(self, forward_context: "ForwardContext",
+                      **kwargs) -> None:
+        super().start_load_kv(forward_context, **kwargs)
+        # Launch the loads of all the requests before the forward.
+        self._flush()
+
+    def wait_for_save(self):
+        super().wait_for_save()
+        self._flush()
+
+    def _flush(self) -> None:
+        assert self.connector_worker is not None
+        spec = self.connector_worker.spec
+        if isinstance(spec, NPUOffloadingSpec):
+            spec.flush()
@@ -0,0 +1,96 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from vllm.config import KVTransferConfig
+from vllm.utils import logger
+
+
+@dataclass
+class RemoteAgent:
+    """A peer engine the workers connect to before its first request, given
+    with the remote_host, remote_port and remote_tp_size of the
+    kv_transfer_params of its requests."""
+    host: str
+    port: int
+    tp_size: Optional[int] = None
+
+
+def get_remote_agents(
+        kv_transfer_config: Optional[KVTransferConfig]) -> list[RemoteAgent]:
+    """The peers listed by remote_agents in kv_connector_extra_config, each
+    either a {"host", "port", "tp_size"} dict or a "host:port" string."""
+    if kv_transfer_config is None:
+        return []
+    remote_agents = []
+    for agent in kv_transfer_config.get_from_extra_config("remote_agents", []):
+        if isinstance(agent, str):
+            host, port = agent.rsplit(":", 1)
+            remote_agents.append(RemoteAgent(host, int(port)))
+        else:
+            tp_size = agent.get("tp_size")
+            remote_agents.append(
+                RemoteAgent(agent["host"], int(agent["port"]),
+                            int(tp_size) if tp_size is not None else None))
+    return remote_agents
+
+
+class AgentMetadataCache:
+    """Metadata of remote engines kept on disk, so that a restarted worker
+    does not handshake again with the engines it already knew.
+
+    The metadata of an engine is stored under a directory named after its
+    engine id, one file per handshake port, and is dropped as a whole by
+    invalidate() when the engine is gone.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(
+        cls, kv_transfer_config: Optional[KVTransferConfig]
+    ) -> Optional["AgentMetadataCache"]:
+        if kv_transfer_config is None:
+            return None
+        cache_dir = kv_transfer_config.get_from_extra_config(
+            "agent_metadata_cache_dir", None)
+        return cls(cache_dir) if cache_dir else None
+
+    def _engine_dir(self, engine_id: str) -> str:
+        return os.path.join(self.cache_dir,
+                            re.sub(r"[^\w.-]", "_", str(engine_id)))
+
+    def get(self, engine_id: str, port: int) -> Optional[dict[str, Any]]:
+        path = os.path.join(self._engine_dir(engine_id), f"{port}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring the agent metadata cached in %s: %s",
+                           path, e)
+            return None
+
+    def put(self, engine_id: str, port: int, metadata: dict[str, Any]) -> None:
+        engine_dir = self._engine_dir(engine_id)
+        try:
+            os.makedirs(engine_dir, exist_ok=True)
+            # The workers of a node share the cache, the file is replaced
+            # atomically so that they never read it half written.
+            fd, tmp_path = tempfile.mkstemp(dir=engine_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+            os.replace(tmp_path, os.path.join(engine_dir, f"{port}.json"))
+        except OSError as e:
+            logger.warning("Failed to cache the metadata of engine %s: %s",
+                           engine_id, e)
+
+    def invalidate(self, engine_id: str) -> None:
+        shutil.rmtree(self._engine_dir(engine_id), ignore_errors=True)
@@ -104,6 +104,16 @@ class VllmEplbAdaptor(EplbAdaptor):
                     for name in self.expert_weight_names
                 ])
 
+    def get_expert_weight_bytes(self) -> torch.Tensor:
+        """Bytes of the weights of one expert of every MoE layer."""
+        return torch.tensor([
+            sum(param.numel() * param.element_size()
+                for param in self.expert_param_per_layer[self.num_dense_layers
+                                                         + moe_layer_id][0])
+            for moe_layer_id in range(self.num_moe_layers)
+        ],
+                            dtype=torch.int64)
+
     def get_rank_expert_workload(self) -> torch.Tensor:
         self.moe_load = self.model.get_all_moe_loads()
         return self.moe_load
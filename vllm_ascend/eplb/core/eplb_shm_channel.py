@@ -0,0 +1,247 @@
+#
+# Copyright (c) 2025 Huawei Technologies Co., Ltd. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# This file is a part of the vllm-ascend project.
+#
+import uuid
+from multiprocessing import shared_memory
+from typing import Any, Optional
+
+import numpy as np
+import torch
+
+# Header layout of a slot, in int64 words.
+_SEQ, _GENERATION, _DTYPE, _NDIM, _SHAPE = 0, 1, 2, 3, 4
+MAX_NDIM = 4
+_HEADER_WORDS = _SHAPE + MAX_NDIM
+
+_DTYPES = [
+    torch.int64, torch.int32, torch.int16, torch.int8, torch.uint8, torch.bool,
+    torch.float64, torch.float32, torch.float16
+]
+
+UPDATE_INFO_KEYS = ("update_layer_ids", "update_expert_maps",
+                    "update_log2phy_maps", "update_send_info",
+                    "update_recv_info")
+CHANNEL_KEYS = ("moe_load",
+                "expert_maps") + UPDATE_INFO_KEYS + ("expert_weight_bytes", )
+
+
+class SharedTensorSlot:
+    """A tensor shared between processes through POSIX shared memory.
+
+    The slot is made of a small header segment, created up front so that
+    it can be inherited by the EPLB process, and a data segment that is
+    (re)created by whichever process writes a tensor that does not fit.
+    The header holds a sequence number, the generation of the data
+    segment and the dtype and shape of the last tensor written.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._header_shm = shared_memory.SharedMemory(name=name,
+                                                      create=True,
+                                                      size=_HEADER_WORDS * 8)
+        self._header_shm.buf[:] = bytes(_HEADER_WORDS * 8)
+        self._data_shm: Optional[shared_memory.SharedMemory] = None
+        self._data_generation = 0
+
+    def __getstate__(self):
+        # Only the names cross the process boundary, the segments are
+        # attached again lazily.
+        return {"name": self.name}
+
+    def __setstate__(self, state):
+        self.name = state["name"]
+        self._header_shm = shared_memory.SharedMemory(name=self.name)
+        self._data_shm = None
+        self._data_generation = 0
+
+    @property
+    def header(self) -> np.ndarray:
+        return np.ndarray((_HEADER_WORDS, ),
+                          dtype=np.int64,
+                          buffer=self._header_shm.buf)
+
+    @property
+    def seq(self) -> int:
+        return int(self.header[_SEQ])
+
+    def _data_name(self, generation: int) -> str:
+        return f"{self.name}_{generation}"
+
+    def _attach_data(self, nbytes: int = 0, grow: bool = False):
+        header = self.header
+        generation = int(header[_GENERATION])
+        if generation != self._data_generation or self._data_shm is None:
+            if self._data_shm is not None:
+                self._data_shm.close()
+                self._data_shm = None
+            if generation > 0:
+                self._data_shm = shared_memory.SharedMemory(
+                    name=self._data_name(generation))
+            self._data_generation = generation
+        if grow and (self._data_shm is None or self._data_shm.size < nbytes):
+            old_shm = self._data_shm
+            generation += 1
+            self._data_shm = shared_memory.SharedMemory(
+                name=self._data_name(generation),
+                create=True,
+                size=max(nbytes, 1))
+            self._data_generation = generation
+            header[_GENERATION] = generation
+            if old_shm is not None:
+                old_shm.close()
+                old_shm.unlink()
+
+    def write(self, tensor: torch.Tensor) -> int:
+        """Copy tensor into the slot and return the new sequence number."""
+        tensor = tensor.detach().cpu().contiguous()
+        if tensor.dim() > MAX_NDIM:
+            raise ValueError(
+                f"Only tensors with up to {MAX_NDIM} dims can be shared, "
+                f"got shape {tuple(tensor.shape)}.")
+        array = tensor.numpy()
+        self._attach_data(array.nbytes, grow=True)
+        assert self._data_shm is not None
+        np.ndarray(array.shape, dtype=array.dtype,
+                   buffer=self._data_shm.buf)[...] = array
+
+        header = self.header
+        header[_DTYPE] = _DTYPES.index(tensor.dtype)
+        header[_NDIM] = tensor.dim()
+        header[_SHAPE:_SHAPE + tensor.dim()] = tensor.shape
+        # The sequence number is bumped last, a reader woken up with it
+        # sees the whole tensor.
+        header[_SEQ] += 1
+        return int(header[_SEQ])
+
+    def read(self, copy: bool = True) -> Optional[torch.Tensor]:
+        """Return the last tensor written, or None if nothing was written.
+
+        With copy=False the tensor is a view of the shared memory, which is
+        only valid until the next write to the slot.
+        """
+        header = self.header
+        if header[_SEQ] == 0:
+            return None
+        self._attach_data()
+        assert self._data_shm is not None
+        dtype = _DTYPES[int(header[_DTYPE])]
+        shape = tuple(int(s) for s in header[_SHAPE:_SHAPE + header[_NDIM]])
+        array = np.ndarray(shape,
+                           dtype=torch.empty(0, dtype=dtype).numpy().dtype,
+                           buffer=self._data_shm.buf)
+        if copy:
+            array = array.copy()
+        return torch.from_numpy(array)
+
+    def close(self):
+        if self._data_shm is not None:
+            self._data_shm.close()
+            self._data_shm = None
+        self._header_shm.close()
+
+    def unlink(self):
+        """Release both segments, called once by the creating process."""
+        self._attach_data()
+        if self._data_shm is not None:
+            self._data_shm.unlink()
+        self._header_shm.unlink()
+        self.close()
+
+
+class EplbSharedChannel:
+    """Shared-memory channel between the model runner and the EPLB process.
+
+    It carries the MoE load, the global expert maps and the packed update
+    info, so that only sequence numbers go through the EPLB queues.
+    """
+
+    def __init__(self, prefix: Optional[str] = None):
+        prefix = prefix or f"eplb_{uuid.uuid4().hex[:12]}"
+        self.slots = {
+            key: SharedTensorSlot(f"{prefix}_{idx}")
+            for idx, key in enumerate(CHANNEL_KEYS)
+        }
+
+    def write(self, key: str, tensor: torch.Tensor) -> int:
+        return self.slots[key].write(tensor)
+
+    def read(self, key: str, copy: bool = True) -> Optional[torch.Tensor]:
+        return self.slots[key].read(copy)
+
+    def seq(self, key: str) -> int:
+        return self.slots[key].seq
+
+    def write_update_info(self, update_info: list[Any]) -> int:
+        """Write the packed update info of this rank.
+
+        update_info is a list of (send_info, recv_info, expert_map,
+        log2phy_map, layer_id) tuples, as produced by
+        EplbWorker.pack_update_info.
+        """
+        num_layers = len(update_info)
+        layer_ids = torch.tensor([info[4] for info in update_info],
+                                 dtype=torch.int64)
+        expert_maps = torch.stack([
+            torch.as_tensor(info[2], dtype=torch.int64) for info in update_info
+        ]) if num_layers else torch.empty((0, 0), dtype=torch.int64)
+        log2phy_maps = torch.stack([
+            torch.as_tensor(info[3], dtype=torch.int64) for info in update_info
+        ]) if num_layers else torch.empty((0, 0), dtype=torch.int64)
+
+        def flatten(pairs_idx):
+            # (idx in update_info, peer rank, global expert id) triples
+            return torch.tensor([(idx, int(rank), int(expert_id))
+                                 for idx, info in enumerate(update_info)
+                                 for rank, expert_id in info[pairs_idx]],
+                                dtype=torch.int64).reshape(-1, 3)
+
+        self.write("update_send_info", flatten(0))
+        self.write("update_recv_info", flatten(1))
+        self.write("update_expert_maps", expert_maps)
+        self.write("update_log2phy_maps", log2phy_maps)
+        # Written last, its sequence number identifies the update.
+        return self.write("update_layer_ids", layer_ids)
+
+    def read_update_info(self) -> list[Any]:
+        """Inverse of write_update_info, the maps are returned as tensors."""
+        layer_ids = self.read("update_layer_ids")
+        if layer_ids is None:
+            return []
+        expert_maps = self.read("update_expert_maps")
+        log2phy_maps = self.read("update_log2phy_maps")
+        send_info = self.read("update_send_info")
+        recv_info = self.read("update_recv_info")
+        assert expert_maps is not None and log2phy_maps is not None
+        assert send_info is not None and recv_info is not None
+
+        update_info: list[Any] = [
+            ([], [], expert_maps[idx], log2phy_maps[idx], layer_id)
+            for idx, layer_id in enumerate(layer_ids.tolist())
+        ]
+        for idx, rank, expert_id in send_info.tolist():
+            update_info[idx][0].append((rank, expert_id))
+        for idx, rank, expert_id in recv_info.tolist():
+            update_info[idx][1].append((rank, expert_id))
+        return update_info
+
+    def close(self):
+        for slot in self.slots.values():
+            slot.close()
+
+    def unlink(self):
+        for slot in self.slots.values():
+            slot.unlink()
@@ -22,6 +22,8 @@ import sys
 import torch
 from vllm.logger import logger
 
+from vllm_ascend.eplb.core.load_forecaster import LOAD_FORECASTERS
+
 
 def determine_default_expert_map(global_expert_num, world_size, rank_id,
                                  global_redundant_expert_num):
@@ -134,6 +136,30 @@ class EPLBParamUtils:
             raise ValueError(
                 f"The {iterations} can not large than {sys.maxsize}")
 
+    @staticmethod
+    def check_migration_budget(budget_mb):
+        if not isinstance(budget_mb,
+                          (int, float)) or isinstance(budget_mb, bool):
+            raise TypeError(f"The {budget_mb} is not a number.")
+        if budget_mb < 0:
+            raise ValueError(f"The {budget_mb} can not less than 0.")
+
+    @staticmethod
+    def check_load_forecaster(load_forecaster):
+        if load_forecaster is None:
+            return
+        if load_forecaster not in LOAD_FORECASTERS:
+            raise ValueError(
+                f"The {load_forecaster} is not in {list(LOAD_FORECASTERS)}.")
+
+    @staticmethod
+    def check_min_rebalance_gain(min_gain):
+        if not isinstance(min_gain,
+                          (int, float)) or isinstance(min_gain, bool):
+            raise TypeError(f"The {min_gain} is not a number.")
+        if min_gain < 0 or min_gain >= 1:
+            raise ValueError(f"The {min_gain} is not in [0, 1).")
+
     @staticmethod
     def check_dynamic_eplb(dynamic_eplb):
         if dynamic_eplb is None:
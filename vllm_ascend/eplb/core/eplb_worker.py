@@ -15,7 +15,7 @@
 # This file is a part of the vllm-ascend project.
 #
 from multiprocessing import Process, Queue
-from typing import Any
+from typing import Any, Optional
 
 import networkx as nx  # type: ignore
 import numpy as np
@@ -23,21 +23,41 @@ import torch
 import torch.distributed as dist
 from vllm.logger import logger
 
+from vllm_ascend.eplb.core.eplb_shm_channel import EplbSharedChannel
 from vllm_ascend.eplb.core.eplb_utils import generate_log2phy_map
+from vllm_ascend.eplb.core.load_forecaster import (create_load_forecaster,
+                                                   forecast_workload)
+from vllm_ascend.eplb.core.migration_planner import (plan_migration,
+                                                     skip_low_gain_layers,
+                                                     spread_layer_updates)
 from vllm_ascend.eplb.core.policy.policy_factory import (DynamicConfig,
                                                          PolicyFactory)
 
 
 class EplbWorker:
 
-    def __init__(self, shared_dict, policy_type, enable_d2d: bool = True):
+    def __init__(self,
+                 channel: EplbSharedChannel,
+                 policy_type,
+                 enable_d2d: bool = True,
+                 migration_budget_bytes: int = 0,
+                 load_forecaster: Optional[str] = None,
+                 min_rebalance_gain: float = 0.0):
         self.policy_type = policy_type
         self.policy = PolicyFactory.generate_policy(policy_type,
                                                     DynamicConfig())
-        self.shared_dict = shared_dict
+        self.channel = channel
         self.old_expert_maps = None
         self.enable_d2d = enable_d2d
         self.rank_id = dist.get_rank()
+        # Bytes of expert weights a rebalance may move, 0 for no limit.
+        self.migration_budget_bytes = migration_budget_bytes
+        # The policies balance the forecast load of the next window instead
+        # of the load of the last one when a forecaster is configured.
+        self.load_forecaster = create_load_forecaster(load_forecaster)
+        # Minimum relative reduction of the max rank load of a layer for its
+        # update to be applied.
+        self.min_rebalance_gain = min_rebalance_gain
 
     def do_update(self):
         # put data in to queue
@@ -54,7 +74,8 @@ class EplbWorker:
             if self.old_expert_maps is not None:
                 self.num_local_experts = self.old_expert_maps.max() + 1
             else:
-                raise ValueError("Failed to get expert_maps from shared_dict.")
+                raise ValueError(
+                    "Failed to get expert_maps from the shared channel.")
 
         # Get MOE load information
         load_info = self.fetch_and_sum_load_info()
@@ -64,21 +85,34 @@ class EplbWorker:
         # Get the updated expert table based on the workload information
         old_placement = self.global2local(self.old_expert_maps,
                                           self.num_local_experts)
+        if self.load_forecaster is not None:
+            load_info = self.forecast_load(old_placement, load_info)
         _, _, new_placement = self.calculate_rebalance_experts(
             load_info, old_placement)
 
         if not torch.is_tensor(new_placement):
             new_placement = torch.tensor(new_placement)
         self.check_expert_placement(old_placement, new_placement)
+        if self.min_rebalance_gain > 0:
+            new_placement = self.skip_low_gain_layers(old_placement,
+                                                      new_placement, load_info)
+        if self.migration_budget_bytes > 0:
+            new_placement = self.limit_migration(old_placement, new_placement,
+                                                 load_info)
         new_expert_maps = self.local2global(new_placement)
         self.update_expert_map(new_expert_maps)
 
         if self.policy_type == 2:
-            update_info = self.compose_expert_update_info_bipartite(
-                new_expert_maps, self.old_expert_maps)
+            compose_layer = self.compose_layer_update_info_bipartite
         else:
-            update_info = self.compose_expert_update_info_greedy(
-                new_expert_maps, self.old_expert_maps)
+            compose_layer = self.compose_layer_update_info_greedy
+        update_info = [
+            compose_layer(new_expert_maps[layer_id],
+                          self.old_expert_maps[layer_id], layer_id)
+            for layer_id in range(new_expert_maps.shape[0])
+        ]
+        if self.migration_budget_bytes > 0:
+            update_info = spread_layer_updates(update_info)
         self.old_expert_maps = new_expert_maps
         logger.info("EPLB Process compute complete")
 
@@ -86,203 +120,251 @@ class EplbWorker:
 
         return packed_update_info
 
+    def forecast_load(self, old_placement, load_info):
+        """
+        Feed the MoE load of the last window to the load forecaster and
+        return the forecast load of the experts of old_placement.
+        """
+        assert self.load_forecaster is not None
+        forecast = forecast_workload(self.load_forecaster,
+                                     old_placement.numpy(), load_info.numpy())
+        forecast = torch.from_numpy(forecast)
+        if not load_info.is_floating_point():
+            forecast = forecast.round()
+        return forecast.to(load_info.dtype)
+
+    def skip_low_gain_layers(self, old_placement, new_placement, load_info):
+        """
+        Keep the current placement of the layers whose update does not
+        reduce their max rank load by min_rebalance_gain.
+        """
+        placement, selected = skip_low_gain_layers(old_placement.numpy(),
+                                                   new_placement.numpy(),
+                                                   load_info.numpy(),
+                                                   self.min_rebalance_gain)
+        logger.info(f"EPLB keeps {selected.sum()} of {len(selected)} layer "
+                    f"updates reducing the max rank load by at least "
+                    f"{self.min_rebalance_gain:.1%}")
+        return torch.from_numpy(placement)
+
+    def limit_migration(self, old_placement, new_placement, load_info):
+        """
+        Keep the layer updates with the best imbalance reduction per byte of
+        expert weights moved, within the migration budget.
+        """
+        expert_weight_bytes = self.channel.read("expert_weight_bytes")
+        if expert_weight_bytes is None:
+            logger.warning(
+                "Expert weight size is unknown, ignore the EPLB migration budget."
+            )
+            return new_placement
+        placement, selected = plan_migration(old_placement.numpy(),
+                                             new_placement.numpy(),
+                                             load_info.numpy(),
+                                             expert_weight_bytes.numpy(),
+                                             self.migration_budget_bytes)
+        logger.info(f"EPLB migration planner keeps {selected.sum()} of "
+                    f"{len(selected)} layer updates within "
+                    f"{self.migration_budget_bytes} bytes")
+        return torch.from_numpy(placement)
+
     def check_expert_placement(self, old_placement, new_placement):
-        num_layers = old_placement.shape[0]
+        for layer_id in range(old_placement.shape[0]):
+            self.check_layer_placement(old_placement, new_placement, layer_id)
+
+    @staticmethod
+    def check_layer_placement(old_placement, new_placement, layer_id):
         num_ranks = old_placement.shape[1]
 
-        for layer_id in range(num_layers):
-            # check if any logical expert is not placed on any rank
-            if torch.unique(new_placement[layer_id]).numel() < torch.unique(
-                    old_placement[layer_id]).numel():
+        # check if any logical expert is not placed on any rank
+        if torch.unique(new_placement[layer_id]).numel() < torch.unique(
+                old_placement[layer_id]).numel():
+            logger.error(
+                f"There exists expert not placed on any rank in layer {layer_id}"
+            )
+            new_placement[layer_id] = old_placement[layer_id]
+            return
+
+        for rank_id in range(num_ranks):
+            new_placement_check = new_placement[layer_id][rank_id]
+            old_placement_check = old_placement[layer_id][rank_id]
+
+            # check if same logical experts are placed on the same NPU
+            if new_placement_check.numel() != torch.unique(
+                    new_placement_check).numel():
                 logger.error(
-                    f"There exists expert not placed on any rank in layer {layer_id}"
+                    f"Replicated experts are placed on the same NPU, expert placement on layer {layer_id}, rank {rank_id} is invalid"
                 )
                 new_placement[layer_id] = old_placement[layer_id]
-                continue
-
-            for rank_id in range(num_ranks):
-                new_placement_check = new_placement[layer_id][rank_id]
-                old_placement_check = old_placement[layer_id][rank_id]
-
-                # check if same logical experts are placed on the same NPU
-                if new_placement_check.numel() != torch.unique(
-                        new_placement_check).numel():
-                    logger.error(
-                        f"Replicated experts are placed on the same NPU, expert placement on layer {layer_id}, rank {rank_id} is invalid"
-                    )
-                    new_placement[layer_id] = old_placement[layer_id]
-                    break
+                break
 
-                # check if there is any experts movement inside one NPU
-                expert_not_move = torch.isin(new_placement_check,
-                                             old_placement_check)
-                if not torch.equal(new_placement_check[expert_not_move],
-                                   old_placement_check[expert_not_move]):
-                    logger.error(
-                        f"There exists expert movement inside NPU, expert placement on layer {layer_id}, rank {rank_id} is invalid"
-                    )
-                    new_placement[layer_id] = old_placement[layer_id]
-                    break
+            # check if there is any experts movement inside one NPU
+            expert_not_move = torch.isin(new_placement_check,
+                                         old_placement_check)
+            if not torch.equal(new_placement_check[expert_not_move],
+                               old_placement_check[expert_not_move]):
+                logger.error(
+                    f"There exists expert movement inside NPU, expert placement on layer {layer_id}, rank {rank_id} is invalid"
+                )
+                new_placement[layer_id] = old_placement[layer_id]
+                break
 
     def compose_expert_update_info_bipartite(self, updated_expert_maps_org,
                                              current_expert_maps_org):
-        # transform numpy array to torch tensor
-        updated_expert_maps = updated_expert_maps_org.clone()
-        current_expert_maps = current_expert_maps_org.clone()
-        updated_expert_maps = np.array(updated_expert_maps)
-        current_expert_maps = np.array(current_expert_maps)
-
-        num_layers = current_expert_maps.shape[0]
-
+        num_layers = current_expert_maps_org.shape[0]
         for layer_id in range(num_layers):
-            updated_expert_maps_this_layer = updated_expert_maps[layer_id]
-            current_expert_maps_this_layer = current_expert_maps[layer_id]
-            updated_expert_maps_this_layer_org = updated_expert_maps_org[
-                layer_id]
-
-            from typing import Any
-
-            expert_send_info_this_layer: dict[Any, Any] = {}
-            expert_recv_info_this_layer: dict[Any, Any] = {}
-
-            # Guard Clause: if there is no expert weight update, avoid subsequent processing
-            if (np.equal(updated_expert_maps_this_layer,
-                         current_expert_maps_this_layer)).all():
-                yield (expert_send_info_this_layer,
-                       expert_recv_info_this_layer,
-                       updated_expert_maps_this_layer_org, layer_id)
-
-            # Parse expert_ids each rank needs to receive from other ranks
-            dst_rank_indices, experts_to_recv = np.where(
-                (current_expert_maps_this_layer == -1)
-                & (updated_expert_maps_this_layer != -1))
-
-            # record src ranks for potential transfer
-            src_ranks_set = dict()
+            yield self.compose_layer_update_info_bipartite(
+                updated_expert_maps_org[layer_id],
+                current_expert_maps_org[layer_id], layer_id)
+
+    @staticmethod
+    def compose_layer_update_info_bipartite(updated_expert_maps_this_layer_org,
+                                            current_expert_maps_this_layer_org,
+                                            layer_id):
+        updated_expert_maps_this_layer = np.array(
+            updated_expert_maps_this_layer_org)
+        current_expert_maps_this_layer = np.array(
+            current_expert_maps_this_layer_org)
+
+        expert_send_info_this_layer: dict[Any, Any] = {}
+        expert_recv_info_this_layer: dict[Any, Any] = {}
+
+        # Guard Clause: if there is no expert weight update, avoid subsequent processing
+        if (np.equal(updated_expert_maps_this_layer,
+                     current_expert_maps_this_layer)).all():
+            return (expert_send_info_this_layer, expert_recv_info_this_layer,
+                    updated_expert_maps_this_layer_org, layer_id)
+
+        # Parse expert_ids each rank needs to receive from other ranks
+        dst_rank_indices, experts_to_recv = np.where(
+            (current_expert_maps_this_layer == -1)
+            & (updated_expert_maps_this_layer != -1))
+
+        # record src ranks for potential transfer
+        src_ranks_set = dict()
+        for idx in range(len(dst_rank_indices)):
+            expert_id = experts_to_recv[idx].item()
+            if expert_id not in src_ranks_set:
+                src_ranks_set[expert_id] = np.where(
+                    current_expert_maps_this_layer[:, expert_id] != -1)[0]
+
+        # loop until all experts are scheduled
+        while len(dst_rank_indices) > 0:
+            # construct bipartite graph
+            graph_expert_update: nx.Graph = nx.Graph()
             for idx in range(len(dst_rank_indices)):
+                dst_rank_id = dst_rank_indices[idx].item()
                 expert_id = experts_to_recv[idx].item()
-                if expert_id not in src_ranks_set:
-                    src_ranks_set[expert_id] = np.where(
-                        current_expert_maps_this_layer[:, expert_id] != -1)[0]
-
-            # loop until all experts are scheduled
-            while len(dst_rank_indices) > 0:
-                # construct bipartite graph
-                graph_expert_update: nx.Graph = nx.Graph()
-                for idx in range(len(dst_rank_indices)):
-                    dst_rank_id = dst_rank_indices[idx].item()
-                    expert_id = experts_to_recv[idx].item()
-                    # add src ranks
-                    src_rank_ids = src_ranks_set[expert_id]
-                    graph_expert_update.add_nodes_from(src_rank_ids,
-                                                       bipartite=0)
-                    # add dest rank
-                    graph_expert_update.add_node(str(dst_rank_id), bipartite=1)
-                    # add edges
-                    for src_rank_id in src_rank_ids:
-                        graph_expert_update.add_edge(src_rank_id,
-                                                     str(dst_rank_id))
-
-                # graph may not be connected
-                connected_components = list(
-                    nx.connected_components(graph_expert_update))
-                all_matches = {}
-                # matching in this loop
-                for i, component in enumerate(connected_components):
-                    subgraph = graph_expert_update.subgraph(component)
-                    component_matching = nx.bipartite.maximum_matching(
-                        subgraph)
-                    all_matches.update(component_matching)
-
-                for src_rank, dst_rank in all_matches.items():
-                    dst_rank = int(dst_rank)
-                    assert src_rank != dst_rank
-                    if graph_expert_update.nodes[src_rank]['bipartite'] == 0:
-                        # currently not scheduled experts in rank dst_rank
-                        experts_v = experts_to_recv[np.where(
-                            dst_rank_indices == dst_rank)]
-                        # src: src_rank, dest: dst_rank, expert: expert_id
-                        expert_id = np.intersect1d(
-                            experts_v,
-                            np.where(current_expert_maps_this_layer[src_rank]
-                                     != -1))[0]
-
-                        # record send/rcv pairs
-                        if src_rank not in expert_send_info_this_layer:
-                            expert_send_info_this_layer[src_rank] = []
-                        if dst_rank not in expert_recv_info_this_layer:
-                            expert_recv_info_this_layer[dst_rank] = []
-                        expert_send_info_this_layer[src_rank].append(
-                            (dst_rank, expert_id))
-                        expert_recv_info_this_layer[dst_rank].append(
-                            (src_rank, expert_id))
-
-                        remove_index = np.where(
-                            np.logical_and(dst_rank_indices == dst_rank,
-                                           experts_to_recv == expert_id))
-
-                        # update
-                        dst_rank_indices = np.delete(dst_rank_indices,
-                                                     remove_index)
-                        experts_to_recv = np.delete(experts_to_recv,
-                                                    remove_index)
-
-            yield (expert_send_info_this_layer, expert_recv_info_this_layer,
-                   updated_expert_maps_this_layer_org, layer_id)
+                # add src ranks
+                src_rank_ids = src_ranks_set[expert_id]
+                graph_expert_update.add_nodes_from(src_rank_ids, bipartite=0)
+                # add dest rank
+                graph_expert_update.add_node(str(dst_rank_id), bipartite=1)
+                # add edges
+                for src_rank_id in src_rank_ids:
+                    graph_expert_update.add_edge(src_rank_id, str(dst_rank_id))
+
+            # graph may not be connected
+            connected_components = list(
+                nx.connected_components(graph_expert_update))
+            all_matches = {}
+            # matching in this loop
+            for i, component in enumerate(connected_components):
+                subgraph = graph_expert_update.subgraph(component)
+                component_matching = nx.bipartite.maximum_matching(subgraph)
+                all_matches.update(component_matching)
+
+            for src_rank, dst_rank in all_matches.items():
+                dst_rank = int(dst_rank)
+                assert src_rank != dst_rank
+                if graph_expert_update.nodes[src_rank]['bipartite'] == 0:
+                    # currently not scheduled experts in rank dst_rank
+                    experts_v = experts_to_recv[np.where(
+                        dst_rank_indices == dst_rank)]
+                    # src: src_rank, dest: dst_rank, expert: expert_id
+                    expert_id = np.intersect1d(
+                        experts_v,
+                        np.where(
+                            current_expert_maps_this_layer[src_rank] != -1))[0]
+
+                    # record send/rcv pairs
+                    if src_rank not in expert_send_info_this_layer:
+                        expert_send_info_this_layer[src_rank] = []
+                    if dst_rank not in expert_recv_info_this_layer:
+                        expert_recv_info_this_layer[dst_rank] = []
+                    expert_send_info_this_layer[src_rank].append(
+                        (dst_rank, expert_id))
+                    expert_recv_info_this_layer[dst_rank].append(
+                        (src_rank, expert_id))
+
+                    remove_index = np.where(
+                        np.logical_and(dst_rank_indices == dst_rank,
+                                       experts_to_recv == expert_id))
+
+                    # update
+                    dst_rank_indices = np.delete(dst_rank_indices,
+                                                 remove_index)
+                    experts_to_recv = np.delete(experts_to_recv, remove_index)
+
+        return (expert_send_info_this_layer, expert_recv_info_this_layer,
+                updated_expert_maps_this_layer_org, layer_id)
 
     # TODO: Here only expert weight exchange is considered, need to be extended to cover other weight update cases
     def compose_expert_update_info_greedy(self, updated_expert_maps,
                                           current_expert_maps):
         num_layers = current_expert_maps.shape[0]
         for layer_id in range(num_layers):
-            updated_expert_maps_this_layer = updated_expert_maps[layer_id]
-            current_expert_maps_this_layer = current_expert_maps[layer_id]
-
-            expert_send_info_this_layer: dict[Any, Any] = {}
-            expert_recv_info_this_layer: dict[Any, Any] = {}
-
-            # Guard Clause: if there is no expert weight update, avoid subsequent processing
-            if torch.equal(updated_expert_maps_this_layer,
-                           current_expert_maps_this_layer):
-                yield (expert_send_info_this_layer,
-                       expert_recv_info_this_layer,
-                       updated_expert_maps_this_layer, layer_id)
+            yield self.compose_layer_update_info_greedy(
+                updated_expert_maps[layer_id], current_expert_maps[layer_id],
+                layer_id)
+
+    @staticmethod
+    def compose_layer_update_info_greedy(updated_expert_maps_this_layer,
+                                         current_expert_maps_this_layer,
+                                         layer_id):
+        expert_send_info_this_layer: dict[Any, Any] = {}
+        expert_recv_info_this_layer: dict[Any, Any] = {}
+
+        # Guard Clause: if there is no expert weight update, avoid subsequent processing
+        if torch.equal(updated_expert_maps_this_layer,
+                       current_expert_maps_this_layer):
+            return (expert_send_info_this_layer, expert_recv_info_this_layer,
+                    updated_expert_maps_this_layer, layer_id)
+
+        # Parse expert_ids each rank needs to receive from other ranks
+        dst_rank_indices, experts_to_recv = torch.where((current_expert_maps_this_layer == -1) \
+            & (updated_expert_maps_this_layer != -1))
+
+        # Parse expert_ids each rank needs to send to other ranks
+        src_rank_indices, experts_to_send = torch.where((current_expert_maps_this_layer != -1) \
+            & (updated_expert_maps_this_layer == -1))
+
+        for idx in range(len(dst_rank_indices)):
+            dst_rank_id = dst_rank_indices[idx].item()
+            expert_id = experts_to_recv[idx].item()
+            if dst_rank_id not in expert_recv_info_this_layer:
+                expert_recv_info_this_layer[dst_rank_id] = []
+
+            if not torch.isin(torch.tensor(expert_id), experts_to_send).any():
+                # if expert_id are not sent out from any npu, it will be copied from one npu holding this expert
+                candidate_src_rank_indices = torch.where(
+                    current_expert_maps_this_layer[:, expert_id] != -1)[0]
+            else:
+                candidate_src_rank_indices = src_rank_indices[experts_to_send
+                                                              == expert_id]
 
-            # Parse expert_ids each rank needs to receive from other ranks
-            dst_rank_indices, experts_to_recv = torch.where((current_expert_maps_this_layer == -1) \
-                & (updated_expert_maps_this_layer != -1))
+            # TODO: improve selection criterion of npu sending expert_id considering such as intra-node or inter-node...
+            src_rank_id = candidate_src_rank_indices[0].item()
+            if src_rank_id not in expert_send_info_this_layer:
+                expert_send_info_this_layer[src_rank_id] = []
 
-            # Parse expert_ids each rank needs to send to other ranks
-            src_rank_indices, experts_to_send = torch.where((current_expert_maps_this_layer != -1) \
-                & (updated_expert_maps_this_layer == -1))
+            expert_send_info_this_layer[src_rank_id].append(
+                (dst_rank_id, expert_id))
+            expert_recv_info_this_layer[dst_rank_id].append(
+                (src_rank_id, expert_id))
 
-            for idx in range(len(dst_rank_indices)):
-                dst_rank_id = dst_rank_indices[idx].item()
-                expert_id = experts_to_recv[idx].item()
-                if dst_rank_id not in expert_recv_info_this_layer:
-                    expert_recv_info_this_layer[dst_rank_id] = []
-
-                if not torch.isin(torch.tensor(expert_id),
-                                  experts_to_send).any():
-                    # if expert_id are not sent out from any npu, it will be copied from one npu holding this expert
-                    candidate_src_rank_indices = torch.where(
-                        current_expert_maps_this_layer[:, expert_id] != -1)[0]
-                else:
-                    candidate_src_rank_indices = src_rank_indices[
-                        experts_to_send == expert_id]
-
-                # TODO: improve selection criterion of npu sending expert_id considering such as intra-node or inter-node...
-                src_rank_id = candidate_src_rank_indices[0].item()
-                if src_rank_id not in expert_send_info_this_layer:
-                    expert_send_info_this_layer[src_rank_id] = []
-
-                expert_send_info_this_layer[src_rank_id].append(
-                    (dst_rank_id, expert_id))
-                expert_recv_info_this_layer[dst_rank_id].append(
-                    (src_rank_id, expert_id))
-
-            yield (expert_send_info_this_layer, expert_recv_info_this_layer,
-                   updated_expert_maps_this_layer, layer_id)
+        return (expert_send_info_this_layer, expert_recv_info_this_layer,
+                updated_expert_maps_this_layer, layer_id)
 
     def calculate_rebalance_experts(self, load_info, old_placement):
         """
@@ -297,20 +379,21 @@ class EplbWorker:
 
     def get_init_expert_maps(self):
         """
-        Read the initial expert_map from shared_dict.
+        Read the initial expert_map from the shared channel.
         """
-        return self.shared_dict.get("expert_maps", None)
+        return self.channel.read("expert_maps")
 
     def fetch_and_sum_load_info(self):
         """
         Each time the subprocess is awakened, read the latest moe_load
-        (shape: [num_moe_layers, num_experts_per_layer]) from shared_dict.
+        (shape: [num_moe_layers, num_experts_per_layer]) from the shared
+        channel.
         """
-        return self.shared_dict.get("moe_load", None)
+        return self.channel.read("moe_load")
 
     def update_expert_map(self, expert_maps):
 
-        self.shared_dict["expert_maps"] = expert_maps
+        self.channel.write("expert_maps", expert_maps)
 
     def global2local(self, placement: torch.Tensor,
                      E_local: int) -> tuple[torch.Tensor, torch.Tensor]:
@@ -358,69 +441,84 @@ class EplbWorker:
 
     def pack_update_info(self, update_info_generator):
         """
-        Pack a list of update info tuples for efficient IPC.
+        Pack a list of update info tuples of this rank, the maps stay
+        tensors and are written to the shared channel as they are.
         """
-        send_all = []
-        recv_all = []
-        maps = []
-        log2phy_all = []
-        layer_ids = []
-
-        for send_info, recv_info, new_expert_map, layer_id in update_info_generator:
-
-            send_info_this_rank = send_info[
-                self.rank_id] if self.rank_id in send_info else []
-            recv_info_this_rank = recv_info[
-                self.rank_id] if self.rank_id in recv_info else []
-            send_all.append(send_info_this_rank)
-            recv_all.append(recv_info_this_rank)
-
-            maps.append(new_expert_map[self.rank_id].numpy().tolist())
+        return [
+            self.pack_layer_update_info(*layer_update_info)
+            for layer_update_info in update_info_generator
+        ]
 
-            log2phy_map = generate_log2phy_map(new_expert_map)
-            log2phy_all.append(log2phy_map[self.rank_id].numpy().tolist())
+    def pack_layer_update_info(self, send_info, recv_info, new_expert_map,
+                               layer_id):
+        send_info_this_rank = send_info[
+            self.rank_id] if self.rank_id in send_info else []
+        recv_info_this_rank = recv_info[
+            self.rank_id] if self.rank_id in recv_info else []
 
-            layer_ids.append(layer_id)
+        log2phy_map = generate_log2phy_map(new_expert_map)
 
-        return list(zip(send_all, recv_all, maps, log2phy_all, layer_ids))
+        return (send_info_this_rank, recv_info_this_rank,
+                new_expert_map[self.rank_id], log2phy_map[self.rank_id],
+                layer_id)
 
 
 class EplbProcess:
 
     def __init__(self,
-                 shared_dict,
+                 channel: EplbSharedChannel,
                  policy_type: int = 0,
-                 enable_d2d: bool = True):
+                 enable_d2d: bool = True,
+                 migration_budget_bytes: int = 0,
+                 load_forecaster: Optional[str] = None,
+                 min_rebalance_gain: float = 0.0):
         """
         Args:
-            shared_dict: Cross-process shared dict returned by Manager().dict()
+            channel: Shared-memory channel carrying the MoE load, the expert
+                maps and the update info, the queues only carry its sequence
+                numbers
             policy_type: Integer passed to PolicyFactory.generate_policy
             enable_d2d: Whether to enable D2D loading
+            migration_budget_bytes: Bytes of expert weights a rebalance may
+                move, 0 for no limit
+            load_forecaster: Name of the forecaster of the MoE load of the
+                next window, None to balance the load of the last window
+            min_rebalance_gain: Minimum relative reduction of the max rank
+                load of a layer for its update to be applied
         """
-        self.shared_dict = shared_dict
+        self.channel = channel
         self.policy_type = policy_type
         self.enable_d2d = enable_d2d
+        self.migration_budget_bytes = migration_budget_bytes
+        self.load_forecaster = load_forecaster
+        self.min_rebalance_gain = min_rebalance_gain
         self.planner_q: Queue[Any] = Queue()
         self.block_update_q: Queue[Any] = Queue(maxsize=1)
 
         # Create EplbWorker instance
-        self.worker = EplbWorker(self.shared_dict, self.policy_type,
-                                 self.enable_d2d)
+        self.worker = EplbWorker(self.channel, self.policy_type,
+                                 self.enable_d2d, self.migration_budget_bytes,
+                                 self.load_forecaster, self.min_rebalance_gain)
 
     def worker_process(self, planner_q, block_update_q):
         """
         Subprocess entry: bind to specified NPU, loop waiting for planner_q to wake up, call do_update, then notify main process update is complete.
+        The update info is written to the shared channel and only its sequence number is put into block_update_q.
         """
         while True:
             try:
                 planner_q.get()
 
                 packed_update_info = self.worker.do_update()
+                update_seq = None
+                if packed_update_info is not None:
+                    update_seq = self.channel.write_update_info(
+                        packed_update_info)
 
                 while True:
                     if not block_update_q.empty():
                         continue
-                    block_update_q.put(packed_update_info)
+                    block_update_q.put(update_seq)
                     break
 
             except Exception as e:
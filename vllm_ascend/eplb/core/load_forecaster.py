@@ -0,0 +1,136 @@
+#
+# Copyright (c) 2025 Huawei Technologies Co., Ltd. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# This file is a part of the vllm-ascend project.
+#
+from abc import abstractmethod
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from vllm_ascend.eplb.core.policy.placement_engine import (
+    compute_logical_workload, spread_logical_workload)
+
+
+class LoadForecaster:
+    """Forecast the load of every (layer, logical expert) of the next EPLB
+    window from the loads of the previous windows.
+
+    The loads are logical, [layer, expert], so that the history survives
+    placement changes.
+    """
+
+    @abstractmethod
+    def update(self, logical_load: np.ndarray) -> None:
+        """Record the load of the last window."""
+
+    @abstractmethod
+    def predict(self) -> np.ndarray:
+        """Forecast the load of the next window."""
+
+
+class EwmaForecaster(LoadForecaster):
+    """Exponentially weighted moving average."""
+
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self.level: Optional[np.ndarray] = None
+
+    def update(self, logical_load):
+        logical_load = np.asarray(logical_load, dtype=np.float64)
+        if self.level is None:
+            self.level = logical_load
+        else:
+            self.level = self.alpha * logical_load + (1 -
+                                                      self.alpha) * self.level
+
+    def predict(self):
+        assert self.level is not None
+        return self.level
+
+
+class HoltForecaster(LoadForecaster):
+    """Holt's linear trend method, i.e. Holt-Winters without a seasonal
+    term, which lets the forecast follow experts heating up or cooling
+    down."""
+
+    def __init__(self, alpha: float = 0.5, beta: float = 0.3):
+        self.alpha = alpha
+        self.beta = beta
+        self.level: Optional[np.ndarray] = None
+        self.trend: Optional[np.ndarray] = None
+
+    def update(self, logical_load):
+        logical_load = np.asarray(logical_load, dtype=np.float64)
+        if self.level is None:
+            self.level = logical_load
+            self.trend = np.zeros_like(logical_load)
+            return
+        assert self.trend is not None
+        level = self.alpha * logical_load + (1 - self.alpha) * (self.level +
+                                                                self.trend)
+        self.trend = self.beta * (level -
+                                  self.level) + (1 - self.beta) * self.trend
+        self.level = level
+
+    def predict(self):
+        assert self.level is not None and self.trend is not None
+        return np.maximum(self.level + self.trend, 0)
+
+
+class WindowQuantileForecaster(LoadForecaster):
+    """Quantile of the load over a sliding window, a quantile above the
+    median provisions for load bursts."""
+
+    def __init__(self, window: int = 8, quantile: float = 0.9):
+        self.quantile = quantile
+        self.history: deque[np.ndarray] = deque(maxlen=window)
+
+    def update(self, logical_load):
+        self.history.append(np.asarray(logical_load, dtype=np.float64))
+
+    def predict(self):
+        return np.quantile(np.stack(self.history), self.quantile, axis=0)
+
+
+LOAD_FORECASTERS = {
+    "ewma": EwmaForecaster,
+    "holt": HoltForecaster,
+    "quantile": WindowQuantileForecaster,
+}
+
+
+def create_load_forecaster(name: Optional[str]) -> Optional[LoadForecaster]:
+    if name is None:
+        return None
+    if name not in LOAD_FORECASTERS:
+        raise ValueError(f"Unknown EPLB load forecaster {name}, supported "
+                         f"forecasters are {list(LOAD_FORECASTERS)}.")
+    return LOAD_FORECASTERS[name]()
+
+
+def forecast_workload(forecaster: LoadForecaster, placement: np.ndarray,
+                      workload: np.ndarray) -> np.ndarray:
+    """Feed the workload of the last window to forecaster and return the
+    forecast as a workload of placement, the load of every logical expert
+    being evenly shared by its replicas.
+
+    placement, workload: [layer, rank, slot]
+    """
+    placement = np.asarray(placement, dtype=np.int64)
+    num_experts = int(placement.max()) + 1
+    forecaster.update(
+        compute_logical_workload(placement, workload, num_experts))
+    return spread_logical_workload(placement, forecaster.predict())
@@ -0,0 +1,127 @@
+#
+# Copyright (c) 2025 Huawei Technologies Co., Ltd. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# This file is a part of the vllm-ascend project.
+#
+from typing import Any
+
+import numpy as np
+
+from vllm_ascend.eplb.core.policy.placement_engine import (
+    compute_logical_workload, compute_rank_workload)
+
+
+def count_migrated_experts(old_placement: np.ndarray,
+                           new_placement: np.ndarray) -> np.ndarray:
+    """Number of experts each layer receives when moving from old_placement
+    to new_placement, placements are [layer, rank, slot] of expert ids."""
+    old_placement = np.asarray(old_placement)
+    new_placement = np.asarray(new_placement)
+    already_there = (new_placement[..., :,
+                                   None] == old_placement[..., None, :]).any(
+                                       axis=-1)
+    received = (new_placement != -1) & ~already_there
+    return received.sum(axis=(1, 2))
+
+
+def plan_migration(old_placement: np.ndarray, new_placement: np.ndarray,
+                   workload: np.ndarray, expert_weight_bytes: np.ndarray,
+                   budget_bytes: int) -> tuple[np.ndarray, np.ndarray]:
+    """Keep the layer updates giving the largest reduction of the max rank
+    load within budget_bytes of expert weights moved.
+
+    A layer is either moved to its new placement or kept as it is, updates
+    are picked greedily by gain per byte, which is the usual approximation
+    of this knapsack. Layers that do not reduce the max rank load are kept.
+
+    old_placement, new_placement, workload: [layer, rank, slot], workload is
+    the load of the experts of old_placement.
+    expert_weight_bytes: [layer], bytes of the weights of one expert.
+    RETURNED: (placement, mask of the layers moved to new_placement)
+    """
+    old_placement = np.asarray(old_placement, dtype=np.int64)
+    new_placement = np.asarray(new_placement, dtype=np.int64)
+    num_experts = int(max(old_placement.max(), new_placement.max())) + 1
+    logical_workload = compute_logical_workload(old_placement, workload,
+                                                num_experts)
+    gain = (compute_rank_workload(old_placement, logical_workload).max(-1) -
+            compute_rank_workload(new_placement, logical_workload).max(-1))
+    cost = count_migrated_experts(old_placement, new_placement) * \
+        np.asarray(expert_weight_bytes, dtype=np.int64)
+
+    selected = np.zeros(len(gain), dtype=bool)
+    candidates = np.nonzero(gain > 0)[0]
+    gain_per_byte = gain[candidates] / np.maximum(cost[candidates], 1)
+    remaining = budget_bytes
+    for layer_id in candidates[np.argsort(-gain_per_byte, kind="stable")]:
+        if cost[layer_id] <= remaining:
+            selected[layer_id] = True
+            remaining -= cost[layer_id]
+
+    placement = old_placement.copy()
+    placement[selected] = new_placement[selected]
+    return placement, selected
+
+
+def skip_low_gain_layers(old_placement: np.ndarray, new_placement: np.ndarray,
+                         workload: np.ndarray,
+                         min_gain: float) -> tuple[np.ndarray, np.ndarray]:
+    """Keep the layer updates reducing the max rank load of their layer by
+    at least the min_gain fraction, the others do not pay for moving the
+    expert weights.
+
+    old_placement, new_placement, workload: [layer, rank, slot], workload is
+    the load of the experts of old_placement.
+    RETURNED: (placement, mask of the layers moved to new_placement)
+    """
+    old_placement = np.asarray(old_placement, dtype=np.int64)
+    new_placement = np.asarray(new_placement, dtype=np.int64)
+    num_experts = int(max(old_placement.max(), new_placement.max())) + 1
+    logical_workload = compute_logical_workload(old_placement, workload,
+                                                num_experts)
+    old_max = compute_rank_workload(old_placement, logical_workload).max(-1)
+    new_max = compute_rank_workload(new_placement, logical_workload).max(-1)
+    gain = np.divide(old_max - new_max,
+                     old_max,
+                     out=np.zeros(len(old_max)),
+                     where=old_max != 0)
+    selected = gain >= min_gain
+
+    placement = old_placement.copy()
+    placement[selected] = new_placement[selected]
+    return placement, selected
+
+
+def spread_layer_updates(update_info: list[Any]) -> list[Any]:
+    """Reorder the per layer update info so that the layers moving experts
+    are evenly spaced over the iterations applying them, one per iteration,
+    instead of running back to back.
+
+    Every entry is (send_info, recv_info, expert_map, layer_id) with the
+    send/recv info of all ranks, so the order is the same on every rank.
+    """
+    busy = [info for info in update_info if info[0] or info[1]]
+    idle = [info for info in update_info if not (info[0] or info[1])]
+    if not busy or not idle:
+        return update_info
+    num_layers = len(update_info)
+    busy_slots = {
+        idx * num_layers // len(busy): info
+        for idx, info in enumerate(busy)
+    }
+    idle_iter = iter(idle)
+    return [
+        busy_slots[slot] if slot in busy_slots else next(idle_iter)
+        for slot in range(num_layers)
+    ]
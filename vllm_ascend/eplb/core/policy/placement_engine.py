@@ -0,0 +1,212 @@
+# Copyright Huawei Technologies Co., Ltd. 2024-2025. All rights reserved.
+"""Vectorized building blocks shared by the dynamic EPLB policies.
+
+The helpers here replace the per-item Python scans of the policies: logical
+expert loads are accumulated with ``np.add.at``, hot experts are split with a
+max-heap and items are packed into the least loaded box with a min-heap, which
+brings the placement of one layer down to O(n log n).
+"""
+import heapq
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+def compute_logical_workload(placement: np.ndarray, workload: np.ndarray,
+                             num_logical_experts: int) -> np.ndarray:
+    """Accumulate the workload of the physical experts per logical expert.
+
+    placement, workload: [layer, rank, experts_per_rank]
+    RETURNED: [layer, num_logical_experts]
+    """
+    layer_num = workload.shape[0]
+    placement = np.asarray(placement, dtype=np.int64).reshape(layer_num, -1)
+    workload = np.asarray(workload, dtype=np.float64).reshape(layer_num, -1)
+    logical_workload = np.zeros((layer_num, num_logical_experts))
+    layer_idx = np.broadcast_to(np.arange(layer_num)[:, None], placement.shape)
+    np.add.at(logical_workload, (layer_idx, placement), workload)
+    return logical_workload
+
+
+def compute_max_heat_per_layer(workload: np.ndarray) -> np.ndarray:
+    """Maximum rank load of each layer, workload: [layer, rank, slot]."""
+    return np.asarray(workload).sum(axis=-1).max(axis=-1)
+
+
+def spread_logical_workload(placement: np.ndarray,
+                            logical_workload: np.ndarray) -> np.ndarray:
+    """Workload of the physical experts of placement when the load of every
+    logical expert is evenly shared by its replicas.
+
+    placement: [layer, rank, slot], logical_workload: [layer, expert]
+    RETURNED: [layer, rank, slot]
+    """
+    placement = np.asarray(placement, dtype=np.int64)
+    logical_workload = np.asarray(logical_workload)
+    layer_num = placement.shape[0]
+    replica_num = np.zeros(logical_workload.shape)
+    layer_idx = np.broadcast_to(
+        np.arange(layer_num)[:, None, None], placement.shape)
+    np.add.at(replica_num, (layer_idx, placement), 1)
+    unit_workload = np.divide(logical_workload,
+                              replica_num,
+                              out=np.zeros(logical_workload.shape),
+                              where=replica_num != 0)
+    return np.take_along_axis(unit_workload,
+                              placement.reshape(layer_num, -1),
+                              axis=1).reshape(placement.shape)
+
+
+def compute_rank_workload(placement: np.ndarray,
+                          logical_workload: np.ndarray) -> np.ndarray:
+    """Load of every rank when the load of every logical expert is evenly
+    shared by its replicas.
+
+    placement: [layer, rank, slot], logical_workload: [layer, expert]
+    RETURNED: [layer, rank]
+    """
+    return spread_logical_workload(placement, logical_workload).sum(axis=-1)
+
+
+def compute_layer_imbalance(placement: np.ndarray,
+                            logical_workload: np.ndarray) -> np.ndarray:
+    """Ratio of the max rank load to the mean rank load of each layer when
+    the load of every logical expert is evenly shared by its replicas.
+
+    placement: [layer, rank, slot], logical_workload: [layer, expert]
+    """
+    layer_num, rank_num = np.shape(placement)[:2]
+    rank_workload = compute_rank_workload(placement, logical_workload)
+    mean_workload = rank_workload.sum(axis=-1) / rank_num
+    return np.divide(rank_workload.max(axis=-1),
+                     mean_workload,
+                     out=np.zeros(layer_num),
+                     where=mean_workload != 0)
+
+
+def split_hot_experts(
+        weights: Sequence[float],
+        num_redundancy: int) -> tuple[np.ndarray, np.ndarray, list[int]]:
+    """Assign the redundant slots one by one to the expert with the highest
+    per-replica weight. Ties go to the later expert, as a reversed stable
+    argsort would.
+
+    RETURNED: (replica_counts, per-replica weights, picks), replica_counts
+    include the original copy of each expert and picks lists the index of
+    the expert receiving each redundant slot.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    replica_counts = np.ones(len(weights), dtype=np.int64)
+    avg_weights = weights.copy()
+    picks: list[int] = []
+    heap = [(-w, -i) for i, w in enumerate(weights.tolist())]
+    heapq.heapify(heap)
+    for _ in range(num_redundancy):
+        _, neg_idx = heapq.heappop(heap)
+        idx = -neg_idx
+        picks.append(idx)
+        replica_counts[idx] += 1
+        avg_weights[idx] = weights[idx] / replica_counts[idx]
+        heapq.heappush(heap, (-avg_weights[idx], neg_idx))
+    return replica_counts, avg_weights, picks
+
+
+def descending_order(weights: Sequence[float]) -> np.ndarray:
+    """Indices sorting weights in descending order, ties by later index."""
+    return np.argsort(np.asarray(weights, dtype=np.float64),
+                      kind='stable')[::-1]
+
+
+class BoxPacker:
+    """Greedy packing of items into ``card_num`` boxes of balanced size.
+
+    Each box holds ``expert_num // card_num`` items and ``expert_num %
+    card_num`` boxes hold one more. Every item goes to the box with the least
+    total weight that still has room and does not hold the same item yet,
+    ties going to the lower box index.
+    """
+
+    def __init__(self, card_num: int, expert_num: int) -> None:
+        if card_num == 0:
+            raise RuntimeError("card_num can not be 0.")
+        self.card_num = card_num
+        self.items_per_box = expert_num // card_num
+        self.remaining_items = expert_num % card_num
+        self.boxes: list[list[int]] = [[] for _ in range(card_num)]
+        self.boxes_weights: list[list[float]] = [[] for _ in range(card_num)]
+        self.box_weights: list[float] = [0] * card_num
+        self.box_counts = [0] * card_num
+        self._box_items: list[set[int]] = [set() for _ in range(card_num)]
+        self._heap = [(0, i) for i in range(card_num)]
+
+    def _has_room(self, box_idx: int) -> bool:
+        count = self.box_counts[box_idx]
+        return count < self.items_per_box or (count == self.items_per_box
+                                              and self.remaining_items > 0)
+
+    def put(self, box_idx: int, item_id: int, weight: float) -> None:
+        self.boxes[box_idx].append(item_id)
+        self.boxes_weights[box_idx].append(weight)
+        self.box_weights[box_idx] += weight
+        self.box_counts[box_idx] += 1
+        self._box_items[box_idx].add(item_id)
+        if self.box_counts[box_idx] == (self.items_per_box +
+                                        1) and self.remaining_items > 0:
+            self.remaining_items -= 1
+
+    def rebuild_heap(self) -> None:
+        """Must be called after boxes were filled directly with ``put``."""
+        self._heap = [(self.box_weights[i], i) for i in range(self.card_num)]
+        heapq.heapify(self._heap)
+
+    def place(self, item_id: int, weight: float) -> int:
+        skipped = []
+        box_idx = -1
+        while self._heap:
+            box_weight, idx = heapq.heappop(self._heap)
+            if box_weight != self.box_weights[idx]:
+                # Stale entry.
+                continue
+            if not self._has_room(idx):
+                # A box without room never gets room again.
+                continue
+            if item_id in self._box_items[idx]:
+                skipped.append((box_weight, idx))
+                continue
+            box_idx = idx
+            break
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        if box_idx == -1:
+            # Keep the historical fallback of the policies: the last box.
+            box_idx = self.card_num - 1
+        self.put(box_idx, item_id, weight)
+        if self._has_room(box_idx):
+            heapq.heappush(self._heap, (self.box_weights[box_idx], box_idx))
+        return box_idx
+
+    def result(self) -> tuple[list[dict], list[list[int]]]:
+        result = []
+        for i in range(self.card_num):
+            result.append({
+                "box_index": i + 1,
+                "items": self.boxes[i],
+                "weight": self.boxes_weights[i],
+                "total_weight": self.box_weights[i],
+                "item_count": self.box_counts[i]
+            })
+        return result, self.boxes
+
+
+def pack_items(item_ids: Sequence[int],
+               item_weights: Sequence[float],
+               card_num: int,
+               expert_num: Optional[int] = None,
+               packer: Optional[BoxPacker] = None) -> BoxPacker:
+    """Place the items, in the given order, with a ``BoxPacker``."""
+    if packer is None:
+        packer = BoxPacker(card_num,
+                           len(item_ids) if expert_num is None else expert_num)
+    for item_id, weight in zip(item_ids, item_weights):
+        packer.place(int(item_id), weight)
+    return packer
@@ -1,10 +1,12 @@
 # Copyright Huawei Technologies Co., Ltd. 2024-2025. All rights reserved.
 # Todo: Once https://github.com/vllm-project/vllm/pull/24069 is merged in vllm. Remove this policy.
-from collections import defaultdict
 from typing import cast
 
 import numpy as np
 
+from .placement_engine import (BoxPacker, compute_logical_workload,
+                               compute_max_heat_per_layer, descending_order,
+                               pack_items, split_hot_experts)
 from .policy_abstract import DynamicConfig, EplbPolicy
 
 
@@ -32,233 +34,77 @@ class DynamicEplb(EplbPolicy):
     @staticmethod
     def add_redundant(current_expert_table, expert_workload,
                       num_original_expert):
-        layer_num, npu_num, experts_per_npu = expert_workload.shape
-        workload_new = np.zeros((layer_num, num_original_expert))
-        for layer_idx in range(layer_num):
-            workload_dict: dict[int, int] = defaultdict(int)
-            placement_layer = current_expert_table[layer_idx].copy()
-            workload_layer = expert_workload[layer_idx].copy()
-            for npu_idx in range(npu_num):
-                for expert_idx in range(experts_per_npu):
-                    workload_dict[placement_layer[npu_idx][
-                        expert_idx]] += workload_layer[npu_idx][expert_idx]
-            for expert_idx in range(num_original_expert):
-                workload_new[layer_idx][expert_idx] = workload_dict[expert_idx]
-        return workload_new
+        return compute_logical_workload(current_expert_table, expert_workload,
+                                        num_original_expert)
+
+    @staticmethod
+    def _unpack_weights(origin_weights):
+        """Split (expert_id, weight) pairs into weights indexed by expert id."""
+        expert_ids = np.array([int(t[0]) for t in origin_weights],
+                              dtype=np.int64)
+        weights = np.zeros(len(origin_weights))
+        weights[expert_ids] = [t[1] for t in origin_weights]
+        return weights
 
     @staticmethod
     # Split hot (high-load) experts into redundant experts
     def original_compute_balanced_pack_redundancy(origin_weights, card_num,
                                                   num_redundancy_expert):
-        # Step 1: Sort the items by weight in descending order (we are sorting by weight now)
-        # Sort based on the second element (the second value of each tuple)
-        route_expert_num = len(origin_weights)
-        route_expert_redundancy: list[list[int]] = [
-            [] for _ in range(route_expert_num)
-        ]
-        for i in range(num_redundancy_expert):
-            sorted_indices = np.argsort([t[1] for t in origin_weights],
-                                        kind='stable')[::-1]
-            weights = [origin_weights[idx] for idx in sorted_indices]
-            tmp_raw_weight = weights[0][1] * (
-                len(route_expert_redundancy[weights[0][0]]) + 1)
-            route_expert_redundancy[weights[0][0]].append(route_expert_num + i)
-            avg_weight = tmp_raw_weight / (
-                len(route_expert_redundancy[weights[0][0]]) + 1)
-            weights[0] = (weights[0][0], avg_weight)
-            origin_weights = weights
-
-        # Step 2: Calculate the number of items per box
+        # Step 1: Give the redundant experts to the hottest experts
+        weights = DynamicEplb._unpack_weights(origin_weights)
+        route_expert_num = len(weights)
+        replica_counts, avg_weights, _ = split_hot_experts(
+            weights, num_redundancy_expert)
+
+        # Step 2: Place the redundant replicas one per box
         expert_num = route_expert_num + num_redundancy_expert
-        items_per_box = expert_num // card_num  # Number of items per box
-        remaining_items = expert_num % card_num  # Number of items per box
-
-        # Step 3: Initialize card_num boxes with empty lists to store item IDs
-        boxes: list[list[int]] = [[] for _ in range(card_num)]
-        boxes_weights: list[list[float]] = [[] for _ in range(card_num)]
-        box_weights = [0] * card_num  # To store the total weight of each box
-        box_counts = [0] * card_num  # To store the number of items in each box
+        packer = BoxPacker(card_num, expert_num)
         index = 0
-        for i in range(route_expert_num):
-            redundancy_num = len(route_expert_redundancy[i])
-            for _ in range(redundancy_num):
-                cur_weight = 0
-                for item, weight in origin_weights:
-                    if item == i:
-                        cur_weight = weight
-
-                boxes[index].append(i)
-                boxes_weights[index].append(cur_weight)
-                box_weights[index] += cur_weight
-                box_counts[index] += 1
+        for i in np.nonzero(replica_counts > 1)[0].tolist():
+            for _ in range(replica_counts[i] - 1):
+                packer.put(index, i, avg_weights[i])
                 index += 1
+        packer.rebuild_heap()
 
-        sorted_indices = np.argsort([t[1] for t in origin_weights],
-                                    kind='stable')[::-1]
-        origin_weights = [origin_weights[idx] for idx in sorted_indices]
-        # Step 4: Distribute items into boxes based on weight
-        for item_id, weight in origin_weights:
-            # Find the box with the least items but not full
-            min_box_index = -1
-            for i in range(card_num):
-                if item_id in boxes[i]:
-                    continue
-                # Only choose boxes that still have space (box_counts[i] < items_per_box)
-                if box_counts[i] < items_per_box or (box_counts[i]
-                                                     == items_per_box
-                                                     and remaining_items > 0):
-                    if min_box_index == -1 or box_weights[i] < box_weights[
-                            min_box_index]:
-                        min_box_index = i
-
-            # Place the item (id) into the selected box
-            boxes[min_box_index].append(item_id)
-            boxes_weights[min_box_index].append(weight)
-            box_weights[min_box_index] += weight
-            box_counts[min_box_index] += 1
-
-            # If there's an imbalance in the remaining items, reduce the "remaining_items" counter
-            if box_counts[min_box_index] == (items_per_box +
-                                             1) and remaining_items > 0:
-                remaining_items -= 1
-
-        # Step 5: Output each box's contents and total weight
-        result = []
-        for i in range(card_num):
-            result.append({
-                "box_index": i + 1,
-                "items": boxes[i],  # List of item IDs in the box
-                "weight": boxes_weights[i],
-                "total_weight": box_weights[i],  # Total weight in this box
-                "item_count": box_counts[i]  # Number of items in the box
-            })
-
-        return result, boxes
+        # Step 3: Distribute experts into boxes based on weight
+        sorted_indices = descending_order(avg_weights)
+        pack_items(sorted_indices,
+                   avg_weights[sorted_indices],
+                   card_num,
+                   packer=packer)
+        return packer.result()
 
     # Split hot (high-load) experts into redundant experts
     @staticmethod
     def compute_balanced_pack_redundancy(origin_weights, card_num,
                                          num_redundancy_expert):
-        route_expert_num = len(origin_weights)
-        route_expert_redundancy: list[list[int]] = [
-            [] for _ in range(route_expert_num)
-        ]
-        for i in range(num_redundancy_expert):
-            sorted_indices = np.argsort([t[1] for t in origin_weights],
-                                        kind='stable')[::-1]
-            weights = [origin_weights[idx] for idx in sorted_indices]
-            tmp_raw_weight = weights[0][1] * (
-                len(route_expert_redundancy[weights[0][0]]) + 1)
-            route_expert_redundancy[weights[0][0]].append(route_expert_num + i)
-            avg_weight = tmp_raw_weight / (
-                len(route_expert_redundancy[weights[0][0]]) + 1)
-            weights[0] = (weights[0][0], avg_weight)
-            origin_weights = weights
-
-        expert_num = route_expert_num + num_redundancy_expert
+        weights = DynamicEplb._unpack_weights(origin_weights)
+        replica_counts, avg_weights, _ = split_hot_experts(
+            weights, num_redundancy_expert)
         if card_num == 0:
             raise RuntimeError("card_num can not be 0.")
-        items_per_box = expert_num // card_num
-        remaining_items = expert_num % card_num
-
-        boxes: list[list[int]] = [[] for _ in range(card_num)]
-        boxes_weights: list[list[float]] = [[] for _ in range(card_num)]
-        box_weights = [0] * card_num
-        box_counts = [0] * card_num
-
-        all_weights = np.zeros((expert_num, ), dtype='object')
-        all_weights[:route_expert_num] = origin_weights
-
-        index = route_expert_num
-        for i in range(route_expert_num):
-            redundancy_num = len(route_expert_redundancy[i])
-            for _ in range(redundancy_num):
-                for item, weight in origin_weights:
-                    if item == i:
-                        all_weights[index] = (item, weight)
-                        index += 1
 
-        sorted_indices = np.argsort([t[1] for t in all_weights],
-                                    kind='stable')[::-1]
-        all_weights = [all_weights[idx] for idx in sorted_indices]
-        for item_id, weight in all_weights:
-            min_box_index = -1
-            for i in range(card_num):
-                if box_counts[i] < items_per_box or (box_counts[i]
-                                                     == items_per_box
-                                                     and remaining_items > 0):
-                    if min_box_index == -1 or box_weights[i] < box_weights[
-                            min_box_index]:
-                        if item_id not in boxes[i]:
-                            min_box_index = i
-
-            boxes[min_box_index].append(item_id)
-            boxes_weights[min_box_index].append(weight)
-            box_weights[min_box_index] += weight
-            box_counts[min_box_index] += 1
-
-            if box_counts[min_box_index] == (items_per_box +
-                                             1) and remaining_items > 0:
-                remaining_items -= 1
-
-        result = []
-        for i in range(card_num):
-            result.append({
-                "box_index": i + 1,
-                "items": boxes[i],
-                "weight": boxes_weights[i],
-                "total_weight": box_weights[i],
-                "item_count": box_counts[i]
-            })
-
-        return result, boxes
+        item_ids = np.concatenate([
+            np.arange(len(weights)),
+            np.repeat(np.arange(len(weights)), replica_counts - 1)
+        ])
+        item_weights = avg_weights[item_ids]
+        sorted_indices = descending_order(item_weights)
+        packer = pack_items(item_ids[sorted_indices],
+                            item_weights[sorted_indices], card_num)
+        return packer.result()
 
     # Scheme without redundant experts
     @staticmethod
     def compute_balanced_pack(origin_weights, card_num):
-        sorted_indices = np.argsort([t[1] for t in origin_weights])[::-1]
-        weights = origin_weights[sorted_indices]
-        expert_num = len(weights)
-        if card_num == 0:
-            raise RuntimeError("card_num can not be 0.")
-        items_per_box = expert_num // card_num
-        remaining_items = expert_num % card_num
-
-        boxes: list[list[int]] = [[] for _ in range(card_num)]
-        boxes_weights: list[list[float]] = [[] for _ in range(card_num)]
-        box_weights = [0] * card_num
-        box_counts = [0] * card_num
-
-        for item_id, weight in weights:
-            min_box_index = -1
-            for i in range(card_num):
-                if box_counts[i] < items_per_box or (box_counts[i]
-                                                     == items_per_box
-                                                     and remaining_items > 0):
-                    if min_box_index == -1 or box_weights[i] < box_weights[
-                            min_box_index]:
-                        min_box_index = i
-
-            boxes[min_box_index].append(item_id)
-            boxes_weights[min_box_index].append(weight)
-            box_weights[min_box_index] += weight
-            box_counts[min_box_index] += 1
-
-            if box_counts[min_box_index] == (items_per_box +
-                                             1) and remaining_items > 0:
-                remaining_items -= 1
-
-        result = []
-        for i in range(card_num):
-            result.append({
-                "box_index": i + 1,
-                "items": boxes[i],
-                "weight": boxes_weights[i],
-                "total_weight": box_weights[i],
-                "item_count": box_counts[i]
-            })
-
-        return result, boxes
+        item_ids = np.array([int(t[0]) for t in origin_weights],
+                            dtype=np.int64)
+        item_weights = np.array([t[1] for t in origin_weights],
+                                dtype=np.float64)
+        sorted_indices = descending_order(item_weights)
+        packer = pack_items(item_ids[sorted_indices],
+                            item_weights[sorted_indices], card_num)
+        return packer.result()
 
     @staticmethod
     def get_redundant_num(npu_num, counts):
@@ -267,11 +113,7 @@ class DynamicEplb(EplbPolicy):
 
     @staticmethod
     def calculate_max_heat_per_layer(workload_table, layer_num):
-        max_heat_per_layer: list[float] = []
-        for layer_idx in range(layer_num):
-            npu_heats_now = np.sum(workload_table[layer_idx], axis=1)
-            max_heat_per_layer.append(np.max(npu_heats_now))
-        return max_heat_per_layer
+        return compute_max_heat_per_layer(workload_table[:layer_num]).tolist()
 
     @staticmethod
     def constraint_expert_local_exchange(current_expert_table,
@@ -357,10 +199,7 @@ class DynamicEplb(EplbPolicy):
         for layer in range(layer_num):
             # Get the expert IDs and their corresponding workloads for the current layer;
             # workloads need to be normalized, and one redundant expert is added per card
-            weights = np.zeros((expert_num, ), dtype='object')
-            for expert_id, workload_weight in enumerate(
-                    layer_workloads[layer]):
-                weights[expert_id] = (expert_id, workload_weight)
+            weights = list(enumerate(layer_workloads[layer]))
 
             # Obtain the globally balanced placement strategy for each layer
             result, layer_deployment = self.original_compute_balanced_pack_redundancy(
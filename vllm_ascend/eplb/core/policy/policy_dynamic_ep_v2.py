@@ -1,10 +1,14 @@
 # Copyright Huawei Technologies Co., Ltd. 2024-2025. All rights reserved.
 # Todo: Once https://github.com/vllm-project/vllm/pull/24069 is merged in vllm. Remove this policy.
 from abc import abstractmethod
-from collections import defaultdict
 
 import numpy as np
 
+from .placement_engine import (compute_layer_imbalance,
+                               compute_logical_workload,
+                               compute_max_heat_per_layer, descending_order,
+                               split_hot_experts)
+
 
 class DynamicConfig:
     placement_policy = None
@@ -90,19 +94,8 @@ class DynamicEplbV2(EplbPolicy):
     @staticmethod
     def add_redundant(current_expert_table, expert_workload,
                       num_original_expert):
-        layer_num, npu_num, experts_per_npu = expert_workload.shape
-        workload_new = np.zeros((layer_num, num_original_expert))
-        for layer_idx in range(layer_num):
-            workload_dict: dict[int, int] = defaultdict(int)
-            placement_layer = current_expert_table[layer_idx].copy()
-            workload_layer = expert_workload[layer_idx].copy()
-            for npu_idx in range(npu_num):
-                for expert_idx in range(experts_per_npu):
-                    workload_dict[placement_layer[npu_idx][
-                        expert_idx]] += workload_layer[npu_idx][expert_idx]
-            for expert_idx in range(num_original_expert):
-                workload_new[layer_idx][expert_idx] = workload_dict[expert_idx]
-        return workload_new
+        return compute_logical_workload(current_expert_table, expert_workload,
+                                        num_original_expert)
 
     @staticmethod
     def get_redundant_num(npu_num, counts):
@@ -111,70 +104,28 @@ class DynamicEplbV2(EplbPolicy):
 
     @staticmethod
     def calculate_max_heat_per_layer(workload_table, layer_num):
-        max_heat_per_layer: list[float] = []
-        for layer_idx in range(layer_num):
-            npu_heats_now = np.sum(workload_table[layer_idx], axis=1)
-            max_heat_per_layer.append(np.max(npu_heats_now))
-        return max_heat_per_layer
+        return compute_max_heat_per_layer(workload_table[:layer_num]).tolist()
 
     def calculate_initial_imbalance(self, global_deployment,
                                     new_layer_workloads):
-
-        device_num = global_deployment.shape[1]
-        layer_imbalance = []
-        expert_num = np.zeros_like(new_layer_workloads)
-        for layer_id, layer in enumerate(global_deployment):
-            for device in layer:
-                for expert_id in device:
-                    expert_num[layer_id][expert_id] += 1
-
-        for layer_id, layer in enumerate(global_deployment):
-            cur_layer_max_workload = 0
-            total_workload = 0
-            for box in layer:
-                box_workload = 0
-                for expert_id in box:
-                    update_workload = self.safe_divide(
-                        new_layer_workloads[layer_id][expert_id],
-                        expert_num[layer_id][expert_id])
-                    box_workload += update_workload
-                    total_workload += update_workload
-                if cur_layer_max_workload < box_workload:
-                    cur_layer_max_workload = box_workload
-
-            cur_layer_imbalance = self.safe_divide(
-                cur_layer_max_workload,
-                (self.safe_divide(total_workload, device_num)))
-            layer_imbalance.append(cur_layer_imbalance)
-
-        return layer_imbalance
+        return compute_layer_imbalance(global_deployment,
+                                       new_layer_workloads).tolist()
 
     def compute_redundant_assignments(self, base_experts,
                                       num_redundant_experts, num_experts):
 
         redundant_assignments: list[list[int]] = [[]
                                                   for _ in range(num_experts)]
-        current_weights = base_experts.copy()
-
-        for i in range(num_redundant_experts):
-            sorted_indices = np.argsort([w for _, w in current_weights],
-                                        kind='stable')[::-1]
-            sorted_weights = [current_weights[i] for i in sorted_indices]
-
-            target_expert = sorted_weights[0]
-            expert_id, original_weight = target_expert
-
-            current_redundancy = len(redundant_assignments[expert_id])
-            new_avg_weight = self.safe_divide(
-                original_weight * (current_redundancy + 1),
-                (current_redundancy + 2))
-
-            redundant_assignments[expert_id].append(num_experts + i)
-            current_weights[sorted_indices[0]] = (expert_id, new_avg_weight)
+        _, avg_weights, picks = split_hot_experts([w for _, w in base_experts],
+                                                  num_redundant_experts)
+        for i, pos in enumerate(picks):
+            redundant_assignments[base_experts[pos][0]].append(num_experts + i)
 
-        sorted_indices = np.argsort([w for _, w in current_weights],
-                                    kind='stable')[::-1]
-        sorted_weights = [current_weights[i] for i in sorted_indices]
+        current_weights = [(expert_id, avg_weights[pos])
+                           for pos, (expert_id, _) in enumerate(base_experts)]
+        sorted_weights = [
+            current_weights[i] for i in descending_order(avg_weights)
+        ]
 
         return redundant_assignments, sorted_weights
 
@@ -239,18 +190,19 @@ class DynamicEplbV2(EplbPolicy):
                             num_redundant_experts):
         redundant_expert_list = np.empty(num_redundant_experts, dtype=object)
 
+        expert_weights = {}
+        for eid, w in base_experts:
+            expert_weights.setdefault(eid, w)
         index = 0
         num_experts = len(redundant_assignments)
         for expert_id in range(num_experts):
             for _ in redundant_assignments[expert_id]:
                 redundant_expert_list[index] = (expert_id,
-                                                next(w
-                                                     for eid, w in base_experts
-                                                     if eid == expert_id))
+                                                expert_weights[expert_id])
                 index += 1
 
-        sorted_indices = np.argsort([w for _, w in redundant_expert_list],
-                                    kind='stable')[::-1]
+        sorted_indices = descending_order(
+            [w for _, w in redundant_expert_list])
         return [redundant_expert_list[i] for i in sorted_indices]
 
     @staticmethod
@@ -266,14 +218,15 @@ class DynamicEplbV2(EplbPolicy):
         device_loads = [0] * device_num
         device_counts = [0] * device_num
 
+        expert_weights = {}
+        for expert_id_of_weight, weight in updated_weights:
+            expert_weights.setdefault(expert_id_of_weight, weight)
         for device_id, device in enumerate(origin_deployment):
             for index, expert_id in enumerate(device):
                 if index in rendun_pos[device_id]:
                     continue
                 device_assignments[device_id][index] = expert_id
-                cur_weight = next(
-                    weight for expert_id_of_weight, weight in updated_weights
-                    if expert_id_of_weight == expert_id)
+                cur_weight = expert_weights[expert_id]
                 device_weights[device_id][index] = cur_weight
                 device_loads[device_id] += cur_weight
                 device_counts[device_id] += 1
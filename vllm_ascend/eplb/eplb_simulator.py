@@ -0,0 +1,314 @@
+#
+# Copyright (c) 2025 Huawei Technologies Co., Ltd. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# This file is a part of the vllm-ascend project.
+#
+"""Offline simulator replaying expert load traces against the EPLB policies.
+
+A trace is a sequence of windows, each holding the expert placement
+``[layer, rank, slot]`` in use and the MoE load of its physical experts with
+the same shape. Traces are recorded by setting the ``eplb_load_trace_dir``
+additional config, one ``window_<idx>.npz`` file per EPLB window, or are
+generated synthetically.
+
+For every window, the placement planned from the previous windows serves the
+load of the window, the load of every logical expert being evenly shared by
+its replicas. The rank loads, the imbalance ratio, the bytes migrated and the
+planner wall time are reported per window and summarized per policy.
+
+Example::
+
+    python -m vllm_ascend.eplb.eplb_simulator --trace /path/to/trace_dir \\
+        --policies 1 2 3 --rebalance-every 1 --expert-mb 44
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+import torch
+
+from vllm_ascend.eplb.core.load_forecaster import (LOAD_FORECASTERS,
+                                                   create_load_forecaster,
+                                                   forecast_workload)
+from vllm_ascend.eplb.core.migration_planner import (count_migrated_experts,
+                                                     plan_migration,
+                                                     skip_low_gain_layers)
+from vllm_ascend.eplb.core.policy.placement_engine import (
+    compute_logical_workload, compute_rank_workload, spread_logical_workload)
+from vllm_ascend.eplb.core.policy.policy_abstract import DynamicConfig
+from vllm_ascend.eplb.core.policy.policy_factory import PolicyFactory
+
+TRACE_FILE_PATTERN = "window_*.npz"
+
+
+@dataclass
+class WindowStats:
+    window: int
+    max_rank_load: float
+    mean_rank_load: float
+    imbalance: float
+    migrated_bytes: int
+    planner_ms: float
+
+
+def save_trace_window(trace_dir: str, window: int, placement: np.ndarray,
+                      load: np.ndarray) -> None:
+    """Record the placement and the MoE load of one window."""
+    os.makedirs(trace_dir, exist_ok=True)
+    np.savez(os.path.join(trace_dir, f"window_{window:06d}.npz"),
+             placement=placement,
+             load=load)
+
+
+def load_trace(path: str) -> tuple[np.ndarray, np.ndarray]:
+    """Read a trace directory written by save_trace_window, or a single npz
+    file holding the stacked 'placements' and 'loads' of all windows.
+
+    RETURNED: (placements, loads), both [window, layer, rank, slot]
+    """
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, TRACE_FILE_PATTERN)))
+        if not files:
+            raise ValueError(f"No {TRACE_FILE_PATTERN} file in {path}.")
+        windows = [np.load(file) for file in files]
+        return (np.stack([w["placement"] for w in windows]),
+                np.stack([w["load"] for w in windows]))
+    with np.load(path) as trace:
+        return trace["placements"], trace["loads"]
+
+
+def generate_synthetic_trace(num_windows: int,
+                             placement: np.ndarray,
+                             tokens_per_window: int = 100000,
+                             skew: float = 1.2,
+                             drift: float = 0.2,
+                             seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Zipf distributed expert loads whose hotness drifts between windows.
+
+    RETURNED: (placements, loads), both [window, layer, rank, slot], the
+    placement being the same for all windows.
+    """
+    rng = np.random.default_rng(seed)
+    num_layers = placement.shape[0]
+    num_experts = int(placement.max()) + 1
+    popularity = np.stack([
+        rng.permutation(1.0 / np.arange(1, num_experts + 1)**skew)
+        for _ in range(num_layers)
+    ])
+    placements, loads = [], []
+    for _ in range(num_windows):
+        popularity *= rng.lognormal(0, drift, popularity.shape)
+        logical = popularity / popularity.sum(-1, keepdims=True) * \
+            tokens_per_window
+        loads.append(np.rint(spread_logical_workload(placement, logical)))
+        placements.append(placement)
+    return np.stack(placements), np.stack(loads)
+
+
+def _placement_to_numpy(placement) -> np.ndarray:
+    """Convert the placement returned by a policy, a tensor or nested lists,
+    to an int64 array, one layer at a time for the lists."""
+    if torch.is_tensor(placement):
+        return placement.to(torch.int64).numpy()
+    return np.stack([
+        np.asarray(layer_placement, dtype=np.int64)
+        for layer_placement in placement
+    ])
+
+
+def simulate(policy_type: int,
+             placements: np.ndarray,
+             loads: np.ndarray,
+             rebalance_every: int = 1,
+             expert_bytes: int = 0,
+             load_forecaster: Optional[str] = None,
+             min_rebalance_gain: float = 0.0,
+             migration_budget_bytes: int = 0) -> list[WindowStats]:
+    """Replay the trace with one policy, see the module docstring."""
+    num_experts = int(max(placements.max(), 0)) + 1
+    # The load of a window is only meaningful for the placement recording it.
+    logical_loads = np.stack([
+        compute_logical_workload(p, w, num_experts)
+        for p, w in zip(placements, loads)
+    ])
+    config = DynamicConfig()
+    config.ep_worldsize = placements.shape[2]
+    policy = PolicyFactory.generate_policy(policy_type, config)
+    forecaster = create_load_forecaster(load_forecaster)
+    num_layers = placements.shape[1]
+
+    placement = placements[0].copy()
+    # The MoE load accumulates until the next rebalance, as it does in
+    # between two wake-ups of the EPLB worker.
+    pending_load = np.zeros(logical_loads.shape[1:])
+    stats = []
+    for window, logical_load in enumerate(logical_loads):
+        rank_load = compute_rank_workload(placement, logical_load)
+        max_load = rank_load.max(-1).sum()
+        mean_load = rank_load.mean(-1).sum()
+        pending_load += logical_load
+
+        migrated_bytes = 0
+        planner_ms = 0.0
+        if (window + 1) % rebalance_every == 0:
+            workload = spread_logical_workload(placement, pending_load)
+            pending_load[:] = 0
+            start = time.perf_counter()
+            if forecaster is not None:
+                workload = forecast_workload(forecaster, placement, workload)
+            _, _, new_placement = policy.rebalance_experts(
+                torch.from_numpy(placement.copy()),
+                torch.from_numpy(np.rint(workload).astype(np.int64)))
+            new_placement = _placement_to_numpy(new_placement)
+            if min_rebalance_gain > 0:
+                new_placement, _ = skip_low_gain_layers(
+                    placement, new_placement, workload, min_rebalance_gain)
+            if migration_budget_bytes > 0:
+                new_placement, _ = plan_migration(
+                    placement, new_placement, workload,
+                    np.full(num_layers, expert_bytes), migration_budget_bytes)
+            planner_ms = (time.perf_counter() - start) * 1000
+            migrated_bytes = int(
+                count_migrated_experts(placement, new_placement).sum() *
+                expert_bytes)
+            placement = new_placement
+
+        stats.append(
+            WindowStats(window=window,
+                        max_rank_load=float(max_load),
+                        mean_rank_load=float(mean_load),
+                        imbalance=float(max_load /
+                                        mean_load) if mean_load else 0.0,
+                        migrated_bytes=migrated_bytes,
+                        planner_ms=planner_ms))
+    return stats
+
+
+def summarize(stats: Sequence[WindowStats]) -> dict:
+    imbalance = np.array([s.imbalance for s in stats])
+    planner_ms = np.array([s.planner_ms for s in stats if s.planner_ms > 0])
+    return {
+        "mean_imbalance": float(imbalance.mean()),
+        "p99_imbalance": float(np.percentile(imbalance, 99)),
+        "total_migrated_bytes": int(sum(s.migrated_bytes for s in stats)),
+        "mean_planner_ms":
+        float(planner_ms.mean()) if len(planner_ms) else 0.0,
+    }
+
+
+def _print_report(policy_type, stats, verbose):
+    if verbose:
+        print(f"policy {policy_type}: window, max rank load, mean rank load, "
+              "imbalance, migrated MB, planner ms")
+        for s in stats:
+            print(f"  {s.window:6d} {s.max_rank_load:14.1f} "
+                  f"{s.mean_rank_load:14.1f} {s.imbalance:9.4f} "
+                  f"{s.migrated_bytes / 2**20:11.1f} {s.planner_ms:10.2f}")
+    summary = summarize(stats)
+    print(f"policy {policy_type}: mean imbalance "
+          f"{summary['mean_imbalance']:.4f}, p99 imbalance "
+          f"{summary['p99_imbalance']:.4f}, migrated "
+          f"{summary['total_migrated_bytes'] / 2**20:.1f} MB, planner "
+          f"{summary['mean_planner_ms']:.2f} ms")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay expert load traces against the EPLB policies.")
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Trace directory recorded with eplb_load_trace_dir, or an npz "
+        "file with stacked 'placements' and 'loads'. A synthetic trace is "
+        "generated when it is not given.")
+    parser.add_argument("--policies", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument(
+        "--rebalance-every",
+        type=int,
+        default=1,
+        help="Rebalance every N trace windows, i.e. num_iterations_eplb_update "
+        "is N times the iterations of a recorded window.")
+    parser.add_argument("--expert-mb",
+                        type=float,
+                        default=0,
+                        help="Size of the weights of one expert in MB.")
+    parser.add_argument("--load-forecaster",
+                        type=str,
+                        default=None,
+                        choices=sorted(LOAD_FORECASTERS))
+    parser.add_argument("--min-rebalance-gain", type=float, default=0.0)
+    parser.add_argument("--migration-budget-mb", type=float, default=0)
+    # Synthetic trace
+    parser.add_argument("--num-windows", type=int, default=20)
+    parser.add_argument("--num-layers", type=int, default=58)
+    parser.add_argument("--num-ranks", type=int, default=32)
+    parser.add_argument("--experts-per-rank", type=int, default=9)
+    parser.add_argument("--num-experts", type=int, default=256)
+    parser.add_argument("--skew", type=float, default=1.2)
+    parser.add_argument("--drift", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose",
+                        action="store_true",
+                        help="Print the stats of every window.")
+    parser.add_argument("--output-json",
+                        type=str,
+                        default=None,
+                        help="Write the per window stats of every policy.")
+    args = parser.parse_args(argv)
+
+    if args.trace is not None:
+        placements, loads = load_trace(args.trace)
+    else:
+        from vllm_ascend.eplb.core.policy.policy_flashlb import \
+            generate_layered_experts
+        torch.manual_seed(args.seed)
+        placement = generate_layered_experts(
+            num_layers=args.num_layers,
+            layer_shape=(args.num_ranks, args.experts_per_rank),
+            expert_max=args.num_experts - 1).numpy()
+        placements, loads = generate_synthetic_trace(args.num_windows,
+                                                     placement,
+                                                     skew=args.skew,
+                                                     drift=args.drift,
+                                                     seed=args.seed)
+    print(f"trace: {placements.shape[0]} windows, placement shape "
+          f"{tuple(placements.shape[1:])}")
+
+    results = {}
+    for policy_type in args.policies:
+        stats = simulate(policy_type,
+                         placements,
+                         loads,
+                         rebalance_every=args.rebalance_every,
+                         expert_bytes=int(args.expert_mb * 2**20),
+                         load_forecaster=args.load_forecaster,
+                         min_rebalance_gain=args.min_rebalance_gain,
+                         migration_budget_bytes=int(args.migration_budget_mb *
+                                                    2**20))
+        _print_report(policy_type, stats, args.verbose)
+        results[policy_type] = [asdict(s) for s in stats]
+
+    if args.output_json is not None:
+        with open(args.output_json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,6 @@
 # This file is a part of the vllm-ascend project.
 #
 # Todo: Once https://github.com/vllm-project/vllm/issues/22246 is merged in vllm. Remove this updator.
-import numpy
 import torch
 import torch.distributed as dist
 import vllm.envs as envs
@@ -23,6 +22,7 @@ from vllm.logger import logger
 
 from vllm_ascend.eplb.core.eplb_utils import EPLBParamUtils
 from vllm_ascend.eplb.core.eplb_worker import EplbProcess
+from vllm_ascend.eplb.eplb_simulator import save_trace_window
 
 
 class EplbUpdator:
@@ -33,7 +33,7 @@ class EplbUpdator:
         self.init_eplb(self.ascend_config.expert_map_path, process)
         self.eplb_loader = loader
         self.eplb_process = eplb_process
-        self.shared_dict = self.eplb_process.shared_dict
+        self.channel = self.eplb_process.channel
 
     def set_adaptor(self, adaptor):
         self.adaptor = adaptor
@@ -48,6 +48,10 @@ class EplbUpdator:
         EPLBParamUtils.check_iterations(self.num_iterations_eplb_update)
         self.expert_map_path = expert_map_path
         self.expert_map_record_path = self.ascend_config.expert_map_record_path
+        # Directory recording the MoE load of every window for the offline
+        # EPLB simulator.
+        self.load_trace_dir = self.ascend_config.eplb_load_trace_dir
+        self.num_trace_windows = 0
 
         try:
             if not envs.VLLM_ALLOW_EXPERT_LOAD_COLLECTING:
@@ -79,7 +83,7 @@ class EplbUpdator:
                                    self.num_wait_worker_iterations + self.num_moe_layers):
             if self.expert_map_record_path is not None:
                 self.adaptor._export_tensor_to_file(
-                    self.shared_dict["expert_maps"],
+                    self.channel.read("expert_maps"),
                     self.expert_map_record_path)
 
             self.adaptor.model.clear_all_moe_loads()
@@ -102,28 +106,27 @@ class EplbUpdator:
     def get_init_expert_map(self):
         try:
             if not self.expert_map_initialized:
-                self.shared_dict[
-                    "expert_maps"] = self.adaptor.get_init_expert_map_from_file(
-                        self.num_moe_layers, self.expert_map_path)
+                self.channel.write(
+                    "expert_maps",
+                    self.adaptor.get_init_expert_map_from_file(
+                        self.num_moe_layers, self.expert_map_path))
                 self.expert_map_initialized = True
         except Exception as e:
             logger.warning(f"[ModelRunner] Failed to wake EPLB process: {e}",
                            exc_info=True)
 
     def wakeup_eplb_worker(self):
-        self.eplb_process.planner_q.put(1)
+        # Only the sequence number of the MoE load crosses the queue, the
+        # load itself is in the shared channel.
+        self.eplb_process.planner_q.put(self.channel.seq("moe_load"))
 
     def forward_before(self):
         if self.update_expert_weight_flag():
             (expert_send_info, expert_recv_info, updated_expert_map,
              log2phy_map, layer_id) = self.update_info_all.pop(0)
-            log2phy_map_this_rank = torch.from_numpy(numpy.array(log2phy_map))
-            self.eplb_loader.set_log2phy_map(log2phy_map_this_rank)
-            updated_expert_map_this_rank = torch.from_numpy(
-                numpy.array(updated_expert_map))
+            self.eplb_loader.set_log2phy_map(log2phy_map)
             self.eplb_loader.generate_expert_d2d_transfer_task(
-                expert_send_info, expert_recv_info,
-                updated_expert_map_this_rank,
+                expert_send_info, expert_recv_info, updated_expert_map,
                 layer_id + self.adaptor.num_dense_layers)
 
             # set asynchronous stream for d2d expert weight update
@@ -133,7 +136,9 @@ class EplbUpdator:
     def take_update_info_from_eplb_process(self):
         # Batch after eplb process being triggered, get update info provided by eplb process
         if self.get_update_info_flag():
-            self.update_info_all = self.eplb_process.block_update_q.get()
+            update_seq = self.eplb_process.block_update_q.get()
+            self.update_info_all = [] if update_seq is None else \
+                self.channel.read_update_info()
 
     def forward_end(self):
         if self.wakeup_eplb_worker_flag():
@@ -162,21 +167,30 @@ class EplbUpdator:
             dist.all_gather_into_tensor(self._gather_buffer, local_load)
 
             moe_load = self._gather_buffer.permute(1, 0, 2)
-            self.shared_dict["moe_load"] = moe_load.cpu()
-            logger.debug(
-                f"[ModelRunner] Updated shared_dict['moe_load'] shape={moe_load.shape}"
-            )
         else:
             moe_load = local_load.unsqueeze(1)
-            self.shared_dict["moe_load"] = moe_load.cpu()
-            logger.debug(
-                f"[ModelRunner] Updated shared_dict['moe_load'] shape={moe_load.shape}"
-            )
+        self.channel.write("moe_load", moe_load)
+        logger.debug(
+            f"[ModelRunner] Updated shared channel 'moe_load' shape={moe_load.shape}"
+        )
+        if is_clear and self.load_trace_dir is not None and self.rank_id == 0:
+            self.record_load_trace(moe_load)
         return moe_load
 
+    def record_load_trace(self, moe_load):
+        expert_maps = self.channel.read("expert_maps")
+        placement = self.adaptor.global2local(expert_maps,
+                                              expert_maps.max() + 1)
+        save_trace_window(self.load_trace_dir, self.num_trace_windows,
+                          placement.numpy(),
+                          moe_load.cpu().numpy())
+        self.num_trace_windows += 1
+
     def warm_up_eplb(self):
 
         self.get_init_expert_map()
+        self.channel.write("expert_weight_bytes",
+                           self.adaptor.get_expert_weight_bytes())
         self.compute_and_set_moe_load()
 
         src_tensor = torch.empty((1, ), device=self.device)
@@ -207,3 +221,4 @@ class EplbUpdator:
             self.process.terminate()
             self.process.join()
             logger.info("[ModelRunner] EPLB process terminated")
+        self.channel.unlink()
@@ -6,6 +6,10 @@ from vllm.v1.kv_offload.mediums import CPULoadStoreSpec, GPULoadStoreSpec
 from vllm.v1.kv_offload.worker.worker import (OffloadingHandler,
                                               TransferResult, TransferSpec)
 
+from vllm_ascend.kv_offload.kv_quant import (dequantize_kv_blocks,
+                                             get_kv_offload_dtype,
+                                             get_scale_shape,
+                                             quantize_kv_blocks)
 from vllm_ascend.utils import vllm_version_is
 
 if vllm_version_is("0.11.0"):
@@ -15,6 +19,9 @@ else:
 
 logger = init_logger(__name__)
 
+# Number of npu events allocated upfront and kept for reuse by a handler.
+NUM_POOLED_EVENTS = 16
+
 
 def expand_block_ids(
     block_ids: np.ndarray,
@@ -37,16 +44,9 @@ def expand_block_ids(
     """
     assert skip_count < block_size_factor
 
-    first_range = np.arange(skip_count, block_size_factor)
-    full_range = np.arange(0, block_size_factor)
-
-    output_idx = 0
-    for i, block_id in enumerate(block_ids):
-        base_block_id = block_id * block_size_factor
-        indices = first_range if i == 0 else full_range
-        output_end_idx = output_idx + len(indices)
-        output[output_idx:output_end_idx] = base_block_id + indices
-        output_idx = output_end_idx
+    expanded = (np.asarray(block_ids)[:, None] * block_size_factor +
+                np.arange(block_size_factor)).ravel()[skip_count:]
+    output[:expanded.size] = expanded
 
 
 class CpuNpuOffloadingHandler(OffloadingHandler):
@@ -58,18 +58,38 @@ class CpuNpuOffloadingHandler(OffloadingHandler):
         num_cpu_blocks: int,
         gpu_caches: dict[str, torch.Tensor],
         attn_backends: dict[str, type[AttentionBackend]],
+        kv_offload_dtype: str = "auto",
+        scale_granularity: str = "token",
+        defer_launch: bool = False,
     ):
         assert cpu_block_size % gpu_block_size == 0
         self.block_size_factor = cpu_block_size // gpu_block_size
+        # The blocks are quantized on the way to the CPU and dequantized on
+        # the way back when quant_dtype is set.
+        self.quant_dtype = get_kv_offload_dtype(kv_offload_dtype)
+        self.scale_granularity = scale_granularity
 
         # npu streams for npu->cpu and cpu->npu
         self.d2h_stream = torch.npu.Stream()
         self.h2d_stream = torch.npu.Stream()
 
-        # job_id -> transfer npu event
-        self.transfer_events: dict[int, torch.npu.Event] = {}
+        # Whether the jobs are queued until flush() instead of being launched
+        # as they are submitted, set when the connector flushes them.
+        self.defer_launch = defer_launch
+        # Jobs submitted since the last flush, per direction (True for
+        # cpu->npu): (job_id, [num_sub_blocks, 2] src to dst block ids).
+        self.pending_jobs: dict[bool, list[tuple[int, np.ndarray]]] = {
+            False: [],
+            True: [],
+        }
+        # Launched transfers: (npu event, job ids, npu buffers to keep until
+        # the event completes).
+        self.transfers: list[tuple[torch.npu.Event, list[int],
+                                   list[torch.Tensor]]] = []
         # list of npu events available for reuse
-        self.events_pool: list[torch.npu.Event] = []
+        self.events_pool: list[torch.npu.Event] = [
+            torch.npu.Event() for _ in range(NUM_POOLED_EVENTS)
+        ]
 
         pin_memory = is_pin_memory_available()
 
@@ -77,6 +97,9 @@ class CpuNpuOffloadingHandler(OffloadingHandler):
         logger.info("Allocating %d CPU tensors...", len(gpu_caches))
         self.npu_tensors: list[torch.Tensor] = []
         self.cpu_tensors: list[torch.Tensor] = []
+        # (key scales, value scales) of every layer when quantized
+        self.cpu_scales: list[tuple[torch.Tensor, torch.Tensor]] = []
+        storage_dtype = self.quant_dtype
         for layer_name, gpu_tensor in gpu_caches.items():
             self.npu_tensors.append(gpu_tensor)
 
@@ -90,34 +113,44 @@ class CpuNpuOffloadingHandler(OffloadingHandler):
             self.cpu_tensors.append((
                 torch.zeros(
                     cpu_shape,
-                    dtype=gpu_tensor[0].dtype,
+                    dtype=storage_dtype or gpu_tensor[0].dtype,
                     device="cpu",
                     pin_memory=pin_memory,
                 ),
                 torch.zeros(
                     cpu_shape,
-                    dtype=gpu_tensor[0].dtype,
+                    dtype=storage_dtype or gpu_tensor[0].dtype,
                     device="cpu",
                     pin_memory=pin_memory,
                 ),
             ))
+            if storage_dtype is not None:
+                scale_shape = get_scale_shape(torch.Size(cpu_shape),
+                                              scale_granularity)
+                self.cpu_scales.append((
+                    torch.zeros(scale_shape,
+                                dtype=torch.float32,
+                                device="cpu",
+                                pin_memory=pin_memory),
+                    torch.zeros(scale_shape,
+                                dtype=torch.float32,
+                                device="cpu",
+                                pin_memory=pin_memory),
+                ))
 
     def transfer_async(self, job_id: int, spec: TransferSpec) -> bool:
-        logger.info("start transfer_async...")
+        """Launch the job, or queue it until the next flush when
+        defer_launch is set."""
         src_spec, dst_spec = spec
         if isinstance(src_spec, CPULoadStoreSpec):
             assert isinstance(dst_spec, GPULoadStoreSpec)
-            stream = self.h2d_stream
-            src_tensors = self.cpu_tensors
-            dst_tensors = self.npu_tensors
+            to_npu = True
             src_block_size_factor = self.block_size_factor
             dst_block_size_factor = 1
         else:
             assert isinstance(src_spec, GPULoadStoreSpec)
             assert isinstance(dst_spec, CPULoadStoreSpec)
-            stream = self.d2h_stream
-            src_tensors = self.npu_tensors
-            dst_tensors = self.cpu_tensors
+            to_npu = False
             src_block_size_factor = 1
             dst_block_size_factor = self.block_size_factor
 
@@ -141,34 +174,135 @@ class CpuNpuOffloadingHandler(OffloadingHandler):
             src_to_dst[:, 1],
             skip_count=dst_sub_blocks_to_skip,
         )
+        self.pending_jobs[to_npu].append((job_id, src_to_dst))
+        if not self.defer_launch:
+            self.flush()
+
+        # success
+        return True
+
+    def flush(self) -> None:
+        """Launch the queued jobs, one transfer per direction whose block
+        mappings are concatenated, so that every layer is swapped once
+        whatever the number of jobs."""
+        for to_npu, jobs in self.pending_jobs.items():
+            if jobs:
+                self._launch(to_npu, jobs)
+                jobs.clear()
+
+    def _launch(self, to_npu: bool, jobs: list[tuple[int,
+                                                     np.ndarray]]) -> None:
+        if to_npu:
+            stream = self.h2d_stream
+            src_tensors = self.cpu_tensors
+            dst_tensors = self.npu_tensors
+        else:
+            stream = self.d2h_stream
+            src_tensors = self.npu_tensors
+            dst_tensors = self.cpu_tensors
+        src_to_dst = np.concatenate([mapping for _, mapping in jobs])
         src_to_dst_tensor = torch.from_numpy(src_to_dst)
 
         event = self.events_pool.pop(
         ) if self.events_pool else torch.npu.Event()
+        buffers: list[torch.Tensor] = []
         with torch.npu.stream(stream):
-            for src_tensor, dst_tensor in zip(src_tensors, dst_tensors):
-                src_key_cache, src_value_cache = src_tensor[0], src_tensor[1]
-                dst_key_cache, dst_value_cache = dst_tensor[0], dst_tensor[1]
-
-                torch.ops._C_ascend.swap_blocks(src_key_cache, dst_key_cache,
-                                                src_to_dst_tensor)
-                torch.ops._C_ascend.swap_blocks(src_value_cache,
-                                                dst_value_cache,
-                                                src_to_dst_tensor)
+            if self.quant_dtype is not None:
+                if to_npu:
+                    buffers = self._swap_in_quantized(src_to_dst)
+                else:
+                    buffers = self._swap_out_quantized(src_to_dst)
+            else:
+                for src_tensor, dst_tensor in zip(src_tensors, dst_tensors):
+                    # key cache, then value cache
+                    for part in range(2):
+                        torch.ops._C_ascend.swap_blocks(
+                            src_tensor[part], dst_tensor[part],
+                            src_to_dst_tensor)
 
             event.record(stream)
 
-        self.transfer_events[job_id] = event
-
-        # success
-        return True
+        self.transfers.append((event, [job_id for job_id, _ in jobs], buffers))
 
     def get_finished(self) -> list[TransferResult]:
+        # The deferred jobs not flushed by the connector are launched here.
+        self.flush()
         results: list[TransferResult] = []
-        for job_id, event in self.transfer_events.items():
+        pending_transfers = []
+        for transfer in self.transfers:
+            event, job_ids, _ = transfer
             if event.query():
-                results.append((job_id, True))
-                self.events_pool.append(event)
-        for job_id, _ in results:
-            del self.transfer_events[job_id]
+                results.extend((job_id, True) for job_id in job_ids)
+                if len(self.events_pool) < NUM_POOLED_EVENTS:
+                    self.events_pool.append(event)
+            else:
+                pending_transfers.append(transfer)
+        self.transfers = pending_transfers
         return results
+
+    def _swap_out_quantized(self,
+                            src_to_dst: np.ndarray) -> list[torch.Tensor]:
+        """Quantize the npu blocks of src_to_dst[:, 0] on the current stream
+        and copy them with their scales to the cpu blocks of
+        src_to_dst[:, 1].
+
+        RETURNED: the npu buffers to keep until the copies are done
+        """
+        assert self.quant_dtype is not None
+        num_blocks = len(src_to_dst)
+        device = self.npu_tensors[0][0].device
+        src_ids = torch.from_numpy(src_to_dst[:, 0]).to(device,
+                                                        non_blocking=True)
+        staging_to_dst = torch.from_numpy(
+            np.stack([np.arange(num_blocks), src_to_dst[:, 1]], axis=1))
+        buffers: list[torch.Tensor] = [src_ids]
+        for npu_tensor, cpu_tensor, cpu_scale in zip(self.npu_tensors,
+                                                     self.cpu_tensors,
+                                                     self.cpu_scales):
+            for part in range(2):
+                quantized, scale = quantize_kv_blocks(
+                    npu_tensor[part].index_select(0, src_ids),
+                    self.quant_dtype, self.scale_granularity)
+                torch.ops._C_ascend.swap_blocks(quantized, cpu_tensor[part],
+                                                staging_to_dst)
+                torch.ops._C_ascend.swap_blocks(scale, cpu_scale[part],
+                                                staging_to_dst)
+                buffers += [quantized, scale]
+        return buffers
+
+    def _swap_in_quantized(self, src_to_dst: np.ndarray) -> list[torch.Tensor]:
+        """Copy the cpu blocks of src_to_dst[:, 0] and their scales to the
+        npu on the current stream, and dequantize them into the npu blocks
+        of src_to_dst[:, 1].
+
+        RETURNED: the npu buffers to keep until the copies are done
+        """
+        num_blocks = len(src_to_dst)
+        device = self.npu_tensors[0][0].device
+        dst_ids = torch.from_numpy(src_to_dst[:, 1]).to(device,
+                                                        non_blocking=True)
+        src_to_staging = torch.from_numpy(
+            np.stack(
+                [src_to_dst[:, 0], np.arange(num_blocks)], axis=1))
+        buffers: list[torch.Tensor] = [dst_ids]
+        for npu_tensor, cpu_tensor, cpu_scale in zip(self.npu_tensors,
+                                                     self.cpu_tensors,
+                                                     self.cpu_scales):
+            for part in range(2):
+                quantized = torch.empty(
+                    (num_blocks, *cpu_tensor[part].shape[1:]),
+                    dtype=cpu_tensor[part].dtype,
+                    device=device)
+                scale = torch.empty((num_blocks, *cpu_scale[part].shape[1:]),
+                                    dtype=torch.float32,
+                                    device=device)
+                torch.ops._C_ascend.swap_blocks(cpu_tensor[part], quantized,
+                                                src_to_staging)
+                torch.ops._C_ascend.swap_blocks(cpu_scale[part], scale,
+                                                src_to_staging)
+                npu_tensor[part].index_copy_(
+                    0, dst_ids,
+                    dequantize_kv_blocks(quantized, scale,
+                                         npu_tensor[part].dtype))
+                buffers += [quantized, scale]
+        return buffers
@@ -0,0 +1,60 @@
+from typing import Optional
+
+import torch
+
+# kv_offload_dtype -> storage dtype of the offloaded blocks, None keeping the
+# dtype of the KV cache.
+KV_OFFLOAD_DTYPES: dict[str, Optional[torch.dtype]] = {
+    "auto": None,
+    "int8": torch.int8,
+    "fp8": torch.float8_e4m3fn,
+}
+# "token": one scale per token and head, "block": one scale per block and
+# head, smaller but less accurate.
+KV_OFFLOAD_SCALE_GRANULARITIES = ("token", "block")
+
+
+def get_kv_offload_dtype(name: str) -> Optional[torch.dtype]:
+    if name not in KV_OFFLOAD_DTYPES:
+        raise ValueError(f"Unsupported kv_offload_dtype {name}, expected one "
+                         f"of {list(KV_OFFLOAD_DTYPES)}.")
+    return KV_OFFLOAD_DTYPES[name]
+
+
+def get_scale_shape(block_shape: torch.Size,
+                    granularity: str) -> tuple[int, ...]:
+    """Shape of the scales of blocks of shape [num_blocks, block_size,
+    num_heads, head_size]."""
+    if granularity not in KV_OFFLOAD_SCALE_GRANULARITIES:
+        raise ValueError(
+            f"Unsupported kv_offload_scale_granularity {granularity}, "
+            f"expected one of {list(KV_OFFLOAD_SCALE_GRANULARITIES)}.")
+    num_blocks, block_size, num_heads = block_shape[:3]
+    if granularity == "block":
+        block_size = 1
+    return (num_blocks, block_size, num_heads, 1)
+
+
+def quantize_kv_blocks(
+        blocks: torch.Tensor,
+        dtype: torch.dtype,
+        granularity: str = "token") -> tuple[torch.Tensor, torch.Tensor]:
+    """Symmetric absmax quantization of KV blocks of shape [num_blocks,
+    block_size, num_heads, head_size].
+
+    RETURNED: (quantized blocks, float32 scales of get_scale_shape)
+    """
+    dims = (-1, ) if granularity == "token" else (1, -1)
+    absmax = blocks.abs().amax(dim=dims, keepdim=True).float()
+    qmax = 127.0 if dtype == torch.int8 else torch.finfo(dtype).max
+    # All-zero groups keep a non-zero scale so that they stay zero.
+    scale = (absmax / qmax).clamp_min(torch.finfo(torch.float32).tiny)
+    scaled = blocks.float() / scale
+    if dtype == torch.int8:
+        scaled = scaled.round_().clamp_(-qmax, qmax)
+    return scaled.to(dtype), scale
+
+
+def dequantize_kv_blocks(quantized: torch.Tensor, scale: torch.Tensor,
+                         dtype: torch.dtype) -> torch.Tensor:
+    return (quantized.float() * scale).to(dtype)
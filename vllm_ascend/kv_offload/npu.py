@@ -25,12 +25,21 @@ class NPUOffloadingSpec(OffloadingSpec):
                 "num_cpu_blocks must be specified in kv_connector_extra_config"
             )
         self.num_cpu_blocks: int = num_cpu_blocks
+        # Storage format of the offloaded blocks, see kv_quant.
+        self.kv_offload_dtype: str = self.extra_config.get(
+            "kv_offload_dtype", "auto")
+        self.kv_offload_scale_granularity: str = self.extra_config.get(
+            "kv_offload_scale_granularity", "token")
+
+        # Whether the handler queues the transfers until flush(), set by the
+        # NPUOffloadingConnector.
+        self.defer_transfers = False
 
         # scheduler-side
         self._manager: Optional[OffloadingManager] = None
 
         # worker-side
-        self._handler: Optional[OffloadingHandler] = None
+        self._handler: Optional[CpuNpuOffloadingHandler] = None
 
     def get_manager(self) -> OffloadingManager:
         if not self._manager:
@@ -64,8 +73,17 @@ class NPUOffloadingSpec(OffloadingSpec):
                 cpu_block_size=self.offloaded_block_size,
                 num_cpu_blocks=self.num_cpu_blocks,
                 gpu_caches=kv_caches,
+                kv_offload_dtype=self.kv_offload_dtype,
+                scale_granularity=self.kv_offload_scale_granularity,
+                defer_launch=self.defer_transfers,
             )
 
         assert self._handler is not None
         yield GPULoadStoreSpec, CPULoadStoreSpec, self._handler
         yield CPULoadStoreSpec, GPULoadStoreSpec, self._handler
+
+    def flush(self) -> None:
+        """Launch the transfers queued by the handler since the last flush
+        when defer_transfers is set, see CpuNpuOffloadingHandler.flush."""
+        if self._handler is not None:
+            self._handler.flush()
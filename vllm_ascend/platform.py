@@ -407,6 +407,8 @@ class NPUPlatform(Platform):
             )
             vllm_config.scheduler_config.chunked_prefill_enabled = True
             vllm_config.scheduler_config.SLO_limits_for_dynamic_batch = ascend_config.SLO_limits_for_dynamic_batch
+            vllm_config.scheduler_config.dynamic_batch_online_calibration = ascend_config.dynamic_batch_online_calibration
+            vllm_config.scheduler_config.dynamic_batch_profile_table = ascend_config.dynamic_batch_profile_table
 
         if vllm_config.kv_transfer_config is not None and \
             prefill_context_parallel_enable() and \
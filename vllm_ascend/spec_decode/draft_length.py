@@ -0,0 +1,85 @@
+from typing import Callable
+
+import numpy as np
+
+
+class DraftLengthPolicy:
+    """Chooses the number of draft tokens of each request to be verified.
+
+    The draft tokens of a request are modelled as accepted independently with
+    the acceptance rate ``a`` of the request, so the j-th draft token is
+    accepted with probability ``a ** j``. Verifying a draft token costs
+    ``draft_token_cost`` of the gain of an accepted token, so a request keeps
+    the draft tokens which are accepted with at least that probability. The
+    acceptance rate is estimated from the decayed counts of the accepted and
+    rejected draft tokens of the request, with one accepted token as prior.
+
+    The draft lengths are snapped to the graph shapes: the tokens the next
+    step is padded with are spent as extra draft tokens of the requests most
+    likely to accept them.
+    """
+
+    def __init__(self,
+                 num_speculative_tokens: int,
+                 draft_token_cost: float,
+                 pad_num_tokens: Callable[[int], int] = lambda n: n,
+                 decay: float = 0.9):
+        assert num_speculative_tokens > 0
+        assert 0 < draft_token_cost < 1
+        self.num_speculative_tokens = num_speculative_tokens
+        self.log_draft_token_cost = np.log(draft_token_cost)
+        self.pad_num_tokens = pad_num_tokens
+        self.decay = decay
+
+    def update(self, num_draft_accepted: np.ndarray,
+               num_draft_rejected: np.ndarray, req_indices: np.ndarray,
+               num_draft_tokens: np.ndarray,
+               num_sampled_tokens: np.ndarray) -> None:
+        """Updates the acceptance counts of the verified requests in place.
+
+        A request samples one token more than its accepted draft tokens, and
+        the verification stops at its first rejected draft token.
+        """
+        num_accepted = num_sampled_tokens - 1
+        num_draft_accepted[req_indices] = (
+            self.decay * num_draft_accepted[req_indices] + num_accepted)
+        num_draft_rejected[req_indices] = (
+            self.decay * num_draft_rejected[req_indices] +
+            (num_accepted < num_draft_tokens))
+
+    def get_acceptance_rates(self, num_draft_accepted: np.ndarray,
+                             num_draft_rejected: np.ndarray) -> np.ndarray:
+        return (num_draft_accepted + 1) / (num_draft_accepted +
+                                           num_draft_rejected + 1)
+
+    def get_draft_lengths(self, num_draft_accepted: np.ndarray,
+                          num_draft_rejected: np.ndarray) -> np.ndarray:
+        """Returns the number of draft tokens to verify for each request.
+
+        Every request keeps at least one draft token, so that its acceptance
+        rate is still measured.
+        """
+        k = self.num_speculative_tokens
+        rates = self.get_acceptance_rates(num_draft_accepted,
+                                          num_draft_rejected)
+        with np.errstate(divide="ignore"):
+            log_rates = np.log(rates)
+        lengths = np.full(rates.shape, k, dtype=np.int64)
+        partial = log_rates < 0
+        lengths[partial] = np.clip(
+            np.floor(self.log_draft_token_cost / log_rates[partial]), 1, k)
+
+        num_tokens = len(lengths) + int(lengths.sum())
+        num_spare = self.pad_num_tokens(num_tokens) - num_tokens
+        if num_spare <= 0 or (lengths == k).all():
+            return lengths
+        # The j-th draft token of a request is accepted with probability
+        # rate ** j, which decreases with j, so the most likely extra draft
+        # tokens of each request are always the next ones.
+        positions = np.arange(1, k + 1)
+        gains = np.where(positions > lengths[:, None],
+                         rates[:, None]**positions, -1.0).ravel()
+        num_spare = min(num_spare, int((gains >= 0).sum()))
+        extra = np.argpartition(-gains, num_spare - 1)[:num_spare]
+        lengths += np.bincount(extra // k, minlength=len(lengths))
+        return lengths
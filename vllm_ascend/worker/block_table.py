@@ -10,6 +10,10 @@ from vllm_ascend.utils import prefill_context_parallel_enable
 if prefill_context_parallel_enable():
     from vllm.distributed import get_pcp_group
 
+# The block table is uploaded whole once more than this fraction of the
+# committed rows changed since the last upload.
+FULL_COPY_DIRTY_ROW_RATIO = 0.5
+
 
 class BlockTable:
 
@@ -77,6 +81,34 @@ class BlockTable:
         self.block_table_np = self.block_table_cpu.numpy()
         self.num_blocks_per_row = np.zeros(max_num_reqs, dtype=np.int32)
 
+        # Columns [dirty_col_start, dirty_col_end) of each row changed on the
+        # CPU since they were last uploaded, dirty_col_end is 0 for the rows
+        # in sync with the device. Only the first num_blocks_per_row entries
+        # of a row are kept in sync, the stale ones past them are never read.
+        self.dirty_col_start = np.full(max_num_reqs,
+                                       logical_table_size,
+                                       dtype=np.int64)
+        self.dirty_col_end = np.zeros(max_num_reqs, dtype=np.int64)
+        # The changed entries are packed into these buffers and scattered into
+        # the device table, unless they are larger than a quarter of it.
+        self.delta_capacity = max(max_num_reqs * logical_table_size // 4, 1)
+        self.delta_indices_cpu = torch.zeros(self.delta_capacity,
+                                             dtype=torch.int64,
+                                             device="cpu",
+                                             pin_memory=pin_memory)
+        self.delta_indices_np = self.delta_indices_cpu.numpy()
+        self.delta_values_cpu = torch.zeros(self.delta_capacity,
+                                            dtype=torch.int32,
+                                            device="cpu",
+                                            pin_memory=pin_memory)
+        self.delta_values_np = self.delta_values_cpu.numpy()
+        self.delta_indices = torch.zeros(self.delta_capacity,
+                                         dtype=torch.int64,
+                                         device=self.device)
+        self.delta_values = torch.zeros(self.delta_capacity,
+                                        dtype=torch.int32,
+                                        device=self.device)
+
         self.slot_mapping_cpu = torch.zeros(self.max_num_batched_tokens,
                                             dtype=torch.int64,
                                             device="cpu",
@@ -117,6 +149,7 @@ class BlockTable:
 
         self.block_table_np[row_idx, start:start + num_blocks] = block_ids
         self.num_blocks_per_row[row_idx] += num_blocks
+        self._mark_dirty(row_idx, start, start + num_blocks)
 
     def add_row(self, block_ids: list[int], row_idx: int) -> None:
         self.num_blocks_per_row[row_idx] = 0
@@ -127,6 +160,7 @@ class BlockTable:
         self.block_table_np[tgt, :num_blocks] = self.block_table_np[
             src, :num_blocks]
         self.num_blocks_per_row[tgt] = num_blocks
+        self._mark_dirty(tgt, 0, num_blocks)
 
     def swap_row(self, src: int, tgt: int) -> None:
         num_blocks_src = self.num_blocks_per_row[src]
@@ -135,6 +169,16 @@ class BlockTable:
         self.num_blocks_per_row[tgt] = num_blocks_src
 
         self.block_table_np[[src, tgt]] = self.block_table_np[[tgt, src]]
+        num_blocks = max(num_blocks_src, num_blocks_tgt)
+        self._mark_dirty(src, 0, num_blocks)
+        self._mark_dirty(tgt, 0, num_blocks)
+
+    def _mark_dirty(self, row_idx: int, start: int, end: int) -> None:
+        if start >= end:
+            return
+        self.dirty_col_start[row_idx] = min(self.dirty_col_start[row_idx],
+                                            start)
+        self.dirty_col_end[row_idx] = max(self.dirty_col_end[row_idx], end)
 
     def compute_slot_mapping(self, req_indices: np.ndarray,
                              positions: np.ndarray) -> None:
@@ -206,8 +250,43 @@ class BlockTable:
                        out=self.slot_mapping_np[:req_indices.shape[0]])
 
     def commit_block_table(self, num_reqs: int) -> None:
-        self.block_table[:num_reqs].copy_(self.block_table_cpu[:num_reqs],
-                                          non_blocking=True)
+        dirty_col_end = self.dirty_col_end[:num_reqs]
+        dirty_rows = np.flatnonzero(dirty_col_end)
+        if dirty_rows.size == 0:
+            return
+
+        col_starts = self.dirty_col_start[dirty_rows]
+        col_ends = dirty_col_end[dirty_rows]
+        num_cols = col_ends - col_starts
+        num_entries = int(num_cols.sum())
+        if (dirty_rows.size > num_reqs * FULL_COPY_DIRTY_ROW_RATIO
+                or num_entries > self.delta_capacity):
+            self.block_table[:num_reqs].copy_(self.block_table_cpu[:num_reqs],
+                                              non_blocking=True)
+        else:
+            # Flat indices of the dirty entries, e.g. rows [1, 3] with the
+            # columns [2, 4) and [0, 1) dirty -> [W + 2, W + 3, 3 * W].
+            row_offsets = np.cumsum(num_cols) - num_cols
+            indices = self.delta_indices_np[:num_entries]
+            np.add(np.repeat(
+                dirty_rows * self.block_table_np.shape[1] + col_starts -
+                row_offsets, num_cols),
+                   np.arange(num_entries),
+                   out=indices)
+            np.take(self.block_table_np.ravel(),
+                    indices,
+                    out=self.delta_values_np[:num_entries])
+            self.delta_indices[:num_entries].copy_(
+                self.delta_indices_cpu[:num_entries], non_blocking=True)
+            self.delta_values[:num_entries].copy_(
+                self.delta_values_cpu[:num_entries], non_blocking=True)
+            self.block_table.view(-1).index_copy_(
+                0, self.delta_indices[:num_entries],
+                self.delta_values[:num_entries])
+
+        # Rows past num_reqs were not uploaded and stay dirty.
+        self.dirty_col_start[:num_reqs] = self.block_table_np.shape[1]
+        self.dirty_col_end[:num_reqs] = 0
 
     def commit_slot_mapping(self, num_tokens: int) -> None:
         self.slot_mapping[:num_tokens].copy_(
@@ -216,6 +295,8 @@ class BlockTable:
     def clear(self) -> None:
         self.block_table.fill_(0)
         self.block_table_cpu.fill_(0)
+        self.dirty_col_start.fill(self.block_table_np.shape[1])
+        self.dirty_col_end.fill(0)
 
     def _convert_physical_to_logical_blocks(
             self, physical_blocks: np.ndarray) -> np.ndarray:
@@ -27,7 +27,6 @@ from collections.abc import Iterator
 from contextlib import contextmanager, nullcontext
 from copy import deepcopy
 from dataclasses import dataclass
-from multiprocessing import Manager
 from typing import (TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional,
                     Union, cast)
 
@@ -121,6 +120,7 @@ from vllm_ascend.compilation.acl_graph import (ACLGraphWrapper,
 from vllm_ascend.eplb.adaptor.vllm_adaptor import VllmEplbAdaptor
 from vllm_ascend.eplb.core.eplb_device_transfer_loader import \
     D2DExpertWeightLoader
+from vllm_ascend.eplb.core.eplb_shm_channel import EplbSharedChannel
 from vllm_ascend.eplb.core.eplb_utils import EPLBParamUtils
 from vllm_ascend.eplb.core.eplb_worker import EplbProcess
 from vllm_ascend.eplb.eplb_updator import EplbUpdator
@@ -130,6 +130,7 @@ from vllm_ascend.platform import NPUPlatform
 from vllm_ascend.sample.logits_processor import build_logitsprocs
 from vllm_ascend.sample.rejection_sampler import AscendRejectionSampler
 from vllm_ascend.spec_decode import get_spec_decode_method
+from vllm_ascend.spec_decode.draft_length import DraftLengthPolicy
 from vllm_ascend.spec_decode.eagle_proposer import EagleProposer
 from vllm_ascend.spec_decode.interface import SpecDcodeType
 from vllm_ascend.spec_decode.mtp_proposer import MtpProposer
@@ -170,6 +171,8 @@ else:
 
 if TYPE_CHECKING:
     import xgrammar as xgr  # type: ignore[import-untyped]
+    from vllm.distributed.kv_transfer.kv_connector.v1.metrics import \
+        KVConnectorStats
     from vllm.v1.core.sched.output import SchedulerOutput
 else:
     xgr = LazyLoader("xgr", globals(), "xgrammar")
@@ -505,6 +508,27 @@ class NPUModelRunner(LoRAModelRunnerMixin):
 
         self.uniform_decode_query_len = 1 if not self.speculative_config else \
             1 + self.speculative_config.num_speculative_tokens
+        self.draft_length_policy: Optional[DraftLengthPolicy] = None
+        if (self.drafter and self.drafter.name
+                in (SpecDcodeType.MTP, SpecDcodeType.EAGLE,
+                    SpecDcodeType.EAGLE3)
+                and self.ascend_config.adaptive_draft_token_cost > 0
+                and not self.ascend_config.torchair_graph_config.enabled):
+            if (self.use_aclgraph
+                    and self.compilation_config.cudagraph_mode.decode_mode()
+                    == CUDAGraphMode.FULL):
+                # The full decode graphs are captured for uniform decode
+                # batches of num_speculative_tokens draft tokens per request,
+                # shorter drafts would run the decode steps eagerly.
+                logger.warning(
+                    "adaptive_draft_token_cost is ignored with the full "
+                    "decode graphs of cudagraph_mode=%s.",
+                    self.compilation_config.cudagraph_mode.name)
+            else:
+                self.draft_length_policy = DraftLengthPolicy(
+                    self.speculative_config.num_speculative_tokens,
+                    self.ascend_config.adaptive_draft_token_cost,
+                    self._pad_num_draft_step_tokens)
         # aclgraph dispatcher for runtime aclgraph dispatching.
         self.aclgraph_dispatcher = CudagraphDispatcher(self.vllm_config)
         # Cached outputs.
@@ -531,15 +555,21 @@ class NPUModelRunner(LoRAModelRunnerMixin):
             self.is_eplb_warmuped = False
             self.policy_type = self.ascend_config.eplb_policy_type
             self.eplb_loader = D2DExpertWeightLoader()
-            self.manager = Manager()
-            self.shared_dict = self.manager.dict({
-                "expert_map": None,
-                "moe_load": None,
-                "expert_maps": None
-            })
-            self.eplb_process = EplbProcess(shared_dict=self.shared_dict,
-                                            policy_type=self.policy_type,
-                                            enable_d2d=True)
+            self.eplb_channel = EplbSharedChannel()
+            EPLBParamUtils.check_migration_budget(
+                self.ascend_config.eplb_migration_budget_mb)
+            EPLBParamUtils.check_load_forecaster(
+                self.ascend_config.eplb_load_forecaster)
+            EPLBParamUtils.check_min_rebalance_gain(
+                self.ascend_config.eplb_min_rebalance_gain)
+            self.eplb_process = EplbProcess(
+                channel=self.eplb_channel,
+                policy_type=self.policy_type,
+                enable_d2d=True,
+                migration_budget_bytes=int(
+                    self.ascend_config.eplb_migration_budget_mb * 1024 * 1024),
+                load_forecaster=self.ascend_config.eplb_load_forecaster,
+                min_rebalance_gain=self.ascend_config.eplb_min_rebalance_gain)
             self.process = self.eplb_process._launch_process()
             ascend_config = get_ascend_config()
             self.eplb_updator = EplbUpdator(ascend_config, self.eplb_loader,
@@ -1346,6 +1376,33 @@ class NPUModelRunner(LoRAModelRunnerMixin):
                 scheduler_output,
                 decode_threshold=self.reorder_batch_threshold)
 
+    def _write_sampled_token_ids(self, num_sampled: np.ndarray,
+                                 flat_sampled_ids: np.ndarray) -> None:
+        """Append the tokens sampled for the first len(num_sampled) requests
+        of the batch, given flattened, to their token ids."""
+        num_reqs = num_sampled.shape[0]
+        if flat_sampled_ids.size == 0:
+            return
+        start_idx = self.input_batch.num_tokens_no_spec[:num_reqs]
+        end_idx = start_idx + num_sampled
+        max_end_idx = int(end_idx.max())
+        assert max_end_idx <= self.model_config.max_model_len, (
+            "Sampled token IDs exceed the max model length. "
+            f"Total number of tokens: {max_end_idx} > max_model_len: "
+            f"{self.model_config.max_model_len}")
+
+        # E.g., num_sampled [2, 0, 1] with start_idx [5, 9, 7]
+        # -> rows [0, 0, 2] and columns [5, 6, 7].
+        req_indices = np.repeat(self.arange_np[:num_reqs], num_sampled)
+        _, arange = self._get_cumsum_and_arange(num_sampled)
+        col_indices = np.repeat(start_idx, num_sampled) + arange
+        self.input_batch.token_ids_cpu[req_indices,
+                                       col_indices] = flat_sampled_ids
+        self.input_batch.num_tokens_no_spec[:num_reqs] = end_idx
+        np.copyto(self.input_batch.num_tokens[:num_reqs],
+                  end_idx,
+                  where=num_sampled > 0)
+
     def _prepare_inputs(
         self,
         scheduler_output: "SchedulerOutput",
@@ -1364,12 +1421,19 @@ class NPUModelRunner(LoRAModelRunnerMixin):
 
         # Get the number of scheduled tokens for each request.
         req_ids = self.input_batch.req_ids
-        tokens = [scheduler_output.num_scheduled_tokens[i] for i in req_ids]
-        num_scheduled_tokens = np.array(tokens, dtype=np.int32)
+        num_scheduled_tokens = np.fromiter(
+            (scheduler_output.num_scheduled_tokens[i] for i in req_ids),
+            dtype=np.int32,
+            count=num_reqs)
 
+        # Get request indices.
+        # E.g., [2, 5, 3] -> [0, 0, 1, 1, 1, 1, 1, 2, 2, 2]
         req_indices = np.repeat(self.arange_np[:num_reqs],
                                 num_scheduled_tokens)
-        _, arange = self._get_cumsum_and_arange(num_scheduled_tokens)
+        # cu_num_tokens: [2, 5, 3] -> [2, 7, 10]
+        # arange: [0, 1, 0, 1, 2, 3, 4, 0, 1, 2]
+        cu_num_tokens, arange = self._get_cumsum_and_arange(
+            num_scheduled_tokens)
         positions_np = np.add(
             self.input_batch.num_computed_tokens_cpu[req_indices],
             arange,
@@ -1380,19 +1444,25 @@ class NPUModelRunner(LoRAModelRunnerMixin):
         self.input_batch.block_table.commit_slot_mapping(
             total_num_scheduled_tokens)
         tokens, position_pcp, pcp_unpad_mask = self._update_tokens_for_pcp(
-            tokens)
-        num_scheduled_tokens = np.array(tokens, dtype=np.int32)
+            num_scheduled_tokens)
+        if self.pcp_size > 1:
+            # The requests are padded for PCP, so the request indices are
+            # computed again over the padded tokens.
+            num_scheduled_tokens = np.array(tokens, dtype=np.int32)
+            req_indices = np.repeat(self.arange_np[:num_reqs],
+                                    num_scheduled_tokens)
+            cu_num_tokens, arange = self._get_cumsum_and_arange(
+                num_scheduled_tokens)
         # update total_num_scheduled_tokens
-        total_num_scheduled_tokens = sum(num_scheduled_tokens[:num_reqs])
+        total_num_scheduled_tokens = int(num_scheduled_tokens.sum())
 
         total_num_pcp_pads = sum(self.num_pcp_pads)
-        max_num_scheduled_tokens = max(tokens)
-        num_valid_tokens = np.array([
-            num_tokens -
-            len(scheduler_output.scheduled_spec_decode_tokens.get(i, []))
-            for num_tokens, i in zip(tokens, req_ids)
-        ],
-                                    dtype=np.int32)
+        max_num_scheduled_tokens = int(num_scheduled_tokens.max())
+        num_valid_tokens = num_scheduled_tokens.copy()
+        for req_id, draft_token_ids in (
+                scheduler_output.scheduled_spec_decode_tokens.items()):
+            num_valid_tokens[self.input_batch.req_id_to_index[req_id]] -= len(
+                draft_token_ids)
 
         if (self.use_aclgraph and total_num_scheduled_tokens
                 <= self.aclgraph_batch_sizes[-1]):
@@ -1438,16 +1508,6 @@ class NPUModelRunner(LoRAModelRunnerMixin):
         if self.lora_config:
             self.set_active_loras(self.input_batch, num_scheduled_tokens)
 
-        # Get request indices.
-        # E.g., [2, 5, 3] -> [0, 0, 1, 1, 1, 1, 1, 2, 2, 2]
-        req_indices = np.repeat(self.arange_np[:num_reqs],
-                                num_scheduled_tokens)
-
-        # cu_num_tokens: [2, 5, 3] -> [2, 7, 10]
-        # arange: [0, 1, 0, 1, 2, 3, 4, 0, 1, 2]
-        cu_num_tokens, arange = self._get_cumsum_and_arange(
-            num_scheduled_tokens)
-
         if self.pcp_size > 1:
             positions_np = self.positions_np[:total_num_scheduled_tokens]
             np.add(self.input_batch.num_computed_tokens_cpu[req_indices],
@@ -2206,7 +2266,8 @@ class NPUModelRunner(LoRAModelRunnerMixin):
 
         kv_connector_output = KVConnectorOutput(
             finished_sending=finished_sending,
-            finished_recving=finished_recving)
+            finished_recving=finished_recving,
+            kv_connector_stats=self.get_kv_connector_stats())
         finished_sending = None
         finished_recving = None
         with ProfileExecuteDuration().capture_async("post process"):
@@ -2370,29 +2431,34 @@ class NPUModelRunner(LoRAModelRunnerMixin):
             # NOTE(woosuk): As an exception, when using PP, the scheduler sends
             # the sampled tokens back, because there's no direct communication
             # between the first-stage worker and the last-stage worker.
-            for req_idx in range(num_sampled_tokens):
-                if self.use_async_scheduling:
-                    sampled_ids = [-1] * 1 if \
-                        req_idx not in invalid_req_indices_set else None
-                else:
-                    sampled_ids = valid_sampled_token_ids[req_idx]
-                if not sampled_ids:
-                    continue
-
-                start_idx = self.input_batch.num_tokens_no_spec[req_idx]
-                end_idx = start_idx + len(sampled_ids)
-                assert end_idx <= self.model_config.max_model_len, (
-                    "Sampled token IDs exceed the max model length. "
-                    f"Total number of tokens: {end_idx} > max_model_len: "
-                    f"{self.model_config.max_model_len}")
-
-                self.input_batch.token_ids_cpu[req_idx,
-                                               start_idx:end_idx] = sampled_ids
-                self.input_batch.num_tokens_no_spec[req_idx] = end_idx
-                self.input_batch.num_tokens[req_idx] = end_idx
+            if self.use_async_scheduling:
+                num_valid_sampled = np.ones(num_sampled_tokens, dtype=np.int32)
+                num_valid_sampled[list(invalid_req_indices_set)] = 0
+                sampled_ids_per_req = [[-1]] * num_sampled_tokens
+                flat_sampled_ids = np.full(
+                    int(num_valid_sampled.sum()),
+                    -1,
+                    dtype=self.input_batch.token_ids_cpu.dtype)
+            else:
+                sampled_ids_per_req = valid_sampled_token_ids
+                num_valid_sampled = np.fromiter(map(
+                    len, valid_sampled_token_ids[:num_sampled_tokens]),
+                                                dtype=np.int32,
+                                                count=num_sampled_tokens)
+                flat_sampled_ids = np.fromiter(
+                    itertools.chain.from_iterable(
+                        valid_sampled_token_ids[:num_sampled_tokens]),
+                    dtype=self.input_batch.token_ids_cpu.dtype,
+                    count=int(num_valid_sampled.sum()))
+            self._write_sampled_token_ids(num_valid_sampled, flat_sampled_ids)
+            if (self.draft_length_policy is not None
+                    and not self.use_async_scheduling):
+                self._update_draft_acceptance(scheduler_output,
+                                              num_valid_sampled)
+            for req_idx in np.flatnonzero(num_valid_sampled).tolist():
                 req_id = self.input_batch.req_ids[req_idx]
-                req_state = self.requests[req_id]
-                req_state.output_token_ids.extend(sampled_ids)
+                self.requests[req_id].output_token_ids.extend(
+                    sampled_ids_per_req[req_idx])
 
             if self.speculative_config:
                 self._draft_token_ids = self.propose_draft_token_ids(
@@ -2452,8 +2518,44 @@ class NPUModelRunner(LoRAModelRunnerMixin):
         else:
             draft_token_ids = self._draft_token_ids
         self._draft_token_ids = None
+        if self.draft_length_policy is not None:
+            num_reqs = self.input_batch.num_reqs
+            draft_lengths = self.draft_length_policy.get_draft_lengths(
+                self.input_batch.num_draft_accepted_cpu[:num_reqs],
+                self.input_batch.num_draft_rejected_cpu[:num_reqs]).tolist()
+            draft_token_ids = [
+                draft[:length]
+                for draft, length in zip(draft_token_ids, draft_lengths)
+            ]
         return DraftTokenIds(req_ids, draft_token_ids)
 
+    def _pad_num_draft_step_tokens(self, num_tokens: int) -> int:
+        # The number of tokens a decode step is padded to by the graph mode.
+        if self.use_aclgraph and num_tokens <= self.aclgraph_batch_sizes[-1]:
+            return self.vllm_config.pad_for_cudagraph(num_tokens)
+        return num_tokens
+
+    def _update_draft_acceptance(self, scheduler_output: "SchedulerOutput",
+                                 num_valid_sampled: np.ndarray) -> None:
+        assert self.draft_length_policy is not None
+        req_indices = []
+        num_draft_tokens = []
+        for req_id, draft_token_ids in (
+                scheduler_output.scheduled_spec_decode_tokens.items()):
+            req_index = self.input_batch.req_id_to_index[req_id]
+            # Skip the discarded samples of the partial prefills.
+            if draft_token_ids and num_valid_sampled[req_index] > 0:
+                req_indices.append(req_index)
+                num_draft_tokens.append(len(draft_token_ids))
+        if not req_indices:
+            return
+        req_indices_np = np.array(req_indices, dtype=np.int64)
+        self.draft_length_policy.update(
+            self.input_batch.num_draft_accepted_cpu,
+            self.input_batch.num_draft_rejected_cpu, req_indices_np,
+            np.array(num_draft_tokens,
+                     dtype=np.int64), num_valid_sampled[req_indices_np])
+
     def kv_connector_no_forward(
             self, scheduler_output: "SchedulerOutput") -> ModelRunnerOutput:
         with set_ascend_forward_context(None, self.vllm_config):
@@ -2467,7 +2569,8 @@ class NPUModelRunner(LoRAModelRunnerMixin):
         output = copy.copy(EMPTY_MODEL_RUNNER_OUTPUT)
         output.kv_connector_output = KVConnectorOutput(
             finished_sending=finished_sending,
-            finished_recving=finished_recving)
+            finished_recving=finished_recving,
+            kv_connector_stats=self.get_kv_connector_stats())
         return output
 
     @staticmethod
@@ -2496,6 +2599,12 @@ class NPUModelRunner(LoRAModelRunnerMixin):
                 scheduler_output.finished_req_ids)
         return None, None
 
+    @staticmethod
+    def get_kv_connector_stats() -> Optional["KVConnectorStats"]:
+        if has_kv_transfer_group():
+            return get_kv_transfer_group().get_kv_connector_stats()
+        return None
+
     def _build_dummy_attn_metadata(
         self,
         with_prefill: bool,
@@ -242,6 +242,12 @@ class InputBatch:
                                                          pin_memory=pin_memory)
         self.num_accepted_tokens_cpu = \
             self.num_accepted_tokens_cpu_tensor.numpy()
+        # Decayed counts of the accepted and rejected draft tokens, used to
+        # choose the draft length of each request.
+        self.num_draft_accepted_cpu = np.zeros((max_num_reqs, ),
+                                               dtype=np.float32)
+        self.num_draft_rejected_cpu = np.zeros((max_num_reqs, ),
+                                               dtype=np.float32)
 
         # lora related
         self.request_lora_mapping = np.zeros((self.max_num_reqs, ),
@@ -439,6 +445,8 @@ class InputBatch:
 
         # Speculative decoding: by default 1 token is generated.
         self.num_accepted_tokens_cpu[req_index] = 1
+        self.num_draft_accepted_cpu[req_index] = 0
+        self.num_draft_rejected_cpu[req_index] = 0
 
         # Add request lora ID
         if request.lora_request:
@@ -541,6 +549,10 @@ class InputBatch:
             self.repetition_penalties_cpu[i2], self.repetition_penalties_cpu[i1]
         self.num_accepted_tokens_cpu[i1], self.num_accepted_tokens_cpu[i2] =\
             self.num_accepted_tokens_cpu[i2], self.num_accepted_tokens_cpu[i1]
+        self.num_draft_accepted_cpu[i1], self.num_draft_accepted_cpu[i2] =\
+            self.num_draft_accepted_cpu[i2], self.num_draft_accepted_cpu[i1]
+        self.num_draft_rejected_cpu[i1], self.num_draft_rejected_cpu[i2] =\
+            self.num_draft_rejected_cpu[i2], self.num_draft_rejected_cpu[i1]
 
         # NOTE: the following is unsafe
         # self.token_ids_cpu[i1, ...], self.token_ids_cpu[i2, ...], =\
@@ -649,6 +661,10 @@ class InputBatch:
                 empty_index] = self.repetition_penalties_cpu[last_req_index]
             self.num_accepted_tokens_cpu[
                 empty_index] = self.num_accepted_tokens_cpu[last_req_index]
+            self.num_draft_accepted_cpu[
+                empty_index] = self.num_draft_accepted_cpu[last_req_index]
+            self.num_draft_rejected_cpu[
+                empty_index] = self.num_draft_rejected_cpu[last_req_index]
             generator = self.generators.pop(last_req_index, None)
             if generator is not None:
                 self.generators[empty_index] = generator